@@ -0,0 +1,364 @@
+"""
+Backend SQLite embebido para ejecuciones locales, pruebas y benchmarks
+Viajes Aventura
+
+Entrega conexiones con la misma interfaz que usan los modelos de
+mysql.connector (cursor(dictionary=True), commit, rollback,
+start_transaction, in_transaction, lastrowid, rowcount...), de modo que el
+mismo codigo de los modelos corre sin un servidor MySQL. Las sentencias se
+traducen una sola vez al dialecto de SQLite (%s -> ?, CURDATE(), TRUNCATE...)
+y SQLite reutiliza la sentencia preparada en cada ejecucion posterior.
+
+Los errores de sqlite3 se convierten a los de mysql.connector, con el
+errno equivalente, para que el manejo de errores de los modelos no cambie.
+"""
+import itertools
+import re
+import sqlite3
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+
+from mysql.connector import errorcode, errors
+
+
+# Esquema equivalente al de MySQL (mismas tablas, columnas y relaciones)
+TABLAS = [
+    ("Clientes", """
+        CREATE TABLE IF NOT EXISTS Clientes (
+            id_cliente INTEGER PRIMARY KEY,
+            nombre_completo VARCHAR(150) NOT NULL,
+            email VARCHAR(100) NOT NULL UNIQUE,
+            telefono VARCHAR(20),
+            direccion VARCHAR(200),
+            fecha_registro DATE DEFAULT (date('now', 'localtime'))
+        )
+    """),
+    ("Usuarios", """
+        CREATE TABLE IF NOT EXISTS Usuarios (
+            id_usuario INTEGER PRIMARY KEY,
+            nombre_usuario VARCHAR(50) NOT NULL UNIQUE,
+            password_hash VARCHAR(255) NOT NULL,
+            rol VARCHAR(20) DEFAULT 'cliente',
+            id_cliente INT,
+            activo BOOLEAN DEFAULT TRUE,
+            fecha_creacion DATETIME DEFAULT (datetime('now', 'localtime')),
+            FOREIGN KEY (id_cliente) REFERENCES Clientes(id_cliente)
+                ON DELETE CASCADE
+        )
+    """),
+    ("Destinos", """
+        CREATE TABLE IF NOT EXISTS Destinos (
+            id_destino INTEGER PRIMARY KEY,
+            nombre VARCHAR(100) NOT NULL,
+            descripcion TEXT,
+            actividades TEXT,
+            costo_base DECIMAL(10,2) NOT NULL,
+            disponible BOOLEAN DEFAULT TRUE,
+            fecha_creacion DATE DEFAULT (date('now', 'localtime'))
+        )
+    """),
+    ("PaquetesTuristicos", """
+        CREATE TABLE IF NOT EXISTS PaquetesTuristicos (
+            id_paquete INTEGER PRIMARY KEY,
+            nombre VARCHAR(100) NOT NULL,
+            descripcion TEXT,
+            fecha_inicio DATE NOT NULL,
+            fecha_fin DATE NOT NULL,
+            precio_total DECIMAL(10,2) NOT NULL,
+            cupo_disponible INT DEFAULT 0,
+            disponible BOOLEAN DEFAULT TRUE,
+            fecha_creacion DATE DEFAULT (date('now', 'localtime'))
+        )
+    """),
+    ("Paquetes_Destinos", """
+        CREATE TABLE IF NOT EXISTS Paquetes_Destinos (
+            id_paquete_destino INTEGER PRIMARY KEY,
+            id_paquete INT NOT NULL,
+            id_destino INT NOT NULL,
+            orden_visita INT DEFAULT 1,
+            FOREIGN KEY (id_paquete) REFERENCES PaquetesTuristicos(id_paquete)
+                ON DELETE CASCADE,
+            FOREIGN KEY (id_destino) REFERENCES Destinos(id_destino)
+                ON DELETE CASCADE,
+            UNIQUE (id_paquete, id_destino)
+        )
+    """),
+    ("Reservas", """
+        CREATE TABLE IF NOT EXISTS Reservas (
+            id_reserva INTEGER PRIMARY KEY,
+            id_cliente INT NOT NULL,
+            id_paquete INT NOT NULL,
+            fecha_reserva DATETIME DEFAULT (datetime('now', 'localtime')),
+            numero_personas INT DEFAULT 1,
+            precio_total DECIMAL(10,2) NOT NULL,
+            estado VARCHAR(20) DEFAULT 'pendiente',
+            notas TEXT,
+            FOREIGN KEY (id_cliente) REFERENCES Clientes(id_cliente)
+                ON DELETE CASCADE,
+            FOREIGN KEY (id_paquete) REFERENCES PaquetesTuristicos(id_paquete)
+                ON DELETE RESTRICT
+        )
+    """),
+]
+
+# Equivalencias del dialecto de MySQL usado por el sistema
+_TRADUCCIONES = [
+    (re.compile(r"%s"), "?"),
+    (re.compile(r"\bCURDATE\(\)", re.IGNORECASE), "date('now', 'localtime')"),
+    (re.compile(r"\bNOW\(\)", re.IGNORECASE), "datetime('now', 'localtime')"),
+    (re.compile(r"\bTRUNCATE\s+TABLE\b", re.IGNORECASE), "DELETE FROM"),
+    (re.compile(r"\bSET\s+FOREIGN_KEY_CHECKS\s*=", re.IGNORECASE),
+     "PRAGMA foreign_keys ="),
+    (re.compile(r"\bDATE_FORMAT\(\s*([\w.]+)\s*,\s*('[^']*')\s*\)",
+                re.IGNORECASE), r"strftime(\2, \1)"),
+    # BEGIN IMMEDIATE ya bloquea la base para escribir
+    (re.compile(r"\s+FOR\s+UPDATE(\s+SKIP\s+LOCKED)?\b", re.IGNORECASE), ""),
+    (re.compile(r"\bON\s+DUPLICATE\s+KEY\s+UPDATE\b(.*)",
+                re.IGNORECASE | re.DOTALL),
+     lambda m: "ON CONFLICT DO UPDATE SET" + re.sub(
+         r"\bVALUES\((\w+)\)", r"excluded.\1", m.group(1))),
+]
+
+_ES_INSERT = re.compile(r"^\s*INSERT\b", re.IGNORECASE)
+
+# Tipos de Python <-> columnas SQLite (mismos tipos que entrega MySQL)
+sqlite3.register_adapter(Decimal, float)
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_adapter(datetime, lambda valor: valor.isoformat(" "))
+sqlite3.register_converter("DECIMAL", lambda valor: Decimal(valor.decode()))
+sqlite3.register_converter("DATE", lambda valor: date.fromisoformat(valor.decode()))
+sqlite3.register_converter(
+    "DATETIME", lambda valor: datetime.fromisoformat(valor.decode()))
+
+
+@lru_cache(maxsize=512)
+def traducir(sql):
+    """Traduce una sentencia al dialecto de SQLite (con cache)."""
+    for patron, reemplazo in _TRADUCCIONES:
+        sql = patron.sub(reemplazo, sql)
+    return sql
+
+
+def _convertir_error(e):
+    """Convierte un error de sqlite3 al error equivalente de mysql.connector."""
+    mensaje = str(e)
+    if isinstance(e, sqlite3.IntegrityError):
+        if "UNIQUE" in mensaje:
+            errno = errorcode.ER_DUP_ENTRY
+        elif "FOREIGN KEY" in mensaje:
+            errno = errorcode.ER_NO_REFERENCED_ROW_2
+        else:
+            errno = None
+        return errors.IntegrityError(msg=mensaje, errno=errno)
+
+    if isinstance(e, sqlite3.OperationalError):
+        if mensaje.startswith("index") and "already exists" in mensaje:
+            return errors.ProgrammingError(msg=mensaje,
+                                           errno=errorcode.ER_DUP_KEYNAME)
+        if mensaje.startswith("duplicate column name"):
+            return errors.ProgrammingError(msg=mensaje,
+                                           errno=errorcode.ER_DUP_FIELDNAME)
+        if "locked" in mensaje:
+            return errors.DatabaseError(msg=mensaje,
+                                        errno=errorcode.ER_LOCK_WAIT_TIMEOUT)
+        return errors.OperationalError(msg=mensaje)
+
+    return errors.DatabaseError(msg=mensaje)
+
+
+class CursorSQLite:
+    """Cursor con la interfaz de los cursores de mysql.connector."""
+
+    def __init__(self, cursor, dictionary=False):
+        """Envuelve un cursor de sqlite3."""
+        self.__cursor = cursor
+        self.__dictionary = dictionary
+        self.__lastrowid = None
+
+    def execute(self, sql, params=()):
+        """Ejecuta una sentencia con parametros %s."""
+        try:
+            self.__cursor.execute(traducir(sql), params or ())
+        except sqlite3.Error as e:
+            raise _convertir_error(e) from e
+        self.__lastrowid = self.__cursor.lastrowid
+
+    def executemany(self, sql, filas):
+        """
+        Ejecuta una sentencia por cada fila. En un INSERT, lastrowid queda
+        con el ID de la primera fila del lote, igual que en MySQL.
+        """
+        try:
+            self.__cursor.executemany(traducir(sql), filas)
+            if _ES_INSERT.match(sql) and self.__cursor.rowcount > 0:
+                ultimo = self.__cursor.connection.execute(
+                    "SELECT last_insert_rowid()").fetchone()[0]
+                self.__lastrowid = ultimo - self.__cursor.rowcount + 1
+        except sqlite3.Error as e:
+            raise _convertir_error(e) from e
+
+    def _fila(self, fila):
+        """Entrega la fila como dict si el cursor es de diccionario."""
+        if fila is None or not self.__dictionary:
+            return fila
+        return dict(zip((c[0] for c in self.__cursor.description), fila))
+
+    def fetchone(self):
+        """Entrega la siguiente fila o None."""
+        return self._fila(self.__cursor.fetchone())
+
+    def fetchall(self):
+        """Entrega las filas restantes."""
+        filas = self.__cursor.fetchall()
+        if not self.__dictionary:
+            return filas
+        columnas = [c[0] for c in self.__cursor.description]
+        return [dict(zip(columnas, fila)) for fila in filas]
+
+    def fetchmany(self, size=1):
+        """Entrega hasta `size` filas."""
+        return [self._fila(fila) for fila in self.__cursor.fetchmany(size)]
+
+    def __iter__(self):
+        """Itera las filas restantes."""
+        return (self._fila(fila) for fila in self.__cursor)
+
+    @property
+    def rowcount(self):
+        """Filas afectadas por la ultima sentencia."""
+        return self.__cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        """ID generado por el ultimo INSERT."""
+        return self.__lastrowid
+
+    @property
+    def description(self):
+        """Descripcion de las columnas del resultado."""
+        return self.__cursor.description
+
+    def close(self):
+        """Cierra el cursor."""
+        self.__cursor.close()
+
+
+class ConexionSQLite:
+    """Conexion SQLite con la interfaz de las conexiones de mysql.connector."""
+
+    def __init__(self, conexion):
+        """Envuelve una conexion de sqlite3 ya configurada."""
+        self.__conexion = conexion
+        self.__abierta = True
+
+    def cursor(self, dictionary=False, **_):
+        """Crea un cursor; con dictionary=True las filas son dicts."""
+        return CursorSQLite(self.__conexion.cursor(), dictionary)
+
+    def start_transaction(self):
+        """
+        Inicia una transaccion tomando el bloqueo de escritura de inmediato,
+        como el SELECT ... FOR UPDATE / UPDATE de una fila en MySQL.
+        """
+        try:
+            self.__conexion.execute("BEGIN IMMEDIATE")
+        except sqlite3.Error as e:
+            raise _convertir_error(e) from e
+
+    @property
+    def in_transaction(self):
+        """Indica si hay una transaccion abierta."""
+        return self.__conexion.in_transaction
+
+    def commit(self):
+        """Confirma la transaccion actual."""
+        try:
+            self.__conexion.commit()
+        except sqlite3.Error as e:
+            raise _convertir_error(e) from e
+
+    def rollback(self):
+        """Revierte la transaccion actual."""
+        try:
+            self.__conexion.rollback()
+        except sqlite3.Error as e:
+            raise _convertir_error(e) from e
+
+    def ping(self, reconnect=False):
+        """Verifica que la conexion responde."""
+        try:
+            self.__conexion.execute("SELECT 1")
+        except sqlite3.Error as e:
+            raise _convertir_error(e) from e
+
+    def is_connected(self):
+        """Indica si la conexion sigue abierta."""
+        return self.__abierta
+
+    def close(self):
+        """Cierra la conexion."""
+        self.__abierta = False
+        self.__conexion.close()
+
+
+class BackendSQLite:
+    """
+    Backend SQLite: un archivo en modo WAL o una base en memoria.
+    En memoria todas las conexiones del pool comparten la misma base
+    (cache compartida) mientras el backend este abierto.
+    """
+
+    nombre = "sqlite"
+    TABLAS = TABLAS
+
+    _contador_memoria = itertools.count(1)
+
+    def __init__(self, ruta=":memory:", timeout=10.0):
+        """Construye el backend sobre un archivo o en memoria (":memory:")."""
+        self.__timeout = timeout
+        self.__ancla = None
+        if ruta == ":memory:":
+            self.__ruta = (f"file:viajes_memoria_{next(self._contador_memoria)}"
+                           "?mode=memory&cache=shared")
+            self.__en_memoria = True
+        else:
+            self.__ruta = ruta
+            self.__en_memoria = False
+        self.__descripcion = ruta
+
+    @property
+    def descripcion(self):
+        """Ruta del archivo o ":memory:"."""
+        return self.__descripcion
+
+    def conectar(self):
+        """Abre una conexion configurada (claves foraneas, WAL)."""
+        try:
+            conexion = sqlite3.connect(
+                self.__ruta,
+                timeout=self.__timeout,
+                detect_types=sqlite3.PARSE_DECLTYPES,
+                check_same_thread=False,  # el pool la entrega a un hilo a la vez
+                uri=self.__en_memoria,
+                cached_statements=256
+            )
+            conexion.execute("PRAGMA foreign_keys = ON")
+            if self.__en_memoria:
+                if self.__ancla is None:
+                    # Mantiene viva la base en memoria entre conexiones
+                    self.__ancla = sqlite3.connect(
+                        self.__ruta, uri=True, check_same_thread=False)
+            else:
+                conexion.execute("PRAGMA journal_mode = WAL")
+                conexion.execute("PRAGMA synchronous = NORMAL")
+            return ConexionSQLite(conexion)
+
+        except sqlite3.Error as e:
+            raise _convertir_error(e) from e
+
+    def cerrar(self):
+        """Libera la base en memoria, si la hay."""
+        if self.__ancla is not None:
+            self.__ancla.close()
+            self.__ancla = None
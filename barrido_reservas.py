@@ -0,0 +1,141 @@
+"""
+Barrido de reservas pendientes vencidas
+Viajes Aventura
+
+Las reservas 'pendiente' retienen asientos del paquete. BarredorPendientes
+corre en segundo plano y cada `intervalo` segundos cancela las pendientes
+con mas de `antiguedad` de creadas, devolviendo sus asientos, en lotes
+acotados con un commit por lote (ver Reserva.expirar_pendientes).
+
+Uso:
+    python barrido_reservas.py --horas 24 --intervalo 60
+    python barrido_reservas.py --horas 24 --una-vez
+"""
+import argparse
+import threading
+import time
+from datetime import datetime, timedelta
+
+from conexion_db import Database
+from paquetes_reservas import Reserva
+
+
+class BarredorPendientes:
+    """Expira periodicamente las reservas pendientes vencidas en un hilo."""
+
+    def __init__(self, db, antiguedad=timedelta(hours=24), intervalo=60.0,
+                 tamano_lote=500, pausa=0.0):
+        """
+        Construye el barredor. `pausa` son los segundos entre lotes de un
+        mismo barrido, para ceder los bloqueos al resto del trafico.
+        """
+        self.db = db
+        self.antiguedad = antiguedad
+        self.intervalo = intervalo
+        self.tamano_lote = tamano_lote
+        self.pausa = pausa
+        self.__detener = threading.Event()
+        self.__hilo = None
+        self.__lock = threading.Lock()
+        self.__totales = {"barridos": 0, "lotes": 0, "reservas": 0,
+                          "asientos": 0, "segundos": 0.0,
+                          "espera_bloqueo": 0.0, "espera_bloqueo_max": 0.0}
+
+    def barrer(self):
+        """Ejecuta un barrido completo y devuelve sus estadisticas."""
+        fecha_limite = datetime.now() - self.antiguedad
+        resultado = Reserva.expirar_pendientes(
+            self.db, fecha_limite, self.tamano_lote, pausa=self.pausa)
+
+        with self.__lock:
+            self.__totales["barridos"] += 1
+            for clave in ("lotes", "reservas", "asientos", "segundos",
+                          "espera_bloqueo"):
+                self.__totales[clave] += resultado[clave]
+            self.__totales["espera_bloqueo_max"] = max(
+                self.__totales["espera_bloqueo_max"],
+                resultado["espera_bloqueo_max"])
+        return resultado
+
+    def _ejecutar(self):
+        """Bucle del hilo: barre y espera el intervalo hasta que se detenga."""
+        while not self.__detener.is_set():
+            try:
+                self.barrer()
+            except Exception as e:
+                print(f"Error en el barrido de reservas: {e}")
+            self.__detener.wait(self.intervalo)
+
+    def iniciar(self):
+        """Inicia el barrido periodico en un hilo de fondo."""
+        if self.__hilo is not None and self.__hilo.is_alive():
+            return
+        self.__detener.clear()
+        self.__hilo = threading.Thread(
+            target=self._ejecutar, name="barrido-reservas", daemon=True)
+        self.__hilo.start()
+
+    def detener(self, timeout=None):
+        """Detiene el hilo al terminar el barrido en curso."""
+        self.__detener.set()
+        if self.__hilo is not None:
+            self.__hilo.join(timeout)
+            self.__hilo = None
+
+    def estadisticas(self):
+        """Totales acumulados, con reservas por segundo de barrido."""
+        with self.__lock:
+            totales = dict(self.__totales)
+        segundos = totales["segundos"]
+        totales["reservas_por_segundo"] = \
+            totales["reservas"] / segundos if segundos else 0.0
+        return totales
+
+
+def mostrar(estadisticas):
+    """Imprime las estadisticas de un barrido."""
+    print(f"Reservas expiradas: {estadisticas['reservas']} "
+          f"({estadisticas['asientos']} asientos devueltos) "
+          f"en {estadisticas['lotes']} lotes")
+    print(f"Tiempo: {estadisticas['segundos']:.3f} s "
+          f"({estadisticas['reservas_por_segundo']:.1f} reservas/s)")
+    print(f"Espera de bloqueos: {estadisticas['espera_bloqueo'] * 1000:.1f} ms "
+          f"(maxima por lote {estadisticas['espera_bloqueo_max'] * 1000:.1f} ms)")
+
+
+def main():
+    """Punto de entrada de la linea de comandos."""
+    parser = argparse.ArgumentParser(
+        description="Expira las reservas pendientes vencidas")
+    parser.add_argument("--horas", type=float, default=24.0,
+                        help="Antiguedad para considerar vencida una pendiente")
+    parser.add_argument("--intervalo", type=float, default=60.0,
+                        help="Segundos entre barridos")
+    parser.add_argument("--lote", type=int, default=500,
+                        help="Reservas por lote (un commit por lote)")
+    parser.add_argument("--pausa", type=float, default=0.0,
+                        help="Segundos de espera entre lotes")
+    parser.add_argument("--una-vez", action="store_true",
+                        help="Ejecutar un solo barrido y salir")
+    args = parser.parse_args()
+
+    db = Database(usar_pool=True, pool_min=1, pool_max=2)
+    barredor = BarredorPendientes(db, timedelta(hours=args.horas),
+                                  args.intervalo, args.lote, args.pausa)
+    try:
+        if args.una_vez:
+            mostrar(barredor.barrer())
+        else:
+            barredor.iniciar()
+            while True:
+                time.sleep(args.intervalo)
+                mostrar(barredor.estadisticas())
+    except KeyboardInterrupt:
+        barredor.detener()
+        mostrar(barredor.estadisticas())
+    finally:
+        db.desconectar()
+
+
+if __name__ == "__main__":
+    main()
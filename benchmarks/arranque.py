@@ -0,0 +1,128 @@
+"""
+Benchmark del arranque del sistema
+Viajes Aventura
+
+Lanza main.py en un proceso nuevo (arranque en frio del interprete) con
+una cuenta de prueba en la entrada estandar y mide cuanto tarda en
+importar los modulos, en mostrar la pantalla de autenticacion y en llegar
+al menu principal (esto ultimo incluye verificar la contrasena con bcrypt).
+Ademas compara en este proceso crear_tablas() con el esquema al dia
+contra la creacion completa del esquema (forzar=True), que era lo que se
+ejecutaba en cada inicio.
+
+Uso:
+    python benchmarks/arranque.py --repeticiones 10
+    python benchmarks/arranque.py --backend sqlite
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from generador_datos import BASE_DATOS_BENCH, abrir_base_bench
+from modelos import Usuario
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+USUARIO, CLAVE = "arranque", "clave-arranque"
+
+# Se ejecuta en el proceso hijo: importa main, informa el tiempo por stderr
+# y corre el programa sobre la base de benchmark
+PROGRAMA = """
+import sys, time
+inicio = time.perf_counter()
+sys.path.insert(0, {raiz!r})
+import main
+from conexion_db import Database
+print(f"importar {{time.perf_counter() - inicio}} "
+      f"{{int('bcrypt' in sys.modules)}}", file=sys.stderr)
+main.main(Database(database={base_datos!r}, backend={backend!r}))
+"""
+
+# Texto que marca cada pantalla en la salida de main.py
+PANTALLAS = (("autenticacion", "AUTENTICACION DE USUARIO"),
+             ("menu", "SISTEMA DE RESERVAS - VIAJES AVENTURA"))
+
+
+def arrancar(base_datos, backend):
+    """
+    Ejecuta main.py en un proceso nuevo hasta el menu principal y sale.
+    Devuelve {"importar", "autenticacion", "menu"} en milisegundos y si
+    bcrypt quedo importado al terminar los imports.
+    """
+    programa = PROGRAMA.format(raiz=RAIZ, base_datos=base_datos, backend=backend)
+    inicio = time.perf_counter()
+    proceso = subprocess.Popen(
+        [sys.executable, "-u", "-c", programa], stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    proceso.stdin.write(f"{USUARIO}\n{CLAVE}\n0\n")
+    proceso.stdin.flush()
+
+    tiempos = {}
+    pendientes = list(PANTALLAS)
+    for linea in proceso.stdout:
+        if pendientes and pendientes[0][1] in linea:
+            tiempos[pendientes.pop(0)[0]] = (time.perf_counter() - inicio) * 1000
+    _, errores = proceso.communicate()
+
+    if pendientes:
+        raise RuntimeError(f"main.py no llego al menu principal:\n{errores}")
+    for linea in errores.splitlines():
+        if linea.startswith("importar "):
+            _, segundos, bcrypt_importado = linea.split()
+            tiempos["importar"] = float(segundos) * 1000
+    return tiempos, bcrypt_importado == "1"
+
+
+def medir(funcion, repeticiones):
+    """Mediana en milisegundos de `funcion`, con su salida descartada."""
+    tiempos = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            funcion()
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos)
+
+
+def main():
+    """Punto de entrada del benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeticiones", type=int, default=10)
+    parser.add_argument("--base-datos", default=BASE_DATOS_BENCH)
+    parser.add_argument("--backend", choices=("mysql", "sqlite"), default="mysql")
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        db = abrir_base_bench(args.base_datos, backend=args.backend)
+        Usuario(db, nombre_usuario=USUARIO, password=CLAVE, rol="admin").registrar()
+
+    print("En frio, proceso nuevo (mediana / p95 en ms):")
+    mediciones = {"importar": [], "autenticacion": [], "menu": []}
+    for _ in range(args.repeticiones):
+        tiempos, bcrypt_importado = arrancar(args.base_datos, args.backend)
+        for clave, valor in tiempos.items():
+            mediciones[clave].append(valor)
+    for clave, nombre in (("importar", "importar main y modelos"),
+                          ("autenticacion", "hasta la autenticacion"),
+                          ("menu", "hasta el menu principal")):
+        valores = sorted(mediciones[clave])
+        print(f"  {nombre:32} {statistics.median(valores):8.1f} / "
+              f"{valores[int(len(valores) * 0.95)]:8.1f}")
+    print(f"  bcrypt importado al iniciar: {'si' if bcrypt_importado else 'no'}")
+
+    print("\ncrear_tablas() en este proceso (mediana en ms):")
+    print(f"  {'esquema al dia (una consulta)':32} "
+          f"{medir(db.crear_tablas, args.repeticiones):8.2f}")
+    print(f"  {'DDL completo (forzar=True)':32} "
+          f"{medir(lambda: db.crear_tablas(forzar=True), args.repeticiones):8.2f}")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        db.desconectar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Benchmark del barrido de reservas pendientes vencidas
+Viajes Aventura
+
+Siembra la base de benchmark (un tercio de las reservas quedan pendientes
+y vencidas), y ejecuta un barrido mientras varios hilos crean reservas.
+Informa el rendimiento del barrido, la espera de bloqueos por lote y la
+latencia de Reserva.crear con y sin barrido en curso. Al final verifica
+que el cupo devuelto coincida con los asientos de las reservas expiradas.
+
+Uso:
+    python benchmarks/barrido_pendientes.py --sembrar 100000 --lote 500
+    python benchmarks/barrido_pendientes.py --backend sqlite --sembrar 100000
+"""
+import argparse
+import contextlib
+import io
+import sys
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+from generador_datos import BASE_DATOS_BENCH, abrir_base_bench, sembrar, volumenes
+from barrido_reservas import mostrar
+from modelos import Cliente
+from paquetes_reservas import PaqueteTuristico, Reserva
+
+
+def totales_cupo(db):
+    """Suma del cupo de todos los paquetes y de los asientos pendientes."""
+    with db.conexion() as connection:
+        cursor = connection.cursor()
+        cursor.execute("SELECT COALESCE(SUM(cupo_disponible), 0) FROM PaquetesTuristicos")
+        cupo = int(cursor.fetchone()[0])
+        cursor.execute("""
+            SELECT COALESCE(SUM(numero_personas), 0) FROM Reservas
+            WHERE estado = 'pendiente'
+        """)
+        pendientes = int(cursor.fetchone()[0])
+        connection.commit()
+        cursor.close()
+    return cupo, pendientes
+
+
+def trafico(db, id_cliente, id_paquete, detener, latencias):
+    """Crea reservas de una persona hasta que se active `detener`."""
+    while not detener.is_set():
+        inicio = time.perf_counter()
+        Reserva(db, id_cliente=id_cliente, id_paquete=id_paquete).crear()
+        latencias.append((time.perf_counter() - inicio) * 1000)
+
+
+def medir_trafico(db, id_cliente, id_paquete, hilos, mientras):
+    """
+    Ejecuta `mientras()` con `hilos` creando reservas en paralelo y
+    devuelve (resultado, latencias_ms).
+    """
+    detener = threading.Event()
+    latencias = []
+    trabajadores = [threading.Thread(target=trafico,
+                                     args=(db, id_cliente, id_paquete, detener,
+                                           latencias))
+                    for _ in range(hilos)]
+    for hilo in trabajadores:
+        hilo.start()
+    try:
+        resultado = mientras()
+    finally:
+        detener.set()
+        for hilo in trabajadores:
+            hilo.join()
+    return resultado, sorted(latencias)
+
+
+def percentil(valores, p):
+    """Percentil `p` (0-100) de una lista ordenada."""
+    if not valores:
+        return 0.0
+    return valores[min(len(valores) - 1, int(len(valores) * p / 100))]
+
+
+def main():
+    """Punto de entrada del benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sembrar", type=int, metavar="RESERVAS", default=100000)
+    parser.add_argument("--lote", type=int, default=500)
+    parser.add_argument("--pausa", type=float, default=0.0)
+    parser.add_argument("--hilos", type=int, default=8)
+    parser.add_argument("--segundos-base", type=float, default=2.0,
+                        help="Duracion del trafico sin barrido (referencia)")
+    parser.add_argument("--base-datos", default=BASE_DATOS_BENCH)
+    parser.add_argument("--backend", choices=("mysql", "sqlite"), default="mysql")
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        db = abrir_base_bench(args.base_datos, backend=args.backend,
+                              usar_pool=True, pool_min=2,
+                              pool_max=args.hilos + 2)
+        sembrar(db, **volumenes(args.sembrar))
+
+        # Paquete futuro con cupo amplio para el trafico concurrente
+        cliente = Cliente(db, nombre_completo="Cliente Barrido",
+                          email=f"barrido{int(time.time())}@bench.test")
+        cliente.guardar()
+        paquete = PaqueteTuristico(db, nombre="Paquete Barrido",
+                                   fecha_inicio=date.today() + timedelta(days=30),
+                                   fecha_fin=date.today() + timedelta(days=37),
+                                   precio_total=100, cupo_disponible=10**7)
+        paquete.guardar()
+
+    cupo_antes, pendientes_antes = totales_cupo(db)
+    # Todas las pendientes sembradas vencen; las reservas del trafico son
+    # posteriores a la fecha limite (fecha_reserva se guarda en segundos)
+    fecha_limite = datetime.now().replace(microsecond=0) - timedelta(seconds=1)
+
+    def barrer():
+        return Reserva.expirar_pendientes(db, fecha_limite, args.lote,
+                                          pausa=args.pausa)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        _, base = medir_trafico(db, cliente.id_cliente, paquete.id_paquete,
+                                args.hilos,
+                                lambda: time.sleep(args.segundos_base))
+        resultado, durante = medir_trafico(db, cliente.id_cliente,
+                                           paquete.id_paquete, args.hilos,
+                                           barrer)
+
+    cupo_despues, pendientes_despues = totales_cupo(db)
+    nuevas = len(base) + len(durante)
+
+    print(f"backend: {args.backend} | lote: {args.lote} | hilos de trafico: {args.hilos}")
+    mostrar(resultado)
+    print(f"Reserva.crear sin barrido: p50={percentil(base, 50):.2f} ms "
+          f"p95={percentil(base, 95):.2f} ms ({len(base)} reservas)")
+    print(f"Reserva.crear con barrido: p50={percentil(durante, 50):.2f} ms "
+          f"p95={percentil(durante, 95):.2f} ms ({len(durante)} reservas)")
+
+    # Cupo final = inicial + asientos devueltos - asientos del trafico
+    esperado = cupo_antes + resultado["asientos"] - nuevas
+    consistente = cupo_despues == esperado and \
+        pendientes_despues == pendientes_antes - resultado["asientos"] + nuevas
+    print(f"Cupo consistente: {'si' if consistente else 'no'}")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        db.desconectar()
+    if not consistente:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
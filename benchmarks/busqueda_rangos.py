@@ -0,0 +1,131 @@
+"""
+Benchmark de la busqueda de paquetes por rango de fechas
+Viajes Aventura
+
+Compara PaqueteTuristico.buscar_por_fechas (consulta SQL) con
+PaqueteTuristico.buscar_en_rango (indice en memoria del catalogo) sobre
+una base con muchos paquetes, en los tres modos de busqueda y con filtros
+de cupo, precio y destino. Tambien mide la construccion del indice y una
+busqueda justo despues de modificar un paquete (recarga incremental).
+
+Uso:
+    python benchmarks/busqueda_rangos.py --sembrar 100000
+    python benchmarks/busqueda_rangos.py --backend sqlite --sembrar 100000
+"""
+import argparse
+import contextlib
+import io
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from generador_datos import BASE_DATOS_BENCH, abrir_base_bench, sembrar
+from paquetes_reservas import PaqueteTuristico
+
+
+def rangos(azar, cantidad):
+    """Rangos de busqueda de 1 a 6 semanas dentro del proximo anio."""
+    hoy = date.today()
+    resultado = []
+    for _ in range(cantidad):
+        desde = hoy + timedelta(days=azar.randrange(365))
+        resultado.append((desde, desde + timedelta(days=azar.randrange(7, 43))))
+    return resultado
+
+
+def casos(db, azar, maximo_destino):
+    """Busquedas a medir, como (nombre, funcion que recibe (desde, hasta))."""
+    return [
+        ("buscar_por_fechas (SQL)",
+         lambda desde, hasta: PaqueteTuristico.buscar_por_fechas(db, desde, hasta)),
+        ("buscar_en_rango dentro",
+         lambda desde, hasta: PaqueteTuristico.buscar_en_rango(db, desde, hasta)),
+        ("buscar_en_rango dentro, limite 20",
+         lambda desde, hasta: PaqueteTuristico.buscar_en_rango(
+             db, desde, hasta, limite=20)),
+        ("buscar_en_rango solapa, 4 personas",
+         lambda desde, hasta: PaqueteTuristico.buscar_en_rango(
+             db, desde, hasta, "solapa", personas=4)),
+        ("buscar_en_rango inicia, precio y destino",
+         lambda desde, hasta: PaqueteTuristico.buscar_en_rango(
+             db, desde, hasta, "inicia", precio_maximo=1500000,
+             destinos=[azar.randint(1, maximo_destino)])),
+    ]
+
+
+def medir(funcion, consultas):
+    """Devuelve (p50_us, p95_us, p99_us, resultados promedio) de `funcion`."""
+    tiempos = []
+    resultados = 0
+    for desde, hasta in consultas:
+        inicio = time.perf_counter()
+        resultados += len(funcion(desde, hasta))
+        tiempos.append((time.perf_counter() - inicio) * 1e6)
+    tiempos.sort()
+    return (statistics.median(tiempos), tiempos[int(len(tiempos) * 0.95)],
+            tiempos[int(len(tiempos) * 0.99)], resultados / len(consultas))
+
+
+def main():
+    """Punto de entrada del benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sembrar", type=int, metavar="PAQUETES",
+                        help="Sembrar la base con este numero de paquetes antes")
+    parser.add_argument("--consultas", type=int, default=500)
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--base-datos", default=BASE_DATOS_BENCH)
+    parser.add_argument("--backend", choices=("mysql", "sqlite"), default="mysql")
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        db = abrir_base_bench(args.base_datos, backend=args.backend)
+        if args.sembrar:
+            sembrar(db, clientes=1000, destinos=max(5, args.sembrar // 100),
+                    paquetes=args.sembrar, destinos_por_paquete=2,
+                    reservas=10000, semilla=args.semilla)
+
+    with db.conexion() as connection:
+        cursor = connection.cursor()
+        cursor.execute("SELECT MAX(id_destino) FROM Destinos")
+        maximo_destino = cursor.fetchone()[0]
+        cursor.execute("SELECT MAX(id_paquete) FROM PaquetesTuristicos")
+        maximo_paquete = cursor.fetchone()[0]
+        cursor.close()
+
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        PaqueteTuristico.buscar_en_rango(db, date.today(), date.today())
+    print(f"Construccion del indice: {time.perf_counter() - inicio:.3f} s")
+
+    azar = random.Random(args.semilla)
+    consultas = rangos(azar, args.consultas)
+    print(f"{'caso':42} {'p50 (us)':>10} {'p95 (us)':>10} {'p99 (us)':>10} "
+          f"{'resultados':>11}")
+    for nombre, funcion in casos(db, azar, maximo_destino):
+        with contextlib.redirect_stdout(io.StringIO()):
+            p50, p95, p99, promedio = medir(funcion, consultas)
+        print(f"{nombre:42} {p50:10.1f} {p95:10.1f} {p99:10.1f} {promedio:11.1f}")
+
+    # Recarga incremental: cada busqueda sigue a la modificacion de un paquete
+    tiempos = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for desde, hasta in consultas[:100]:
+            paquete = PaqueteTuristico.buscar_por_id(
+                db, azar.randint(1, maximo_paquete))
+            paquete.cupo_disponible += 1
+            paquete.actualizar()
+            inicio = time.perf_counter()
+            PaqueteTuristico.buscar_en_rango(db, desde, hasta, limite=20)
+            tiempos.append((time.perf_counter() - inicio) * 1e6)
+    tiempos.sort()
+    print(f"{'tras actualizar un paquete, limite 20':42} "
+          f"{statistics.median(tiempos):10.1f} {tiempos[94]:10.1f} "
+          f"{tiempos[98]:10.1f}")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        db.desconectar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark de la busqueda de texto en destinos y paquetes
+Viajes Aventura
+
+Compara Destino.buscar_texto (indice invertido en memoria) con una
+busqueda LIKE sobre nombre, actividades y descripcion, sobre una base con
+muchos destinos. Las consultas mezclan actividades, regiones y ambas, con
+y sin tildes. Tambien mide la construccion de los indices, una pagina
+posterior a la primera y PaqueteTuristico.buscar_por_actividad.
+
+Uso:
+    python benchmarks/busqueda_texto.py --sembrar 50000
+    python benchmarks/busqueda_texto.py --backend sqlite --sembrar 50000
+"""
+import argparse
+import contextlib
+import io
+import random
+import statistics
+import time
+
+from generador_datos import (ACTIVIDADES, BASE_DATOS_BENCH, REGIONES,
+                             abrir_base_bench, sembrar)
+from modelos import Destino
+from paquetes_reservas import PaqueteTuristico
+
+# Variantes con tildes y mayusculas de algunas regiones
+CON_TILDES = {"Araucania": "Araucanía", "Aysen": "Aysén", "Biobio": "Biobío",
+              "Valparaiso": "VALPARAÍSO"}
+
+SQL_LIKE = """
+    SELECT * FROM Destinos
+    WHERE nombre LIKE %s OR actividades LIKE %s OR descripcion LIKE %s
+    ORDER BY nombre
+    LIMIT 20
+"""
+
+
+def consultas(azar, cantidad):
+    """Textos de busqueda: una actividad, una region o region y actividad."""
+    textos = []
+    for _ in range(cantidad):
+        region = azar.choice(REGIONES)
+        region = CON_TILDES.get(region, region)
+        actividad = azar.choice(ACTIVIDADES)
+        textos.append(azar.choice([actividad, region, f"{actividad} {region}"]))
+    return textos
+
+
+def buscar_like(db, texto):
+    """Busqueda con LIKE (solo la primera palabra, como haria un usuario)."""
+    patron = f"%{texto.split()[0]}%"
+    with db.conexion() as connection:
+        cursor = connection.cursor()
+        cursor.execute(SQL_LIKE, (patron, patron, patron))
+        filas = cursor.fetchall()
+        cursor.close()
+    return filas
+
+
+def medir(funcion, textos):
+    """Devuelve (p50_us, p95_us, p99_us) de `funcion` sobre los textos."""
+    tiempos = []
+    for texto in textos:
+        inicio = time.perf_counter()
+        funcion(texto)
+        tiempos.append((time.perf_counter() - inicio) * 1e6)
+    tiempos.sort()
+    return (statistics.median(tiempos), tiempos[int(len(tiempos) * 0.95)],
+            tiempos[int(len(tiempos) * 0.99)])
+
+
+def main():
+    """Punto de entrada del benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sembrar", type=int, metavar="DESTINOS",
+                        help="Sembrar la base con este numero de destinos antes")
+    parser.add_argument("--consultas", type=int, default=500)
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--base-datos", default=BASE_DATOS_BENCH)
+    parser.add_argument("--backend", choices=("mysql", "sqlite"), default="mysql")
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        db = abrir_base_bench(args.base_datos, backend=args.backend)
+        if args.sembrar:
+            sembrar(db, clientes=1000, destinos=args.sembrar,
+                    paquetes=args.sembrar // 2, destinos_por_paquete=2,
+                    reservas=10000, semilla=args.semilla)
+
+    for nombre, construir in (
+            ("destinos", lambda: Destino.buscar_texto(db, "trekking")),
+            ("paquetes", lambda: PaqueteTuristico.buscar_por_actividad(db, "trekking"))):
+        inicio = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            construir()
+        print(f"Construccion del indice de {nombre}: "
+              f"{time.perf_counter() - inicio:.3f} s")
+
+    textos = consultas(random.Random(args.semilla), args.consultas)
+    casos = [
+        ("LIKE en SQL, primeros 20", lambda texto: buscar_like(db, texto)),
+        ("Destino.buscar_texto, primeros 20",
+         lambda texto: Destino.buscar_texto(db, texto)),
+        ("Destino.buscar_texto, pagina 5",
+         lambda texto: Destino.buscar_texto(db, texto, despues=80)),
+        ("PaqueteTuristico.buscar_por_actividad",
+         lambda texto: PaqueteTuristico.buscar_por_actividad(db, texto)),
+    ]
+
+    print(f"{'caso':40} {'p50 (us)':>10} {'p95 (us)':>10} {'p99 (us)':>10}")
+    for nombre, funcion in casos:
+        with contextlib.redirect_stdout(io.StringIO()):
+            p50, p95, p99 = medir(funcion, textos)
+        print(f"{nombre:40} {p50:10.1f} {p95:10.1f} {p99:10.1f}")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        db.desconectar()
+
+
+if __name__ == "__main__":
+    main()
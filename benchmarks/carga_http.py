@@ -0,0 +1,266 @@
+"""
+Prueba de carga del servicio HTTP/JSON
+Viajes Aventura
+
+Lanza clientes concurrentes (cada uno con su conexion keep-alive) que
+repiten una mezcla de operaciones del catalogo, "Mis Reservas" y nuevas
+reservas contra servicio_http, con concurrencia creciente. Por cada nivel
+informa peticiones por segundo, latencia p50/p95/p99, reservas rechazadas
+por cupo (409) y errores (5xx o de conexion).
+
+Sin --url levanta el servidor en este mismo proceso sobre la base de
+benchmark y crea las cuentas de los clientes; como clientes y servidor
+comparten el GIL, para medir el servidor solo conviene levantarlo aparte
+y usar --url con una cuenta existente.
+
+Uso:
+    python benchmarks/carga_http.py --backend sqlite --sembrar 10000
+    python benchmarks/carga_http.py --concurrencias 1,4,16,64 --duracion 10
+    python benchmarks/carga_http.py --url http://127.0.0.1:8080 --usuario ana --password secreta
+"""
+import argparse
+import contextlib
+import http.client
+import io
+import json
+import os
+import random
+import sys
+import threading
+import time
+from datetime import date, timedelta
+from urllib.parse import quote, urlsplit
+
+from generador_datos import (ACTIVIDADES, BASE_DATOS_BENCH, abrir_base_bench,
+                             sembrar, volumenes)
+import hash_passwords
+from modelos import Usuario
+from servicio_http import ServidorAPI
+
+CLAVE_CUENTAS = "clave-carga"
+
+
+class Cliente:
+    """Cliente HTTP con una conexion persistente y un token de sesion."""
+
+    def __init__(self, host, puerto):
+        """Abre la conexion con el servicio."""
+        self.host = host
+        self.puerto = puerto
+        self.conexion = http.client.HTTPConnection(host, puerto, timeout=30)
+        self.token = None
+
+    def pedir(self, metodo, ruta, cuerpo=None, extra=None):
+        """
+        Envia una peticion (con las cabeceras `extra`, si se indican) y
+        devuelve (codigo, respuesta JSON).
+        """
+        cabeceras = {"Content-Type": "application/json", **(extra or {})}
+        if self.token:
+            cabeceras["Authorization"] = f"Bearer {self.token}"
+        datos = json.dumps(cuerpo) if cuerpo is not None else None
+        try:
+            self.conexion.request(metodo, ruta, datos, cabeceras)
+            respuesta = self.conexion.getresponse()
+            return respuesta.status, json.loads(respuesta.read() or b"null")
+        except (OSError, http.client.HTTPException):
+            # Reabrir la conexion para la proxima peticion
+            self.conexion.close()
+            self.conexion = http.client.HTTPConnection(
+                self.host, self.puerto, timeout=30)
+            raise
+
+    def iniciar_sesion(self, usuario, password):
+        """Inicia sesion y guarda el token."""
+        codigo, respuesta = self.pedir(
+            "POST", "/api/sesiones",
+            {"nombre_usuario": usuario, "password": password})
+        if codigo != 201:
+            raise RuntimeError(f"No se pudo iniciar sesion como {usuario}: {respuesta}")
+        self.token = respuesta["token"]
+
+
+def operaciones(azar, paquetes, destinos):
+    """
+    Mezcla de operaciones como (peso, nombre, funcion que recibe un Cliente
+    y devuelve el codigo HTTP).
+    """
+    hoy = date.today()
+
+    def rango():
+        desde = hoy + timedelta(days=azar.randrange(365))
+        return (f"/api/paquetes?desde={desde}&hasta={desde + timedelta(days=21)}"
+                f"&modo=solapa&limite=20")
+
+    return [
+        (30, "paquetes disponibles",
+         lambda c: c.pedir("GET", "/api/paquetes?disponibles=1&limite=20")[0]),
+        (20, "buscar destinos",
+         lambda c: c.pedir("GET", f"/api/destinos?q={quote(azar.choice(ACTIVIDADES))}"
+                                  f"&limite=20")[0]),
+        (15, "ver paquete",
+         lambda c: c.pedir("GET", f"/api/paquetes/{azar.choice(paquetes)}")[0]),
+        (10, "paquetes por fechas", lambda c: c.pedir("GET", rango())[0]),
+        (10, "ver destino",
+         lambda c: c.pedir("GET", f"/api/destinos/{azar.choice(destinos)}")[0]),
+        (10, "mis reservas", lambda c: c.pedir("GET", "/api/reservas/mias")[0]),
+        (5, "reservar",
+         lambda c: c.pedir("POST", "/api/reservas",
+                           {"id_paquete": azar.choice(paquetes),
+                            "numero_personas": 1})[0]),
+    ]
+
+
+def ejecutar_nivel(clientes, duracion, semilla, paquetes, destinos):
+    """
+    Corre un nivel de concurrencia durante `duracion` segundos. Devuelve
+    (peticiones, segundos, latencias ordenadas en ms, rechazadas, errores).
+    """
+    fin = time.perf_counter() + duracion
+    latencias = [[] for _ in clientes]
+    rechazadas = [0] * len(clientes)
+    errores = [0] * len(clientes)
+    barrera = threading.Barrier(len(clientes) + 1)
+
+    def trabajar(i):
+        azar = random.Random(semilla + i)
+        mezcla = operaciones(azar, paquetes, destinos)
+        pesos = [peso for peso, _, _ in mezcla]
+        barrera.wait()
+        while time.perf_counter() < fin:
+            _, _, operacion = azar.choices(mezcla, pesos)[0]
+            inicio = time.perf_counter()
+            try:
+                codigo = operacion(clientes[i])
+            except (OSError, http.client.HTTPException):
+                codigo = 599
+            latencias[i].append((time.perf_counter() - inicio) * 1000)
+            if codigo == 409:
+                rechazadas[i] += 1
+            elif codigo >= 400:
+                errores[i] += 1
+
+    hilos = [threading.Thread(target=trabajar, args=(i,))
+             for i in range(len(clientes))]
+    for hilo in hilos:
+        hilo.start()
+    barrera.wait()
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.join()
+    segundos = time.perf_counter() - inicio
+
+    todas = sorted(latencia for lista in latencias for latencia in lista)
+    return len(todas), segundos, todas, sum(rechazadas), sum(errores)
+
+
+def preparar_cuentas(db, cantidad):
+    """Crea cuentas de cliente carga1..cargaN (si no existen)."""
+    with db.conexion() as connection:
+        cursor = connection.cursor()
+        cursor.execute("SELECT id_cliente FROM Clientes ORDER BY id_cliente LIMIT %s",
+                       (cantidad,))
+        ids = [fila[0] for fila in cursor.fetchall()]
+        cursor.execute("SELECT nombre_usuario FROM Usuarios")
+        existentes = {fila[0] for fila in cursor.fetchall()}
+        cursor.close()
+
+    if len(ids) < cantidad:
+        raise RuntimeError("La base de benchmark no tiene suficientes clientes; "
+                           "use --sembrar")
+    cuentas = []
+    for i, id_cliente in enumerate(ids, 1):
+        nombre = f"carga{i}"
+        if nombre not in existentes:
+            Usuario(db, nombre_usuario=nombre, password=CLAVE_CUENTAS,
+                    rol="cliente", id_cliente=id_cliente).registrar()
+        cuentas.append((nombre, CLAVE_CUENTAS))
+    return cuentas
+
+
+def ids_del_catalogo(cliente):
+    """IDs de paquetes disponibles y destinos, leidos del propio servicio."""
+    _, paquetes = cliente.pedir("GET", "/api/paquetes?disponibles=1&limite=200")
+    _, destinos = cliente.pedir("GET", "/api/destinos?limite=200")
+    paquetes = [p["id_paquete"] for p in paquetes["resultados"]]
+    destinos = [d["id_destino"] for d in destinos["resultados"]]
+    if not paquetes or not destinos:
+        raise RuntimeError("El catalogo no tiene paquetes disponibles o destinos")
+    return paquetes, destinos
+
+
+def main():
+    """Punto de entrada de la prueba de carga."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrencias", default="1,2,4,8,16,32",
+                        help="Clientes concurrentes de cada nivel, separados por coma")
+    parser.add_argument("--duracion", type=float, default=5.0,
+                        help="Segundos por nivel")
+    parser.add_argument("--url", help="Servicio ya levantado (si no, se levanta aqui)")
+    parser.add_argument("--usuario", help="Cuenta a usar con --url")
+    parser.add_argument("--password", help="Contrasena de la cuenta con --url")
+    parser.add_argument("--sembrar", type=int, metavar="RESERVAS",
+                        help="Sembrar la base con este numero de reservas antes")
+    parser.add_argument("--conexiones", type=int, default=16,
+                        help="Maximo de conexiones del pool del servidor local")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--base-datos", default=BASE_DATOS_BENCH)
+    parser.add_argument("--backend", choices=("mysql", "sqlite"), default="mysql")
+    args = parser.parse_args()
+
+    concurrencias = [int(c) for c in args.concurrencias.split(",")]
+    salida = sys.stdout
+    servidor = db = None
+
+    # Los modelos informan cada operacion por pantalla: se descarta
+    with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+        if args.url:
+            if not args.usuario or not args.password:
+                parser.error("--url requiere --usuario y --password")
+            partes = urlsplit(args.url)
+            host, puerto = partes.hostname, partes.port or 80
+            cuentas = [(args.usuario, args.password)]
+        else:
+            hash_passwords.configurar(rondas=4)
+            with contextlib.redirect_stdout(io.StringIO()):
+                db = abrir_base_bench(args.base_datos, backend=args.backend,
+                                      usar_cache=True, usar_pool=True,
+                                      pool_min=2, pool_max=args.conexiones)
+                if args.sembrar:
+                    sembrar(db, **volumenes(args.sembrar), semilla=args.semilla)
+            cuentas = preparar_cuentas(db, max(concurrencias))
+            servidor = ServidorAPI(db, ("127.0.0.1", 0), registrar_peticiones=False)
+            servidor.iniciar()
+            host, puerto = servidor.server_address
+
+        try:
+            clientes = []
+            for i in range(max(concurrencias)):
+                cliente = Cliente(host, puerto)
+                cliente.iniciar_sesion(*cuentas[i % len(cuentas)])
+                clientes.append(cliente)
+            paquetes, destinos = ids_del_catalogo(clientes[0])
+
+            print(f"{'clientes':>8} {'peticiones':>10} {'pet/s':>9} {'p50 (ms)':>9} "
+                  f"{'p95 (ms)':>9} {'p99 (ms)':>9} {'409':>6} {'errores':>8}",
+                  file=salida)
+            for concurrencia in concurrencias:
+                peticiones, segundos, latencias, rechazadas, errores = ejecutar_nivel(
+                    clientes[:concurrencia], args.duracion, args.semilla,
+                    paquetes, destinos)
+                if not latencias:
+                    continue
+                print(f"{concurrencia:8} {peticiones:10} {peticiones / segundos:9.1f} "
+                      f"{latencias[len(latencias) // 2]:9.2f} "
+                      f"{latencias[int(len(latencias) * 0.95)]:9.2f} "
+                      f"{latencias[int(len(latencias) * 0.99)]:9.2f} "
+                      f"{rechazadas:6} {errores:8}", file=salida)
+        finally:
+            if servidor is not None:
+                servidor.shutdown()
+                servidor.server_close()
+                db.desconectar()
+
+
+if __name__ == "__main__":
+    main()
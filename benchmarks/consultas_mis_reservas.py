@@ -0,0 +1,133 @@
+"""
+Contador de consultas para la pantalla "Mis Reservas"
+Viajes Aventura
+
+Compara el camino anterior (listar_por_cliente + buscar_por_id por cada
+reserva, 1 + 2N consultas) con Reserva.listar_por_cliente_detallado.
+
+Uso:
+    python benchmarks/consultas_mis_reservas.py --reservas 200 --paquetes 20
+    python benchmarks/consultas_mis_reservas.py --backend sqlite
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generador_datos import BASE_DATOS_BENCH, abrir_base_bench  # noqa: E402
+from paquetes_reservas import PaqueteTuristico, Reserva  # noqa: E402
+from utilidades import DatabaseRegistradora  # noqa: E402
+
+
+def preparar_datos(db, total_reservas, total_paquetes, destinos_por_paquete):
+    """Crea un cliente con reservas repartidas entre varios paquetes."""
+    marca = int(time.time() * 1000)
+    with db.conexion() as connection:
+        cursor = connection.cursor()
+        cursor.execute("""
+            INSERT INTO Clientes (nombre_completo, email) VALUES (%s, %s)
+        """, ("Cliente Benchmark", f"bench{marca}@viajes.test"))
+        id_cliente = cursor.lastrowid
+
+        ids_destinos = []
+        for i in range(destinos_por_paquete):
+            cursor.execute("""
+                INSERT INTO Destinos (nombre, costo_base) VALUES (%s, %s)
+            """, (f"Destino Benchmark {marca}-{i}", 10))
+            ids_destinos.append(cursor.lastrowid)
+
+        inicio = date.today() + timedelta(days=30)
+        ids_paquetes = []
+        for i in range(total_paquetes):
+            cursor.execute("""
+                INSERT INTO PaquetesTuristicos
+                (nombre, fecha_inicio, fecha_fin, precio_total, cupo_disponible)
+                VALUES (%s, %s, %s, %s, %s)
+            """, (f"Paquete Benchmark {marca}-{i}", inicio,
+                  inicio + timedelta(days=7), 100, 1000))
+            id_paquete = cursor.lastrowid
+            ids_paquetes.append(id_paquete)
+            PaqueteTuristico.sincronizar_disponibilidad(cursor, id_paquete)
+            cursor.executemany("""
+                INSERT INTO Paquetes_Destinos (id_paquete, id_destino, orden_visita)
+                VALUES (%s, %s, %s)
+            """, [(id_paquete, id_destino, orden)
+                  for orden, id_destino in enumerate(ids_destinos, 1)])
+
+        cursor.executemany("""
+            INSERT INTO Reservas (id_cliente, id_paquete, numero_personas, precio_total)
+            VALUES (%s, %s, %s, %s)
+        """, [(id_cliente, ids_paquetes[i % total_paquetes], 1, 100)
+              for i in range(total_reservas)])
+        connection.commit()
+        cursor.close()
+
+    return id_cliente, ids_paquetes, ids_destinos
+
+
+def limpiar_datos(db, id_cliente, ids_paquetes, ids_destinos):
+    """Elimina los datos creados por el benchmark."""
+    with db.conexion() as connection:
+        cursor = connection.cursor()
+        cursor.execute("DELETE FROM Reservas WHERE id_cliente = %s", (id_cliente,))
+        cursor.executemany("DELETE FROM PaquetesTuristicos WHERE id_paquete = %s",
+                           [(i,) for i in ids_paquetes])
+        cursor.executemany("DELETE FROM Destinos WHERE id_destino = %s",
+                           [(i,) for i in ids_destinos])
+        cursor.execute("DELETE FROM Clientes WHERE id_cliente = %s", (id_cliente,))
+        connection.commit()
+        cursor.close()
+
+
+def camino_anterior(db, id_cliente):
+    """Replica el menu anterior: una busqueda de paquete por reserva."""
+    reservas = Reserva.listar_por_cliente(db, id_cliente)
+    for reserva in reservas:
+        reserva.paquete = PaqueteTuristico.buscar_por_id(db, reserva.id_paquete)
+    return reservas
+
+
+def medir(db, funcion, id_cliente):
+    """Devuelve (consultas, segundos, reservas) de una ejecucion."""
+    db.reiniciar()
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        reservas = funcion(db, id_cliente)
+    return db.consultas, time.perf_counter() - inicio, len(reservas)
+
+
+def main():
+    """Punto de entrada del benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--reservas", type=int, default=200)
+    parser.add_argument("--paquetes", type=int, default=20)
+    parser.add_argument("--destinos", type=int, default=4)
+    parser.add_argument("--base-datos", default=BASE_DATOS_BENCH)
+    parser.add_argument("--backend", choices=("mysql", "sqlite"), default="mysql")
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        db = abrir_base_bench(args.base_datos, clase=DatabaseRegistradora,
+                              backend=args.backend, usar_pool=True,
+                              pool_min=1, pool_max=2)
+    datos = preparar_datos(db, args.reservas, args.paquetes, args.destinos)
+
+    try:
+        for nombre, funcion in (
+                ("anterior (1 + 2N)", camino_anterior),
+                ("detallado", Reserva.listar_por_cliente_detallado)):
+            consultas, segundos, total = medir(db, funcion, datos[0])
+            print(f"{nombre:20} reservas={total} consultas={consultas} "
+                  f"tiempo={segundos * 1000:.1f} ms")
+    finally:
+        limpiar_datos(db, *datos)
+        db.desconectar()
+
+
+if __name__ == "__main__":
+    main()
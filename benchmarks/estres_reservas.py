@@ -0,0 +1,138 @@
+"""
+Benchmark de estres: reservas concurrentes sobre un mismo paquete
+Viajes Aventura
+
+Lanza cientos de reservas en paralelo contra un solo paquete y verifica
+que no se sobrevenda el cupo. Informa reservas por segundo.
+
+Uso:
+    python benchmarks/estres_reservas.py --cupo 100 --reservas 500 --hilos 32
+    python benchmarks/estres_reservas.py --backend sqlite
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conexion_db import Database  # noqa: E402
+from generador_datos import BASE_DATOS_BENCH, abrir_base_bench  # noqa: E402
+from modelos import Cliente  # noqa: E402
+from paquetes_reservas import PaqueteTuristico, Reserva  # noqa: E402
+
+
+def preparar_datos(db, cupo):
+    """Crea un cliente y un paquete de prueba con el cupo indicado."""
+    marca = int(time.time() * 1000)
+    cliente = Cliente(db, nombre_completo="Cliente Benchmark",
+                      email=f"bench{marca}@viajes.test")
+    cliente.guardar()
+
+    paquete = PaqueteTuristico(db, nombre=f"Paquete Benchmark {marca}",
+                               descripcion="Paquete de estres",
+                               fecha_inicio=date.today() + timedelta(days=30),
+                               fecha_fin=date.today() + timedelta(days=37),
+                               precio_total=100.0, cupo_disponible=cupo)
+    paquete.guardar()
+    return cliente, paquete
+
+
+def limpiar_datos(db, cliente, paquete):
+    """Elimina las reservas, el paquete y el cliente de prueba."""
+    with db.conexion() as connection:
+        cursor = connection.cursor()
+        cursor.execute("DELETE FROM Reservas WHERE id_paquete = %s",
+                       (paquete.id_paquete,))
+        cursor.execute("DELETE FROM PaquetesTuristicos WHERE id_paquete = %s",
+                       (paquete.id_paquete,))
+        cursor.execute("DELETE FROM Clientes WHERE id_cliente = %s",
+                       (cliente.id_cliente,))
+        connection.commit()
+        cursor.close()
+
+
+def ejecutar(db, cupo, total_reservas, hilos, personas):
+    """Ejecuta el benchmark y devuelve un diccionario con los resultados."""
+    cliente, paquete = preparar_datos(db, cupo)
+
+    def reservar(_):
+        reserva = Reserva(db, id_cliente=cliente.id_cliente,
+                          id_paquete=paquete.id_paquete,
+                          numero_personas=personas)
+        return reserva.crear()
+
+    try:
+        # Los modelos imprimen cada operacion; se silencian durante la carga
+        with contextlib.redirect_stdout(io.StringIO()):
+            inicio = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=hilos) as executor:
+                resultados = list(executor.map(reservar, range(total_reservas)))
+            duracion = time.perf_counter() - inicio
+
+        exitosas = sum(1 for r in resultados if r)
+
+        with db.conexion() as connection:
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute("""
+                SELECT COALESCE(SUM(numero_personas), 0) AS personas
+                FROM Reservas WHERE id_paquete = %s
+            """, (paquete.id_paquete,))
+            personas_reservadas = int(cursor.fetchone()['personas'])
+            cursor.execute(
+                "SELECT cupo_disponible FROM PaquetesTuristicos WHERE id_paquete = %s",
+                (paquete.id_paquete,))
+            cupo_final = cursor.fetchone()['cupo_disponible']
+            connection.commit()
+            cursor.close()
+
+        return {
+            "reservas_intentadas": total_reservas,
+            "reservas_exitosas": exitosas,
+            "personas_reservadas": personas_reservadas,
+            "cupo_inicial": cupo,
+            "cupo_final": cupo_final,
+            "sobreventa": personas_reservadas > cupo or cupo_final < 0,
+            "consistente": personas_reservadas + cupo_final == cupo,
+            "segundos": round(duracion, 3),
+            "intentos_por_segundo": round(total_reservas / duracion, 1),
+            "reservas_por_segundo": round(exitosas / duracion, 1),
+        }
+    finally:
+        limpiar_datos(db, cliente, paquete)
+
+
+def main():
+    """Punto de entrada del benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--cupo", type=int, default=100)
+    parser.add_argument("--reservas", type=int, default=500)
+    parser.add_argument("--hilos", type=int, default=32)
+    parser.add_argument("--personas", type=int, default=1)
+    parser.add_argument("--backend", choices=("mysql", "sqlite"), default="mysql",
+                        help="Con sqlite se usa la base de benchmark embebida")
+    args = parser.parse_args()
+
+    if args.backend == "sqlite":
+        with contextlib.redirect_stdout(io.StringIO()):
+            db = abrir_base_bench(BASE_DATOS_BENCH, backend="sqlite",
+                                  usar_pool=True, pool_min=2, pool_max=args.hilos)
+    else:
+        db = Database(usar_pool=True, pool_min=2, pool_max=args.hilos)
+    resultado = ejecutar(db, args.cupo, args.reservas, args.hilos, args.personas)
+    db.desconectar()
+
+    for clave, valor in resultado.items():
+        print(f"{clave}: {valor}")
+
+    if resultado["sobreventa"] or not resultado["consistente"]:
+        print("ERROR: el cupo del paquete quedo inconsistente")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+Generador de datos sinteticos para benchmarks
+Viajes Aventura
+
+Siembra Clientes, Destinos, PaquetesTuristicos, Paquetes_Destinos y
+Reservas con volumenes configurables y una semilla fija, para que dos
+ejecuciones generen exactamente el mismo conjunto de datos.
+
+Solo trabaja sobre bases de datos cuyo nombre contiene "bench", porque
+vacia las tablas antes de sembrar.
+
+Uso:
+    python benchmarks/generador_datos.py --reservas 100000
+    python benchmarks/generador_datos.py --reservas 100000 --backend sqlite
+"""
+import argparse
+import random
+import time
+from datetime import date, datetime, timedelta
+
+import utilidades  # noqa: F401  (agrega la raiz del proyecto al path)
+from conexion_db import Database
+import reportes
+from paquetes_reservas import PaqueteTuristico
+
+BASE_DATOS_BENCH = "viajes_aventura_bench"
+TAMANO_LOTE = 5000
+
+ACTIVIDADES = ["trekking", "rafting", "kayak", "cabalgata", "buceo",
+               "escalada", "ciclismo", "observacion de aves", "termas",
+               "esqui", "degustacion de vinos", "city tour"]
+REGIONES = ["Atacama", "Patagonia", "Araucania", "Valparaiso", "Magallanes",
+            "Los Lagos", "Coquimbo", "Aysen", "Maule", "Biobio"]
+ESTADOS = ["confirmada"] * 6 + ["pendiente"] * 3 + ["cancelada"]
+
+
+def volumenes(reservas):
+    """Volumenes proporcionales a partir del numero de reservas."""
+    return {
+        "clientes": max(10, reservas // 10),
+        "destinos": max(5, reservas // 100),
+        "paquetes": max(5, reservas // 20),
+        "destinos_por_paquete": 3,
+        "reservas": reservas,
+    }
+
+
+def abrir_base_bench(nombre=BASE_DATOS_BENCH, clase=Database, **config):
+    """
+    Abre la base de benchmark (sin cache salvo que se pida) y crea el
+    esquema si hace falta. `clase` permite abrirla con una subclase de
+    Database (p. ej. utilidades.DatabaseRegistradora).
+    """
+    if "bench" not in nombre:
+        raise ValueError("La base de benchmark debe contener 'bench' en su nombre")
+
+    config.setdefault("usar_cache", False)
+    db = clase(database=nombre, **config)
+    db.conectar()
+    db.crear_tablas()
+    return db
+
+
+def vaciar_tablas(db):
+    """Elimina todas las filas de las tablas del sistema."""
+    if "bench" not in db.nombre_base_datos:
+        raise ValueError("Solo se vacian bases de datos de benchmark")
+
+    with db.conexion() as connection:
+        cursor = connection.cursor()
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+        for tabla in ("ResumenReservas", "DisponibilidadPaquetes", "Reservas",
+                      "Paquetes_Destinos", "PaquetesTuristicos", "Destinos",
+                      "Usuarios", "Clientes"):
+            cursor.execute(f"TRUNCATE TABLE {tabla}")
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+        connection.commit()
+        cursor.close()
+
+
+def _insertar_por_lotes(connection, sql, filas):
+    """Inserta un generador de filas con executemany y commit por lote."""
+    cursor = connection.cursor()
+    lote = []
+    total = 0
+    for fila in filas:
+        lote.append(fila)
+        if len(lote) >= TAMANO_LOTE:
+            cursor.executemany(sql, lote)
+            connection.commit()
+            total += len(lote)
+            lote = []
+    if lote:
+        cursor.executemany(sql, lote)
+        connection.commit()
+        total += len(lote)
+    cursor.close()
+    return total
+
+
+def sembrar(db, clientes, destinos, paquetes, destinos_por_paquete, reservas,
+            semilla=42):
+    """
+    Vacia las tablas y genera el conjunto de datos.
+    Devuelve los volumenes insertados y el tiempo empleado.
+    """
+    azar = random.Random(semilla)
+    hoy = date.today()
+    ahora = datetime.now().replace(microsecond=0)
+    inicio = time.perf_counter()
+
+    vaciar_tablas(db)
+
+    with db.conexion() as connection:
+        _insertar_por_lotes(connection, """
+            INSERT INTO Clientes
+            (id_cliente, nombre_completo, email, telefono, direccion, fecha_registro)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, ((i, f"Cliente {i:07d}", f"cliente{i}@bench.test",
+               f"+569{azar.randrange(10**7, 10**8)}", f"Calle {i}",
+               hoy - timedelta(days=azar.randrange(730)))
+              for i in range(1, clientes + 1)))
+
+        _insertar_por_lotes(connection, """
+            INSERT INTO Destinos
+            (id_destino, nombre, descripcion, actividades, costo_base, disponible)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, ((i, f"{azar.choice(REGIONES)} {i:05d}",
+               f"Destino sintetico numero {i}",
+               ", ".join(azar.sample(ACTIVIDADES, 3)),
+               azar.randrange(20, 500) * 1000, azar.random() < 0.9)
+              for i in range(1, destinos + 1)))
+
+        precios = {}
+
+        def generar_paquetes():
+            for i in range(1, paquetes + 1):
+                fecha_inicio = hoy + timedelta(days=azar.randrange(-180, 365))
+                precios[i] = azar.randrange(200, 3000) * 1000
+                yield (i, f"Paquete {i:06d}", f"Paquete sintetico {i}",
+                       fecha_inicio,
+                       fecha_inicio + timedelta(days=azar.randrange(3, 15)),
+                       precios[i], azar.randrange(0, 1000), azar.random() < 0.85)
+
+        _insertar_por_lotes(connection, """
+            INSERT INTO PaquetesTuristicos
+            (id_paquete, nombre, descripcion, fecha_inicio, fecha_fin,
+             precio_total, cupo_disponible, disponible)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        """, generar_paquetes())
+
+        por_paquete = min(destinos_por_paquete, destinos)
+        _insertar_por_lotes(connection, """
+            INSERT INTO Paquetes_Destinos (id_paquete, id_destino, orden_visita)
+            VALUES (%s, %s, %s)
+        """, ((id_paquete, id_destino, orden)
+              for id_paquete in range(1, paquetes + 1)
+              for orden, id_destino in enumerate(
+                  azar.sample(range(1, destinos + 1), por_paquete), 1)))
+
+        def generar_reservas():
+            for i in range(1, reservas + 1):
+                id_paquete = azar.randrange(1, paquetes + 1)
+                personas = azar.randrange(1, 6)
+                yield (i, azar.randrange(1, clientes + 1), id_paquete,
+                       ahora - timedelta(minutes=azar.randrange(60 * 24 * 730)),
+                       personas, precios[id_paquete] * personas,
+                       azar.choice(ESTADOS), "")
+
+        _insertar_por_lotes(connection, """
+            INSERT INTO Reservas
+            (id_reserva, id_cliente, id_paquete, fecha_reserva, numero_personas,
+             precio_total, estado, notas)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        """, generar_reservas())
+
+        # Tablas derivadas: indice de disponibilidad y resumen de reportes
+        cursor = connection.cursor()
+        PaqueteTuristico.sincronizar_disponibilidad(cursor, 1, paquetes)
+        cursor.execute(reportes.SQL_RECONSTRUIR_RESUMEN)
+        connection.commit()
+        cursor.close()
+
+    return {
+        "clientes": clientes,
+        "destinos": destinos,
+        "paquetes": paquetes,
+        "paquetes_destinos": paquetes * por_paquete,
+        "reservas": reservas,
+        "segundos": round(time.perf_counter() - inicio, 3),
+    }
+
+
+def main():
+    """Punto de entrada del generador."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--reservas", type=int, default=10000)
+    parser.add_argument("--clientes", type=int)
+    parser.add_argument("--destinos", type=int)
+    parser.add_argument("--paquetes", type=int)
+    parser.add_argument("--destinos-por-paquete", type=int)
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--base-datos", default=BASE_DATOS_BENCH)
+    parser.add_argument("--backend", choices=("mysql", "sqlite"), default="mysql")
+    args = parser.parse_args()
+
+    config = volumenes(args.reservas)
+    for clave in ("clientes", "destinos", "paquetes", "destinos_por_paquete"):
+        if getattr(args, clave) is not None:
+            config[clave] = getattr(args, clave)
+
+    db = abrir_base_bench(args.base_datos, backend=args.backend)
+    try:
+        resultado = sembrar(db, semilla=args.semilla, **config)
+    finally:
+        db.desconectar()
+
+    for clave, valor in resultado.items():
+        print(f"{clave}: {valor}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Benchmark de lecturas del catalogo con y sin cache
+Viajes Aventura
+
+Simula repetidas visitas a los menus de destinos y paquetes y compara las
+consultas enviadas a la base de datos con la cache activa y desactivada.
+
+Uso:
+    python benchmarks/lecturas_catalogo.py --visitas 200
+"""
+import argparse
+import contextlib
+import io
+import time
+
+from utilidades import DatabaseRegistradora
+from modelos import Destino
+from paquetes_reservas import PaqueteTuristico
+
+
+def visitar_catalogo(db, visitas):
+    """Recorre los listados y detalles del catalogo `visitas` veces."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        paquetes = PaqueteTuristico.listar_todos(db, solo_disponibles=True)
+        destinos = Destino.listar_todos(db)
+        ids_paquetes = [p.id_paquete for p in paquetes[:10]]
+        ids_destinos = [d.id_destino for d in destinos[:10]]
+
+        db.reiniciar()
+        inicio = time.perf_counter()
+        for _ in range(visitas):
+            Destino.listar_todos(db)
+            Destino.listar_todos(db, solo_disponibles=True)
+            PaqueteTuristico.listar_todos(db, solo_disponibles=True,
+                                          prefetch_destinos=True)
+            for id_paquete in ids_paquetes:
+                PaqueteTuristico.buscar_por_id(db, id_paquete)
+            for id_destino in ids_destinos:
+                Destino.buscar_por_id(db, id_destino)
+        return time.perf_counter() - inicio
+
+
+def main():
+    """Punto de entrada del benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--visitas", type=int, default=200)
+    parser.add_argument("--ttl", type=float, default=30.0)
+    args = parser.parse_args()
+
+    for usar_cache in (False, True):
+        db = DatabaseRegistradora(usar_pool=True, pool_min=1, pool_max=2,
+                                  usar_cache=usar_cache, cache_ttl=args.ttl)
+        segundos = visitar_catalogo(db, args.visitas)
+        print(f"cache={'si' if usar_cache else 'no'}: consultas={db.consultas} "
+              f"tiempo={segundos * 1000:.1f} ms")
+        if db.cache is not None:
+            print(f"    {db.cache.estadisticas()}")
+        db.desconectar()
+
+
+if __name__ == "__main__":
+    main()
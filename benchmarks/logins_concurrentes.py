@@ -0,0 +1,63 @@
+"""
+Benchmark de inicios de sesion concurrentes (verificacion bcrypt)
+Viajes Aventura
+
+Mide cuantas verificaciones de contrasena por segundo atiende HasherBcrypt
+con distinto numero de trabajadores, simulando una rafaga de logins.
+
+Uso:
+    python benchmarks/logins_concurrentes.py --logins 64 --rondas 12
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import utilidades  # noqa: F401  (agrega la raiz del proyecto al path)
+from hash_passwords import HasherBcrypt
+
+
+def medir(trabajadores, logins, rondas, usar_procesos):
+    """Devuelve logins por segundo con la cantidad de trabajadores dada."""
+    hasher = HasherBcrypt(rondas=rondas, trabajadores=trabajadores,
+                          usar_procesos=usar_procesos)
+    try:
+        hash_guardado = hasher.hash("clave-de-prueba")
+
+        # Cada login llega desde su propio hilo, como en un servidor
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=logins) as clientes:
+            resultados = list(clientes.map(
+                lambda _: hasher.verificar("clave-de-prueba", hash_guardado),
+                range(logins)))
+        segundos = time.perf_counter() - inicio
+    finally:
+        hasher.cerrar()
+
+    assert all(resultados)
+    return logins / segundos
+
+
+def main():
+    """Punto de entrada del benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--rondas", type=int, default=12)
+    parser.add_argument("--procesos", action="store_true",
+                        help="Usar un pool de procesos en vez de hilos")
+    args = parser.parse_args()
+
+    nucleos = os.cpu_count() or 1
+    cantidades = sorted({1, 2, 4, 8, nucleos} & set(range(1, nucleos + 1)))
+
+    print(f"CPUs: {nucleos} | rondas: {args.rondas} | logins: {args.logins}")
+    base = None
+    for trabajadores in cantidades:
+        por_segundo = medir(trabajadores, args.logins, args.rondas, args.procesos)
+        base = base or por_segundo
+        print(f"trabajadores={trabajadores:3} logins/s={por_segundo:8.1f} "
+              f"aceleracion={por_segundo / base:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
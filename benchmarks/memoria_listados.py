@@ -0,0 +1,108 @@
+"""
+Benchmark de memoria de los listados completos
+Viajes Aventura
+
+Mide el pico de memoria (tracemalloc), la memoria retenida por objeto y el
+tiempo de Cliente.listar_todos y PaqueteTuristico.listar_todos sobre una
+base grande, y lo compara con la construccion anterior: cursor de dicts y
+objetos con __dict__.
+
+Uso:
+    python benchmarks/memoria_listados.py --sembrar 100000
+    python benchmarks/memoria_listados.py --backend sqlite --sembrar 100000
+"""
+import argparse
+import contextlib
+import gc
+import io
+import time
+import tracemalloc
+
+from generador_datos import BASE_DATOS_BENCH, abrir_base_bench, sembrar
+from modelos import Cliente
+from paquetes_reservas import PaqueteTuristico
+
+
+class ObjetoConDict:
+    """Objeto de modelo sin __slots__, como se construian antes."""
+
+    def __init__(self, db, **campos):
+        self.db = db
+        self.__dict__.update(campos)
+
+
+def listar_con_dicts(db, sql, campos):
+    """Listado con cursor de dicts y un objeto con __dict__ por fila."""
+    with db.conexion() as connection:
+        cursor = connection.cursor(dictionary=True)
+        try:
+            cursor.execute(sql)
+            return [ObjetoConDict(db, **{campo: row[campo] for campo in campos})
+                    for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+
+
+def casos(db):
+    """Listados a medir, como (nombre, funcion sin argumentos)."""
+    return [
+        ("Cliente.listar_todos (dicts)",
+         lambda: listar_con_dicts(db, Cliente.SQL_LISTAR_TODOS, Cliente.CAMPOS)),
+        ("Cliente.listar_todos",
+         lambda: Cliente.listar_todos(db)),
+        ("PaqueteTuristico.listar_todos (dicts)",
+         lambda: listar_con_dicts(db, PaqueteTuristico.SQL_LISTAR_TODOS,
+                                  PaqueteTuristico.CAMPOS)),
+        ("PaqueteTuristico.listar_todos",
+         lambda: PaqueteTuristico.listar_todos(db)),
+    ]
+
+
+def medir(funcion):
+    """Devuelve (filas, segundos, pico_bytes, retenidos_bytes) de `funcion`."""
+    gc.collect()
+    inicio = time.perf_counter()
+    objetos = funcion()
+    segundos = time.perf_counter() - inicio
+    del objetos
+
+    gc.collect()
+    tracemalloc.start()
+    objetos = funcion()
+    retenidos, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(objetos), segundos, pico, retenidos
+
+
+def main():
+    """Punto de entrada del benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sembrar", type=int, metavar="FILAS",
+                        help="Sembrar la base con este numero de clientes, "
+                             "paquetes y reservas antes")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--base-datos", default=BASE_DATOS_BENCH)
+    parser.add_argument("--backend", choices=("mysql", "sqlite"), default="mysql")
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        db = abrir_base_bench(args.base_datos, backend=args.backend)
+        if args.sembrar:
+            sembrar(db, clientes=args.sembrar,
+                    destinos=max(5, args.sembrar // 100),
+                    paquetes=args.sembrar, destinos_por_paquete=1,
+                    reservas=args.sembrar, semilla=args.semilla)
+
+    print(f"{'caso':38} {'filas':>8} {'tiempo (s)':>10} {'pico (MB)':>10} "
+          f"{'retenido (MB)':>14} {'bytes/fila':>11}")
+    for nombre, funcion in casos(db):
+        filas, segundos, pico, retenidos = medir(funcion)
+        print(f"{nombre:38} {filas:8} {segundos:10.3f} {pico / 2**20:10.1f} "
+              f"{retenidos / 2**20:14.1f} {retenidos / max(filas, 1):11.0f}")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        db.desconectar()
+
+
+if __name__ == "__main__":
+    main()
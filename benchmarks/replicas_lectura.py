@@ -0,0 +1,171 @@
+"""
+Benchmark de lecturas repartidas entre replicas
+Viajes Aventura
+
+Compara lecturas por segundo de "Mis Reservas", paquetes y clientes (hilos
+concurrentes) solo contra la primaria y con las replicas de lectura, e
+informa cuantas lecturas atendio cada base. Despues crea reservas y las
+lee de inmediato con Reserva.listar_por_cliente para verificar que se lee
+lo propio recien escrito.
+
+Con SQLite, si no se indican replicas, se copian dos replicas del archivo
+de la base de benchmark. Como las copias no se replican, una reserva leida
+desde una replica no aparece: la verificacion falla si la lectura no se
+quedo en la primaria.
+
+Uso:
+    python benchmarks/replicas_lectura.py --backend sqlite --sembrar 10000
+    python benchmarks/replicas_lectura.py --replica 127.0.0.1:3309 --replica 127.0.0.1:3310
+    python benchmarks/replicas_lectura.py --backend sqlite --seleccion latencia
+"""
+import argparse
+import contextlib
+import io
+import random
+import shutil
+import threading
+import time
+from datetime import date, timedelta
+
+from generador_datos import BASE_DATOS_BENCH, abrir_base_bench, sembrar, volumenes
+from conexion_db import _ruta_sqlite
+from modelos import Cliente
+from paquetes_reservas import PaqueteTuristico, Reserva
+from replicas import SELECCIONES
+
+
+def replicas_sqlite(base_datos, cantidad):
+    """Copia el archivo de la base de benchmark en `cantidad` replicas."""
+    replicas = []
+    for i in range(1, cantidad + 1):
+        nombre = f"{base_datos}_replica{i}"
+        shutil.copyfile(_ruta_sqlite(base_datos), _ruta_sqlite(nombre))
+        replicas.append({"database": nombre})
+    return replicas
+
+
+def leer(db, hilos, duracion, ids_clientes, semilla):
+    """
+    Repite lecturas de los modelos en `hilos` hilos durante `duracion`
+    segundos. Devuelve las lecturas por segundo.
+    """
+    fin = time.perf_counter() + duracion
+    cuentas = [0] * hilos
+
+    def trabajar(i):
+        azar = random.Random(semilla + i)
+        while time.perf_counter() < fin:
+            operacion = azar.randrange(3)
+            if operacion == 0:
+                Reserva.listar_por_cliente(db, azar.choice(ids_clientes))
+            elif operacion == 1:
+                PaqueteTuristico.listar_pagina(db, limite=20, solo_disponibles=True)
+            else:
+                Cliente.buscar_por_id(db, azar.choice(ids_clientes))
+            cuentas[i] += 1
+
+    inicio = time.perf_counter()
+    trabajadores = [threading.Thread(target=trabajar, args=(i,)) for i in range(hilos)]
+    for hilo in trabajadores:
+        hilo.start()
+    for hilo in trabajadores:
+        hilo.join()
+    return sum(cuentas) / (time.perf_counter() - inicio)
+
+
+def paquete_con_cupo(db, reservas):
+    """Crea un paquete con cupo para `reservas` reservas de una persona."""
+    inicio = date.today() + timedelta(days=30)
+    paquete = PaqueteTuristico(db, nombre="Paquete replicas", fecha_inicio=inicio,
+                               fecha_fin=inicio + timedelta(days=5),
+                               precio_total=100000, cupo_disponible=reservas)
+    paquete.guardar()
+    return paquete.id_paquete
+
+
+def verificar_lectura_propia(db, reservas, ids_clientes, semilla):
+    """
+    Crea `reservas` reservas y las busca enseguida en listar_por_cliente.
+    Devuelve cuantas no aparecieron.
+    """
+    azar = random.Random(semilla)
+    id_paquete = paquete_con_cupo(db, reservas)
+    perdidas = 0
+    for _ in range(reservas):
+        reserva = Reserva(db, id_cliente=azar.choice(ids_clientes),
+                          id_paquete=id_paquete, numero_personas=1)
+        if not reserva.crear():
+            continue
+        ids = {r.id_reserva for r in Reserva.listar_por_cliente(db, reserva.id_cliente)}
+        if reserva.id_reserva not in ids:
+            perdidas += 1
+    return perdidas
+
+
+def main():
+    """Punto de entrada del benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--replica", action="append", default=[],
+                        help="Replica MySQL como HOST:PUERTO, o base SQLite "
+                             "(se puede repetir)")
+    parser.add_argument("--seleccion", choices=SELECCIONES, default="rotacion")
+    parser.add_argument("--hilos", type=int, default=8)
+    parser.add_argument("--duracion", type=float, default=5.0,
+                        help="Segundos de lecturas por configuracion")
+    parser.add_argument("--reservas", type=int, default=200,
+                        help="Reservas de la verificacion de lectura propia")
+    parser.add_argument("--sembrar", type=int, metavar="RESERVAS",
+                        help="Sembrar la base con este numero de reservas antes")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--base-datos", default=BASE_DATOS_BENCH)
+    parser.add_argument("--backend", choices=("mysql", "sqlite"), default="mysql")
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        base = abrir_base_bench(args.base_datos, backend=args.backend)
+        if args.sembrar:
+            sembrar(base, **volumenes(args.sembrar), semilla=args.semilla)
+        ids_clientes = [c.id_cliente for c in Cliente.listar_todos(base)]
+        base.desconectar()
+
+    if args.replica and args.backend == "mysql":
+        replicas = []
+        for replica in args.replica:
+            host, _, puerto = replica.partition(":")
+            replicas.append({"host": host, "port": int(puerto or 3306)})
+    elif args.replica:
+        replicas = [{"database": replica} for replica in args.replica]
+    elif args.backend == "sqlite":
+        replicas = replicas_sqlite(args.base_datos, 2)
+    else:
+        parser.error("Con MySQL indique las replicas con --replica HOST:PUERTO")
+
+    config = dict(backend=args.backend, usar_pool=True, pool_min=1,
+                  pool_max=args.hilos, instrumentar=False)
+    print(f"{'configuracion':24} {'lecturas/s':>11}  lecturas por base")
+    for nombre, extra in (("solo primaria", {}),
+                          (f"replicas ({args.seleccion})",
+                           {"replicas": replicas,
+                            "seleccion_replicas": args.seleccion})):
+        with contextlib.redirect_stdout(io.StringIO()):
+            db = abrir_base_bench(args.base_datos, **config, **extra)
+            por_segundo = leer(db, args.hilos, args.duracion, ids_clientes,
+                               args.semilla)
+        reparto = ("-" if db.replicas is None else
+                   ", ".join(f"{e['base']}={e['lecturas']}"
+                             f"{' (caida)' if e['caida'] else ''}"
+                             for e in db.replicas.estado()))
+        print(f"{nombre:24} {por_segundo:11.1f}  {reparto}")
+
+        if db.replicas is not None:
+            with contextlib.redirect_stdout(io.StringIO()):
+                perdidas = verificar_lectura_propia(db, args.reservas, ids_clientes,
+                                                    args.semilla)
+            print(f"\nLectura propia tras Reserva.crear: {perdidas} de "
+                  f"{args.reservas} reservas no aparecieron")
+        with contextlib.redirect_stdout(io.StringIO()):
+            db.desconectar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+Prueba de reintentos concurrentes de reservas con clave de idempotencia
+Viajes Aventura
+
+Simula clientes que reintentan una reserva que parecio fallar: por cada
+clave lanza `--duplicados` peticiones identicas en paralelo (con la misma
+clave de idempotencia) y verifica que quede una sola fila en Reservas y que
+el cupo se descuente una sola vez. Con --http las peticiones van por el
+servicio HTTP con la cabecera Idempotency-Key.
+
+Al final compara la latencia (p50/p95) de una reserva nueva, de un
+reintento respondido desde las claves recientes y de un reintento que
+busca la clave en la base de datos.
+
+Uso:
+    python benchmarks/reservas_duplicadas.py --backend sqlite --sembrar 1000
+    python benchmarks/reservas_duplicadas.py --claves 200 --duplicados 16
+    python benchmarks/reservas_duplicadas.py --backend sqlite --http
+"""
+import argparse
+import contextlib
+import io
+import threading
+import time
+import uuid
+from datetime import date, timedelta
+
+from carga_http import Cliente as ClienteHTTP, preparar_cuentas
+from generador_datos import BASE_DATOS_BENCH, abrir_base_bench, sembrar, volumenes
+import hash_passwords
+from modelos import Cliente
+from paquetes_reservas import PaqueteTuristico, Reserva
+from servicio_http import ServidorAPI
+
+
+def crear_paquete(db, cupo):
+    """Crea el paquete sobre el que se reserva."""
+    inicio = date.today() + timedelta(days=60)
+    paquete = PaqueteTuristico(db, nombre="Paquete reintentos", fecha_inicio=inicio,
+                               fecha_fin=inicio + timedelta(days=7),
+                               precio_total=180000, cupo_disponible=cupo)
+    paquete.guardar()
+    return paquete.id_paquete
+
+
+def contar_por_clave(db, claves):
+    """Filas de Reservas por clave de idempotencia."""
+    filas = {}
+    with db.conexion() as connection:
+        cursor = connection.cursor()
+        for clave in claves:
+            cursor.execute("SELECT COUNT(*) FROM Reservas WHERE clave_idempotencia = %s",
+                           (clave,))
+            filas[clave] = cursor.fetchone()[0]
+        connection.rollback()
+        cursor.close()
+    return filas
+
+
+def cupo_actual(db, id_paquete):
+    """Cupo disponible del paquete, leido de la base de datos."""
+    with db.conexion() as connection:
+        cursor = connection.cursor()
+        cursor.execute("SELECT cupo_disponible FROM PaquetesTuristicos "
+                       "WHERE id_paquete = %s", (id_paquete,))
+        cupo = cursor.fetchone()[0]
+        connection.rollback()
+        cursor.close()
+    return cupo
+
+
+def duplicar(peticion, claves, duplicados):
+    """
+    Por cada clave lanza `duplicados` llamadas a `peticion(i, clave)` en
+    paralelo. Devuelve (IDs devueltos por clave, segundos).
+    """
+    devueltos = {clave: set() for clave in claves}
+    inicio = time.perf_counter()
+    for clave in claves:
+        barrera = threading.Barrier(duplicados)
+
+        def reintentar(i, clave=clave, barrera=barrera):
+            barrera.wait()
+            devueltos[clave].add(peticion(i, clave))
+
+        hilos = [threading.Thread(target=reintentar, args=(i,))
+                 for i in range(duplicados)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+    return devueltos, time.perf_counter() - inicio
+
+
+def percentiles(funcion, repeticiones):
+    """(p50, p95) en microsegundos de `funcion(i)`."""
+    tiempos = []
+    for i in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion(i)
+        tiempos.append((time.perf_counter() - inicio) * 1e6)
+    tiempos.sort()
+    return tiempos[len(tiempos) // 2], tiempos[int(len(tiempos) * 0.95)]
+
+
+def main():
+    """Punto de entrada de la prueba."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--claves", type=int, default=100,
+                        help="Reservas distintas (una clave cada una)")
+    parser.add_argument("--duplicados", type=int, default=8,
+                        help="Peticiones simultaneas con la misma clave")
+    parser.add_argument("--http", action="store_true",
+                        help="Enviar las peticiones por el servicio HTTP")
+    parser.add_argument("--repeticiones", type=int, default=500,
+                        help="Mediciones de latencia por caso")
+    parser.add_argument("--sembrar", type=int, metavar="RESERVAS",
+                        help="Sembrar la base con este numero de reservas antes")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--base-datos", default=BASE_DATOS_BENCH)
+    parser.add_argument("--backend", choices=("mysql", "sqlite"), default="mysql")
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        db = abrir_base_bench(args.base_datos, backend=args.backend, usar_pool=True,
+                              pool_min=1, pool_max=args.duplicados)
+        if args.sembrar:
+            sembrar(db, **volumenes(args.sembrar), semilla=args.semilla)
+        clientes = Cliente.listar_todos(db)
+        if not clientes:
+            parser.error("La base de benchmark no tiene clientes; use --sembrar")
+        # Con --http la cuenta carga1 es del cliente de menor ID
+        id_cliente = min(c.id_cliente for c in clientes)
+        id_paquete = crear_paquete(db, args.claves + 3 * args.repeticiones)
+
+    servidor = None
+    if args.http:
+        hash_passwords.configurar(rondas=4)
+        servidor = ServidorAPI(db, ("127.0.0.1", 0), registrar_peticiones=False)
+        servidor.iniciar()
+        conexiones = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            cuenta = preparar_cuentas(db, 1)[0]
+            for _ in range(args.duplicados):
+                cliente = ClienteHTTP(*servidor.server_address)
+                cliente.iniciar_sesion(*cuenta)
+                conexiones.append(cliente)
+
+        def peticion(i, clave):
+            codigo, respuesta = conexiones[i].pedir(
+                "POST", "/api/reservas", {"id_paquete": id_paquete, "numero_personas": 1},
+                {"Idempotency-Key": clave})
+            return respuesta.get("id_reserva") if codigo == 201 else None
+    else:
+        def peticion(i, clave):
+            reserva = Reserva(db, id_cliente=id_cliente, id_paquete=id_paquete,
+                              numero_personas=1)
+            return reserva.crear(clave)
+
+    claves = [str(uuid.uuid4()) for _ in range(args.claves)]
+    cupo_antes = cupo_actual(db, id_paquete)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            devueltos, segundos = duplicar(peticion, claves, args.duplicados)
+    finally:
+        if servidor is not None:
+            servidor.shutdown()
+            servidor.server_close()
+
+    filas = contar_por_clave(db, claves)
+    repetidas = sum(1 for n in filas.values() if n > 1)
+    faltantes = sum(1 for n in filas.values() if n == 0)
+    distintas = sum(1 for ids in devueltos.values() if len(ids - {None}) > 1)
+    descontado = cupo_antes - cupo_actual(db, id_paquete)
+    print(f"{args.claves} claves x {args.duplicados} peticiones simultaneas "
+          f"({'HTTP' if args.http else 'modelo'}): {segundos:.2f} s")
+    print(f"  claves con mas de una fila:       {repetidas}")
+    print(f"  claves sin reserva:               {faltantes}")
+    print(f"  claves con respuestas distintas:  {distintas}")
+    print(f"  cupo descontado: {descontado} (esperado {args.claves - faltantes})")
+
+    def reserva(clave):
+        return Reserva(db, id_cliente=id_cliente, id_paquete=id_paquete,
+                       numero_personas=1).crear(clave)
+
+    def desde_base(i):
+        db.claves_idempotencia.limpiar()
+        reserva(claves[i % len(claves)])
+
+    print(f"\n{'caso':40} {'p50 (us)':>10} {'p95 (us)':>10}")
+    with contextlib.redirect_stdout(io.StringIO()):
+        casos = [
+            ("reserva nueva (sin clave)", percentiles(lambda i: reserva(None),
+                                                      args.repeticiones)),
+            ("reintento, clave en cache", percentiles(
+                lambda i: reserva(claves[i % len(claves)]), args.repeticiones)),
+            ("reintento, clave en la base de datos",
+             percentiles(desde_base, args.repeticiones)),
+        ]
+    for nombre, (p50, p95) in casos:
+        print(f"{nombre:40} {p50:10.1f} {p95:10.1f}")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        db.desconectar()
+
+
+if __name__ == "__main__":
+    main()
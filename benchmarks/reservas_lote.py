@@ -0,0 +1,151 @@
+"""
+Benchmark de reservas en lote
+Viajes Aventura
+
+Crea las mismas solicitudes (cliente, paquete, personas) con una llamada a
+Reserva.crear por reserva y con Reserva.crear_lote, para varios tamanos de
+lote, e informa reservas por segundo. Luego lanza lotes concurrentes sobre
+los mismos paquetes en distinto orden: como crear_lote bloquea los paquetes
+en orden de ID no deberia haber lotes fallidos por deadlock, y el cupo
+final debe cuadrar con los asientos reservados.
+
+Uso:
+    python benchmarks/reservas_lote.py --backend sqlite --sembrar 1000
+    python benchmarks/reservas_lote.py --tamanos 10,100,1000 --hilos 8
+"""
+import argparse
+import contextlib
+import io
+import random
+import threading
+import time
+from datetime import date, timedelta
+
+from generador_datos import BASE_DATOS_BENCH, abrir_base_bench, sembrar, volumenes
+from modelos import Cliente
+from paquetes_reservas import PaqueteTuristico, Reserva
+
+
+def crear_paquetes(db, cantidad, cupo):
+    """Crea `cantidad` paquetes de benchmark con `cupo` asientos cada uno."""
+    inicio = date.today() + timedelta(days=60)
+    ids = []
+    for i in range(cantidad):
+        paquete = PaqueteTuristico(db, nombre=f"Paquete lote {i}", fecha_inicio=inicio,
+                                   fecha_fin=inicio + timedelta(days=7),
+                                   precio_total=250000, cupo_disponible=cupo)
+        paquete.guardar()
+        ids.append(paquete.id_paquete)
+    return ids
+
+
+def solicitudes(azar, tamano, ids_clientes, ids_paquetes):
+    """Manifiesto de `tamano` solicitudes de 1 a 4 personas."""
+    return [(azar.choice(ids_clientes), azar.choice(ids_paquetes), azar.randint(1, 4))
+            for _ in range(tamano)]
+
+
+def una_por_una(db, manifiesto):
+    """Crea el manifiesto con Reserva.crear. Devuelve reservas por segundo."""
+    inicio = time.perf_counter()
+    creadas = 0
+    for id_cliente, id_paquete, personas in manifiesto:
+        reserva = Reserva(db, id_cliente=id_cliente, id_paquete=id_paquete,
+                          numero_personas=personas)
+        if reserva.crear():
+            creadas += 1
+    return creadas / (time.perf_counter() - inicio)
+
+
+def concurrentes(db, hilos, lotes, tamano, ids_clientes, ids_paquetes, semilla):
+    """
+    Lanza `lotes` lotes por hilo sobre los mismos paquetes. Devuelve
+    (reservas por segundo, asientos reservados, lotes fallidos).
+    """
+    asientos = [0] * hilos
+    fallidos = [0] * hilos
+
+    def trabajar(i):
+        azar = random.Random(semilla + i)
+        for _ in range(lotes):
+            resultado = Reserva.crear_lote(
+                db, solicitudes(azar, tamano, ids_clientes, ids_paquetes))
+            if resultado is None:
+                fallidos[i] += 1
+            else:
+                asientos[i] += resultado["asientos"]
+
+    inicio = time.perf_counter()
+    trabajadores = [threading.Thread(target=trabajar, args=(i,)) for i in range(hilos)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        for hilo in trabajadores:
+            hilo.start()
+        for hilo in trabajadores:
+            hilo.join()
+    segundos = time.perf_counter() - inicio
+    return hilos * lotes * tamano / segundos, sum(asientos), sum(fallidos)
+
+
+def main():
+    """Punto de entrada del benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tamanos", default="10,100,1000",
+                        help="Solicitudes por lote, separadas por coma")
+    parser.add_argument("--paquetes", type=int, default=20,
+                        help="Paquetes distintos en cada manifiesto")
+    parser.add_argument("--hilos", type=int, default=4,
+                        help="Hilos de la prueba de lotes concurrentes")
+    parser.add_argument("--lotes", type=int, default=10,
+                        help="Lotes por hilo en la prueba concurrente")
+    parser.add_argument("--sembrar", type=int, metavar="RESERVAS",
+                        help="Sembrar la base con este numero de reservas antes")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--base-datos", default=BASE_DATOS_BENCH)
+    parser.add_argument("--backend", choices=("mysql", "sqlite"), default="mysql")
+    args = parser.parse_args()
+
+    tamanos = [int(t) for t in args.tamanos.split(",")]
+    azar = random.Random(args.semilla)
+    # Cupo suficiente para que ninguna solicitud se rechace por cupo
+    cupo = 4 * (2 * sum(tamanos) + args.hilos * args.lotes * max(tamanos))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        db = abrir_base_bench(args.base_datos, backend=args.backend, usar_pool=True,
+                              pool_min=1, pool_max=args.hilos)
+        if args.sembrar:
+            sembrar(db, **volumenes(args.sembrar), semilla=args.semilla)
+        ids_clientes = [c.id_cliente for c in Cliente.listar_todos(db)]
+        ids_paquetes = crear_paquetes(db, args.paquetes, cupo)
+    if not ids_clientes:
+        parser.error("La base de benchmark no tiene clientes; use --sembrar")
+
+    print(f"{'tamano':>7} {'crear (res/s)':>14} {'crear_lote (res/s)':>19} {'aceleracion':>12}")
+    for tamano in tamanos:
+        manifiesto = solicitudes(azar, tamano, ids_clientes, ids_paquetes)
+        with contextlib.redirect_stdout(io.StringIO()):
+            individual = una_por_una(db, manifiesto)
+            resultado = Reserva.crear_lote(db, manifiesto, todo_o_nada=True)
+        en_lote = resultado["reservas_por_segundo"] if resultado else 0.0
+        print(f"{tamano:7} {individual:14.1f} {en_lote:19.1f} "
+              f"{en_lote / individual if individual else 0.0:11.1f}x")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        antes = sum(PaqueteTuristico.buscar_por_id(db, i).cupo_disponible
+                    for i in ids_paquetes)
+    por_segundo, asientos, fallidos = concurrentes(
+        db, args.hilos, args.lotes, max(tamanos), ids_clientes, ids_paquetes,
+        args.semilla)
+    with contextlib.redirect_stdout(io.StringIO()):
+        despues = sum(PaqueteTuristico.buscar_por_id(db, i).cupo_disponible
+                      for i in ids_paquetes)
+    print(f"\n{args.hilos} hilos x {args.lotes} lotes de {max(tamanos)}: "
+          f"{por_segundo:.1f} reservas/s, {fallidos} lotes fallidos, "
+          f"cupo {'cuadra' if antes - despues == asientos else 'NO cuadra'} "
+          f"({antes - despues} descontados, {asientos} reservados)")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        db.desconectar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark de sentencias preparadas contra SQL en texto
+Viajes Aventura
+
+Mide la latencia de las busquedas por clave (buscar_por_id, buscar_por_email,
+la consulta de autenticacion) con el registro de sentencias preparadas
+activo y desactivado, sobre la base de benchmark y sin cache del catalogo.
+
+Uso:
+    python benchmarks/sentencias_preparadas.py --sembrar 10000 --iteraciones 2000
+    python benchmarks/sentencias_preparadas.py --backend sqlite --sembrar 10000
+"""
+import argparse
+import contextlib
+import io
+import random
+import statistics
+import time
+
+from generador_datos import BASE_DATOS_BENCH, abrir_base_bench, sembrar, volumenes
+from modelos import Cliente, Destino
+from paquetes_reservas import PaqueteTuristico, Reserva
+
+
+def casos(db, azar):
+    """Busquedas a medir, como (nombre, funcion sin argumentos)."""
+    with db.conexion() as connection:
+        cursor = connection.cursor()
+        maximos = []
+        for tabla, columna in (("Clientes", "id_cliente"), ("Destinos", "id_destino"),
+                               ("PaquetesTuristicos", "id_paquete"),
+                               ("Reservas", "id_reserva")):
+            cursor.execute(f"SELECT MAX({columna}) FROM {tabla}")
+            maximos.append(cursor.fetchone()[0])
+        cursor.close()
+    max_cliente, max_destino, max_paquete, max_reserva = maximos
+
+    def autenticar():
+        with db.conexion() as connection:
+            db.consultar_preparada(connection, "usuarios.autenticar", ("bench",))
+
+    return [
+        ("Cliente.buscar_por_id",
+         lambda: Cliente.buscar_por_id(db, azar.randint(1, max_cliente))),
+        ("Cliente.buscar_por_email",
+         lambda: Cliente.buscar_por_email(
+             db, f"cliente{azar.randint(1, max_cliente)}@bench.test")),
+        ("Destino.buscar_por_id",
+         lambda: Destino.buscar_por_id(db, azar.randint(1, max_destino))),
+        ("PaqueteTuristico.buscar_por_id",
+         lambda: PaqueteTuristico.buscar_por_id(db, azar.randint(1, max_paquete))),
+        ("Reserva.buscar_por_id",
+         lambda: Reserva.buscar_por_id(db, azar.randint(1, max_reserva))),
+        ("consulta de Usuario.autenticar", autenticar),
+    ]
+
+
+def medir(db, iteraciones, semilla):
+    """Devuelve {caso: (mediana_us, p95_us)} para la configuracion de `db`."""
+    resultados = {}
+    for nombre, funcion in casos(db, random.Random(semilla)):
+        tiempos = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(50):  # calentamiento (prepara las sentencias)
+                funcion()
+            for _ in range(iteraciones):
+                inicio = time.perf_counter()
+                funcion()
+                tiempos.append((time.perf_counter() - inicio) * 1e6)
+        tiempos.sort()
+        resultados[nombre] = (statistics.median(tiempos),
+                              tiempos[int(len(tiempos) * 0.95)])
+    return resultados
+
+
+def main():
+    """Punto de entrada del benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iteraciones", type=int, default=2000)
+    parser.add_argument("--sembrar", type=int, metavar="RESERVAS",
+                        help="Sembrar la base con este numero de reservas antes")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--base-datos", default=BASE_DATOS_BENCH)
+    parser.add_argument("--backend", choices=("mysql", "sqlite"), default="mysql")
+    args = parser.parse_args()
+
+    if args.sembrar:
+        with contextlib.redirect_stdout(io.StringIO()):
+            base = abrir_base_bench(args.base_datos, backend=args.backend)
+            sembrar(base, **volumenes(args.sembrar))
+            base.desconectar()
+
+    mediciones = {}
+    for usar_preparadas in (False, True):
+        with contextlib.redirect_stdout(io.StringIO()):
+            db = abrir_base_bench(args.base_datos, backend=args.backend,
+                                  usar_pool=True, pool_min=1, pool_max=1,
+                                  usar_preparadas=usar_preparadas)
+        mediciones[usar_preparadas] = medir(db, args.iteraciones, args.semilla)
+        with contextlib.redirect_stdout(io.StringIO()):
+            db.desconectar()
+
+    print(f"{'caso':34} {'texto p50/p95 (us)':>20} {'preparada p50/p95 (us)':>24} "
+          f"{'mejora p50':>11}")
+    for nombre, (texto_p50, texto_p95) in mediciones[False].items():
+        prep_p50, prep_p95 = mediciones[True][nombre]
+        print(f"{nombre:34} {texto_p50:9.1f} /{texto_p95:9.1f} "
+              f"{prep_p50:11.1f} /{prep_p95:11.1f} {texto_p50 / prep_p50:10.2f}x")
+
+
+if __name__ == "__main__":
+    main()
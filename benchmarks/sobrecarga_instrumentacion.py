@@ -0,0 +1,65 @@
+"""
+Benchmark del costo de la instrumentacion de consultas
+Viajes Aventura
+
+Mide las mismas busquedas por clave que sentencias_preparadas.py con la
+instrumentacion de consultas apagada y encendida, y muestra al final las
+sentencias mas costosas segun el registro de la corrida instrumentada.
+
+Uso:
+    python benchmarks/sobrecarga_instrumentacion.py --sembrar 10000
+    python benchmarks/sobrecarga_instrumentacion.py --backend sqlite --sembrar 10000
+"""
+import argparse
+import contextlib
+import io
+
+from generador_datos import BASE_DATOS_BENCH, abrir_base_bench, sembrar, volumenes
+from sentencias_preparadas import medir
+
+
+def main():
+    """Punto de entrada del benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iteraciones", type=int, default=2000)
+    parser.add_argument("--sembrar", type=int, metavar="RESERVAS",
+                        help="Sembrar la base con este numero de reservas antes")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--base-datos", default=BASE_DATOS_BENCH)
+    parser.add_argument("--backend", choices=("mysql", "sqlite"), default="mysql")
+    args = parser.parse_args()
+
+    if args.sembrar:
+        with contextlib.redirect_stdout(io.StringIO()):
+            base = abrir_base_bench(args.base_datos, backend=args.backend,
+                                    instrumentar=False)
+            sembrar(base, **volumenes(args.sembrar))
+            base.desconectar()
+
+    mediciones = {}
+    for instrumentar in (False, True):
+        with contextlib.redirect_stdout(io.StringIO()):
+            db = abrir_base_bench(args.base_datos, backend=args.backend,
+                                  usar_pool=True, pool_min=1, pool_max=1,
+                                  instrumentar=instrumentar)
+        mediciones[instrumentar] = medir(db, args.iteraciones, args.semilla)
+        if instrumentar:
+            sentencias = db.instrumentacion.instantanea()
+        with contextlib.redirect_stdout(io.StringIO()):
+            db.desconectar()
+
+    print(f"{'caso':34} {'sin p50/p95 (us)':>20} {'con p50/p95 (us)':>20} "
+          f"{'costo p50':>10}")
+    for nombre, (sin_p50, sin_p95) in mediciones[False].items():
+        con_p50, con_p95 = mediciones[True][nombre]
+        print(f"{nombre:34} {sin_p50:9.1f} /{sin_p95:9.1f} "
+              f"{con_p50:9.1f} /{con_p95:9.1f} {con_p50 - sin_p50:8.1f}us")
+
+    print(f"\n{'sentencia':60} {'llamadas':>9} {'p50 (ms)':>9} {'p99 (ms)':>9}")
+    for fila in sentencias[:5]:
+        print(f"{fila['sentencia'][:60]:60} {fila['llamadas']:9} "
+              f"{fila['p50_ms']:9.3f} {fila['p99_ms']:9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Suite de benchmarks del sistema de reservas
+Viajes Aventura
+
+Siembra la base de benchmark con varios tamanos de datos, cronometra los
+metodos publicos de los modelos y guarda los resultados en JSON. Con
+--comparar se contrastan contra una ejecucion anterior (p. ej. de otro
+commit) y se termina con error si alguna mediana empeora mas del umbral.
+
+Uso:
+    python benchmarks/suite.py --tamanos 1000,10000 --salida actual.json
+    python benchmarks/suite.py --tamanos 1000,10000 --comparar base.json
+    python benchmarks/suite.py --tamanos 1000,10000 --backend sqlite
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+from generador_datos import BASE_DATOS_BENCH, abrir_base_bench, sembrar, volumenes
+import hash_passwords
+from modelos import Cliente, Destino, Usuario
+from paquetes_reservas import PaqueteTuristico, Reserva
+
+PASSWORD_BENCH = "clave-benchmark"
+
+
+def cronometrar(funcion, repeticiones):
+    """Ejecuta `funcion` varias veces y resume los tiempos en milisegundos."""
+    tiempos = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        funcion()  # calentamiento
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            funcion()
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+
+    tiempos.sort()
+    return {
+        "min_ms": round(tiempos[0], 3),
+        "mediana_ms": round(statistics.median(tiempos), 3),
+        "p95_ms": round(tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.95))], 3),
+        "media_ms": round(statistics.fmean(tiempos), 3),
+        "repeticiones": repeticiones,
+    }
+
+
+def preparar_usuario(db):
+    """Crea el usuario usado para medir Usuario.autenticar."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        usuario = Usuario(db, nombre_usuario="bench", password=PASSWORD_BENCH,
+                          rol="cliente", id_cliente=1)
+        usuario.registrar()
+
+
+def casos(db):
+    """Metodos publicos a medir, como (nombre, funcion sin argumentos)."""
+    hoy = date.today()
+
+    with db.conexion() as connection:
+        cursor = connection.cursor()
+        cursor.execute("""
+            SELECT id_cliente FROM Reservas
+            GROUP BY id_cliente ORDER BY COUNT(*) DESC LIMIT 1
+        """)
+        id_cliente = cursor.fetchone()[0]
+        cursor.execute("""
+            SELECT id_paquete FROM PaquetesTuristicos
+            WHERE fecha_inicio > CURDATE() ORDER BY id_paquete LIMIT 1
+        """)
+        id_paquete = cursor.fetchone()[0]
+        # Cupo amplio para que Reserva.crear no se quede sin asientos
+        cursor.execute("""
+            UPDATE PaquetesTuristicos SET cupo_disponible = 1000000, disponible = TRUE
+            WHERE id_paquete = %s
+        """, (id_paquete,))
+        PaqueteTuristico.sincronizar_disponibilidad(cursor, id_paquete)
+        connection.commit()
+        cursor.close()
+
+    def crear_reserva():
+        Reserva(db, id_cliente=id_cliente, id_paquete=id_paquete).crear()
+
+    return [
+        ("Cliente.listar_todos", lambda: Cliente.listar_todos(db)),
+        ("Destino.listar_todos", lambda: Destino.listar_todos(db)),
+        ("PaqueteTuristico.listar_todos",
+         lambda: PaqueteTuristico.listar_todos(db)),
+        ("PaqueteTuristico.listar_todos(solo_disponibles)",
+         lambda: PaqueteTuristico.listar_todos(db, solo_disponibles=True)),
+        ("PaqueteTuristico.buscar_por_fechas",
+         lambda: PaqueteTuristico.buscar_por_fechas(
+             db, hoy, hoy + timedelta(days=90))),
+        ("PaqueteTuristico.buscar_por_id",
+         lambda: PaqueteTuristico.buscar_por_id(db, id_paquete)),
+        ("Reserva.listar_por_cliente",
+         lambda: Reserva.listar_por_cliente(db, id_cliente)),
+        ("Reserva.listar_por_cliente_detallado",
+         lambda: Reserva.listar_por_cliente_detallado(db, id_cliente)),
+        ("Reserva.listar_todas", lambda: Reserva.listar_todas(db)),
+        ("Reserva.listar_pagina", lambda: Reserva.listar_pagina(db, limite=50)),
+        ("Reserva.crear", crear_reserva),
+        ("Usuario.autenticar",
+         lambda: Usuario(db, nombre_usuario="bench",
+                         password=PASSWORD_BENCH).autenticar()),
+    ]
+
+
+def ejecutar(tamanos, repeticiones, base_datos, semilla, backend="mysql"):
+    """Ejecuta la suite completa y devuelve el documento de resultados."""
+    db = abrir_base_bench(base_datos, usar_pool=True, pool_min=1, pool_max=4,
+                          backend=backend)
+    resultados = {}
+
+    try:
+        for tamano in tamanos:
+            print(f"Sembrando {tamano} reservas...", file=sys.stderr)
+            with contextlib.redirect_stdout(io.StringIO()):
+                siembra = sembrar(db, semilla=semilla, **volumenes(tamano))
+            preparar_usuario(db)
+
+            mediciones = {}
+            for nombre, funcion in casos(db):
+                mediciones[nombre] = cronometrar(funcion, repeticiones)
+                print(f"  {nombre:50} {mediciones[nombre]['mediana_ms']:10.2f} ms",
+                      file=sys.stderr)
+
+            resultados[str(tamano)] = {"datos": siembra, "metodos": mediciones}
+    finally:
+        db.desconectar()
+
+    return {
+        "commit": _commit_actual(),
+        "backend": backend,
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "rondas_bcrypt": hash_passwords.hasher_actual().rondas,
+        "repeticiones": repeticiones,
+        "semilla": semilla,
+        "resultados": resultados,
+    }
+
+
+def _commit_actual():
+    """Hash corto del commit actual, si el proyecto esta en git."""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                              capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar(actual, anterior, umbral):
+    """
+    Imprime la razon actual/anterior de cada mediana.
+    Devuelve la lista de metodos que empeoraron mas que `umbral`.
+    """
+    regresiones = []
+    print(f"\nComparacion {anterior.get('commit')} -> {actual.get('commit')}")
+    for tamano, datos in actual["resultados"].items():
+        previos = anterior["resultados"].get(tamano, {}).get("metodos", {})
+        for nombre, medicion in datos["metodos"].items():
+            if nombre not in previos:
+                continue
+            razon = medicion["mediana_ms"] / max(previos[nombre]["mediana_ms"], 1e-6)
+            marca = ""
+            if razon > 1 + umbral:
+                marca = "  REGRESION"
+                regresiones.append((tamano, nombre, razon))
+            print(f"  [{tamano:>8}] {nombre:50} {razon:6.2f}x{marca}")
+    return regresiones
+
+
+def main():
+    """Punto de entrada de la suite."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tamanos", default="1000,10000",
+                        help="Numeros de reservas separados por coma")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--rondas", type=int, default=hash_passwords.RONDAS_BCRYPT,
+                        help="Costo bcrypt usado en Usuario.autenticar")
+    parser.add_argument("--base-datos", default=BASE_DATOS_BENCH)
+    parser.add_argument("--backend", choices=("mysql", "sqlite"), default="mysql")
+    parser.add_argument("--salida", help="Archivo JSON de resultados")
+    parser.add_argument("--comparar", help="JSON de una ejecucion anterior")
+    parser.add_argument("--umbral", type=float, default=0.2,
+                        help="Empeoramiento tolerado (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    hash_passwords.configurar(rondas=args.rondas)
+    tamanos = [int(t) for t in args.tamanos.split(",")]
+    documento = ejecutar(tamanos, args.repeticiones, args.base_datos, args.semilla,
+                         args.backend)
+
+    texto = json.dumps(documento, indent=2, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as archivo:
+            archivo.write(texto + "\n")
+    else:
+        print(texto)
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as archivo:
+            anterior = json.load(archivo)
+        if comparar(documento, anterior, args.umbral):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Utilidades compartidas por los benchmarks
+Viajes Aventura
+"""
+import os
+import sys
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conexion_db import Database  # noqa: E402
+
+
+class _CursorRegistrador:
+    """Cursor que registra cada execute antes de delegarlo."""
+
+    def __init__(self, cursor, db):
+        self._cursor = cursor
+        self._db = db
+
+    def execute(self, sql, params=None, *args, **kwargs):
+        if self._db.registrando:
+            self._db.sentencias.append((sql, params))
+        return self._cursor.execute(sql, params, *args, **kwargs)
+
+    def __getattr__(self, nombre):
+        return getattr(self._cursor, nombre)
+
+
+class _ConexionRegistradora:
+    """Conexion que entrega cursores registradores."""
+
+    def __init__(self, conexion, db):
+        self._conexion = conexion
+        self._db = db
+
+    def cursor(self, *args, **kwargs):
+        return _CursorRegistrador(self._conexion.cursor(*args, **kwargs), self._db)
+
+    def __getattr__(self, nombre):
+        return getattr(self._conexion, nombre)
+
+
+class DatabaseRegistradora(Database):
+    """Database que registra las sentencias ejecutadas por los modelos."""
+
+    def __init__(self, **config):
+        super().__init__(**config)
+        self.sentencias = []
+        self.registrando = True
+
+    @property
+    def consultas(self):
+        """Numero de sentencias registradas."""
+        return len(self.sentencias)
+
+    def reiniciar(self):
+        """Descarta las sentencias registradas."""
+        self.sentencias = []
+
+    @contextmanager
+    def conexion(self):
+        with super().conexion() as connection:
+            yield _ConexionRegistradora(connection, self)
@@ -0,0 +1,181 @@
+"""
+Verificacion de planes de ejecucion (EXPLAIN)
+Viajes Aventura
+
+Ejecuta las consultas de lectura de modelos.py y paquetes_reservas.py,
+registra cada SELECT y corre EXPLAIN sobre ella. Termina con error si alguna
+consulta filtrada o paginada recorre una tabla completa (type = ALL).
+
+Debe ejecutarse sobre el conjunto de datos de benchmark: con tablas de pocas
+filas el optimizador prefiere recorridos completos aunque existan indices.
+
+Uso:
+    python benchmarks/verificar_planes.py --sembrar 100000
+"""
+import argparse
+import contextlib
+import io
+import re
+import sys
+from datetime import date, timedelta
+
+from utilidades import DatabaseRegistradora
+from generador_datos import BASE_DATOS_BENCH, abrir_base_bench, sembrar, volumenes
+from modelos import Cliente, Destino, Usuario
+from paquetes_reservas import PaqueteTuristico, Reserva
+
+# Por debajo de este tamano el resultado de EXPLAIN no es representativo
+FILAS_MINIMAS = 1000
+
+
+def _normalizar(sql):
+    """Colapsa espacios para mostrar y clasificar la sentencia."""
+    return re.sub(r"\s+", " ", sql).strip()
+
+
+def es_lectura_completa(sql):
+    """Un listado sin WHERE ni LIMIT lee toda la tabla por definicion."""
+    sql = _normalizar(sql).upper()
+    return " WHERE " not in sql and " LIMIT " not in sql
+
+
+def obtener_muestras(db):
+    """Busca ids y valores reales para parametrizar las consultas."""
+    with db.conexion() as connection:
+        cursor = connection.cursor(dictionary=True)
+        muestras = {}
+        for tabla in ("Clientes", "Destinos", "PaquetesTuristicos", "Reservas"):
+            cursor.execute(f"SELECT COUNT(*) AS total FROM {tabla}")
+            muestras[f"filas_{tabla}"] = cursor.fetchone()["total"]
+
+        cursor.execute("SELECT id_cliente, id_paquete FROM Reservas LIMIT 1")
+        row = cursor.fetchone() or {}
+        muestras["id_cliente"] = row.get("id_cliente", 1)
+        muestras["id_paquete"] = row.get("id_paquete", 1)
+
+        cursor.execute("SELECT email FROM Clientes LIMIT 1")
+        row = cursor.fetchone() or {}
+        muestras["email"] = row.get("email", "")
+
+        cursor.execute("SELECT id_destino FROM Destinos LIMIT 1")
+        row = cursor.fetchone() or {}
+        muestras["id_destino"] = row.get("id_destino", 1)
+
+        cursor.execute("SELECT id_reserva FROM Reservas LIMIT 1")
+        row = cursor.fetchone() or {}
+        muestras["id_reserva"] = row.get("id_reserva", 1)
+
+        cursor.execute("SELECT nombre_usuario FROM Usuarios LIMIT 1")
+        row = cursor.fetchone() or {}
+        muestras["nombre_usuario"] = row.get("nombre_usuario", "")
+
+        cursor.execute("SELECT id_paquete FROM PaquetesTuristicos LIMIT 200")
+        muestras["ids_paquetes"] = [r["id_paquete"] for r in cursor.fetchall()]
+        connection.commit()
+        cursor.close()
+    return muestras
+
+
+def ejecutar_consultas(db, m):
+    """Llama a cada metodo de lectura de los modelos."""
+    hoy = date.today()
+
+    _, despues = Cliente.listar_pagina(db, limite=20)
+    Cliente.listar_pagina(db, limite=20, despues=despues)
+    Cliente.buscar_por_id(db, m["id_cliente"])
+    Cliente.buscar_por_email(db, m["email"])
+
+    Usuario.listar_pagina(db, limite=20)
+    Usuario(db, nombre_usuario=m["nombre_usuario"], password="x").autenticar()
+
+    Destino.listar_pagina(db, limite=20)
+    _, despues = Destino.listar_pagina(db, limite=20, solo_disponibles=True)
+    Destino.listar_pagina(db, limite=20, despues=despues, solo_disponibles=True)
+    Destino.listar_todos(db)
+    Destino.buscar_por_id(db, m["id_destino"])
+
+    PaqueteTuristico.listar_todos(db, solo_disponibles=True)
+    _, despues = PaqueteTuristico.listar_pagina(db, limite=20)
+    PaqueteTuristico.listar_pagina(db, limite=20, despues=despues)
+    PaqueteTuristico.listar_pagina(db, limite=20, solo_disponibles=True)
+    PaqueteTuristico.buscar_por_id(db, m["id_paquete"])
+    PaqueteTuristico.buscar_por_fechas(db, hoy, hoy + timedelta(days=30))
+    PaqueteTuristico.cargar_destinos_lote(
+        db, [PaqueteTuristico(db, id_paquete=i) for i in m["ids_paquetes"]])
+
+    Reserva.listar_por_cliente(db, m["id_cliente"])
+    Reserva.listar_por_cliente_detallado(db, m["id_cliente"])
+    _, despues = Reserva.listar_pagina(db, limite=20)
+    Reserva.listar_pagina(db, limite=20, despues=despues)
+    Reserva.buscar_por_id(db, m["id_reserva"])
+
+
+def main():
+    """Punto de entrada de la verificacion."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-datos", default=BASE_DATOS_BENCH)
+    parser.add_argument("--sembrar", type=int, metavar="RESERVAS",
+                        help="Sembrar la base con este numero de reservas antes")
+    args = parser.parse_args()
+
+    if args.sembrar:
+        base = abrir_base_bench(args.base_datos)
+        with contextlib.redirect_stdout(io.StringIO()):
+            sembrar(base, **volumenes(args.sembrar))
+        base.desconectar()
+
+    db = DatabaseRegistradora(database=args.base_datos, usar_cache=False,
+                              usar_pool=True, pool_min=1, pool_max=2)
+    db.registrando = False
+    muestras = obtener_muestras(db)
+
+    pequenas = [t for t, n in muestras.items()
+                if t.startswith("filas_") and n < FILAS_MINIMAS]
+    if pequenas:
+        print(f"Advertencia: tablas con menos de {FILAS_MINIMAS} filas: "
+              f"{', '.join(t[6:] for t in pequenas)}")
+
+    db.registrando = True
+    with contextlib.redirect_stdout(io.StringIO()):
+        ejecutar_consultas(db, muestras)
+    db.registrando = False
+
+    vistas = set()
+    fallas = []
+    with db.conexion() as connection:
+        cursor = connection.cursor(dictionary=True)
+        for sql, params in db.sentencias:
+            clave = _normalizar(sql)
+            if not clave.upper().startswith("SELECT") or clave in vistas:
+                continue
+            vistas.add(clave)
+
+            cursor.execute("EXPLAIN " + sql, params)
+            plan = cursor.fetchall()
+            recorridos = [p["table"] for p in plan if p["type"] == "ALL"]
+
+            if recorridos and not es_lectura_completa(sql):
+                estado = "FALLA"
+                fallas.append(clave)
+            elif recorridos:
+                estado = "ok (lectura completa)"
+            else:
+                estado = "ok"
+
+            print(f"[{estado}] {clave[:100]}")
+            for p in plan:
+                print(f"    {p['table']}: type={p['type']} key={p['key']} "
+                      f"rows={p['rows']}")
+        connection.commit()
+        cursor.close()
+
+    db.desconectar()
+
+    if fallas:
+        print(f"\n{len(fallas)} consulta(s) recorren tablas completas")
+        sys.exit(1)
+    print(f"\n{len(vistas)} consultas verificadas sin recorridos completos")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""
+Cache en proceso para el catalogo de destinos y paquetes
+Viajes Aventura
+"""
+import functools
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheTTL:
+    """
+    Cache de lectura con expiracion por tiempo (TTL) y desalojo LRU.
+    Las claves son tuplas (grupo, consulta, parametros), lo que permite
+    invalidar una entrada puntual o todas las de un grupo o consulta.
+    """
+
+    def __init__(self, capacidad=512, ttl=30.0):
+        """Construye la cache con una capacidad maxima de entradas."""
+        if capacidad < 1:
+            raise ValueError("La capacidad de la cache debe ser positiva")
+
+        self.__capacidad = capacidad
+        self.__ttl = ttl
+        self.__entradas = OrderedDict()  # clave -> (vence, valor)
+        self.__lock = threading.Lock()
+        self.__aciertos = 0
+        self.__fallos = 0
+        self.__desalojos = 0
+        self.__invalidaciones = 0
+
+    def obtener(self, clave, cargar):
+        """
+        Devuelve el valor de la clave o lo carga con `cargar()`.
+        Un resultado None (error de base de datos) no se guarda.
+        """
+        encontrado, valor = self.buscar(clave)
+        if encontrado:
+            return valor
+
+        # La consulta se hace fuera del lock para no bloquear otros hilos
+        valor = cargar()
+        if valor is None:
+            return None
+
+        self.guardar(clave, valor)
+        return valor
+
+    def buscar(self, clave):
+        """
+        Busca una clave sin cargarla. Devuelve (encontrado, valor) y cuenta
+        el acierto o el fallo.
+        """
+        ahora = time.monotonic()
+        with self.__lock:
+            entrada = self.__entradas.get(clave)
+            if entrada is not None:
+                if entrada[0] > ahora:
+                    self.__entradas.move_to_end(clave)
+                    self.__aciertos += 1
+                    return True, entrada[1]
+                del self.__entradas[clave]
+            self.__fallos += 1
+            return False, None
+
+    def guardar(self, clave, valor):
+        """Guarda un valor con el TTL de la cache, desalojando el mas antiguo."""
+        with self.__lock:
+            self.__entradas[clave] = (time.monotonic() + self.__ttl, valor)
+            self.__entradas.move_to_end(clave)
+            while len(self.__entradas) > self.__capacidad:
+                self.__entradas.popitem(last=False)
+                self.__desalojos += 1
+
+    def invalidar(self, grupo, consulta=None, params=None):
+        """
+        Elimina las entradas de un grupo, de una consulta del grupo o la
+        entrada exacta (grupo, consulta, params).
+        """
+        prefijo = tuple(p for p in (grupo, consulta, params) if p is not None)
+        with self.__lock:
+            claves = [c for c in self.__entradas if c[:len(prefijo)] == prefijo]
+            for clave in claves:
+                del self.__entradas[clave]
+            self.__invalidaciones += len(claves)
+
+    def limpiar(self):
+        """Vacia la cache sin reiniciar los contadores."""
+        with self.__lock:
+            self.__entradas.clear()
+
+    def estadisticas(self):
+        """Devuelve los contadores de aciertos, fallos y desalojos."""
+        with self.__lock:
+            total = self.__aciertos + self.__fallos
+            return {
+                "entradas": len(self.__entradas),
+                "aciertos": self.__aciertos,
+                "fallos": self.__fallos,
+                "tasa_aciertos": self.__aciertos / total if total else 0.0,
+                "desalojos": self.__desalojos,
+                "invalidaciones": self.__invalidaciones,
+            }
+
+
+class IndicesMemoria:
+    """
+    Indices en memoria del catalogo (IndiceFechas, IndiceTexto) por clave
+    (grupo, nombre, ()). A diferencia de las entradas de CacheTTL no vencen
+    ni se desalojan: cada indice se construye una vez con una lectura
+    completa y despues se mantiene al dia recargando solo los IDs que
+    marcan las escrituras.
+    """
+
+    def __init__(self):
+        """Construye el registro sin indices."""
+        self.__indices = {}     # clave -> indice
+        self.__marcas = {}      # clave -> IDs marcados durante la construccion
+        self.__bloqueos = {}    # clave -> Lock de construccion y recarga
+        self.__descartes = {}   # grupo -> veces que se descarto
+        self.__lock = threading.Lock()
+
+    def leer(self, clave, clase, consultar):
+        """
+        Devuelve el indice de la clave con los IDs marcados ya recargados.
+        Si no existe lo construye con `clase()` y `consultar()`; los IDs
+        marcados se recargan con `consultar(ids)`. Devuelve None si hay error.
+        Construcciones y recargas de un mismo indice no se solapan, para que
+        una recarga vieja no pise a otra mas nueva.
+        """
+        with self.__lock:
+            bloqueo = self.__bloqueos.setdefault(clave, threading.Lock())
+
+        with bloqueo:
+            with self.__lock:
+                indice = self.__indices.get(clave)
+            if indice is None:
+                indice = self._construir(clave, clase, consultar)
+                if indice is None:
+                    return None
+
+            # Las marcas se toman antes de consultar: una escritura que
+            # confirma durante la recarga vuelve a marcar y se aplica en la
+            # siguiente lectura
+            ids = indice.tomar_pendientes()
+            if ids:
+                contenido = consultar(ids)
+                if contenido is None:
+                    for id_marcado in ids:
+                        indice.marcar(id_marcado)
+                else:
+                    indice.actualizar(ids, contenido)
+            return indice
+
+    def _construir(self, clave, clase, consultar):
+        """
+        Construye el indice con una lectura completa (con el bloqueo de la
+        clave tomado). Las marcas que llegan mientras se lee se aplican al
+        indice nuevo; si el grupo se descarto mientras tanto no se guarda.
+        """
+        with self.__lock:
+            self.__marcas[clave] = set()
+            descartes = self.__descartes.get(clave[0], 0)
+
+        contenido = consultar()
+        indice = None
+        if contenido is not None:
+            indice = clase()
+            indice.cargar(contenido)
+
+        with self.__lock:
+            marcas = self.__marcas.pop(clave)
+            if indice is not None and self.__descartes.get(clave[0], 0) == descartes:
+                for id_marcado in marcas:
+                    indice.marcar(id_marcado)
+                self.__indices[clave] = indice
+        return indice
+
+    def marcar(self, grupo, ids):
+        """Marca IDs para recargarlos en los indices del grupo."""
+        with self.__lock:
+            for clave, indice in self.__indices.items():
+                if clave[0] == grupo:
+                    for id_marcado in ids:
+                        indice.marcar(id_marcado)
+            for clave, marcas in self.__marcas.items():
+                if clave[0] == grupo:
+                    marcas.update(ids)
+
+    def descartar(self, grupo):
+        """
+        Descarta los indices del grupo; la siguiente lectura los reconstruye.
+        Para escrituras de muchas filas (cargas masivas), donde reconstruir
+        cuesta menos que recargar cada ID.
+        """
+        with self.__lock:
+            for clave in [c for c in self.__indices if c[0] == grupo]:
+                del self.__indices[clave]
+            self.__descartes[grupo] = self.__descartes.get(grupo, 0) + 1
+
+
+def leer(db, clave, cargar):
+    """Lee a traves de la cache de `db`, o consulta directo si no tiene."""
+    cache = db.cache
+    if cache is None:
+        return cargar()
+    return cache.obtener(clave, cargar)
+
+
+async def leer_async(db, clave, cargar):
+    """Igual que leer(), pero `cargar` es una funcion async."""
+    cache = db.cache
+    if cache is None:
+        return await cargar()
+
+    encontrado, valor = cache.buscar(clave)
+    if encontrado:
+        return valor
+
+    valor = await cargar()
+    if valor is not None:
+        cache.guardar(clave, valor)
+    return valor
+
+
+def leer_indice(db, clave, clase, consultar):
+    """
+    Lee un indice en memoria (IndiceFechas, IndiceTexto) de `db`, con o sin
+    cache del catalogo. Si no esta lo construye con `clase()` y
+    `consultar(db)`; antes de devolverlo recarga con `consultar(db, ids)` los
+    IDs marcados por las escrituras. Devuelve None si hay error.
+    """
+    return db.indices.leer(clave, clase, functools.partial(consultar, db))
+
+
+def marcar_indices(db, grupo, ids):
+    """Marca IDs de destinos o paquetes para recargarlos en sus indices."""
+    db.indices.marcar(grupo, ids)
+
+
+def descartar_indices(db, grupo):
+    """Descarta los indices de un grupo tras escribir muchas filas."""
+    db.indices.descartar(grupo)
+
+
+def invalidar(db, grupo, consulta=None, params=None):
+    """Invalida entradas de la cache de `db` si esta activa."""
+    cache = db.cache
+    if cache is not None:
+        cache.invalidar(grupo, consulta, params)
@@ -0,0 +1,448 @@
+"""
+Carga masiva de destinos, paquetes y clientes desde CSV o JSONL
+Viajes Aventura
+
+Uso:
+    python carga_masiva.py destinos destinos.csv
+    python carga_masiva.py paquetes paquetes.jsonl --lote 2000
+    python carga_masiva.py clientes clientes.csv
+
+Los archivos se leen en streaming y se insertan por lotes con executemany y
+un solo commit por lote. En paquetes, la columna `destinos` lista los
+destinos del paquete en orden de visita, separados por "|", por nombre o ID.
+Una referencia formada solo por digitos siempre se toma como ID, por lo que
+un destino cuyo nombre sean solo digitos debe referenciarse por su ID.
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+from datetime import datetime
+from itertools import islice
+
+from mysql.connector import Error
+
+import cache_catalogo
+from conexion_db import Database
+from paquetes_reservas import PaqueteTuristico
+
+
+class RegistroInvalido(ValueError):
+    """Fila del archivo que no pasa la validacion."""
+
+
+class _LoteNoConsecutivo(Exception):
+    """Los IDs generados por un INSERT multiple no fueron consecutivos."""
+
+
+def _texto(registro, campo, obligatorio=False, largo=None):
+    """Lee un campo de texto, validando presencia y largo maximo."""
+    valor = registro.get(campo)
+    valor = "" if valor is None else str(valor).strip()
+    if obligatorio and not valor:
+        raise RegistroInvalido(f"falta el campo '{campo}'")
+    if largo and len(valor) > largo:
+        raise RegistroInvalido(f"'{campo}' supera {largo} caracteres")
+    return valor
+
+
+def _numero(registro, campo, tipo=float, minimo=0):
+    """Lee un campo numerico no menor que `minimo`."""
+    try:
+        valor = tipo(registro.get(campo))
+    except (TypeError, ValueError):
+        raise RegistroInvalido(f"'{campo}' debe ser numerico")
+    if valor < minimo:
+        raise RegistroInvalido(f"'{campo}' no puede ser menor que {minimo}")
+    return valor
+
+
+def _fecha(registro, campo):
+    """Lee una fecha en formato YYYY-MM-DD."""
+    try:
+        return datetime.strptime(_texto(registro, campo, True), "%Y-%m-%d").date()
+    except ValueError:
+        raise RegistroInvalido(f"'{campo}' debe tener formato YYYY-MM-DD")
+
+
+def _booleano(registro, campo, defecto=True):
+    """Lee un campo booleano (true/false, si/no, yes/no, 1/0)."""
+    valor = registro.get(campo)
+    if valor is None or str(valor).strip() == "":
+        return defecto
+    if isinstance(valor, bool):
+        return valor
+    texto = str(valor).strip().lower()
+    if texto in ("1", "true", "si", "s", "yes", "y"):
+        return True
+    if texto in ("0", "false", "no", "n"):
+        return False
+    raise RegistroInvalido(f"'{campo}' debe ser verdadero o falso (si/no, 1/0)")
+
+
+def validar_destino(registro):
+    """Convierte un registro en la tupla de INSERT de Destinos."""
+    return (
+        _texto(registro, "nombre", True, 100),
+        _texto(registro, "descripcion"),
+        _texto(registro, "actividades"),
+        _numero(registro, "costo_base"),
+        _booleano(registro, "disponible"),
+    )
+
+
+def validar_paquete(registro):
+    """
+    Convierte un registro en (tupla de INSERT, referencias de destinos).
+    Las referencias conservan el orden de visita; las que son solo digitos
+    se resuelven como IDs (ver _resolver_destinos).
+    """
+    fecha_inicio = _fecha(registro, "fecha_inicio")
+    fecha_fin = _fecha(registro, "fecha_fin")
+    if fecha_fin <= fecha_inicio:
+        raise RegistroInvalido("la fecha de fin debe ser posterior a la de inicio")
+
+    destinos = registro.get("destinos") or []
+    if isinstance(destinos, str):
+        destinos = [d.strip() for d in destinos.split("|") if d.strip()]
+
+    fila = (
+        _texto(registro, "nombre", True, 100),
+        _texto(registro, "descripcion"),
+        fecha_inicio,
+        fecha_fin,
+        _numero(registro, "precio_total"),
+        _numero(registro, "cupo_disponible", int),
+        _booleano(registro, "disponible"),
+    )
+    return fila, destinos
+
+
+def validar_cliente(registro):
+    """Convierte un registro en la tupla de INSERT de Clientes."""
+    email = _texto(registro, "email", True, 100).lower()
+    if "@" not in email:
+        raise RegistroInvalido("email invalido")
+    return (
+        _texto(registro, "nombre_completo", True, 150),
+        email,
+        _texto(registro, "telefono", largo=20),
+        _texto(registro, "direccion", largo=200),
+    )
+
+
+ENTIDADES = {
+    "destinos": {
+        "validar": validar_destino,
+        "sql": """
+            INSERT INTO Destinos (nombre, descripcion, actividades, costo_base, disponible)
+            VALUES (%s, %s, %s, %s, %s)
+        """,
+    },
+    "paquetes": {
+        "validar": validar_paquete,
+        "sql": """
+            INSERT INTO PaquetesTuristicos
+            (nombre, descripcion, fecha_inicio, fecha_fin, precio_total,
+             cupo_disponible, disponible)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """,
+    },
+    "clientes": {
+        "validar": validar_cliente,
+        "sql": """
+            INSERT INTO Clientes (nombre_completo, email, telefono, direccion)
+            VALUES (%s, %s, %s, %s)
+        """,
+    },
+}
+
+
+def leer_registros(ruta):
+    """
+    Genera (numero_linea, registro) desde un archivo CSV o JSONL sin
+    cargarlo completo en memoria. Las lineas JSON invalidas se entregan
+    como RegistroInvalido para que se informen junto a las demas.
+    """
+    with open(ruta, encoding="utf-8", newline="") as archivo:
+        if ruta.endswith((".jsonl", ".ndjson")):
+            for numero, linea in enumerate(archivo, 1):
+                if not linea.strip():
+                    continue
+                try:
+                    yield numero, json.loads(linea)
+                except json.JSONDecodeError as e:
+                    yield numero, RegistroInvalido(f"JSON invalido: {e.msg}")
+        else:
+            lector = csv.DictReader(archivo)
+            for registro in lector:
+                yield lector.line_num, registro
+
+
+def _lotes(iterable, tamano):
+    """Agrupa un iterable en listas de hasta `tamano` elementos."""
+    iterador = iter(iterable)
+    while True:
+        lote = list(islice(iterador, tamano))
+        if not lote:
+            return
+        yield lote
+
+
+def _ids_insertados(cursor, tabla, columna_id, primer_id, nombres):
+    """
+    Calcula los IDs de un INSERT multiple a partir del primer ID generado
+    y los verifica contra los nombres insertados. Devuelve None si no son
+    consecutivos (p. ej. por inserciones concurrentes).
+    """
+    if not primer_id:
+        return None
+
+    ids = list(range(primer_id, primer_id + len(nombres)))
+    marcadores = ", ".join(["%s"] * len(ids))
+    cursor.execute(
+        f"SELECT {columna_id}, nombre FROM {tabla} "
+        f"WHERE {columna_id} IN ({marcadores}) ORDER BY {columna_id}",
+        tuple(ids))
+    encontrados = [(row[0], row[1]) for row in cursor.fetchall()]
+
+    if encontrados != list(zip(ids, nombres)):
+        return None
+    return ids
+
+
+def _resolver_destinos(cursor, referencias):
+    """
+    Traduce referencias de destinos (IDs o nombres) a IDs existentes, con
+    una consulta por lote para los IDs y otra para los nombres. Una
+    referencia formada solo por digitos es siempre un ID: no se busca como
+    nombre aunque exista un destino con ese nombre. Si hay nombres repetidos
+    se usa el destino mas antiguo. Las referencias que no corresponden a
+    ningun destino no aparecen en el resultado.
+    """
+    nombres = sorted({str(r) for r in referencias if not str(r).isdigit()})
+    numericas = {str(r): int(r) for r in referencias if str(r).isdigit()}
+    ids = {}
+
+    if numericas:
+        candidatos = sorted(set(numericas.values()))
+        marcadores = ", ".join(["%s"] * len(candidatos))
+        cursor.execute(
+            f"SELECT id_destino FROM Destinos WHERE id_destino IN ({marcadores})",
+            tuple(candidatos))
+        existentes = {row[0] for row in cursor.fetchall()}
+        ids.update({referencia: id_destino
+                    for referencia, id_destino in numericas.items()
+                    if id_destino in existentes})
+
+    if nombres:
+        marcadores = ", ".join(["%s"] * len(nombres))
+        cursor.execute(f"""
+            SELECT nombre, MIN(id_destino) FROM Destinos
+            WHERE nombre IN ({marcadores})
+            GROUP BY nombre
+        """, tuple(nombres))
+        ids.update({nombre: id_destino for nombre, id_destino in cursor.fetchall()})
+
+    return ids
+
+
+def _insertar_paquetes(cursor, filas, destinos_por_fila):
+    """
+    Inserta un lote de paquetes y sus enlaces en Paquetes_Destinos, y los
+    agrega al indice de disponibilidad. Devuelve (enlaces insertados,
+    destinos no encontrados).
+    """
+    sql = ENTIDADES["paquetes"]["sql"]
+    cursor.executemany(sql, filas)
+    ids = _ids_insertados(cursor, "PaquetesTuristicos", "id_paquete",
+                          cursor.lastrowid, [f[0] for f in filas])
+
+    if ids is None:
+        # IDs no consecutivos: se rehace el lote fila por fila
+        raise _LoteNoConsecutivo()
+
+    conteo = _enlazar_destinos(cursor, ids, destinos_por_fila)
+    PaqueteTuristico.sincronizar_disponibilidad(cursor, ids[0], ids[-1])
+    return conteo
+
+
+def _enlazar_destinos(cursor, ids, destinos_por_fila):
+    """
+    Inserta en bloque los enlaces paquete-destino de un lote. Devuelve
+    (enlaces insertados, destinos no encontrados); el llamador los suma al
+    resultado solo si la transaccion se confirma.
+    """
+    referencias = {r for destinos in destinos_por_fila for r in destinos}
+    if not referencias:
+        return 0, 0
+
+    resueltos = _resolver_destinos(cursor, referencias)
+    enlaces = []
+    no_encontrados = 0
+    for id_paquete, destinos in zip(ids, destinos_por_fila):
+        vistos = set()
+        for orden, referencia in enumerate(destinos, 1):
+            id_destino = resueltos.get(str(referencia))
+            if id_destino is None:
+                no_encontrados += 1
+            elif id_destino not in vistos:
+                vistos.add(id_destino)
+                enlaces.append((id_paquete, id_destino, orden))
+
+    if enlaces:
+        cursor.executemany("""
+            INSERT INTO Paquetes_Destinos (id_paquete, id_destino, orden_visita)
+            VALUES (%s, %s, %s)
+        """, enlaces)
+    return len(enlaces), no_encontrados
+
+
+def _sumar_enlaces(resultado, conteo):
+    """Suma al resultado los enlaces de una transaccion confirmada."""
+    enlaces, no_encontrados = conteo
+    resultado["enlaces_destinos"] += enlaces
+    resultado["destinos_no_encontrados"] += no_encontrados
+
+
+def _cargar_lote(connection, entidad, lote, resultado):
+    """
+    Inserta un lote validado en una transaccion. Si el lote completo falla
+    (p. ej. un email repetido) se reintenta fila por fila, con un commit
+    por fila, para rechazar solo las filas con error.
+    """
+    sql = ENTIDADES[entidad]["sql"]
+    cursor = connection.cursor()
+    try:
+        conteo = (0, 0)
+        if entidad == "paquetes":
+            filas = [fila for _, (fila, _) in lote]
+            conteo = _insertar_paquetes(cursor, filas, [d for _, (_, d) in lote])
+        else:
+            cursor.executemany(sql, [fila for _, fila in lote])
+        connection.commit()
+        resultado["insertados"] += len(lote)
+        _sumar_enlaces(resultado, conteo)
+        return
+
+    except (Error, _LoteNoConsecutivo):
+        connection.rollback()
+    finally:
+        cursor.close()
+
+    cursor = connection.cursor()
+    try:
+        for numero, validado in lote:
+            fila, destinos = validado if entidad == "paquetes" else (validado, [])
+            conteo = (0, 0)
+            try:
+                cursor.execute(sql, fila)
+                if entidad == "paquetes":
+                    id_paquete = cursor.lastrowid
+                    conteo = _enlazar_destinos(cursor, [id_paquete], [destinos])
+                    PaqueteTuristico.sincronizar_disponibilidad(cursor, id_paquete)
+                connection.commit()
+            except Error as e:
+                # Se descarta solo esta fila (y sus enlaces)
+                connection.rollback()
+                resultado["rechazados"] += 1
+                resultado["errores"].append((numero, str(e)))
+                continue
+
+            resultado["insertados"] += 1
+            _sumar_enlaces(resultado, conteo)
+    finally:
+        cursor.close()
+
+
+def cargar(db, entidad, ruta, tamano_lote=1000):
+    """
+    Carga un archivo CSV o JSONL de la entidad indicada.
+    Devuelve un diccionario con filas leidas, insertadas, rechazadas,
+    errores por linea y filas por segundo.
+    """
+    if entidad not in ENTIDADES:
+        raise ValueError(f"Entidad desconocida: {entidad}")
+
+    validar = ENTIDADES[entidad]["validar"]
+    resultado = {
+        "leidos": 0,
+        "insertados": 0,
+        "rechazados": 0,
+        "enlaces_destinos": 0,
+        "destinos_no_encontrados": 0,
+        "errores": [],
+    }
+
+    def validos():
+        """Valida los registros y deja pasar solo los correctos."""
+        emails = set()
+        for numero, registro in leer_registros(ruta):
+            resultado["leidos"] += 1
+            try:
+                if isinstance(registro, RegistroInvalido):
+                    raise registro
+                validado = validar(registro)
+                if entidad == "clientes":
+                    if validado[1] in emails:
+                        raise RegistroInvalido("email repetido en el archivo")
+                    emails.add(validado[1])
+            except RegistroInvalido as e:
+                resultado["rechazados"] += 1
+                resultado["errores"].append((numero, str(e)))
+                continue
+            yield numero, validado
+
+    inicio = time.perf_counter()
+    with db.conexion() as connection:
+        for lote in _lotes(validos(), tamano_lote):
+            _cargar_lote(connection, entidad, lote, resultado)
+    segundos = time.perf_counter() - inicio
+
+    if entidad in ("destinos", "paquetes"):
+        cache_catalogo.invalidar(db, entidad)
+        cache_catalogo.descartar_indices(db, entidad)
+
+    resultado["segundos"] = round(segundos, 3)
+    resultado["filas_por_segundo"] = round(
+        resultado["insertados"] / segundos, 1) if segundos else 0.0
+    return resultado
+
+
+def main():
+    """Punto de entrada de la linea de comandos."""
+    parser = argparse.ArgumentParser(
+        description="Carga masiva de destinos, paquetes y clientes")
+    parser.add_argument("entidad", choices=sorted(ENTIDADES))
+    parser.add_argument("archivo", help="Archivo .csv o .jsonl")
+    parser.add_argument("--lote", type=int, default=1000,
+                        help="Filas por lote (un commit por lote)")
+    parser.add_argument("--max-errores", type=int, default=20,
+                        help="Errores a mostrar en el resumen")
+    args = parser.parse_args()
+
+    db = Database()
+    try:
+        resultado = cargar(db, args.entidad, args.archivo, args.lote)
+    finally:
+        db.desconectar()
+
+    print(f"Filas leidas: {resultado['leidos']}")
+    print(f"Filas insertadas: {resultado['insertados']}")
+    print(f"Filas rechazadas: {resultado['rechazados']}")
+    if args.entidad == "paquetes":
+        print(f"Enlaces a destinos: {resultado['enlaces_destinos']}")
+        print(f"Destinos no encontrados: {resultado['destinos_no_encontrados']}")
+    print(f"Tiempo: {resultado['segundos']} s "
+          f"({resultado['filas_por_segundo']} filas/s)")
+
+    for numero, error in resultado["errores"][:args.max_errores]:
+        print(f"  linea {numero}: {error}")
+
+    if resultado["rechazados"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
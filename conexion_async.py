@@ -0,0 +1,243 @@
+"""
+Modulo de conexion asincrona a la base de datos (asyncio)
+Sistema de Reservas - Viajes Aventura
+
+Version async de Database para servir muchas peticiones concurrentes desde
+un solo event loop (p. ej. detras de un front end web). Usa el conector
+asincrono de mysql-connector-python (mysql.connector.aio). El esquema se
+crea y migra con la Database sincrona de conexion_db.
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+
+import mysql.connector.aio
+from mysql.connector import Error
+
+from cache_catalogo import CacheTTL, IndicesMemoria
+
+
+class PoolConexionesAsync:
+    """
+    Pool de conexiones async con tamano minimo y maximo.
+    Mismo comportamiento que PoolConexiones: las tareas que no encuentran
+    conexion libre esperan (sin bloquear el event loop) hasta `timeout`.
+    Todo corre en un solo event loop, por lo que no necesita locks.
+    """
+
+    def __init__(self, crear_conexion, minimo=1, maximo=10,
+                 ping_tras_inactividad=30.0, timeout=10.0):
+        """Construye el pool; `crear_conexion` es una funcion async."""
+        if minimo < 0 or maximo < 1 or minimo > maximo:
+            raise ValueError("Tamanos de pool invalidos")
+
+        self.__crear_conexion = crear_conexion
+        self.__minimo = minimo
+        self.__maximo = maximo
+        self.__ping_tras_inactividad = ping_tras_inactividad
+        self.__timeout = timeout
+        self.__libres = None  # pila de (conexion, ultimo_uso)
+        self.__total = 0
+        self.__iniciado = False
+
+    async def _precalentar(self):
+        """Abre las conexiones minimas del pool."""
+        if self.__libres is None:
+            # La cola se crea dentro del event loop que usa el pool
+            self.__libres = asyncio.LifoQueue()
+        self.__iniciado = True
+        while self.__total < self.__minimo:
+            conexion = await self._abrir()
+            self.__libres.put_nowait((conexion, time.monotonic()))
+
+    async def _abrir(self):
+        """Abre una conexion nueva contando su cupo desde antes de abrirla."""
+        self.__total += 1
+        try:
+            return await self.__crear_conexion()
+        except BaseException:
+            self.__total -= 1
+            raise
+
+    async def obtener(self):
+        """Entrega una conexion libre, creando una nueva si hay espacio."""
+        if not self.__iniciado:
+            await self._precalentar()
+
+        try:
+            conexion, ultimo_uso = self.__libres.get_nowait()
+        except asyncio.QueueEmpty:
+            if self.__total < self.__maximo:
+                return await self._abrir()
+            try:
+                conexion, ultimo_uso = await asyncio.wait_for(
+                    self.__libres.get(), self.__timeout)
+            except asyncio.TimeoutError:
+                raise Exception(
+                    "Tiempo de espera agotado al obtener conexion del pool")
+
+        if time.monotonic() - ultimo_uso > self.__ping_tras_inactividad:
+            try:
+                conexion = await self._verificar(conexion)
+            except BaseException:
+                self.__total -= 1
+                raise
+        return conexion
+
+    async def _verificar(self, conexion):
+        """Hace ping a una conexion inactiva y la reemplaza si esta caida."""
+        try:
+            await conexion.ping(reconnect=False)
+            return conexion
+        except Error:
+            try:
+                await conexion.close()
+            except Error:
+                pass
+            return await self.__crear_conexion()
+
+    async def devolver(self, conexion, sospechosa=False):
+        """
+        Devuelve una conexion al pool.
+        Si quedo una transaccion abierta se revierte; si la conexion es
+        sospechosa se fuerza un ping en la proxima entrega.
+        """
+        try:
+            if conexion.in_transaction:
+                await conexion.rollback()
+        except Error:
+            sospechosa = True
+
+        ultimo_uso = float("-inf") if sospechosa else time.monotonic()
+        self.__libres.put_nowait((conexion, ultimo_uso))
+
+    async def cerrar(self):
+        """Cierra todas las conexiones libres del pool."""
+        while self.__libres is not None and not self.__libres.empty():
+            conexion, _ = self.__libres.get_nowait()
+            self.__total -= 1
+            try:
+                await conexion.close()
+            except Error:
+                pass
+        self.__iniciado = False
+
+    @property
+    def total(self):
+        """Numero de conexiones abiertas (libres y en uso)."""
+        return self.__total
+
+    @property
+    def libres(self):
+        """Numero de conexiones libres."""
+        return self.__libres.qsize() if self.__libres is not None else 0
+
+
+class DatabaseAsync:
+    """
+    Acceso asincrono a la base de datos MySQL.
+    Recibe la misma configuracion que Database, pero siempre usa un pool.
+    """
+
+    def __init__(self, host="localhost", port=3308, user="root", password="",
+                 database="viajes_aventura_db", pool_min=1, pool_max=10,
+                 ping_tras_inactividad=30.0, pool_timeout=10.0,
+                 usar_cache=True, cache_ttl=30.0, cache_capacidad=512,
+                 usar_resumenes=False, claves_recientes=10000, claves_ttl=3600.0):
+        """Construye la configuracion; las conexiones se abren en el primer uso."""
+        self.__host = host
+        self.__port = port
+        self.__user = user
+        self.__password = password
+        self.__database = database
+        self.__cache = CacheTTL(cache_capacidad, cache_ttl) if usar_cache else None
+        self.__indices = IndicesMemoria()
+        self.__claves_idempotencia = CacheTTL(claves_recientes, claves_ttl)
+        self.__usar_resumenes = usar_resumenes
+        # (tarea, conexion) en uso por la tarea actual (equivale al
+        # threading.local de Database, pero por tarea de asyncio). Se guarda
+        # la tarea porque las tareas hijas (gather, create_task) heredan el
+        # contexto y no deben compartir la conexion de la tarea padre
+        self.__actual = ContextVar(f"conexion_{id(self)}", default=None)
+        self.__pool = PoolConexionesAsync(
+            self._nueva_conexion,
+            minimo=pool_min,
+            maximo=pool_max,
+            ping_tras_inactividad=ping_tras_inactividad,
+            timeout=pool_timeout
+        )
+
+    @property
+    def pool(self):
+        """Pool de conexiones async."""
+        return self.__pool
+
+    @property
+    def nombre_base_datos(self):
+        """Nombre de la base de datos configurada."""
+        return self.__database
+
+    @property
+    def cache(self):
+        """Cache del catalogo, o None si esta desactivada."""
+        return self.__cache
+
+    @property
+    def indices(self):
+        """Indices en memoria del catalogo (existen aunque no haya cache)."""
+        return self.__indices
+
+    @property
+    def claves_idempotencia(self):
+        """Cache de claves de idempotencia recientes (clave -> reserva)."""
+        return self.__claves_idempotencia
+
+    @property
+    def usar_resumenes(self):
+        """Indica si las reservas mantienen la tabla ResumenReservas."""
+        return self.__usar_resumenes
+
+    async def _nueva_conexion(self):
+        """Abre una conexion async nueva."""
+        try:
+            return await mysql.connector.aio.connect(
+                host=self.__host,
+                port=self.__port,
+                user=self.__user,
+                password=self.__password,
+                database=self.__database
+            )
+        except Error as e:
+            print(f"Error de conexion: {e}")
+            raise Exception(f"Error de conexion: {e}")
+
+    @asynccontextmanager
+    async def conexion(self):
+        """
+        Entrega una conexion del pool para un bloque `async with` y la
+        devuelve al salir. Un bloque anidado en la misma tarea reutiliza
+        la misma conexion, igual que Database.conexion(); una tarea hija
+        obtiene su propia conexion.
+        """
+        tarea = asyncio.current_task()
+        actual = self.__actual.get()
+        if actual is not None and actual[0] is tarea:
+            yield actual[1]
+            return
+
+        connection = await self.__pool.obtener()
+        token = self.__actual.set((tarea, connection))
+        sospechosa = False
+        try:
+            yield connection
+        except Error:
+            sospechosa = True
+            raise
+        finally:
+            self.__actual.reset(token)
+            await self.__pool.devolver(connection, sospechosa)
+
+    async def desconectar(self):
+        """Cierra las conexiones del pool."""
+        await self.__pool.cerrar()
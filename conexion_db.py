@@ -2,63 +2,365 @@
 Modulo de conexion a la base de datos
 Sistema de Reservas - Viajes Aventura
 """
+import operator
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
 import mysql.connector
-from mysql.connector import Error
+from mysql.connector import Error, errorcode
 
+from cache_catalogo import CacheTTL, IndicesMemoria
+from instrumentacion import ConexionInstrumentada, RegistroConsultas
+from replicas import ROTACION, ConexionPrimaria, Replicas
 
-class Database:
-    """Clase para manejar la conexion a la base de datos MySQL."""
 
-    _instance = None
+# Esquema de MySQL: (tabla, sentencia CREATE TABLE), en orden de creacion.
+TABLAS = [
+    # Tabla Clientes (Usuarios del sistema)
+    ("Clientes", """
+        CREATE TABLE IF NOT EXISTS Clientes (
+            id_cliente INT AUTO_INCREMENT PRIMARY KEY,
+            nombre_completo VARCHAR(150) NOT NULL,
+            email VARCHAR(100) NOT NULL UNIQUE,
+            telefono VARCHAR(20),
+            direccion VARCHAR(200),
+            fecha_registro DATE DEFAULT (CURRENT_DATE)
+        )
+    """),
+    # Tabla Usuarios (Autenticacion)
+    ("Usuarios", """
+        CREATE TABLE IF NOT EXISTS Usuarios (
+            id_usuario INT AUTO_INCREMENT PRIMARY KEY,
+            nombre_usuario VARCHAR(50) NOT NULL UNIQUE,
+            password_hash VARCHAR(255) NOT NULL,
+            rol VARCHAR(20) DEFAULT 'cliente',
+            id_cliente INT,
+            activo BOOLEAN DEFAULT TRUE,
+            fecha_creacion DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (id_cliente) REFERENCES Clientes(id_cliente)
+                ON DELETE CASCADE
+        )
+    """),
+    # Tabla Destinos
+    ("Destinos", """
+        CREATE TABLE IF NOT EXISTS Destinos (
+            id_destino INT AUTO_INCREMENT PRIMARY KEY,
+            nombre VARCHAR(100) NOT NULL,
+            descripcion TEXT,
+            actividades TEXT,
+            costo_base DECIMAL(10,2) NOT NULL,
+            disponible BOOLEAN DEFAULT TRUE,
+            fecha_creacion DATE DEFAULT (CURRENT_DATE)
+        )
+    """),
+    # Tabla Paquetes Turisticos
+    ("PaquetesTuristicos", """
+        CREATE TABLE IF NOT EXISTS PaquetesTuristicos (
+            id_paquete INT AUTO_INCREMENT PRIMARY KEY,
+            nombre VARCHAR(100) NOT NULL,
+            descripcion TEXT,
+            fecha_inicio DATE NOT NULL,
+            fecha_fin DATE NOT NULL,
+            precio_total DECIMAL(10,2) NOT NULL,
+            cupo_disponible INT DEFAULT 0,
+            disponible BOOLEAN DEFAULT TRUE,
+            fecha_creacion DATE DEFAULT (CURRENT_DATE)
+        )
+    """),
+    # Tabla intermedia: Paquetes_Destinos (relacion muchos a muchos)
+    ("Paquetes_Destinos", """
+        CREATE TABLE IF NOT EXISTS Paquetes_Destinos (
+            id_paquete_destino INT AUTO_INCREMENT PRIMARY KEY,
+            id_paquete INT NOT NULL,
+            id_destino INT NOT NULL,
+            orden_visita INT DEFAULT 1,
+            FOREIGN KEY (id_paquete) REFERENCES PaquetesTuristicos(id_paquete)
+                ON DELETE CASCADE,
+            FOREIGN KEY (id_destino) REFERENCES Destinos(id_destino)
+                ON DELETE CASCADE,
+            UNIQUE KEY unique_paquete_destino (id_paquete, id_destino)
+        )
+    """),
+    # Tabla Reservas
+    ("Reservas", """
+        CREATE TABLE IF NOT EXISTS Reservas (
+            id_reserva INT AUTO_INCREMENT PRIMARY KEY,
+            id_cliente INT NOT NULL,
+            id_paquete INT NOT NULL,
+            fecha_reserva DATETIME DEFAULT CURRENT_TIMESTAMP,
+            numero_personas INT DEFAULT 1,
+            precio_total DECIMAL(10,2) NOT NULL,
+            estado VARCHAR(20) DEFAULT 'pendiente',
+            notas TEXT,
+            FOREIGN KEY (id_cliente) REFERENCES Clientes(id_cliente)
+                ON DELETE CASCADE,
+            FOREIGN KEY (id_paquete) REFERENCES PaquetesTuristicos(id_paquete)
+                ON DELETE RESTRICT
+        )
+    """),
+]
+
+# Migraciones del esquema: (version, descripcion, sentencias).
+# Se aplican en orden y cada version aplicada se registra en VersionEsquema,
+# por lo que Database.migrar() puede ejecutarse en cada inicio sin efectos.
+# Todo cambio de esquema (tambien una tabla nueva) debe agregarse como
+# migracion: crear_tablas() no ejecuta DDL si VersionEsquema ya registra
+# VERSION_ESQUEMA.
+MIGRACIONES = [
+    (1, "Indices secundarios para las consultas frecuentes", [
+        # Paquetes disponibles desde hoy (listar_todos, buscar_por_fechas)
+        """CREATE INDEX idx_paquetes_disponible_inicio
+           ON PaquetesTuristicos (disponible, fecha_inicio)""",
+        # Catalogo completo ordenado por fecha de inicio
+        "CREATE INDEX idx_paquetes_inicio ON PaquetesTuristicos (fecha_inicio)",
+        # Reservas de un cliente ordenadas por fecha (Mis Reservas)
+        """CREATE INDEX idx_reservas_cliente_fecha
+           ON Reservas (id_cliente, fecha_reserva)""",
+        # Listado de todas las reservas (admin)
+        "CREATE INDEX idx_reservas_fecha ON Reservas (fecha_reserva)",
+        # Destinos disponibles ordenados por nombre
+        """CREATE INDEX idx_destinos_disponible_nombre
+           ON Destinos (disponible, nombre)""",
+        "CREATE INDEX idx_destinos_nombre ON Destinos (nombre)",
+        # Clientes ordenados por nombre
+        "CREATE INDEX idx_clientes_nombre ON Clientes (nombre_completo)",
+    ]),
+    (2, "Tabla de resumen de reservas para los reportes", [
+        # Una fila por paquete, mes de reserva (AAAA-MM) y estado
+        """CREATE TABLE IF NOT EXISTS ResumenReservas (
+               id_paquete INT NOT NULL,
+               mes CHAR(7) NOT NULL,
+               estado VARCHAR(20) NOT NULL,
+               reservas INT NOT NULL DEFAULT 0,
+               personas INT NOT NULL DEFAULT 0,
+               monto DECIMAL(12,2) NOT NULL DEFAULT 0,
+               PRIMARY KEY (id_paquete, mes, estado)
+           )""",
+        "DELETE FROM ResumenReservas",
+        """INSERT INTO ResumenReservas
+           (id_paquete, mes, estado, reservas, personas, monto)
+           SELECT id_paquete, DATE_FORMAT(fecha_reserva, '%Y-%m') AS mes,
+                  estado, COUNT(*), SUM(numero_personas), SUM(precio_total)
+           FROM Reservas
+           GROUP BY id_paquete, mes, estado""",
+    ]),
+    (3, "Indice de disponibilidad de paquetes por fecha de inicio", [
+        # Solo paquetes disponibles, con su cupo restante; lo mantienen
+        # PaqueteTuristico y Reserva dentro de sus transacciones
+        """CREATE TABLE IF NOT EXISTS DisponibilidadPaquetes (
+               id_paquete INT PRIMARY KEY,
+               fecha_inicio DATE NOT NULL,
+               fecha_fin DATE NOT NULL,
+               cupo_disponible INT NOT NULL,
+               FOREIGN KEY (id_paquete) REFERENCES PaquetesTuristicos(id_paquete)
+                   ON DELETE CASCADE
+           )""",
+        """CREATE INDEX idx_disponibilidad_inicio
+           ON DisponibilidadPaquetes (fecha_inicio, cupo_disponible)""",
+        "DELETE FROM DisponibilidadPaquetes",
+        """INSERT INTO DisponibilidadPaquetes
+           (id_paquete, fecha_inicio, fecha_fin, cupo_disponible)
+           SELECT id_paquete, fecha_inicio, fecha_fin, cupo_disponible
+           FROM PaquetesTuristicos
+           WHERE disponible = TRUE""",
+    ]),
+    (4, "Indice de reservas por estado y fecha (expiracion de pendientes)", [
+        """CREATE INDEX idx_reservas_estado_fecha
+           ON Reservas (estado, fecha_reserva)""",
+    ]),
+    (5, "Clave de idempotencia de las reservas", [
+        # Opcional (NULL se permite repetido); un reintento de Reserva.crear
+        # con la misma clave no puede insertar una segunda reserva
+        "ALTER TABLE Reservas ADD COLUMN clave_idempotencia VARCHAR(64) NULL",
+        """CREATE UNIQUE INDEX idx_reservas_clave
+           ON Reservas (clave_idempotencia)""",
+    ]),
+    (6, "Marca de paquete agotado, separada de la disponibilidad", [
+        # TRUE solo si el paquete lo deshabilito una reserva al agotar el
+        # cupo; una cancelacion rehabilita esos paquetes y no los que
+        # deshabilito un administrador. Los paquetes ya deshabilitados
+        # quedan como deshabilitados por un administrador.
+        """ALTER TABLE PaquetesTuristicos
+           ADD COLUMN agotado BOOLEAN NOT NULL DEFAULT FALSE""",
+    ]),
+]
+
+# Version del esquema que espera este codigo (la ultima migracion)
+VERSION_ESQUEMA = MIGRACIONES[-1][0]
+
+
+# Sentencias preparadas por nombre (nombre -> SQL). Los modelos registran
+# sus consultas frecuentes con registrar_sentencia() y las ejecutan con
+# Database.consultar_preparada() / ejecutar_preparada().
+SENTENCIAS = {}
+
+
+def registrar_sentencia(nombre, sql):
+    """Registra una sentencia preparada con un nombre unico."""
+    registrada = SENTENCIAS.setdefault(nombre, sql)
+    if registrada != sql:
+        raise ValueError(f"La sentencia '{nombre}' ya esta registrada con otro SQL")
+    return nombre
+
+
+class PoolConexiones:
+    """
+    Pool de conexiones reutilizables con tamano minimo y maximo.
+    Solo verifica una conexion (ping) al entregarla si estuvo inactiva
+    mas de `ping_tras_inactividad` segundos.
+    """
+
+    def __init__(self, crear_conexion, minimo=1, maximo=10,
+                 ping_tras_inactividad=30.0, timeout=10.0):
+        """Construye el pool; las conexiones se abren en el primer uso."""
+        if minimo < 0 or maximo < 1 or minimo > maximo:
+            raise ValueError("Tamanos de pool invalidos")
+
+        self.__crear_conexion = crear_conexion
+        self.__minimo = minimo
+        self.__maximo = maximo
+        self.__ping_tras_inactividad = ping_tras_inactividad
+        self.__timeout = timeout
+        self.__libres = []  # pila de (conexion, ultimo_uso)
+        self.__total = 0
+        self.__iniciado = False
+        self.__condicion = threading.Condition()
+
+    def _precalentar(self):
+        """Abre las conexiones minimas del pool."""
+        while self.__total < self.__minimo:
+            conexion = self.__crear_conexion()
+            self.__libres.append((conexion, time.monotonic()))
+            self.__total += 1
+        self.__iniciado = True
+
+    def obtener(self):
+        """Entrega una conexion libre, creando una nueva si hay espacio."""
+        limite = time.monotonic() + self.__timeout
+        with self.__condicion:
+            if not self.__iniciado:
+                self._precalentar()
+
+            while True:
+                if self.__libres:
+                    conexion, ultimo_uso = self.__libres.pop()
+                    break
+                if self.__total < self.__maximo:
+                    # Reservar el cupo y crear la conexion fuera del lock
+                    self.__total += 1
+                    conexion, ultimo_uso = None, None
+                    break
+
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    raise Exception(
+                        "Tiempo de espera agotado al obtener conexion del pool")
+                self.__condicion.wait(restante)
+
+        try:
+            if conexion is None:
+                conexion = self.__crear_conexion()
+            elif time.monotonic() - ultimo_uso > self.__ping_tras_inactividad:
+                conexion = self._verificar(conexion)
+            return conexion
+
+        except Exception:
+            with self.__condicion:
+                self.__total -= 1
+                self.__condicion.notify()
+            raise
+
+    def _verificar(self, conexion):
+        """Hace ping a una conexion inactiva y la reemplaza si esta caida."""
+        try:
+            conexion.ping(reconnect=False)
+            return conexion
+        except Error:
+            try:
+                conexion.close()
+            except Error:
+                pass
+            return self.__crear_conexion()
 
-    def __new__(cls):
+    def devolver(self, conexion, sospechosa=False):
         """
-        Garantiza que solo exista una instancia de Database.
+        Devuelve una conexion al pool.
+        Si quedo una transaccion abierta se revierte; si la conexion es
+        sospechosa se fuerza un ping en la proxima entrega.
         """
-        if cls._instance is None:
-            cls._instance = super(Database, cls).__new__(cls)
-            cls._instance.__initialized = False
-        return cls._instance
+        try:
+            if conexion.in_transaction:
+                conexion.rollback()
+        except Error:
+            sospechosa = True
 
-    def __init__(self):
-        """Constructor de la configuracion de la base de datos."""
-        if self.__initialized:
-            return
+        ultimo_uso = float("-inf") if sospechosa else time.monotonic()
+        with self.__condicion:
+            self.__libres.append((conexion, ultimo_uso))
+            self.__condicion.notify()
 
-        self.__host = "localhost"
-        self.__port = 3308  # Cambiar si se tiene otro
-        self.__user = "root"
-        self.__password = ""
-        self.__database = "viajes_aventura_db"
-        self.__connection = None
-        self.__initialized = True
+    def cerrar(self):
+        """Cierra todas las conexiones libres del pool."""
+        with self.__condicion:
+            while self.__libres:
+                conexion, _ = self.__libres.pop()
+                self.__total -= 1
+                try:
+                    conexion.close()
+                except Error:
+                    pass
+            self.__iniciado = False
 
-    def conectar(self):
-        """Establece conexion con la base de datos."""
-        try:
-            if self.__connection is None or not self.__connection.is_connected():
-                self.__connection = mysql.connector.connect(
-                    host=self.__host,
-                    port=self.__port,
-                    user=self.__user,
-                    password=self.__password,
-                    database=self.__database
-                )
-                print(
-                    f"Conexion establecida con la base de datos '{self.__database}'")
+    @property
+    def total(self):
+        """Numero de conexiones abiertas (libres y en uso)."""
+        return self.__total
+
+    @property
+    def libres(self):
+        """Numero de conexiones libres."""
+        return len(self.__libres)
+
+
+class BackendMySQL:
+    """Backend de produccion: servidor MySQL."""
+
+    nombre = "mysql"
+    TABLAS = TABLAS
 
-            if self.__connection.is_connected():
-                return self.__connection
+    def __init__(self, host="localhost", port=3308, user="root", password="",
+                 database="viajes_aventura_db"):
+        """Guarda los datos de conexion al servidor."""
+        self.__host = host
+        self.__port = port  # Cambiar si se tiene otro
+        self.__user = user
+        self.__password = password
+        self.__database = database
 
+    @property
+    def descripcion(self):
+        """Nombre de la base de datos."""
+        return self.__database
+
+    def conectar(self):
+        """Abre una conexion nueva, creando la base de datos si no existe."""
+        try:
+            return mysql.connector.connect(
+                host=self.__host,
+                port=self.__port,
+                user=self.__user,
+                password=self.__password,
+                database=self.__database
+            )
         except Error as e:
             if "Unknown database" in str(e):
                 print(
                     f"Base de datos '{self.__database}' no existe. Creando...")
                 self._crear_base_datos()
                 return self.conectar()
-            else:
-                print(f"Error de conexion: {e}")
-                raise Exception(f"Error de conexion: {e}")
+            print(f"Error de conexion: {e}")
+            raise Exception(f"Error de conexion: {e}")
 
     def _crear_base_datos(self):
         """Crea la base de datos si no existe."""
@@ -78,114 +380,362 @@ class Database:
         except Error as e:
             raise Exception(f"Error al crear la base de datos: {e}")
 
-    def crear_tablas(self):
-        """Crea el esquema completo de la base de datos."""
-        if self.__connection and self.__connection.is_connected():
+    def cerrar(self):
+        """El servidor MySQL no requiere liberar nada al desconectar."""
+
+
+class Database:
+    """Clase para manejar la conexion a la base de datos (MySQL o SQLite)."""
+
+    _instance = None
+
+    def __new__(cls, **config):
+        """
+        Garantiza que solo exista una instancia de Database.
+        Si se entrega configuracion explicita se crea una instancia
+        independiente (util para benchmarks o varias bases de datos).
+        """
+        if config:
+            instancia = super(Database, cls).__new__(cls)
+            instancia.__initialized = False
+            return instancia
+
+        if cls._instance is None:
+            cls._instance = super(Database, cls).__new__(cls)
+            cls._instance.__initialized = False
+        return cls._instance
+
+    def __init__(self, host="localhost", port=3308, user="root", password="",
+                 database="viajes_aventura_db", usar_pool=False, pool_min=1,
+                 pool_max=10, ping_tras_inactividad=30.0, pool_timeout=10.0,
+                 usar_cache=True, cache_ttl=30.0, cache_capacidad=512,
+                 backend="mysql", usar_preparadas=True, usar_resumenes=False,
+                 instrumentar=True, umbral_lento=1.0, log_lentas=None,
+                 replicas=None, seleccion_replicas=ROTACION,
+                 ventana_lectura_propia=5.0, claves_recientes=10000,
+                 claves_ttl=3600.0, registro_consultas=None):
+        """
+        Constructor de la configuracion de la base de datos.
+        `backend` es "mysql" (servidor, por defecto) o "sqlite" (embebido;
+        `database` es la ruta del archivo o ":memory:").
+        Con usar_pool=True las consultas de los modelos usan un pool de
+        entre pool_min y pool_max conexiones en vez de una sola compartida.
+        Con usar_cache=True el catalogo (destinos y paquetes) se lee a
+        traves de una cache en memoria de cache_ttl segundos.
+        Con usar_preparadas=True las sentencias registradas se preparan en
+        el servidor una vez por conexion y se reutilizan.
+        Con usar_resumenes=True las reservas mantienen la tabla
+        ResumenReservas y los reportes se calculan sobre ella.
+        Con instrumentar=True cada sentencia se mide por sentencia
+        normalizada (ver instrumentacion); las que tardan umbral_lento
+        segundos o mas se guardan como lentas y, si se indica log_lentas,
+        se agregan a ese archivo. Si se entrega registro_consultas (un
+        RegistroConsultas) las sentencias se anotan en el en vez de en uno
+        propio.
+        `replicas` es una lista de dicts con la configuracion de replicas de
+        solo lectura (host, port, user, password, database; lo que falte se
+        toma de la primaria). Las lecturas de los modelos se reparten entre
+        ellas segun seleccion_replicas ("rotacion" o "latencia"), salvo
+        durante ventana_lectura_propia segundos tras una escritura (ver
+        conexion_lectura y el modulo replicas).
+        Las ultimas claves_recientes claves de idempotencia de reservas
+        creadas se recuerdan claves_ttl segundos, para responder a los
+        reintentos sin consultar la base de datos.
+        """
+        if self.__initialized:
+            return
+
+        if backend == "mysql":
+            self.__backend = BackendMySQL(host, port, user, password, database)
+        elif backend == "sqlite":
+            from backend_sqlite import BackendSQLite
+            self.__backend = BackendSQLite(_ruta_sqlite(database))
+        else:
+            raise ValueError(f"Backend desconocido: {backend}")
+        self.__database = database
+        self.__connection = None
+        self.__ultimo_uso = float("-inf")
+        self.__ping_tras_inactividad = ping_tras_inactividad
+        self.__pool = None
+        self.__cache = CacheTTL(cache_capacidad, cache_ttl) if usar_cache else None
+        self.__indices = IndicesMemoria()
+        self.__claves_idempotencia = CacheTTL(claves_recientes, claves_ttl)
+        self.__local = threading.local()
+        self.__usar_preparadas = usar_preparadas
+        self.__usar_resumenes = usar_resumenes
+        if not instrumentar:
+            self.__instrumentacion = None
+        elif registro_consultas is not None:
+            self.__instrumentacion = registro_consultas
+        else:
+            self.__instrumentacion = RegistroConsultas(umbral_lento, log_lentas)
+        self.__replicas = None
+        self.__ventana_lectura_propia = ventana_lectura_propia
+        self.__ultima_escritura = float("-inf")
+        if replicas:
+            # Las replicas no usan cache: la cache del catalogo es de la
+            # primaria. Sus sentencias se anotan en el registro de la primaria
+            base = dict(host=host, port=port, user=user, password=password,
+                        database=database, backend=backend, usar_pool=usar_pool,
+                        pool_min=pool_min, pool_max=pool_max,
+                        ping_tras_inactividad=ping_tras_inactividad,
+                        pool_timeout=pool_timeout, usar_cache=False,
+                        usar_preparadas=usar_preparadas, instrumentar=instrumentar,
+                        umbral_lento=umbral_lento, log_lentas=log_lentas,
+                        registro_consultas=self.__instrumentacion)
+            self.__replicas = Replicas(
+                [Database(**{**base, **replica}) for replica in replicas],
+                seleccion_replicas)
+        if usar_pool:
+            self.__pool = PoolConexiones(
+                self._nueva_conexion,
+                minimo=pool_min,
+                maximo=pool_max,
+                ping_tras_inactividad=ping_tras_inactividad,
+                timeout=pool_timeout
+            )
+        self.__initialized = True
+
+    @property
+    def pool(self):
+        """Pool de conexiones, o None si se usa una conexion compartida."""
+        return self.__pool
+
+    @property
+    def backend(self):
+        """Nombre del backend en uso ("mysql" o "sqlite")."""
+        return self.__backend.nombre
+
+    @property
+    def nombre_base_datos(self):
+        """Nombre de la base de datos configurada."""
+        return self.__database
+
+    @property
+    def cache(self):
+        """Cache del catalogo, o None si esta desactivada."""
+        return self.__cache
+
+    @property
+    def indices(self):
+        """Indices en memoria del catalogo (existen aunque no haya cache)."""
+        return self.__indices
+
+    @property
+    def claves_idempotencia(self):
+        """Cache de claves de idempotencia recientes (clave -> reserva)."""
+        return self.__claves_idempotencia
+
+    @property
+    def usar_resumenes(self):
+        """Indica si las reservas mantienen la tabla ResumenReservas."""
+        return self.__usar_resumenes
+
+    @property
+    def instrumentacion(self):
+        """Registro de consultas, o None si la instrumentacion esta apagada."""
+        return self.__instrumentacion
+
+    @property
+    def replicas(self):
+        """Replicas de lectura, o None si todo se lee de la primaria."""
+        return self.__replicas
+
+    def _nueva_conexion(self):
+        """Abre una conexion nueva con el backend configurado."""
+        connection = self.__backend.conectar()
+        if self.__instrumentacion is not None:
+            connection = ConexionInstrumentada(connection, self.__instrumentacion)
+        if self.__replicas is not None:
+            connection = ConexionPrimaria(connection, self._anotar_escritura)
+        return connection
+
+    def _anotar_escritura(self):
+        """Registra un commit en la primaria (para leer lo propio)."""
+        ahora = time.monotonic()
+        self.__local.ultima_escritura = ahora
+        self.__ultima_escritura = ahora
+
+    def _leer_de_primaria(self, compartida):
+        """Indica si una lectura debe ir a la primaria aunque haya replicas."""
+        if getattr(self.__local, "conexion", None) is not None:
+            # Dentro de un bloque conexion(): misma conexion y transaccion
+            return True
+        limite = time.monotonic() - self.__ventana_lectura_propia
+        if compartida:
+            return self.__ultima_escritura > limite
+        return getattr(self.__local, "ultima_escritura", float("-inf")) > limite
+
+    @contextmanager
+    def conexion(self):
+        """
+        Entrega una conexion para usar en un bloque `with` y la libera al
+        salir. En modo pool la conexion vuelve al pool; en modo simple se
+        reutiliza la conexion compartida sin verificarla en cada consulta.
+        """
+        if self.__pool is None:
+            if (self.__connection is None or
+                    time.monotonic() - self.__ultimo_uso > self.__ping_tras_inactividad):
+                self.conectar()
+            anterior = getattr(self.__local, "conexion", None)
+            self.__local.conexion = self.__connection
             try:
-                cursor = self.__connection.cursor()
+                yield self.__connection
+            finally:
+                self.__local.conexion = anterior
+                self.__ultimo_uso = time.monotonic()
+            return
 
-                # Tabla Clientes (Usuarios del sistema)
-                print("Creando tabla Clientes...")
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS Clientes (
-                        id_cliente INT AUTO_INCREMENT PRIMARY KEY,
-                        nombre_completo VARCHAR(150) NOT NULL,
-                        email VARCHAR(100) NOT NULL UNIQUE,
-                        telefono VARCHAR(20),
-                        direccion VARCHAR(200),
-                        fecha_registro DATE DEFAULT (CURRENT_DATE)
-                    );
-                """)
-                self.__connection.commit()
+        # Un bloque anidado en el mismo hilo (p. ej. Reserva.crear que
+        # llama a PaqueteTuristico.actualizar) reutiliza la misma conexion
+        # para no partir la transaccion en dos.
+        actual = getattr(self.__local, "conexion", None)
+        if actual is not None:
+            yield actual
+            return
 
-                # Tabla Usuarios (Autenticacion)
-                print("Creando tabla Usuarios...")
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS Usuarios (
-                        id_usuario INT AUTO_INCREMENT PRIMARY KEY,
-                        nombre_usuario VARCHAR(50) NOT NULL UNIQUE,
-                        password_hash VARCHAR(255) NOT NULL,
-                        rol VARCHAR(20) DEFAULT 'cliente',
-                        id_cliente INT,
-                        activo BOOLEAN DEFAULT TRUE,
-                        fecha_creacion DATETIME DEFAULT CURRENT_TIMESTAMP,
-                        FOREIGN KEY (id_cliente) REFERENCES Clientes(id_cliente)
-                            ON DELETE CASCADE
-                    );
-                """)
-                self.__connection.commit()
+        connection = self.__pool.obtener()
+        self.__local.conexion = connection
+        sospechosa = False
+        try:
+            yield connection
+        except Error:
+            sospechosa = True
+            raise
+        finally:
+            self.__local.conexion = None
+            self.__pool.devolver(connection, sospechosa)
 
-                # Tabla Destinos
-                print("Creando tabla Destinos...")
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS Destinos (
-                        id_destino INT AUTO_INCREMENT PRIMARY KEY,
-                        nombre VARCHAR(100) NOT NULL,
-                        descripcion TEXT,
-                        actividades TEXT,
-                        costo_base DECIMAL(10,2) NOT NULL,
-                        disponible BOOLEAN DEFAULT TRUE,
-                        fecha_creacion DATE DEFAULT (CURRENT_DATE)
-                    );
-                """)
-                self.__connection.commit()
+    @contextmanager
+    def conexion_lectura(self, compartida=False):
+        """
+        Como conexion(), para consultas de solo lectura. Con replicas
+        configuradas entrega una conexion de una replica, salvo dentro de
+        un bloque conexion() del mismo hilo o si el mismo hilo escribio hace
+        menos de ventana_lectura_propia segundos. Con compartida=True (lo
+        leido queda en la cache del catalogo para todos los hilos) cuenta
+        la ultima escritura de cualquier hilo. Si la replica no entrega
+        conexion se lee de la primaria.
+        """
+        # Una lectura anidada (p. ej. listar_pagina que carga los destinos)
+        # sigue en la misma replica
+        actual = getattr(self.__local, "lectura", None)
+        if actual is not None:
+            yield actual
+            return
 
-                # Tabla Paquetes Turisticos
-                print("Creando tabla PaquetesTuristicos...")
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS PaquetesTuristicos (
-                        id_paquete INT AUTO_INCREMENT PRIMARY KEY,
-                        nombre VARCHAR(100) NOT NULL,
-                        descripcion TEXT,
-                        fecha_inicio DATE NOT NULL,
-                        fecha_fin DATE NOT NULL,
-                        precio_total DECIMAL(10,2) NOT NULL,
-                        cupo_disponible INT DEFAULT 0,
-                        disponible BOOLEAN DEFAULT TRUE,
-                        fecha_creacion DATE DEFAULT (CURRENT_DATE)
-                    );
-                """)
-                self.__connection.commit()
+        elegida = None
+        if self.__replicas is not None and not self._leer_de_primaria(compartida):
+            elegida = self.__replicas.elegir()
+        if elegida is None:
+            with self.conexion() as connection:
+                yield connection
+            return
 
-                # Tabla intermedia: Paquetes_Destinos (relacion muchos a muchos)
-                print("Creando tabla Paquetes_Destinos...")
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS Paquetes_Destinos (
-                        id_paquete_destino INT AUTO_INCREMENT PRIMARY KEY,
-                        id_paquete INT NOT NULL,
-                        id_destino INT NOT NULL,
-                        orden_visita INT DEFAULT 1,
-                        FOREIGN KEY (id_paquete) REFERENCES PaquetesTuristicos(id_paquete)
-                            ON DELETE CASCADE,
-                        FOREIGN KEY (id_destino) REFERENCES Destinos(id_destino)
-                            ON DELETE CASCADE,
-                        UNIQUE KEY unique_paquete_destino (id_paquete, id_destino)
-                    );
-                """)
-                self.__connection.commit()
+        indice, replica = elegida
+        with ExitStack() as pila:
+            try:
+                connection = pila.enter_context(replica.conexion())
+            except Exception as e:
+                print(f"Replica '{replica.nombre_base_datos}' no disponible, "
+                      f"se lee de la primaria: {e}")
+                self.__replicas.marcar_caida(indice)
+                yield pila.enter_context(self.conexion())
+                return
 
-                # Tabla Reservas
-                print("Creando tabla Reservas...")
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS Reservas (
-                        id_reserva INT AUTO_INCREMENT PRIMARY KEY,
-                        id_cliente INT NOT NULL,
-                        id_paquete INT NOT NULL,
-                        fecha_reserva DATETIME DEFAULT CURRENT_TIMESTAMP,
-                        numero_personas INT DEFAULT 1,
-                        precio_total DECIMAL(10,2) NOT NULL,
-                        estado VARCHAR(20) DEFAULT 'pendiente',
-                        notas TEXT,
-                        FOREIGN KEY (id_cliente) REFERENCES Clientes(id_cliente)
-                            ON DELETE CASCADE,
-                        FOREIGN KEY (id_paquete) REFERENCES PaquetesTuristicos(id_paquete)
-                            ON DELETE RESTRICT
-                    );
-                """)
-                self.__connection.commit()
+            self.__local.lectura = connection
+            inicio = time.perf_counter()
+            try:
+                yield connection
+                self.__replicas.registrar(indice, time.perf_counter() - inicio)
+            finally:
+                self.__local.lectura = None
+                # Sin pool nadie cierra la transaccion de lectura y la replica
+                # seguiria entregando la misma foto de los datos
+                if connection.in_transaction:
+                    connection.rollback()
+
+    @staticmethod
+    def _cursores_preparados(connection):
+        """
+        Cursores preparados de la conexion ({nombre: cursor}). Se guardan en
+        la propia conexion, por lo que duran lo mismo que ella en el pool.
+        """
+        cursores = getattr(connection, "_cursores_preparados", None)
+        if cursores is None:
+            cursores = connection._cursores_preparados = {}
+        return cursores
+
+    def _ejecutar_registrada(self, connection, nombre, params, leer):
+        """
+        Ejecuta una sentencia registrada. Devuelve las filas si `leer`, o
+        el numero de filas afectadas.
+        """
+        sql = SENTENCIAS[nombre]
+        if not self.__usar_preparadas:
+            cursor = connection.cursor(dictionary=True)
+            try:
+                cursor.execute(sql, params)
+                return cursor.fetchall() if leer else cursor.rowcount
+            finally:
+                cursor.close()
+
+        cursores = self._cursores_preparados(connection)
+        cursor = cursores.get(nombre)
+        if cursor is None:
+            cursor = cursores[nombre] = connection.cursor(prepared=True,
+                                                          dictionary=True)
+        try:
+            # Con el mismo objeto SQL el cursor reutiliza la sentencia
+            # ya preparada y solo envia los parametros
+            cursor.execute(sql, params)
+            return cursor.fetchall() if leer else cursor.rowcount
+        except Error:
+            # El cursor puede quedar inservible: se prepara de nuevo
+            cursores.pop(nombre, None)
+            raise
+
+    def consultar_preparada(self, connection, nombre, params=()):
+        """Ejecuta una consulta registrada y devuelve sus filas (dicts)."""
+        return self._ejecutar_registrada(connection, nombre, params, leer=True)
+
+    def ejecutar_preparada(self, connection, nombre, params=()):
+        """Ejecuta una sentencia registrada y devuelve las filas afectadas."""
+        return self._ejecutar_registrada(connection, nombre, params, leer=False)
+
+    def conectar(self):
+        """Establece conexion con la base de datos."""
+        if self.__connection is None or not self.__connection.is_connected():
+            self.__connection = self._nueva_conexion()
+            print(f"Conexion establecida con la base de datos "
+                  f"'{self.__backend.descripcion}'")
+
+        self.__ultimo_uso = time.monotonic()
+        return self.__connection
+
+    def crear_tablas(self, forzar=False):
+        """
+        Crea el esquema completo de la base de datos. Si el esquema ya esta
+        en VERSION_ESQUEMA no ejecuta DDL (el arranque habitual cuesta una
+        sola consulta), salvo con forzar=True, p. ej. para recrear una tabla
+        borrada a mano.
+        """
+        if self.__connection and self.__connection.is_connected():
+            if not forzar and self.version_esquema() >= VERSION_ESQUEMA:
+                return
+
+            try:
+                cursor = self.__connection.cursor()
+
+                for tabla, sentencia in self.__backend.TABLAS:
+                    print(f"Creando tabla {tabla}...")
+                    cursor.execute(sentencia)
+                    self.__connection.commit()
 
                 print("Todas las tablas fueron creadas exitosamente")
 
+                self.migrar()
+
             except Error as e:
                 print(f"Error creando tablas: {e}")
                 raise
@@ -195,6 +745,74 @@ class Database:
         else:
             raise Exception("No hay conexion activa a la base de datos")
 
+    def version_esquema(self):
+        """
+        Version registrada en VersionEsquema; 0 si la tabla aun no existe
+        (base de datos nueva).
+        """
+        with self.conexion() as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.execute("SELECT MAX(version) FROM VersionEsquema")
+                return cursor.fetchone()[0] or 0
+
+            except Error:
+                connection.rollback()
+                return 0
+            finally:
+                cursor.close()
+
+    def migrar(self):
+        """
+        Aplica las migraciones pendientes de MIGRACIONES.
+        Devuelve la version del esquema resultante.
+        """
+        with self.conexion() as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS VersionEsquema (
+                        version INT PRIMARY KEY,
+                        descripcion VARCHAR(200),
+                        fecha_aplicacion DATETIME DEFAULT CURRENT_TIMESTAMP
+                    );
+                """)
+                cursor.execute(
+                    "SELECT COALESCE(MAX(version), 0) FROM VersionEsquema")
+                version_actual = cursor.fetchone()[0]
+
+                for version, descripcion, sentencias in MIGRACIONES:
+                    if version <= version_actual:
+                        continue
+
+                    print(f"Aplicando migracion {version}: {descripcion}...")
+                    for sentencia in sentencias:
+                        try:
+                            cursor.execute(sentencia)
+                        except Error as e:
+                            # El indice o la columna ya existia (creado a
+                            # mano o por una ejecucion interrumpida): se
+                            # considera aplicado
+                            if e.errno not in (errorcode.ER_DUP_KEYNAME,
+                                               errorcode.ER_DUP_FIELDNAME):
+                                raise
+
+                    cursor.execute("""
+                        INSERT INTO VersionEsquema (version, descripcion)
+                        VALUES (%s, %s)
+                    """, (version, descripcion))
+                    connection.commit()
+                    version_actual = version
+
+                return version_actual
+
+            except Error as e:
+                connection.rollback()
+                print(f"Error aplicando migraciones: {e}")
+                raise
+            finally:
+                cursor.close()
+
     def ejecutar_query(self, query, params=None):
         """Ejecuta un query SQL de manera segura."""
         try:
@@ -214,11 +832,97 @@ class Database:
 
     def desconectar(self):
         """Cierra la conexion a la base de datos."""
+        if self.__pool is not None:
+            self.__pool.cerrar()
+
         if self.__connection and self.__connection.is_connected():
             self.__connection.close()
             self.__connection = None
             print("Conexion cerrada correctamente")
 
+        self.__backend.cerrar()
+        if self.__replicas is not None:
+            self.__replicas.desconectar()
+
     def __del__(self):
         """Destructor que asegura que la conexion se cierre."""
         self.desconectar()
+
+
+def _ruta_sqlite(database):
+    """Ruta del archivo SQLite para un nombre de base de datos."""
+    if database == ":memory:" or database.endswith((".db", ".sqlite", ".sqlite3")):
+        return database
+    return f"{database}.sqlite3"
+
+
+def paginar(cursor, select, columnas, params=(), condiciones=(), despues=None,
+            limite=50, descendente=False):
+    """
+    Ejecuta una consulta paginada por keyset (sin OFFSET).
+
+    `columnas` es la clave de orden, que debe ser unica (p. ej.
+    ("r.fecha_reserva", "r.id_reserva")). `despues` es la clave de la ultima
+    fila de la pagina anterior. Devuelve (filas, siguiente), donde
+    `siguiente` es None si no hay mas paginas.
+    """
+    sql, params = consulta_pagina(select, columnas, params, condiciones,
+                                  despues, limite, descendente)
+    cursor.execute(sql, params)
+    return cortar_pagina(cursor.fetchall(), columnas, limite, cursor.description)
+
+
+def consulta_pagina(select, columnas, params=(), condiciones=(), despues=None,
+                    limite=50, descendente=False):
+    """Arma el SQL y los parametros de una pagina; ver paginar()."""
+    condiciones = list(condiciones)
+    params = list(params)
+
+    if despues is not None:
+        marcadores = ", ".join(["%s"] * len(columnas))
+        operador = "<" if descendente else ">"
+        condiciones.append(
+            f"({', '.join(columnas)}) {operador} ({marcadores})")
+        params.extend(despues)
+
+    sql = select
+    if condiciones:
+        sql += " WHERE " + " AND ".join(condiciones)
+
+    orden = " DESC" if descendente else ""
+    sql += " ORDER BY " + ", ".join(c + orden for c in columnas)
+    sql += " LIMIT %s"
+    params.append(limite + 1)
+
+    return sql, tuple(params)
+
+
+def cortar_pagina(filas, columnas, limite, descripcion=None):
+    """
+    Recorta la fila extra pedida por consulta_pagina() y calcula la clave
+    de la pagina siguiente. Devuelve (filas, siguiente).
+    Las filas pueden ser dicts o tuplas; para tuplas se necesita la
+    `descripcion` del cursor (cursor.description).
+    """
+    siguiente = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        claves = [columna.split(".")[-1] for columna in columnas]
+        ultima = filas[-1]
+        if isinstance(ultima, dict):
+            siguiente = tuple(ultima[clave] for clave in claves)
+        else:
+            nombres = [c[0] for c in descripcion]
+            siguiente = tuple(ultima[nombres.index(clave)] for clave in claves)
+
+    return filas, siguiente
+
+
+def mapeador(descripcion, campos):
+    """
+    Devuelve una funcion que extrae de una fila tupla los valores de
+    `campos`, en ese orden. Los indices se calculan una sola vez por
+    consulta a partir de `descripcion` (cursor.description), no por fila.
+    """
+    nombres = [c[0] for c in descripcion]
+    return operator.itemgetter(*(nombres.index(campo) for campo in campos))
@@ -0,0 +1,141 @@
+"""
+Hash de contrasenas con bcrypt en un pool de trabajadores
+Viajes Aventura
+
+El hash y la verificacion con bcrypt consumen cientos de milisegundos de CPU.
+HasherBcrypt los ejecuta en un pool acotado de hilos (bcrypt libera el GIL)
+o de procesos, de modo que varios inicios de sesion simultaneos se
+atienden en paralelo sin que cada uno bloquee al resto.
+
+bcrypt y el pool de procesos se importan al usarlos por primera vez, para
+no demorar el arranque de quien solo importa los modelos.
+"""
+import os
+import threading
+from concurrent.futures import Future
+
+# Factor de costo por defecto (2^12 iteraciones)
+RONDAS_BCRYPT = 12
+
+
+def _hashpw(password, rondas):
+    """Genera el hash bcrypt de una contrasena (se ejecuta en el pool)."""
+    import bcrypt
+
+    salt = bcrypt.gensalt(rounds=rondas)
+    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+
+
+def _checkpw(password, hash_guardado):
+    """Verifica una contrasena contra su hash (se ejecuta en el pool)."""
+    import bcrypt
+
+    return bcrypt.checkpw(password.encode('utf-8'), hash_guardado.encode('utf-8'))
+
+
+def _ejecutar_aqui(funcion, *args):
+    """Ejecuta la tarea en el hilo actual y devuelve un Future ya resuelto."""
+    futuro = Future()
+    try:
+        futuro.set_result(funcion(*args))
+    except Exception as e:
+        futuro.set_exception(e)
+    return futuro
+
+
+class HasherBcrypt:
+    """Hasher bcrypt con costo configurable y pool de trabajadores acotado."""
+
+    def __init__(self, rondas=RONDAS_BCRYPT, trabajadores=None,
+                 usar_procesos=False, max_pendientes=None):
+        """
+        Construye el hasher.
+        `trabajadores` limita cuantos hashes corren en paralelo (por defecto
+        el numero de CPUs) y `max_pendientes` cuantos pueden esperar en cola.
+        """
+        if not 4 <= rondas <= 31:
+            raise ValueError("bcrypt admite entre 4 y 31 rondas")
+
+        self.rondas = rondas
+        self.trabajadores = trabajadores or os.cpu_count() or 1
+        if usar_procesos:
+            from concurrent.futures import ProcessPoolExecutor as ejecutor
+        else:
+            from concurrent.futures import ThreadPoolExecutor as ejecutor
+        self.__ejecutor = ejecutor(max_workers=self.trabajadores)
+        self.__cupos = threading.BoundedSemaphore(
+            max_pendientes or self.trabajadores * 4)
+
+    def _enviar(self, funcion, *args):
+        """
+        Encola una tarea; bloquea si la cola del pool esta llena. Si el pool
+        ya se cerro (configurar reemplazo este hasher mientras el llamador lo
+        usaba) la tarea se ejecuta en el hilo actual.
+        """
+        self.__cupos.acquire()
+        try:
+            futuro = self.__ejecutor.submit(funcion, *args)
+        except RuntimeError:
+            self.__cupos.release()
+            return _ejecutar_aqui(funcion, *args)
+        except Exception:
+            self.__cupos.release()
+            raise
+        futuro.add_done_callback(lambda _: self.__cupos.release())
+        return futuro
+
+    def enviar_hash(self, password):
+        """Encola el hash de una contrasena y devuelve un Future."""
+        return self._enviar(_hashpw, password, self.rondas)
+
+    def enviar_verificacion(self, password, hash_guardado):
+        """Encola una verificacion y devuelve un Future con el resultado."""
+        return self._enviar(_checkpw, password, hash_guardado)
+
+    def hash(self, password):
+        """Genera el hash bcrypt de la contrasena con sal automatica."""
+        return self.enviar_hash(password).result()
+
+    def verificar(self, password, hash_guardado):
+        """Indica si la contrasena corresponde al hash guardado."""
+        try:
+            return self.enviar_verificacion(password, hash_guardado).result()
+        except ValueError:
+            # Hash con formato invalido en la base de datos
+            return False
+
+    def necesita_rehash(self, hash_guardado):
+        """Indica si el hash fue generado con un costo distinto al actual."""
+        try:
+            return int(hash_guardado.split("$")[2]) != self.rondas
+        except (IndexError, ValueError):
+            return True
+
+    def cerrar(self):
+        """Detiene el pool de trabajadores."""
+        self.__ejecutor.shutdown(wait=True)
+
+
+_hasher = None
+_lock = threading.Lock()
+
+
+def configurar(rondas=RONDAS_BCRYPT, trabajadores=None, usar_procesos=False,
+               max_pendientes=None):
+    """Reemplaza el hasher del sistema por uno con la configuracion dada."""
+    global _hasher
+    nuevo = HasherBcrypt(rondas, trabajadores, usar_procesos, max_pendientes)
+    with _lock:
+        anterior, _hasher = _hasher, nuevo
+    if anterior is not None:
+        anterior.cerrar()
+    return nuevo
+
+
+def hasher_actual():
+    """Devuelve el hasher del sistema, creandolo con valores por defecto."""
+    global _hasher
+    with _lock:
+        if _hasher is None:
+            _hasher = HasherBcrypt()
+        return _hasher
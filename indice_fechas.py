@@ -0,0 +1,186 @@
+"""
+Indice en memoria de paquetes por rango de fechas
+Viajes Aventura
+
+Arreglos paralelos ordenados por (fecha_inicio, id_paquete). Una busqueda
+ubica con bisect el tramo de fechas de inicio candidatas y filtra ese tramo
+por fecha de fin, cupo y precio. Para las busquedas por solapamiento el
+tramo empieza `duracion_maxima` dias antes del rango, por lo que no hace
+falta un arbol de intervalos mientras los paquetes duren dias o semanas.
+Con filtro de destinos se recorren en cambio las claves ordenadas de cada
+destino pedido, que son muchas menos.
+
+Las escrituras marcan el paquete como pendiente (marcar) y quien usa el
+indice recarga solo esos paquetes (tomar_pendientes / actualizar).
+"""
+import threading
+from bisect import bisect_left, bisect_right, insort
+
+# Modos de busqueda
+DENTRO = "dentro"      # el paquete empieza y termina dentro del rango
+SOLAPA = "solapa"      # el paquete tiene al menos un dia dentro del rango
+INICIA = "inicia"      # el paquete empieza dentro del rango
+MODOS = (DENTRO, SOLAPA, INICIA)
+
+
+class IndiceFechas:
+    """Indice de paquetes por fechas, cupo, precio y destinos."""
+
+    def __init__(self):
+        """Construye un indice vacio."""
+        self.__claves = []       # (inicio, id_paquete), ordenadas
+        self.__fines = []
+        self.__cupos = []
+        self.__precios = []
+        self.__destinos = []     # frozenset de id_destino
+        self.__valores = []      # lo que se devuelve en cada resultado
+        self.__inicios = {}      # id_paquete -> inicio
+        self.__entradas = {}     # id_paquete -> (fin, cupo, precio, valor)
+        self.__por_destino = {}  # id_destino -> claves ordenadas
+        self.__duracion_maxima = 0
+        self.__pendientes = set()
+        self.__lock = threading.Lock()
+
+    def __len__(self):
+        """Cantidad de paquetes en el indice."""
+        with self.__lock:
+            return len(self.__claves)
+
+    def _quitar(self, id_paquete):
+        """Quita un paquete si esta indexado (con el lock tomado)."""
+        inicio = self.__inicios.pop(id_paquete, None)
+        if inicio is None:
+            return
+        clave = (inicio, id_paquete)
+        posicion = bisect_left(self.__claves, clave)
+        for id_destino in self.__destinos[posicion]:
+            claves = self.__por_destino[id_destino]
+            del claves[bisect_left(claves, clave)]
+        del self.__claves[posicion]
+        del self.__fines[posicion]
+        del self.__cupos[posicion]
+        del self.__precios[posicion]
+        del self.__destinos[posicion]
+        del self.__valores[posicion]
+        del self.__entradas[id_paquete]
+
+    def _agregar(self, id_paquete, inicio, fin, precio, cupo, destinos, valor):
+        """Inserta un paquete en su posicion (con el lock tomado)."""
+        inicio, fin, precio = inicio.toordinal(), fin.toordinal(), float(precio)
+        clave = (inicio, id_paquete)
+        posicion = bisect_left(self.__claves, clave)
+        self.__claves.insert(posicion, clave)
+        self.__fines.insert(posicion, fin)
+        self.__cupos.insert(posicion, cupo)
+        self.__precios.insert(posicion, precio)
+        self.__destinos.insert(posicion, frozenset(destinos))
+        self.__valores.insert(posicion, valor)
+        self.__inicios[id_paquete] = inicio
+        self.__entradas[id_paquete] = (fin, cupo, precio, valor)
+        for id_destino in self.__destinos[posicion]:
+            insort(self.__por_destino.setdefault(id_destino, []), clave)
+        self.__duracion_maxima = max(self.__duracion_maxima, fin - inicio)
+
+    def cargar(self, paquetes):
+        """
+        Reemplaza el contenido del indice. `paquetes` es un iterable de
+        (id_paquete, fecha_inicio, fecha_fin, precio, cupo, destinos, valor).
+        """
+        ordenados = sorted(
+            (inicio.toordinal(), id_paquete, fin.toordinal(), cupo,
+             float(precio), frozenset(destinos), valor)
+            for id_paquete, inicio, fin, precio, cupo, destinos, valor in paquetes)
+
+        with self.__lock:
+            self.__claves = [(fila[0], fila[1]) for fila in ordenados]
+            self.__fines = [fila[2] for fila in ordenados]
+            self.__cupos = [fila[3] for fila in ordenados]
+            self.__precios = [fila[4] for fila in ordenados]
+            self.__destinos = [fila[5] for fila in ordenados]
+            self.__valores = [fila[6] for fila in ordenados]
+            self.__inicios = {fila[1]: fila[0] for fila in ordenados}
+            self.__entradas = {fila[1]: (fila[2], fila[3], fila[4], fila[6])
+                               for fila in ordenados}
+            self.__por_destino = {}
+            for fila in ordenados:
+                for id_destino in fila[5]:
+                    self.__por_destino.setdefault(id_destino, []).append(
+                        (fila[0], fila[1]))
+            self.__duracion_maxima = max(
+                (fila[2] - fila[0] for fila in ordenados), default=0)
+            self.__pendientes.clear()
+
+    def marcar(self, id_paquete):
+        """Marca un paquete para recargarlo antes de la proxima busqueda."""
+        with self.__lock:
+            self.__pendientes.add(id_paquete)
+
+    def tomar_pendientes(self):
+        """Devuelve y limpia los IDs marcados desde la ultima recarga."""
+        with self.__lock:
+            pendientes = self.__pendientes
+            self.__pendientes = set()
+        return pendientes
+
+    def actualizar(self, ids, paquetes):
+        """
+        Reemplaza los paquetes `ids` por los de `paquetes` (mismo formato
+        que cargar). Los IDs que no vienen en `paquetes` se quitan.
+        """
+        with self.__lock:
+            for id_paquete in ids:
+                self._quitar(id_paquete)
+            for paquete in paquetes:
+                self._quitar(paquete[0])
+                self._agregar(*paquete)
+
+    def buscar(self, desde, hasta, modo=DENTRO, personas=1, precio_maximo=None,
+               destinos=None, minimo_inicio=None, limite=None):
+        """
+        Devuelve los valores de los paquetes que cumplen los filtros, por
+        fecha de inicio. `destinos` acepta paquetes que visiten alguno de
+        esos IDs; `minimo_inicio` descarta los que empiezan antes.
+        """
+        if modo not in MODOS:
+            raise ValueError(f"Modo de busqueda invalido: {modo}")
+
+        desde, hasta = desde.toordinal(), hasta.toordinal()
+        fin_minimo, fin_maximo = float("-inf"), float("inf")
+        primer_inicio = desde
+        if modo == DENTRO:
+            fin_maximo = hasta
+        elif modo == SOLAPA:
+            fin_minimo = desde
+
+        if precio_maximo is None:
+            precio_maximo = float("inf")
+
+        with self.__lock:
+            if modo == SOLAPA:
+                primer_inicio = desde - self.__duracion_maxima
+            if minimo_inicio is not None:
+                primer_inicio = max(primer_inicio, minimo_inicio.toordinal())
+            primera, ultima = (primer_inicio,), (hasta, float("inf"))
+
+            if destinos is not None:
+                candidatos = set()
+                for id_destino in destinos:
+                    claves = self.__por_destino.get(id_destino, ())
+                    candidatos.update(claves[bisect_left(claves, primera):
+                                             bisect_right(claves, ultima)])
+                entradas = (self.__entradas[id_paquete]
+                            for _, id_paquete in sorted(candidatos))
+            else:
+                i = bisect_left(self.__claves, primera)
+                j = bisect_right(self.__claves, ultima)
+                entradas = zip(self.__fines[i:j], self.__cupos[i:j],
+                               self.__precios[i:j], self.__valores[i:j])
+
+            resultados = []
+            for fin, cupo, precio, valor in entradas:
+                if (fin_minimo <= fin <= fin_maximo and cupo >= personas
+                        and precio <= precio_maximo):
+                    resultados.append(valor)
+                    if len(resultados) == limite:
+                        break
+            return resultados
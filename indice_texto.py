@@ -0,0 +1,236 @@
+"""
+Indice invertido en memoria para busquedas de texto
+Viajes Aventura
+
+Tokeniza texto en espanol sin distinguir tildes ni mayusculas (normaliza a
+NFKD y descarta las marcas diacriticas), quita palabras vacias y el plural
+final en "s", y rankea con BM25 ponderando cada campo del documento (p. ej.
+el nombre pesa mas que la descripcion). Todas las palabras de la consulta
+deben aparecer en el documento.
+
+El peso BM25 de cada palabra en cada documento se calcula al indexar, con
+la longitud promedio de la ultima carga completa, y las listas de cada
+palabra se ordenan por peso la primera vez que se consultan: una busqueda
+de una sola palabra lee solo la pagina pedida. Una de varias palabras
+intersecta las listas y rankea los documentos comunes; ese ranking se
+guarda para las paginas siguientes y las consultas repetidas hasta la
+proxima escritura.
+
+Igual que indice_fechas, las escrituras marcan el documento (marcar) y
+quien usa el indice recarga solo esos documentos antes de buscar.
+"""
+import math
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+
+PALABRAS_VACIAS = frozenset("""
+    a al algo con de del el en entre es esta este hay la las lo los mas muy
+    o para pero por que se sin sobre su sus un una unas unos y
+""".split())
+
+# Parametros de BM25
+K1 = 1.2
+B = 0.75
+
+# Rankings de consultas de varias palabras guardados
+CONSULTAS_GUARDADAS = 64
+
+_PALABRA = re.compile(r"[a-z0-9]+")
+
+
+def normalizar(texto):
+    """Pasa el texto a minusculas sin tildes ni dieresis."""
+    descompuesto = unicodedata.normalize("NFKD", texto.lower())
+    return "".join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+def tokenizar(texto):
+    """
+    Devuelve las palabras indexables del texto: normalizadas, sin palabras
+    vacias y sin la "s" final del plural ("Termas" -> "terma").
+    """
+    tokens = []
+    for palabra in _PALABRA.findall(normalizar(texto or "")):
+        if palabra in PALABRAS_VACIAS:
+            continue
+        if len(palabra) > 3 and palabra.endswith("s"):
+            palabra = palabra[:-1]
+        tokens.append(palabra)
+    return tokens
+
+
+class IndiceTexto:
+    """Indice invertido con ranking BM25 por campos ponderados."""
+
+    def __init__(self):
+        """Construye un indice vacio."""
+        self.__postings = {}     # token -> {id: peso BM25 sin idf}
+        self.__ordenados = {}    # token -> [(-peso, id)], ordenada
+        self.__documentos = {}   # id -> (tokens, valor)
+        self.__longitud_promedio = 1.0
+        self.__rankings = OrderedDict()  # palabras -> [id] por relevancia
+        self.__pendientes = set()
+        self.__lock = threading.Lock()
+
+    def __len__(self):
+        """Cantidad de documentos indexados."""
+        with self.__lock:
+            return len(self.__documentos)
+
+    def _quitar(self, id_documento):
+        """Quita un documento si esta indexado (con el lock tomado)."""
+        documento = self.__documentos.pop(id_documento, None)
+        if documento is None:
+            return
+        tokens, _ = documento
+        for token in tokens:
+            postings = self.__postings[token]
+            del postings[id_documento]
+            if not postings:
+                del self.__postings[token]
+            self.__ordenados.pop(token, None)
+        self.__rankings.clear()
+
+    @staticmethod
+    def _frecuencias(campos):
+        """
+        Frecuencia ponderada de cada palabra y longitud ponderada de un
+        documento. `campos` es una secuencia de (texto, peso).
+        """
+        frecuencias = {}
+        longitud = 0.0
+        for texto, peso in campos:
+            for token in tokenizar(texto):
+                frecuencias[token] = frecuencias.get(token, 0.0) + peso
+                longitud += peso
+        return frecuencias, longitud
+
+    def _agregar(self, id_documento, frecuencias, longitud, valor):
+        """Indexa un documento ya tokenizado (con el lock tomado)."""
+        normal = K1 * (1 - B + B * longitud / self.__longitud_promedio)
+        for token, frecuencia in frecuencias.items():
+            self.__postings.setdefault(token, {})[id_documento] = \
+                frecuencia * (K1 + 1) / (frecuencia + normal)
+            self.__ordenados.pop(token, None)
+        self.__documentos[id_documento] = (tuple(frecuencias), valor)
+        self.__rankings.clear()
+
+    def cargar(self, documentos):
+        """
+        Reemplaza el contenido del indice. `documentos` es un iterable de
+        (id, campos, valor), con `campos` una secuencia de (texto, peso).
+        """
+        tokenizados = [(id_documento, *IndiceTexto._frecuencias(campos), valor)
+                       for id_documento, campos, valor in documentos]
+
+        with self.__lock:
+            self.__postings = {}
+            self.__ordenados = {}
+            self.__rankings = OrderedDict()
+            self.__documentos = {}
+            self.__longitud_promedio = max(1.0, sum(
+                documento[2] for documento in tokenizados) / max(1, len(tokenizados)))
+            for documento in tokenizados:
+                self._agregar(*documento)
+            self.__pendientes.clear()
+
+    def marcar(self, id_documento):
+        """Marca un documento para recargarlo antes de la proxima busqueda."""
+        with self.__lock:
+            self.__pendientes.add(id_documento)
+
+    def tomar_pendientes(self):
+        """Devuelve y limpia los IDs marcados desde la ultima recarga."""
+        with self.__lock:
+            pendientes = self.__pendientes
+            self.__pendientes = set()
+        return pendientes
+
+    def actualizar(self, ids, documentos):
+        """
+        Reemplaza los documentos `ids` por los de `documentos` (mismo
+        formato que cargar). Los IDs que no vienen en `documentos` se quitan.
+        """
+        tokenizados = [(id_documento, *IndiceTexto._frecuencias(campos), valor)
+                       for id_documento, campos, valor in documentos]
+
+        with self.__lock:
+            for id_documento in ids:
+                self._quitar(id_documento)
+            for documento in tokenizados:
+                self._quitar(documento[0])
+                self._agregar(*documento)
+
+    def _ordenada(self, token):
+        """IDs con la palabra, del mayor al menor peso (con el lock tomado)."""
+        ordenada = self.__ordenados.get(token)
+        if ordenada is None:
+            ordenada = [id_documento for _, id_documento in sorted(
+                (-peso, id_documento)
+                for id_documento, peso in self.__postings[token].items())]
+            self.__ordenados[token] = ordenada
+        return ordenada
+
+    def _ranking(self, tokens):
+        """
+        IDs que contienen todas las palabras, del mas al menos relevante
+        (con el lock tomado).
+        """
+        clave = frozenset(tokens)
+        ranking = self.__rankings.get(clave)
+        if ranking is not None:
+            self.__rankings.move_to_end(clave)
+            return ranking
+
+        listas = sorted((self.__postings[token] for token in tokens), key=len)
+        candidatos = listas[0].keys() & listas[1].keys()
+        for postings in listas[2:]:
+            candidatos &= postings.keys()
+
+        cantidad = len(self.__documentos)
+        ponderadas = [(math.log(1 + (cantidad - len(postings) + 0.5) /
+                                (len(postings) + 0.5)), postings)
+                      for postings in listas]
+        ranking = [id_documento for _, id_documento in sorted(
+            (-sum(idf * postings[id_documento] for idf, postings in ponderadas),
+             id_documento)
+            for id_documento in candidatos)]
+
+        self.__rankings[clave] = ranking
+        while len(self.__rankings) > CONSULTAS_GUARDADAS:
+            self.__rankings.popitem(last=False)
+        return ranking
+
+    def buscar(self, consulta, limite=20, desplazamiento=0, filtro=None):
+        """
+        Devuelve (valores, hay_mas) con los documentos que contienen todas
+        las palabras de la consulta, del mas al menos relevante (a igual
+        puntaje, por ID), saltando los `desplazamiento` primeros. `hay_mas`
+        indica si hay resultados despues de la pagina. `filtro(valor)`
+        descarta documentos.
+        """
+        tokens = set(tokenizar(consulta))
+        if not tokens:
+            return [], False
+
+        buscados = desplazamiento + limite + 1
+        with self.__lock:
+            if not all(token in self.__postings for token in tokens):
+                return [], False
+
+            if len(tokens) == 1:
+                ranking = self._ordenada(next(iter(tokens)))
+            else:
+                ranking = self._ranking(tokens)
+
+            valores = []
+            for id_documento in ranking:
+                valor = self.__documentos[id_documento][1]
+                if filtro is None or filtro(valor):
+                    valores.append(valor)
+                    if len(valores) == buscados:
+                        break
+
+        return valores[desplazamiento:desplazamiento + limite], len(valores) == buscados
@@ -0,0 +1,291 @@
+"""
+Instrumentacion de las consultas a la base de datos
+Viajes Aventura
+
+ConexionInstrumentada envuelve cada conexion que abre Database y entrega
+cursores que miden cada execute/executemany (incluida la lectura de las
+filas) y lo registran en un RegistroConsultas por sentencia normalizada:
+llamadas, errores, filas y percentiles de latencia. Las sentencias que
+superan el umbral se guardan como consultas lentas y, si se indica un
+archivo, se agregan al log de consultas lentas.
+
+Las sentencias se normalizan reemplazando literales y parametros por "?" y
+las listas IN (...) por una sola, para que la misma consulta con otros
+valores se cuente junta. Nunca se registran los parametros.
+"""
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from functools import lru_cache
+
+from mysql.connector import Error
+
+# Latencias recientes guardadas por sentencia para los percentiles
+MUESTRAS_POR_SENTENCIA = 2048
+# Sentencias distintas registradas; el resto se acumula en OTRAS
+MAX_SENTENCIAS = 1000
+OTRAS = "(otras sentencias)"
+# Consultas lentas recientes guardadas en memoria
+MAX_LENTAS = 100
+
+_NORMALIZACIONES = [
+    (re.compile(r"'(?:[^'\\]|\\.|'')*'"), "?"),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"%s"), "?"),
+    (re.compile(r"\s+"), " "),
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)"), "(?)"),
+    (re.compile(r"\(\?\)(?:\s*,\s*\(\?\))+"), "(?)"),
+]
+
+
+@lru_cache(maxsize=4096)
+def normalizar_sentencia(sql):
+    """
+    Forma normalizada de una sentencia: sin literales ni parametros, con
+    los espacios colapsados y las listas de valores reducidas a (?).
+    """
+    for patron, reemplazo in _NORMALIZACIONES:
+        sql = patron.sub(reemplazo, sql)
+    return sql.strip()
+
+
+def _percentil(ordenadas, p):
+    """Percentil `p` (0-100) de una lista ordenada."""
+    if not ordenadas:
+        return 0.0
+    return ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * p / 100))]
+
+
+class _Estadistica:
+    """Contadores de una sentencia normalizada."""
+
+    __slots__ = ("llamadas", "errores", "filas", "segundos", "maximo",
+                 "lentas", "muestras")
+
+    def __init__(self):
+        self.llamadas = 0
+        self.errores = 0
+        self.filas = 0
+        self.segundos = 0.0
+        self.maximo = 0.0
+        self.lentas = 0
+        self.muestras = deque(maxlen=MUESTRAS_POR_SENTENCIA)
+
+
+class RegistroConsultas:
+    """
+    Estadisticas por sentencia normalizada y log de consultas lentas.
+    Es seguro usarlo desde varios hilos.
+    """
+
+    def __init__(self, umbral_lento=1.0, log_lentas=None):
+        """
+        `umbral_lento` son los segundos a partir de los cuales una consulta
+        se considera lenta; `log_lentas` es la ruta del archivo donde se
+        agregan (None para guardarlas solo en memoria).
+        """
+        self.umbral_lento = umbral_lento
+        self.log_lentas = log_lentas
+        self.__estadisticas = {}
+        self.__lentas = deque(maxlen=MAX_LENTAS)
+        self.__desde = datetime.now()
+        self.__lock = threading.Lock()
+
+    def registrar(self, sql, segundos, filas=0, error=False):
+        """Registra una ejecucion de `sql`."""
+        sentencia = normalizar_sentencia(sql)
+        lenta = segundos >= self.umbral_lento
+
+        with self.__lock:
+            estadistica = self.__estadisticas.get(sentencia)
+            if estadistica is None:
+                if len(self.__estadisticas) >= MAX_SENTENCIAS:
+                    sentencia = OTRAS
+                estadistica = self.__estadisticas.setdefault(
+                    sentencia, _Estadistica())
+            estadistica.llamadas += 1
+            estadistica.filas += filas
+            estadistica.segundos += segundos
+            estadistica.maximo = max(estadistica.maximo, segundos)
+            estadistica.muestras.append(segundos)
+            if error:
+                estadistica.errores += 1
+            if lenta:
+                estadistica.lentas += 1
+                self.__lentas.append((datetime.now(), segundos, filas, sentencia))
+
+        if lenta and self.log_lentas:
+            self._escribir_lenta(sentencia, segundos, filas, error)
+
+    def _escribir_lenta(self, sentencia, segundos, filas, error):
+        """Agrega una consulta lenta al archivo de log."""
+        linea = (f"{datetime.now():%Y-%m-%d %H:%M:%S} | {segundos * 1000:.1f} ms | "
+                 f"{filas} filas{' | error' if error else ''} | {sentencia}\n")
+        try:
+            with self.__lock:
+                with open(self.log_lentas, "a", encoding="utf-8") as archivo:
+                    archivo.write(linea)
+        except OSError as e:
+            print(f"Error al escribir el log de consultas lentas: {e}")
+
+    def instantanea(self):
+        """
+        Devuelve una lista de dicts, uno por sentencia, ordenada por tiempo
+        total descendente. Los percentiles son de las ultimas
+        MUESTRAS_POR_SENTENCIA ejecuciones; los tiempos van en milisegundos.
+        """
+        with self.__lock:
+            copias = [(sentencia, e.llamadas, e.errores, e.filas, e.segundos,
+                       e.maximo, e.lentas, sorted(e.muestras))
+                      for sentencia, e in self.__estadisticas.items()]
+
+        resultado = []
+        for (sentencia, llamadas, errores, filas, segundos, maximo, lentas,
+             muestras) in copias:
+            resultado.append({
+                "sentencia": sentencia,
+                "llamadas": llamadas,
+                "errores": errores,
+                "filas": filas,
+                "filas_por_llamada": filas / llamadas,
+                "total_ms": segundos * 1000,
+                "promedio_ms": segundos * 1000 / llamadas,
+                "p50_ms": _percentil(muestras, 50) * 1000,
+                "p95_ms": _percentil(muestras, 95) * 1000,
+                "p99_ms": _percentil(muestras, 99) * 1000,
+                "max_ms": maximo * 1000,
+                "lentas": lentas,
+            })
+        resultado.sort(key=lambda fila: fila["total_ms"], reverse=True)
+        return resultado
+
+    def lentas(self):
+        """Consultas lentas recientes: dicts con fecha, ms, filas y sentencia."""
+        with self.__lock:
+            lentas = list(self.__lentas)
+        return [{"fecha": fecha, "ms": segundos * 1000, "filas": filas,
+                 "sentencia": sentencia}
+                for fecha, segundos, filas, sentencia in reversed(lentas)]
+
+    @property
+    def desde(self):
+        """Momento desde el que se acumulan las estadisticas."""
+        return self.__desde
+
+    def reiniciar(self):
+        """Descarta las estadisticas y las consultas lentas en memoria."""
+        with self.__lock:
+            self.__estadisticas.clear()
+            self.__lentas.clear()
+            self.__desde = datetime.now()
+
+
+class CursorInstrumentado:
+    """
+    Cursor que mide cada sentencia. En un SELECT la medicion incluye la
+    lectura de las filas y se registra al leer todas (fetchall), al
+    ejecutar otra sentencia o al cerrar el cursor.
+    """
+
+    def __init__(self, cursor, registro):
+        """Envuelve un cursor de la conexion."""
+        self.__cursor = cursor
+        self.__registro = registro
+        self.__pendiente = None  # [sql, segundos, filas] de un SELECT en curso
+
+    def _terminar(self):
+        """Registra el SELECT en curso, si lo hay."""
+        if self.__pendiente is not None:
+            self.__registro.registrar(*self.__pendiente)
+            self.__pendiente = None
+
+    def _medir(self, metodo, sql, *args, **kwargs):
+        """Ejecuta `metodo` y registra la sentencia o la deja pendiente."""
+        self._terminar()
+        inicio = time.perf_counter()
+        try:
+            resultado = metodo(sql, *args, **kwargs)
+        except Error:
+            self.__registro.registrar(sql, time.perf_counter() - inicio,
+                                      error=True)
+            raise
+
+        segundos = time.perf_counter() - inicio
+        if self.__cursor.description is None:
+            self.__registro.registrar(sql, segundos, max(self.__cursor.rowcount, 0))
+        else:
+            self.__pendiente = [sql, segundos, 0]
+        return resultado
+
+    def execute(self, sql, *args, **kwargs):
+        """Ejecuta una sentencia midiendo su duracion."""
+        return self._medir(self.__cursor.execute, sql, *args, **kwargs)
+
+    def executemany(self, sql, *args, **kwargs):
+        """Ejecuta una sentencia por fila midiendo la duracion del lote."""
+        return self._medir(self.__cursor.executemany, sql, *args, **kwargs)
+
+    def _leido(self, inicio, filas, fin):
+        """Suma una lectura al SELECT en curso y lo registra si termino."""
+        if self.__pendiente is not None:
+            self.__pendiente[1] += time.perf_counter() - inicio
+            self.__pendiente[2] += filas
+            if fin:
+                self._terminar()
+
+    def fetchall(self):
+        """Entrega las filas restantes."""
+        inicio = time.perf_counter()
+        filas = self.__cursor.fetchall()
+        self._leido(inicio, len(filas), True)
+        return filas
+
+    def fetchone(self):
+        """Entrega la siguiente fila o None."""
+        inicio = time.perf_counter()
+        fila = self.__cursor.fetchone()
+        self._leido(inicio, 0 if fila is None else 1, fila is None)
+        return fila
+
+    def fetchmany(self, size=1):
+        """Entrega hasta `size` filas."""
+        inicio = time.perf_counter()
+        filas = self.__cursor.fetchmany(size)
+        self._leido(inicio, len(filas), not filas)
+        return filas
+
+    def __iter__(self):
+        """Itera las filas restantes."""
+        fila = self.fetchone()
+        while fila is not None:
+            yield fila
+            fila = self.fetchone()
+
+    def close(self):
+        """Registra la sentencia en curso y cierra el cursor."""
+        self._terminar()
+        return self.__cursor.close()
+
+    def __getattr__(self, nombre):
+        """Delega el resto (rowcount, lastrowid, description...) al cursor."""
+        return getattr(self.__cursor, nombre)
+
+
+class ConexionInstrumentada:
+    """Conexion que entrega cursores instrumentados."""
+
+    def __init__(self, conexion, registro):
+        """Envuelve una conexion abierta por el backend."""
+        self.__conexion = conexion
+        self.__registro = registro
+
+    def cursor(self, *args, **kwargs):
+        """Crea un cursor instrumentado."""
+        return CursorInstrumentado(self.__conexion.cursor(*args, **kwargs),
+                                   self.__registro)
+
+    def __getattr__(self, nombre):
+        """Delega el resto (commit, rollback, ping...) a la conexion."""
+        return getattr(self.__conexion, nombre)
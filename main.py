@@ -5,12 +5,16 @@ Programa principal con menu.
 from conexion_db import Database
 from modelos import Cliente, Usuario, Destino
 from paquetes_reservas import PaqueteTuristico, Reserva
+import reportes
 from datetime import datetime, date
 
 
 # Variable global para el usuario autenticado
 USUARIO_ACTUAL = None
 
+# Cantidad de registros por pagina en los listados largos
+REGISTROS_POR_PAGINA = 20
+
 
 def limpiar_pantalla():
     """Simula limpiar la pantalla con lineas en blanco"""
@@ -29,6 +33,8 @@ def mostrar_menu_principal():
     print("5. Ver Mis Reservas")
     print("6. Administracion de Usuarios")
     print("7. Ver Todas las Reservas (Admin)")
+    print("8. Reportes de Ingresos y Ocupacion (Admin)")
+    print("9. Estadisticas de Consultas (Admin)")
     print("0. Cerrar Sesion y Salir")
     print("="*70)
 
@@ -47,6 +53,7 @@ def menu_destinos(db):
         print("2. Listar todos los destinos")
         print("3. Modificar destino")
         print("4. Eliminar destino")
+        print("5. Buscar destinos por nombre o actividad")
         print("0. Volver al menu principal")
         print("="*70)
 
@@ -150,6 +157,31 @@ def menu_destinos(db):
 
             input("\nPresione Enter para continuar...")
 
+        elif opcion == "5":
+            # Buscar destinos por texto
+            print("\n--- BUSCAR DESTINOS ---")
+            texto = input("Buscar (ej. rafting, termas, Patagonia): ").strip()
+
+            despues = None
+            i = 0
+            while texto:
+                destinos, despues = Destino.buscar_texto(
+                    db, texto, limite=REGISTROS_POR_PAGINA, despues=despues)
+
+                for dest in destinos:
+                    i += 1
+                    print(f"\n{i}. [ID {dest.id_destino}] {dest}")
+                    print(f"   Actividades: {dest.actividades}")
+
+                if despues is None or input(
+                        "\nEnter para ver mas, 0 para terminar: ").strip() == "0":
+                    break
+
+            if i == 0:
+                print("No se encontraron destinos")
+
+            input("\nPresione Enter para continuar...")
+
         elif opcion == "0":
             break
         else:
@@ -172,6 +204,7 @@ def menu_paquetes(db):
         print("3. Ver paquetes disponibles")
         print("4. Buscar paquetes por fechas")
         print("5. Ver detalles de un paquete")
+        print("6. Buscar paquetes por actividad")
         print("0. Volver al menu principal")
         print("="*70)
 
@@ -292,8 +325,20 @@ def menu_paquetes(db):
                     "Fecha fin deseada (YYYY-MM-DD): ").strip()
                 fecha_fin = datetime.strptime(fecha_fin_str, "%Y-%m-%d").date()
 
-                paquetes = PaqueteTuristico.buscar_por_fechas(
-                    db, fecha_inicio, fecha_fin)
+                personas_str = input("Numero de personas (Enter = 1): ").strip()
+                personas = int(personas_str) if personas_str else 1
+
+                precio_str = input("Precio maximo (Enter = sin limite): ").strip()
+                precio_maximo = float(precio_str) if precio_str else None
+
+                print("Paquetes que: 1. Empiezan y terminan en esas fechas  "
+                      "2. Pasan por esas fechas  3. Empiezan en esas fechas")
+                modo = {"2": "solapa", "3": "inicia"}.get(
+                    input("Opcion (Enter = 1): ").strip(), "dentro")
+
+                paquetes = PaqueteTuristico.buscar_en_rango(
+                    db, fecha_inicio, fecha_fin, modo, personas=personas,
+                    precio_maximo=precio_maximo)
 
                 if paquetes:
                     print(
@@ -304,7 +349,7 @@ def menu_paquetes(db):
                     print("No se encontraron paquetes para esas fechas")
 
             except ValueError:
-                print("Error: Formato de fecha invalido")
+                print("Error: Formato de fecha o numero invalido")
 
             input("\nPresione Enter para continuar...")
 
@@ -336,6 +381,30 @@ def menu_paquetes(db):
 
             input("\nPresione Enter para continuar...")
 
+        elif opcion == "6":
+            # Buscar paquetes por actividad
+            print("\n--- BUSCAR PAQUETES POR ACTIVIDAD ---")
+            texto = input("Actividad o destino (ej. trekking, kayak): ").strip()
+
+            despues = None
+            i = 0
+            while texto:
+                paquetes, despues = PaqueteTuristico.buscar_por_actividad(
+                    db, texto, limite=REGISTROS_POR_PAGINA, despues=despues)
+
+                for paq in paquetes:
+                    i += 1
+                    print(f"\n{i}. [ID {paq.id_paquete}] {paq}")
+
+                if despues is None or input(
+                        "\nEnter para ver mas, 0 para terminar: ").strip() == "0":
+                    break
+
+            if i == 0:
+                print("No se encontraron paquetes con esa actividad")
+
+            input("\nPresione Enter para continuar...")
+
         elif opcion == "0":
             break
         else:
@@ -391,14 +460,23 @@ def menu_clientes(db):
         elif opcion == "2":
             # Listar clientes
             print("\n--- LISTA DE CLIENTES ---")
-            clientes = Cliente.listar_todos(db)
+            despues = None
+            i = 0
+            while True:
+                clientes, despues = Cliente.listar_pagina(
+                    db, limite=REGISTROS_POR_PAGINA, despues=despues)
 
-            if clientes:
-                for i, cli in enumerate(clientes, 1):
+                for cli in clientes:
+                    i += 1
                     print(f"\n{i}. {cli}")
                     print(f"   Direccion: {cli.direccion}")
                     print(f"   Fecha registro: {cli.fecha_registro}")
-            else:
+
+                if despues is None or input(
+                        "\nEnter para ver mas, 0 para terminar: ").strip() == "0":
+                    break
+
+            if i == 0:
                 print("No hay clientes registrados")
 
             input("\nPresione Enter para continuar...")
@@ -440,8 +518,9 @@ def menu_reservas(db, usuario):
     print(" " * 27 + "REALIZAR RESERVA")
     print("="*70)
 
-    # Mostrar paquetes disponibles
-    paquetes = PaqueteTuristico.listar_todos(db, solo_disponibles=True)
+    # Mostrar paquetes disponibles (con sus destinos en una sola consulta)
+    paquetes = PaqueteTuristico.listar_todos(db, solo_disponibles=True,
+                                             prefetch_destinos=True)
 
     if not paquetes:
         print("No hay paquetes disponibles en este momento")
@@ -468,7 +547,6 @@ def menu_reservas(db, usuario):
         paquete_seleccionado = paquetes[seleccion - 1]
 
         # Mostrar detalles del paquete
-        paquete_seleccionado.cargar_destinos()
         print(f"\nPaquete seleccionado: {paquete_seleccionado.nombre}")
         print(f"Precio por persona: ${paquete_seleccionado.precio_total:,.2f}")
 
@@ -527,18 +605,21 @@ def menu_mis_reservas(db, usuario):
     print(" " * 27 + "MIS RESERVAS")
     print("="*70)
 
-    reservas = Reserva.listar_por_cliente(db, usuario.id_cliente)
+    # Reservas, paquetes y destinos en dos consultas (sin N+1)
+    reservas = Reserva.listar_por_cliente_detallado(db, usuario.id_cliente)
 
     if reservas:
         for i, res in enumerate(reservas, 1):
             print(f"\n{i}. {res}")
 
-            # Obtener detalles del paquete
-            paquete = PaqueteTuristico.buscar_por_id(db, res.id_paquete)
+            paquete = res.paquete
             if paquete:
                 print(f"   Paquete: {paquete.nombre}")
                 print(
                     f"   Fechas: {paquete.fecha_inicio} a {paquete.fecha_fin}")
+                if paquete.destinos:
+                    nombres = ", ".join(d['nombre'] for d in paquete.destinos)
+                    print(f"   Destinos: {nombres}")
 
             if res.notas:
                 print(f"   Notas: {res.notas}")
@@ -612,10 +693,15 @@ def menu_todas_reservas(db):
     print(" " * 24 + "TODAS LAS RESERVAS")
     print("="*70)
 
-    reservas = Reserva.listar_todas(db)
+    # Se muestran por paginas para no cargar todas las reservas en memoria
+    despues = None
+    i = 0
+    while True:
+        reservas, despues = Reserva.listar_pagina(
+            db, limite=REGISTROS_POR_PAGINA, despues=despues)
 
-    if reservas:
-        for i, res in enumerate(reservas, 1):
+        for res in reservas:
+            i += 1
             print(f"\n{i}. Reserva #{res['id_reserva']}")
             print(f"   Cliente: {res['nombre_completo']}")
             print(f"   Paquete: {res['nombre_paquete']}")
@@ -623,21 +709,143 @@ def menu_todas_reservas(db):
             print(f"   Total: ${res['precio_total']:,.2f}")
             print(f"   Estado: {res['estado']}")
             print(f"   Fecha: {res['fecha_reserva']}")
-    else:
+
+        if despues is None:
+            break
+        if input("\nEnter para ver mas, 0 para volver: ").strip() == "0":
+            return
+
+    if i == 0:
         print("No hay reservas registradas")
 
     input("\nPresione Enter para continuar...")
 
 
+def menu_reportes(db):
+    """
+    Menu de reportes de ingresos y ocupacion.
+    Solo para administradores.
+    """
+    limpiar_pantalla()
+    print("\n" + "="*70)
+    print(" " * 18 + "REPORTES DE INGRESOS Y OCUPACION")
+    print("="*70)
+    print("1. Por paquete (incluye ocupacion)")
+    print("2. Por destino")
+    print("3. Por mes")
+    print("4. Reconstruir tablas de resumen")
+    print("0. Volver al menu principal")
+    print("="*70)
+
+    opcion = input("\nSeleccione una opcion: ").strip()
+
+    if opcion == "1":
+        print("\n--- INGRESOS Y OCUPACION POR PAQUETE ---")
+        filas = reportes.por_paquete(db)
+        if filas:
+            for fila in filas:
+                print(f"\n{fila['nombre']} (ID {fila['id_paquete']})")
+                print(f"   Ingresos: ${fila['ingresos']:,.2f} | "
+                      f"Pendiente: ${fila['ingresos_pendientes']:,.2f}")
+                print(f"   Reservas: {fila['reservas']} | "
+                      f"Confirmadas: {fila['confirmadas']} | "
+                      f"Pendientes: {fila['pendientes']} | "
+                      f"Canceladas: {fila['canceladas']}")
+                print(f"   Ocupacion: {fila['personas']}/{fila['cupo_original']} "
+                      f"personas ({fila['ocupacion']:.1f}%)")
+        else:
+            print("No hay paquetes registrados")
+
+    elif opcion == "2":
+        print("\n--- INGRESOS POR DESTINO ---")
+        filas = reportes.por_destino(db)
+        if filas:
+            for fila in filas:
+                print(f"{fila['nombre']} | Ingresos: ${fila['ingresos']:,.2f} | "
+                      f"Personas: {fila['personas']} | Reservas: {fila['reservas']} | "
+                      f"Canceladas: {fila['canceladas']}")
+        else:
+            print("No hay destinos registrados")
+
+    elif opcion == "3":
+        print("\n--- INGRESOS POR MES ---")
+        filas = reportes.por_mes(db)
+        if filas:
+            for fila in filas:
+                print(f"{fila['mes']} | Ingresos: ${fila['ingresos']:,.2f} | "
+                      f"Personas: {fila['personas']} | Reservas: {fila['reservas']} | "
+                      f"Canceladas: {fila['canceladas']}")
+        else:
+            print("No hay reservas registradas")
+
+    elif opcion == "4":
+        reportes.reconstruir_resumenes(db)
+
+    else:
+        return
+
+    input("\nPresione Enter para continuar...")
+
+
+def menu_consultas(db):
+    """
+    Estadisticas de las consultas a la base de datos: las sentencias que
+    mas tiempo consumen y las consultas lentas recientes.
+    Solo para administradores.
+    """
+    limpiar_pantalla()
+    print("\n" + "="*70)
+    print(" " * 22 + "ESTADISTICAS DE CONSULTAS")
+    print("="*70)
+
+    registro = db.instrumentacion
+    if registro is None:
+        print("La instrumentacion de consultas esta desactivada")
+        input("\nPresione Enter para continuar...")
+        return
+
+    sentencias = registro.instantanea()
+    print(f"Desde: {registro.desde:%Y-%m-%d %H:%M:%S} | "
+          f"Umbral de consulta lenta: {registro.umbral_lento * 1000:.0f} ms")
+
+    if sentencias:
+        for fila in sentencias[:10]:
+            sentencia = fila['sentencia']
+            if len(sentencia) > 66:
+                sentencia = sentencia[:63] + "..."
+            print(f"\n{sentencia}")
+            print(f"   Llamadas: {fila['llamadas']} | Errores: {fila['errores']} | "
+                  f"Filas/llamada: {fila['filas_por_llamada']:.1f} | "
+                  f"Total: {fila['total_ms']:.1f} ms")
+            print(f"   p50: {fila['p50_ms']:.2f} ms | p95: {fila['p95_ms']:.2f} ms | "
+                  f"p99: {fila['p99_ms']:.2f} ms | Max: {fila['max_ms']:.2f} ms")
+    else:
+        print("\nNo hay consultas registradas")
+
+    lentas = registro.lentas()
+    if lentas:
+        print("\n--- CONSULTAS LENTAS RECIENTES ---")
+        for lenta in lentas[:10]:
+            print(f"{lenta['fecha']:%H:%M:%S} | {lenta['ms']:.1f} ms | "
+                  f"{lenta['filas']} filas | {lenta['sentencia'][:40]}")
+
+    if input("\nIngrese R para reiniciar las estadisticas o Enter para volver: "
+             ).strip().upper() == "R":
+        registro.reiniciar()
+        print("Estadisticas reiniciadas")
+        input("\nPresione Enter para continuar...")
+
+
 def verificar_usuarios_existentes(db):
     """Verifica si existen usuarios en el sistema."""
     try:
-        connection = db.conectar()
-        cursor = connection.cursor()
-        cursor.execute("SELECT COUNT(*) FROM Usuarios")
-        count = cursor.fetchone()[0]
-        cursor.close()
-        return count > 0
+        with db.conexion() as connection:
+            cursor = connection.cursor()
+            # Basta con encontrar una fila; COUNT(*) recorreria la tabla
+            cursor.execute("SELECT 1 FROM Usuarios LIMIT 1")
+            existe = cursor.fetchone() is not None
+            cursor.close()
+        return existe
     except Exception as e:
         print(f"Error al verificar usuarios: {e}")
         return False
@@ -709,17 +917,19 @@ def autenticar_usuario(db):
         return None
 
 
-def main():
+def main(db=None):
     """
     Funcion principal del sistema.
-    Punto de entrada de la aplicacion.
+    Punto de entrada de la aplicacion. `db` permite usar otra base de datos
+    en vez de la configurada por defecto (p. ej. benchmarks/arranque.py).
     """
     print("\n" + "="*70)
     print(" " * 15 + "INICIANDO SISTEMA VIAJES AVENTURA")
     print("="*70)
 
     # Conectar a la base de datos
-    db = Database()
+    if db is None:
+        db = Database()
 
     try:
         connection = db.conectar()
@@ -809,6 +1019,20 @@ def main():
                         print("No tiene permisos para esta opcion")
                         input("\nPresione Enter para continuar...")
 
+                elif opcion == "8":
+                    if USUARIO_ACTUAL.tiene_permiso("admin"):
+                        menu_reportes(db)
+                    else:
+                        print("No tiene permisos para esta opcion")
+                        input("\nPresione Enter para continuar...")
+
+                elif opcion == "9":
+                    if USUARIO_ACTUAL.tiene_permiso("admin"):
+                        menu_consultas(db)
+                    else:
+                        print("No tiene permisos para esta opcion")
+                        input("\nPresione Enter para continuar...")
+
                 elif opcion == "0":
                     print("\nGracias por usar el sistema Viajes Aventura")
                     print("Cerrando sesion...")
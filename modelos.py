@@ -2,14 +2,33 @@
 Modelos de datos del sistema de reservas
 Viajes Aventura - Clases del negocio
 """
-import bcrypt
 from datetime import date, datetime
 from mysql.connector import Error
+import cache_catalogo
+import hash_passwords
+import indice_texto
+from conexion_db import mapeador, paginar, registrar_sentencia
 
 
 class Cliente:
     """Clase que representa un cliente de la agencia."""
 
+    # Consultas compartidas con la version async (modelos_async)
+    SQL_INSERTAR = """
+        INSERT INTO Clientes (nombre_completo, email, telefono, direccion, fecha_registro)
+        VALUES (%s, %s, %s, %s, %s)
+    """
+    SQL_LISTAR_TODOS = "SELECT * FROM Clientes ORDER BY nombre_completo"
+    SQL_PAGINA = "SELECT * FROM Clientes"
+    CLAVE_PAGINA = ("nombre_completo", "id_cliente")
+    SQL_BUSCAR_POR_ID = "SELECT * FROM Clientes WHERE id_cliente = %s"
+    SQL_BUSCAR_POR_EMAIL = "SELECT * FROM Clientes WHERE email = %s"
+
+    # Columnas en el orden de los argumentos del constructor
+    CAMPOS = ("id_cliente", "nombre_completo", "email", "telefono",
+              "direccion", "fecha_registro")
+    __slots__ = ("db",) + CAMPOS
+
     def __init__(self, db, id_cliente=None, nombre_completo="", email="",
                  telefono="", direccion="", fecha_registro=None):
         """Construye un cliente."""
@@ -27,31 +46,46 @@ class Cliente:
         return (f"Cliente: {self.nombre_completo} | Email: {self.email} | "
                 f"Telefono: {self.telefono}")
 
+    @staticmethod
+    def _desde_fila(db, row):
+        """Construye un cliente a partir de una fila de la tabla Clientes."""
+        return Cliente(
+            db,
+            id_cliente=row['id_cliente'],
+            nombre_completo=row['nombre_completo'],
+            email=row['email'],
+            telefono=row['telefono'],
+            direccion=row['direccion'],
+            fecha_registro=row['fecha_registro']
+        )
+
+    @staticmethod
+    def _desde_tuplas(db, descripcion, filas):
+        """Construye clientes a partir de filas tupla de la tabla Clientes."""
+        extraer = mapeador(descripcion, Cliente.CAMPOS)
+        return [Cliente(db, *extraer(row)) for row in filas]
+
     def guardar(self):
         """Guarda el cliente en la base de datos."""
-        sql = """
-            INSERT INTO Clientes (nombre_completo, email, telefono, direccion, fecha_registro)
-            VALUES (%s, %s, %s, %s, %s)
-        """
         values = (self.nombre_completo, self.email, self.telefono,
                   self.direccion, self.fecha_registro)
 
-        try:
-            connection = self.db.conectar()
+        with self.db.conexion() as connection:
             cursor = connection.cursor()
-            cursor.execute(sql, values)
-            connection.commit()
-            self.id_cliente = cursor.lastrowid
-            print(
-                f"Cliente '{self.nombre_completo}' registrado con ID: {self.id_cliente}")
-            return self.id_cliente
-
-        except Error as e:
-            connection.rollback()
-            print(f"Error al registrar cliente: {e}")
-            return None
-        finally:
-            cursor.close()
+            try:
+                cursor.execute(Cliente.SQL_INSERTAR, values)
+                connection.commit()
+                self.id_cliente = cursor.lastrowid
+                print(
+                    f"Cliente '{self.nombre_completo}' registrado con ID: {self.id_cliente}")
+                return self.id_cliente
+
+            except Error as e:
+                connection.rollback()
+                print(f"Error al registrar cliente: {e}")
+                return None
+            finally:
+                cursor.close()
 
     def actualizar(self):
         """Actualiza los datos del cliente."""
@@ -63,110 +97,113 @@ class Cliente:
         values = (self.nombre_completo, self.email, self.telefono,
                   self.direccion, self.id_cliente)
 
-        try:
-            connection = self.db.conectar()
+        with self.db.conexion() as connection:
             cursor = connection.cursor()
-            cursor.execute(sql, values)
-            connection.commit()
-            print(f"Cliente ID {self.id_cliente} actualizado correctamente")
-            return True
-
-        except Error as e:
-            connection.rollback()
-            print(f"Error al actualizar cliente: {e}")
-            return False
-        finally:
-            cursor.close()
+            try:
+                cursor.execute(sql, values)
+                connection.commit()
+                print(f"Cliente ID {self.id_cliente} actualizado correctamente")
+                return True
+
+            except Error as e:
+                connection.rollback()
+                print(f"Error al actualizar cliente: {e}")
+                return False
+            finally:
+                cursor.close()
 
     @staticmethod
     def listar_todos(db):
         """Lista todos los clientes registrados."""
-        try:
-            connection = db.conectar()
-            cursor = connection.cursor(dictionary=True)
-            cursor.execute("SELECT * FROM Clientes ORDER BY nombre_completo")
-            resultados = cursor.fetchall()
-
-            clientes = []
-            for row in resultados:
-                cliente = Cliente(
-                    db,
-                    id_cliente=row['id_cliente'],
-                    nombre_completo=row['nombre_completo'],
-                    email=row['email'],
-                    telefono=row['telefono'],
-                    direccion=row['direccion'],
-                    fecha_registro=row['fecha_registro']
-                )
-                clientes.append(cliente)
-
-            return clientes
-
-        except Error as e:
-            print(f"Error al listar clientes: {e}")
-            return []
-        finally:
-            cursor.close()
+        with db.conexion_lectura() as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.execute(Cliente.SQL_LISTAR_TODOS)
+                return Cliente._desde_tuplas(
+                    db, cursor.description, cursor.fetchall())
+
+            except Error as e:
+                print(f"Error al listar clientes: {e}")
+                return []
+            finally:
+                cursor.close()
+
+    @staticmethod
+    def listar_pagina(db, limite=50, despues=None):
+        """
+        Lista una pagina de clientes ordenados por nombre.
+        Devuelve (clientes, siguiente); `siguiente` se entrega como
+        `despues` para pedir la pagina que sigue y es None al final.
+        """
+        with db.conexion_lectura() as connection:
+            cursor = connection.cursor()
+            try:
+                filas, siguiente = paginar(
+                    cursor, Cliente.SQL_PAGINA, Cliente.CLAVE_PAGINA,
+                    despues=despues, limite=limite)
+                clientes = Cliente._desde_tuplas(db, cursor.description, filas)
+                return clientes, siguiente
+
+            except Error as e:
+                print(f"Error al listar clientes: {e}")
+                return [], None
+            finally:
+                cursor.close()
+
+    @staticmethod
+    def iterar_todos(db, tamano_lote=500):
+        """Recorre todos los clientes en lotes acotados de memoria."""
+        despues = None
+        while True:
+            clientes, despues = Cliente.listar_pagina(db, tamano_lote, despues)
+            yield from clientes
+            if despues is None:
+                return
 
     @staticmethod
     def buscar_por_id(db, id_cliente):
         """Busca un cliente por su ID."""
-        try:
-            connection = db.conectar()
-            cursor = connection.cursor(dictionary=True)
-            cursor.execute(
-                "SELECT * FROM Clientes WHERE id_cliente = %s", (id_cliente,))
-            row = cursor.fetchone()
-
-            if row:
-                return Cliente(
-                    db,
-                    id_cliente=row['id_cliente'],
-                    nombre_completo=row['nombre_completo'],
-                    email=row['email'],
-                    telefono=row['telefono'],
-                    direccion=row['direccion'],
-                    fecha_registro=row['fecha_registro']
-                )
-            return None
-
-        except Error as e:
-            print(f"Error al buscar cliente: {e}")
-            return None
-        finally:
-            cursor.close()
+        with db.conexion_lectura() as connection:
+            try:
+                filas = db.consultar_preparada(
+                    connection, "clientes.buscar_por_id", (id_cliente,))
+
+                if filas:
+                    return Cliente._desde_fila(db, filas[0])
+                return None
+
+            except Error as e:
+                print(f"Error al buscar cliente: {e}")
+                return None
 
     @staticmethod
     def buscar_por_email(db, email):
         """Busca un cliente por su email."""
-        try:
-            connection = db.conectar()
-            cursor = connection.cursor(dictionary=True)
-            cursor.execute("SELECT * FROM Clientes WHERE email = %s", (email,))
-            row = cursor.fetchone()
-
-            if row:
-                return Cliente(
-                    db,
-                    id_cliente=row['id_cliente'],
-                    nombre_completo=row['nombre_completo'],
-                    email=row['email'],
-                    telefono=row['telefono'],
-                    direccion=row['direccion'],
-                    fecha_registro=row['fecha_registro']
-                )
-            return None
-
-        except Error as e:
-            print(f"Error al buscar cliente por email: {e}")
-            return None
-        finally:
-            cursor.close()
+        with db.conexion_lectura() as connection:
+            try:
+                filas = db.consultar_preparada(
+                    connection, "clientes.buscar_por_email", (email,))
+
+                if filas:
+                    return Cliente._desde_fila(db, filas[0])
+                return None
+
+            except Error as e:
+                print(f"Error al buscar cliente por email: {e}")
+                return None
 
 
 class Usuario:
     """Clase para autenticacion y autorizacion de usuarios."""
 
+    SQL_AUTENTICAR = \
+        "SELECT * FROM Usuarios WHERE nombre_usuario = %s AND activo = TRUE"
+    SQL_ACTUALIZAR_HASH = \
+        "UPDATE Usuarios SET password_hash = %s WHERE id_usuario = %s"
+
+    __slots__ = ("db", "id_usuario", "nombre_usuario", "password", "rol",
+                 "id_cliente", "activo")
+
     def __init__(self, db, id_usuario=None, nombre_usuario="", password="",
                  rol="cliente", id_cliente=None, activo=True):
         """Construye un usuario del sistema."""
@@ -184,10 +221,11 @@ class Usuario:
 
     @staticmethod
     def _hash_password(password):
-        """Genera hash bcrypt de la contrasena con sal automatica."""
-        salt = bcrypt.gensalt(rounds=12)
-        hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-        return hashed.decode('utf-8')
+        """
+        Genera hash bcrypt de la contrasena con sal automatica.
+        El calculo corre en el pool del hasher configurado en hash_passwords.
+        """
+        return hash_passwords.hasher_actual().hash(password)
 
     def registrar(self):
         """Registra un nuevo usuario en el sistema."""
@@ -200,60 +238,73 @@ class Usuario:
         values = (self.nombre_usuario, password_hash, self.rol,
                   self.id_cliente, self.activo)
 
-        try:
-            connection = self.db.conectar()
+        with self.db.conexion() as connection:
             cursor = connection.cursor()
-            cursor.execute(sql, values)
-            connection.commit()
-            self.id_usuario = cursor.lastrowid
-            print(
-                f"Usuario '{self.nombre_usuario}' registrado con ID: {self.id_usuario}")
-            print(f"Rol: {self.rol} | Contrasena hasheada con bcrypt + sal")
-            return self.id_usuario
-
-        except Error as e:
-            connection.rollback()
-            print(f"Error al registrar usuario: {e}")
-            return None
-        finally:
-            cursor.close()
+            try:
+                cursor.execute(sql, values)
+                connection.commit()
+                self.id_usuario = cursor.lastrowid
+                print(
+                    f"Usuario '{self.nombre_usuario}' registrado con ID: {self.id_usuario}")
+                print(f"Rol: {self.rol} | Contrasena hasheada con bcrypt + sal")
+                return self.id_usuario
+
+            except Error as e:
+                connection.rollback()
+                print(f"Error al registrar usuario: {e}")
+                return None
+            finally:
+                cursor.close()
 
     def autenticar(self):
         """
         Autentica un usuario verificando sus credenciales.
+        Si el hash guardado usa un costo distinto al configurado, se
+        vuelve a generar con el costo actual tras un login exitoso.
         """
-        try:
-            connection = self.db.conectar()
-            cursor = connection.cursor(dictionary=True)
-
-            cursor.execute(
-                "SELECT * FROM Usuarios WHERE nombre_usuario = %s AND activo = TRUE",
-                (self.nombre_usuario,)
-            )
-            resultado = cursor.fetchone()
-
-            if resultado:
-                stored_hash = resultado['password_hash'].encode('utf-8')
-
-                if bcrypt.checkpw(self.password.encode('utf-8'), stored_hash):
-                    self.id_usuario = resultado['id_usuario']
-                    self.rol = resultado['rol']
-                    self.id_cliente = resultado['id_cliente']
-                    print(
-                        f"Autenticacion exitosa: {self.nombre_usuario} ({self.rol})")
-                    return True
-                else:
-                    print("Usuario o contrasena incorrectos")
-                    return False
-            else:
-                print("Usuario o contrasena incorrectos")
+        with self.db.conexion() as connection:
+            try:
+                filas = self.db.consultar_preparada(
+                    connection, "usuarios.autenticar", (self.nombre_usuario,))
+                resultado = filas[0] if filas else None
+
+            except Error as e:
+                print(f"Error en autenticacion: {e}")
                 return False
 
-        except Error as e:
-            print(f"Error en autenticacion: {e}")
+        # La verificacion se hace sin retener la conexion
+        hasher = hash_passwords.hasher_actual()
+        stored_hash = resultado['password_hash'] if resultado else None
+
+        if not stored_hash or not hasher.verificar(self.password, stored_hash):
+            print("Usuario o contrasena incorrectos")
             return False
-        finally:
-            cursor.close()
+
+        self.id_usuario = resultado['id_usuario']
+        self.rol = resultado['rol']
+        self.id_cliente = resultado['id_cliente']
+
+        if hasher.necesita_rehash(stored_hash):
+            self._actualizar_hash(hasher.hash(self.password))
+
+        print(
+            f"Autenticacion exitosa: {self.nombre_usuario} ({self.rol})")
+        return True
+
+    def _actualizar_hash(self, password_hash):
+        """Guarda un nuevo hash de la contrasena del usuario."""
+        with self.db.conexion() as connection:
+            try:
+                self.db.ejecutar_preparada(
+                    connection, "usuarios.actualizar_hash",
+                    (password_hash, self.id_usuario))
+                connection.commit()
+                return True
+
+            except Error as e:
+                connection.rollback()
+                print(f"Error al actualizar hash de contrasena: {e}")
+                return False
 
     def tiene_permiso(self, rol_requerido):
         """Verifica si el usuario tiene el rol requerido."""
@@ -263,26 +314,84 @@ class Usuario:
     @staticmethod
     def listar_todos(db):
         """Lista todos los usuarios del sistema."""
-        try:
-            connection = db.conectar()
+        with db.conexion_lectura() as connection:
             cursor = connection.cursor(dictionary=True)
-            cursor.execute("""
-                SELECT id_usuario, nombre_usuario, rol, id_cliente, activo, fecha_creacion
-                FROM Usuarios
-                ORDER BY nombre_usuario
-            """)
-            return cursor.fetchall()
-
-        except Error as e:
-            print(f"Error al listar usuarios: {e}")
-            return []
-        finally:
-            cursor.close()
+            try:
+                cursor.execute("""
+                    SELECT id_usuario, nombre_usuario, rol, id_cliente, activo, fecha_creacion
+                    FROM Usuarios
+                    ORDER BY nombre_usuario
+                """)
+                return cursor.fetchall()
+
+            except Error as e:
+                print(f"Error al listar usuarios: {e}")
+                return []
+            finally:
+                cursor.close()
+
+    @staticmethod
+    def listar_pagina(db, limite=50, despues=None):
+        """
+        Lista una pagina de usuarios ordenados por nombre de usuario.
+        Devuelve (usuarios, siguiente) igual que Cliente.listar_pagina.
+        """
+        with db.conexion_lectura() as connection:
+            cursor = connection.cursor(dictionary=True)
+            try:
+                return paginar(
+                    cursor,
+                    """
+                    SELECT id_usuario, nombre_usuario, rol, id_cliente, activo,
+                           fecha_creacion
+                    FROM Usuarios
+                    """,
+                    ("nombre_usuario",), despues=despues, limite=limite)
+
+            except Error as e:
+                print(f"Error al listar usuarios: {e}")
+                return [], None
+            finally:
+                cursor.close()
+
+    @staticmethod
+    def iterar_todos(db, tamano_lote=500):
+        """Recorre todos los usuarios en lotes acotados de memoria."""
+        despues = None
+        while True:
+            usuarios, despues = Usuario.listar_pagina(db, tamano_lote, despues)
+            yield from usuarios
+            if despues is None:
+                return
 
 
 class Destino:
     """Clase que representa un destino turistico."""
 
+    # Consultas compartidas con la version async (modelos_async)
+    SQL_LISTAR_TODOS = "SELECT * FROM Destinos ORDER BY nombre"
+    SQL_LISTAR_DISPONIBLES = \
+        "SELECT * FROM Destinos WHERE disponible = TRUE ORDER BY nombre"
+    SQL_PAGINA = "SELECT * FROM Destinos"
+    CLAVE_PAGINA = ("nombre", "id_destino")
+    CONDICIONES_DISPONIBLES = ("disponible = TRUE",)
+    SQL_BUSCAR_POR_ID = "SELECT * FROM Destinos WHERE id_destino = %s"
+    # Destinos del indice de texto; {filtro} limita la recarga a los
+    # destinos modificados
+    SQL_INDICE_TEXTO = "SELECT * FROM Destinos {filtro}"
+    CLAVE_INDICE_TEXTO = ("destinos", "indice_texto", ())
+    # Paquetes que incluyen el destino, para recargarlos en los indices de
+    # paquetes cuando el destino cambia
+    SQL_PAQUETES_DEL_DESTINO = \
+        "SELECT id_paquete FROM Paquetes_Destinos WHERE id_destino = %s"
+    # Peso de cada campo en el ranking de buscar_texto
+    PESOS_TEXTO = (("nombre", 3), ("actividades", 2), ("descripcion", 1))
+
+    # Columnas en el orden de los argumentos del constructor
+    CAMPOS = ("id_destino", "nombre", "descripcion", "actividades",
+              "costo_base", "disponible")
+    __slots__ = ("db",) + CAMPOS
+
     def __init__(self, db, id_destino=None, nombre="", descripcion="",
                  actividades="", costo_base=0.0, disponible=True):
         """Construye un destino turistico."""
@@ -300,6 +409,25 @@ class Destino:
         return (f"Destino: {self.nombre} | Costo: ${self.costo_base:,.2f} | "
                 f"Estado: {estado}")
 
+    @staticmethod
+    def _desde_fila(db, row):
+        """Construye un destino a partir de una fila de la tabla Destinos."""
+        return Destino(
+            db,
+            id_destino=row['id_destino'],
+            nombre=row['nombre'],
+            descripcion=row['descripcion'],
+            actividades=row['actividades'],
+            costo_base=row['costo_base'],
+            disponible=row['disponible']
+        )
+
+    @staticmethod
+    def _desde_tuplas(db, descripcion, filas):
+        """Construye destinos a partir de filas tupla de la tabla Destinos."""
+        extraer = mapeador(descripcion, Destino.CAMPOS)
+        return [Destino(db, *extraer(row)) for row in filas]
+
     def guardar(self):
         """Guarda el destino en la base de datos."""
         sql = """
@@ -309,21 +437,23 @@ class Destino:
         values = (self.nombre, self.descripcion, self.actividades,
                   self.costo_base, self.disponible)
 
-        try:
-            connection = self.db.conectar()
+        with self.db.conexion() as connection:
             cursor = connection.cursor()
-            cursor.execute(sql, values)
-            connection.commit()
-            self.id_destino = cursor.lastrowid
-            print(f"Destino '{self.nombre}' creado con ID: {self.id_destino}")
-            return self.id_destino
-
-        except Error as e:
-            connection.rollback()
-            print(f"Error al crear destino: {e}")
-            return None
-        finally:
-            cursor.close()
+            try:
+                cursor.execute(sql, values)
+                connection.commit()
+                self.id_destino = cursor.lastrowid
+                cache_catalogo.invalidar(self.db, "destinos", "listar_todos")
+                Destino._marcar_en_indice(self.db, self.id_destino)
+                print(f"Destino '{self.nombre}' creado con ID: {self.id_destino}")
+                return self.id_destino
+
+            except Error as e:
+                connection.rollback()
+                print(f"Error al crear destino: {e}")
+                return None
+            finally:
+                cursor.close()
 
     def actualizar(self):
         """Actualiza los datos del destino."""
@@ -335,100 +465,223 @@ class Destino:
         values = (self.nombre, self.descripcion, self.actividades,
                   self.costo_base, self.disponible, self.id_destino)
 
-        try:
-            connection = self.db.conectar()
+        with self.db.conexion() as connection:
             cursor = connection.cursor()
-            cursor.execute(sql, values)
-            connection.commit()
-            print(f"Destino ID {self.id_destino} actualizado correctamente")
-            return True
-
-        except Error as e:
-            connection.rollback()
-            print(f"Error al actualizar destino: {e}")
-            return False
-        finally:
-            cursor.close()
+            try:
+                cursor.execute(sql, values)
+                # Su nombre y actividades estan en el indice de texto de paquetes
+                paquetes = Destino._paquetes_del_destino(cursor, self.id_destino)
+                connection.commit()
+                Destino._invalidar_cache(self.db, self.id_destino, paquetes)
+                print(f"Destino ID {self.id_destino} actualizado correctamente")
+                return True
+
+            except Error as e:
+                connection.rollback()
+                print(f"Error al actualizar destino: {e}")
+                return False
+            finally:
+                cursor.close()
+
+    @staticmethod
+    def _invalidar_cache(db, id_destino, paquetes=()):
+        """
+        Invalida los listados de destinos, la entrada del destino y los
+        paquetes, que incluyen los datos de sus destinos, y marca en los
+        indices el destino y los `paquetes` que lo incluyen.
+        """
+        cache_catalogo.invalidar(db, "destinos", "listar_todos")
+        cache_catalogo.invalidar(db, "destinos", "buscar_por_id", (id_destino,))
+        cache_catalogo.invalidar(db, "paquetes")
+        Destino._marcar_en_indice(db, id_destino)
+        cache_catalogo.marcar_indices(db, "paquetes", paquetes)
+
+    @staticmethod
+    def _paquetes_del_destino(cursor, id_destino):
+        """IDs de los paquetes que incluyen el destino."""
+        cursor.execute(Destino.SQL_PAQUETES_DEL_DESTINO, (id_destino,))
+        return [row[0] for row in cursor.fetchall()]
+
+    @staticmethod
+    def _marcar_en_indice(db, id_destino):
+        """Marca el destino para recargarlo en el indice de texto."""
+        cache_catalogo.marcar_indices(db, "destinos", (id_destino,))
 
     @staticmethod
     def eliminar(db, id_destino):
         """Elimina un destino de la base de datos."""
-        try:
-            connection = db.conectar()
+        with db.conexion() as connection:
             cursor = connection.cursor()
-            cursor.execute(
-                "DELETE FROM Destinos WHERE id_destino = %s", (id_destino,))
-            connection.commit()
-            print(f"Destino ID {id_destino} eliminado")
-            return True
-
-        except Error as e:
-            connection.rollback()
-            print(f"Error al eliminar destino: {e}")
-            return False
-        finally:
-            cursor.close()
+            try:
+                # Los enlaces se borran en cascada: se leen antes
+                paquetes = Destino._paquetes_del_destino(cursor, id_destino)
+                cursor.execute(
+                    "DELETE FROM Destinos WHERE id_destino = %s", (id_destino,))
+                connection.commit()
+                Destino._invalidar_cache(db, id_destino, paquetes)
+                print(f"Destino ID {id_destino} eliminado")
+                return True
+
+            except Error as e:
+                connection.rollback()
+                print(f"Error al eliminar destino: {e}")
+                return False
+            finally:
+                cursor.close()
 
     @staticmethod
     def listar_todos(db, solo_disponibles=False):
-        """Lista todos los destinos."""
-        try:
-            connection = db.conectar()
-            cursor = connection.cursor(dictionary=True)
+        """Lista todos los destinos (a traves de la cache del catalogo)."""
+        resultado = cache_catalogo.leer(
+            db, ("destinos", "listar_todos", solo_disponibles),
+            lambda: Destino._consultar_todos(db, solo_disponibles))
 
-            if solo_disponibles:
-                cursor.execute(
-                    "SELECT * FROM Destinos WHERE disponible = TRUE ORDER BY nombre")
-            else:
-                cursor.execute("SELECT * FROM Destinos ORDER BY nombre")
-
-            resultados = cursor.fetchall()
-
-            destinos = []
-            for row in resultados:
-                destino = Destino(
-                    db,
-                    id_destino=row['id_destino'],
-                    nombre=row['nombre'],
-                    descripcion=row['descripcion'],
-                    actividades=row['actividades'],
-                    costo_base=row['costo_base'],
-                    disponible=row['disponible']
-                )
-                destinos.append(destino)
-
-            return destinos
-
-        except Error as e:
-            print(f"Error al listar destinos: {e}")
+        if resultado is None:
             return []
-        finally:
-            cursor.close()
+
+        extraer, filas = resultado
+        return [Destino(db, *extraer(row)) for row in filas]
+
+    @staticmethod
+    def _consultar_todos(db, solo_disponibles):
+        """
+        Consulta las filas tupla de destinos junto con su mapeador.
+        Devuelve (extraer, filas) o None si hay error.
+        """
+        with db.conexion_lectura(compartida=True) as connection:
+            cursor = connection.cursor()
+            try:
+                if solo_disponibles:
+                    cursor.execute(Destino.SQL_LISTAR_DISPONIBLES)
+                else:
+                    cursor.execute(Destino.SQL_LISTAR_TODOS)
+
+                filas = tuple(cursor.fetchall())
+                return mapeador(cursor.description, Destino.CAMPOS), filas
+
+            except Error as e:
+                print(f"Error al listar destinos: {e}")
+                return None
+            finally:
+                cursor.close()
+
+    @staticmethod
+    def listar_pagina(db, limite=50, despues=None, solo_disponibles=False):
+        """
+        Lista una pagina de destinos ordenados por nombre.
+        Devuelve (destinos, siguiente) igual que Cliente.listar_pagina.
+        """
+        condiciones = Destino.CONDICIONES_DISPONIBLES if solo_disponibles else ()
+
+        with db.conexion_lectura() as connection:
+            cursor = connection.cursor()
+            try:
+                filas, siguiente = paginar(
+                    cursor, Destino.SQL_PAGINA, Destino.CLAVE_PAGINA,
+                    condiciones=condiciones, despues=despues, limite=limite)
+                destinos = Destino._desde_tuplas(db, cursor.description, filas)
+                return destinos, siguiente
+
+            except Error as e:
+                print(f"Error al listar destinos: {e}")
+                return [], None
+            finally:
+                cursor.close()
+
+    @staticmethod
+    def iterar_todos(db, tamano_lote=500, solo_disponibles=False):
+        """Recorre todos los destinos en lotes acotados de memoria."""
+        despues = None
+        while True:
+            destinos, despues = Destino.listar_pagina(
+                db, tamano_lote, despues, solo_disponibles)
+            yield from destinos
+            if despues is None:
+                return
 
     @staticmethod
     def buscar_por_id(db, id_destino):
-        """Busca un destino por su ID."""
-        try:
-            connection = db.conectar()
-            cursor = connection.cursor(dictionary=True)
-            cursor.execute(
-                "SELECT * FROM Destinos WHERE id_destino = %s", (id_destino,))
-            row = cursor.fetchone()
-
-            if row:
-                return Destino(
-                    db,
-                    id_destino=row['id_destino'],
-                    nombre=row['nombre'],
-                    descripcion=row['descripcion'],
-                    actividades=row['actividades'],
-                    costo_base=row['costo_base'],
-                    disponible=row['disponible']
-                )
-            return None
-
-        except Error as e:
-            print(f"Error al buscar destino: {e}")
-            return None
-        finally:
-            cursor.close()
+        """Busca un destino por su ID (a traves de la cache del catalogo)."""
+        row = cache_catalogo.leer(
+            db, ("destinos", "buscar_por_id", (id_destino,)),
+            lambda: Destino._consultar_por_id(db, id_destino))
+
+        if row:
+            return Destino._desde_fila(db, row)
+        return None
+
+    @staticmethod
+    def _consultar_por_id(db, id_destino):
+        """Consulta la fila de un destino; None si no existe o hay error."""
+        with db.conexion_lectura(compartida=True) as connection:
+            try:
+                filas = db.consultar_preparada(
+                    connection, "destinos.buscar_por_id", (id_destino,))
+                return filas[0] if filas else None
+
+            except Error as e:
+                print(f"Error al buscar destino: {e}")
+                return None
+
+    @staticmethod
+    def buscar_texto(db, texto, limite=20, despues=None, solo_disponibles=False):
+        """
+        Busca destinos cuyo nombre, actividades o descripcion contengan todas
+        las palabras de `texto` (sin distinguir tildes ni mayusculas),
+        ordenados por relevancia. Devuelve (destinos, siguiente) igual que
+        listar_pagina.
+        """
+        indice = cache_catalogo.leer_indice(
+            db, Destino.CLAVE_INDICE_TEXTO, indice_texto.IndiceTexto,
+            Destino._consultar_indice_texto)
+        if indice is None:
+            return [], None
+
+        desplazamiento = despues or 0
+        filtro = (lambda valor: valor[5]) if solo_disponibles else None
+        valores, hay_mas = indice.buscar(texto, limite, desplazamiento, filtro)
+        destinos = [Destino(db, *valor) for valor in valores]
+        return destinos, desplazamiento + limite if hay_mas else None
+
+    @staticmethod
+    def _consultar_indice_texto(db, ids=None):
+        """
+        Consulta los destinos (todos o los de `ids`) como documentos de
+        IndiceTexto, con los campos del constructor como valor.
+        Devuelve None si hay error.
+        """
+        filtro, params = "", ()
+        if ids is not None:
+            params = tuple(ids)
+            filtro = f"WHERE id_destino IN ({', '.join(['%s'] * len(params))})"
+
+        with db.conexion_lectura(compartida=True) as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.execute(Destino.SQL_INDICE_TEXTO.format(filtro=filtro),
+                               params)
+                extraer = mapeador(cursor.description, Destino.CAMPOS)
+                posiciones = [Destino.CAMPOS.index(campo)
+                              for campo, _ in Destino.PESOS_TEXTO]
+
+                documentos = []
+                for row in cursor.fetchall():
+                    valor = extraer(row)
+                    campos = [(valor[posicion], peso) for posicion, (_, peso)
+                              in zip(posiciones, Destino.PESOS_TEXTO)]
+                    documentos.append((valor[0], campos, valor))
+                return documentos
+
+            except Error as e:
+                print(f"Error al cargar el indice de texto: {e}")
+                return None
+            finally:
+                cursor.close()
+
+
+# Sentencias preparadas de las consultas frecuentes
+registrar_sentencia("clientes.buscar_por_id", Cliente.SQL_BUSCAR_POR_ID)
+registrar_sentencia("clientes.buscar_por_email", Cliente.SQL_BUSCAR_POR_EMAIL)
+registrar_sentencia("usuarios.autenticar", Usuario.SQL_AUTENTICAR)
+registrar_sentencia("usuarios.actualizar_hash", Usuario.SQL_ACTUALIZAR_HASH)
+registrar_sentencia("destinos.buscar_por_id", Destino.SQL_BUSCAR_POR_ID)
@@ -0,0 +1,601 @@
+"""
+Consultas asincronas de los modelos del sistema de reservas
+Viajes Aventura
+
+Contrapartes async de las consultas de Cliente, Destino, PaqueteTuristico
+y Reserva para usar con DatabaseAsync. Reutilizan el SQL (constantes SQL_*
+de cada clase) y la construccion de objetos (_desde_fila) de los modelos
+sincronos, por lo que devuelven los mismos objetos Cliente, Destino, etc.
+"""
+from mysql.connector import Error, errorcode
+
+import cache_catalogo
+import reportes
+from conexion_db import consulta_pagina, cortar_pagina
+from modelos import Cliente, Destino
+from paquetes_reservas import PaqueteTuristico, Reserva
+
+
+async def _paginar(cursor, select, columnas, condiciones=(), despues=None,
+                   limite=50, descendente=False):
+    """Version async de conexion_db.paginar."""
+    sql, params = consulta_pagina(select, columnas, condiciones=condiciones,
+                                  despues=despues, limite=limite,
+                                  descendente=descendente)
+    await cursor.execute(sql, params)
+    return cortar_pagina(await cursor.fetchall(), columnas, limite)
+
+
+class ClienteAsync:
+    """Consultas async de clientes."""
+
+    @staticmethod
+    async def guardar(cliente):
+        """Guarda el cliente en la base de datos."""
+        values = (cliente.nombre_completo, cliente.email, cliente.telefono,
+                  cliente.direccion, cliente.fecha_registro)
+
+        async with cliente.db.conexion() as connection:
+            cursor = await connection.cursor()
+            try:
+                await cursor.execute(Cliente.SQL_INSERTAR, values)
+                await connection.commit()
+                cliente.id_cliente = cursor.lastrowid
+                return cliente.id_cliente
+
+            except Error as e:
+                await connection.rollback()
+                print(f"Error al registrar cliente: {e}")
+                return None
+            finally:
+                await cursor.close()
+
+    @staticmethod
+    async def listar_todos(db):
+        """Lista todos los clientes registrados."""
+        async with db.conexion() as connection:
+            cursor = await connection.cursor(dictionary=True)
+            try:
+                await cursor.execute(Cliente.SQL_LISTAR_TODOS)
+                return [Cliente._desde_fila(db, row)
+                        for row in await cursor.fetchall()]
+
+            except Error as e:
+                print(f"Error al listar clientes: {e}")
+                return []
+            finally:
+                await cursor.close()
+
+    @staticmethod
+    async def listar_pagina(db, limite=50, despues=None):
+        """Lista una pagina de clientes; ver Cliente.listar_pagina."""
+        async with db.conexion() as connection:
+            cursor = await connection.cursor(dictionary=True)
+            try:
+                filas, siguiente = await _paginar(
+                    cursor, Cliente.SQL_PAGINA, Cliente.CLAVE_PAGINA,
+                    despues=despues, limite=limite)
+                return [Cliente._desde_fila(db, row) for row in filas], siguiente
+
+            except Error as e:
+                print(f"Error al listar clientes: {e}")
+                return [], None
+            finally:
+                await cursor.close()
+
+    @staticmethod
+    async def buscar_por_id(db, id_cliente):
+        """Busca un cliente por su ID."""
+        return await ClienteAsync._buscar(db, Cliente.SQL_BUSCAR_POR_ID, id_cliente)
+
+    @staticmethod
+    async def buscar_por_email(db, email):
+        """Busca un cliente por su email."""
+        return await ClienteAsync._buscar(db, Cliente.SQL_BUSCAR_POR_EMAIL, email)
+
+    @staticmethod
+    async def _buscar(db, sql, valor):
+        """Busca un cliente con una consulta de una fila."""
+        async with db.conexion() as connection:
+            cursor = await connection.cursor(dictionary=True)
+            try:
+                await cursor.execute(sql, (valor,))
+                row = await cursor.fetchone()
+
+                if row:
+                    return Cliente._desde_fila(db, row)
+                return None
+
+            except Error as e:
+                print(f"Error al buscar cliente: {e}")
+                return None
+            finally:
+                await cursor.close()
+
+
+class DestinoAsync:
+    """Consultas async de destinos (con la misma cache que Destino)."""
+
+    @staticmethod
+    async def listar_todos(db, solo_disponibles=False):
+        """Lista todos los destinos (a traves de la cache del catalogo)."""
+        filas = await cache_catalogo.leer_async(
+            db, ("destinos", "listar_todos", solo_disponibles),
+            lambda: DestinoAsync._consultar_todos(db, solo_disponibles))
+
+        return [Destino._desde_fila(db, row) for row in filas or ()]
+
+    @staticmethod
+    async def _consultar_todos(db, solo_disponibles):
+        """Consulta las filas de destinos; devuelve None si hay error."""
+        sql = Destino.SQL_LISTAR_DISPONIBLES if solo_disponibles \
+            else Destino.SQL_LISTAR_TODOS
+
+        async with db.conexion() as connection:
+            cursor = await connection.cursor(dictionary=True)
+            try:
+                await cursor.execute(sql)
+                return tuple(await cursor.fetchall())
+
+            except Error as e:
+                print(f"Error al listar destinos: {e}")
+                return None
+            finally:
+                await cursor.close()
+
+    @staticmethod
+    async def listar_pagina(db, limite=50, despues=None, solo_disponibles=False):
+        """Lista una pagina de destinos; ver Destino.listar_pagina."""
+        condiciones = Destino.CONDICIONES_DISPONIBLES if solo_disponibles else ()
+
+        async with db.conexion() as connection:
+            cursor = await connection.cursor(dictionary=True)
+            try:
+                filas, siguiente = await _paginar(
+                    cursor, Destino.SQL_PAGINA, Destino.CLAVE_PAGINA,
+                    condiciones=condiciones, despues=despues, limite=limite)
+                return [Destino._desde_fila(db, row) for row in filas], siguiente
+
+            except Error as e:
+                print(f"Error al listar destinos: {e}")
+                return [], None
+            finally:
+                await cursor.close()
+
+    @staticmethod
+    async def buscar_por_id(db, id_destino):
+        """Busca un destino por su ID (a traves de la cache del catalogo)."""
+        row = await cache_catalogo.leer_async(
+            db, ("destinos", "buscar_por_id", (id_destino,)),
+            lambda: DestinoAsync._consultar_por_id(db, id_destino))
+
+        if row:
+            return Destino._desde_fila(db, row)
+        return None
+
+    @staticmethod
+    async def _consultar_por_id(db, id_destino):
+        """Consulta la fila de un destino; None si no existe o hay error."""
+        async with db.conexion() as connection:
+            cursor = await connection.cursor(dictionary=True)
+            try:
+                await cursor.execute(Destino.SQL_BUSCAR_POR_ID, (id_destino,))
+                return await cursor.fetchone()
+
+            except Error as e:
+                print(f"Error al buscar destino: {e}")
+                return None
+            finally:
+                await cursor.close()
+
+
+class PaqueteTuristicoAsync:
+    """Consultas async de paquetes (con la misma cache que PaqueteTuristico)."""
+
+    @staticmethod
+    async def cargar_destinos_lote(db, paquetes, tamano_lote=1000):
+        """Carga los destinos de varios paquetes; ver cargar_destinos_lote."""
+        por_id = {paquete.id_paquete: paquete for paquete in paquetes}
+        for paquete in por_id.values():
+            paquete.destinos = []
+
+        ids = list(por_id)
+        if not ids:
+            return paquetes
+
+        async with db.conexion() as connection:
+            cursor = await connection.cursor(dictionary=True)
+            try:
+                for i in range(0, len(ids), tamano_lote):
+                    lote = ids[i:i + tamano_lote]
+                    marcadores = ", ".join(["%s"] * len(lote))
+                    await cursor.execute(
+                        PaqueteTuristico.SQL_DESTINOS_LOTE.format(marcadores=marcadores),
+                        tuple(lote))
+
+                    for row in await cursor.fetchall():
+                        por_id[row['id_paquete']].destinos.append(row)
+
+                return paquetes
+
+            except Error as e:
+                print(f"Error al cargar destinos de los paquetes: {e}")
+                return paquetes
+            finally:
+                await cursor.close()
+
+    @staticmethod
+    async def listar_todos(db, solo_disponibles=False, prefetch_destinos=False):
+        """Lista todos los paquetes; ver PaqueteTuristico.listar_todos."""
+        resultado = await cache_catalogo.leer_async(
+            db, ("paquetes", "listar_todos", (solo_disponibles, prefetch_destinos)),
+            lambda: PaqueteTuristicoAsync._consultar_todos(
+                db, solo_disponibles, prefetch_destinos))
+
+        if resultado is None:
+            return []
+
+        filas, destinos = resultado
+        paquetes = []
+        for row in filas:
+            paquete = PaqueteTuristico._desde_fila(db, row)
+            if destinos is not None:
+                paquete.destinos = list(destinos.get(paquete.id_paquete, ()))
+            paquetes.append(paquete)
+
+        return paquetes
+
+    @staticmethod
+    async def _consultar_todos(db, solo_disponibles, prefetch_destinos):
+        """
+        Consulta las filas de paquetes y, si se pide, sus destinos.
+        Devuelve (filas, destinos_por_paquete) o None si hay error.
+        """
+        sql = PaqueteTuristico.SQL_LISTAR_DISPONIBLES if solo_disponibles \
+            else PaqueteTuristico.SQL_LISTAR_TODOS
+
+        async with db.conexion() as connection:
+            cursor = await connection.cursor(dictionary=True)
+            try:
+                await cursor.execute(sql)
+                filas = tuple(await cursor.fetchall())
+
+            except Error as e:
+                print(f"Error al listar paquetes: {e}")
+                return None
+            finally:
+                await cursor.close()
+
+        destinos = None
+        if prefetch_destinos:
+            paquetes = [PaqueteTuristico._desde_fila(db, row) for row in filas]
+            await PaqueteTuristicoAsync.cargar_destinos_lote(db, paquetes)
+            destinos = {p.id_paquete: tuple(p.destinos) for p in paquetes}
+
+        return filas, destinos
+
+    @staticmethod
+    async def listar_pagina(db, limite=50, despues=None, solo_disponibles=False,
+                            prefetch_destinos=False):
+        """Lista una pagina de paquetes; ver PaqueteTuristico.listar_pagina."""
+        condiciones = ()
+        if solo_disponibles:
+            condiciones = PaqueteTuristico.CONDICIONES_DISPONIBLES
+
+        async with db.conexion() as connection:
+            cursor = await connection.cursor(dictionary=True)
+            try:
+                filas, siguiente = await _paginar(
+                    cursor, PaqueteTuristico.SQL_PAGINA,
+                    PaqueteTuristico.CLAVE_PAGINA,
+                    condiciones=condiciones, despues=despues, limite=limite)
+                paquetes = [PaqueteTuristico._desde_fila(db, row)
+                            for row in filas]
+
+                if prefetch_destinos:
+                    await PaqueteTuristicoAsync.cargar_destinos_lote(db, paquetes)
+                return paquetes, siguiente
+
+            except Error as e:
+                print(f"Error al listar paquetes: {e}")
+                return [], None
+            finally:
+                await cursor.close()
+
+    @staticmethod
+    async def buscar_por_id(db, id_paquete):
+        """Busca un paquete por su ID (a traves de la cache del catalogo)."""
+        resultado = await cache_catalogo.leer_async(
+            db, ("paquetes", "buscar_por_id", (id_paquete,)),
+            lambda: PaqueteTuristicoAsync._consultar_por_id(db, id_paquete))
+
+        if resultado:
+            row, destinos = resultado
+            paquete = PaqueteTuristico._desde_fila(db, row)
+            paquete.destinos = list(destinos)
+            return paquete
+        return None
+
+    @staticmethod
+    async def _consultar_por_id(db, id_paquete):
+        """
+        Consulta la fila de un paquete y sus destinos.
+        Devuelve (fila, destinos) o None si no existe o hay error.
+        """
+        async with db.conexion() as connection:
+            cursor = await connection.cursor(dictionary=True)
+            try:
+                await cursor.execute(PaqueteTuristico.SQL_BUSCAR_POR_ID,
+                                     (id_paquete,))
+                row = await cursor.fetchone()
+                if not row:
+                    return None
+
+                await cursor.execute(PaqueteTuristico.SQL_DESTINOS, (id_paquete,))
+                return row, tuple(await cursor.fetchall())
+
+            except Error as e:
+                print(f"Error al buscar paquete: {e}")
+                return None
+            finally:
+                await cursor.close()
+
+    @staticmethod
+    async def buscar_por_fechas(db, fecha_inicio, fecha_fin,
+                                prefetch_destinos=False, personas=1):
+        """Busca paquetes disponibles en un rango de fechas con cupo para personas."""
+        async with db.conexion() as connection:
+            cursor = await connection.cursor(dictionary=True)
+            try:
+                await cursor.execute(PaqueteTuristico.SQL_BUSCAR_POR_FECHAS,
+                                     (fecha_inicio, fecha_fin, personas))
+                paquetes = [PaqueteTuristico._desde_fila(db, row)
+                            for row in await cursor.fetchall()]
+
+                if prefetch_destinos:
+                    await PaqueteTuristicoAsync.cargar_destinos_lote(db, paquetes)
+                return paquetes
+
+            except Error as e:
+                print(f"Error al buscar paquetes por fechas: {e}")
+                return []
+            finally:
+                await cursor.close()
+
+
+class ReservaAsync:
+    """Consultas y operaciones async de reservas."""
+
+    @staticmethod
+    async def crear(reserva, clave_idempotencia=None):
+        """
+        Crea la reserva con el mismo UPDATE condicional de cupo que
+        Reserva.crear, dentro de una sola transaccion. `clave_idempotencia`
+        funciona igual que en Reserva.crear.
+        """
+        db = reserva.db
+        clave = clave_idempotencia
+        if clave is not None:
+            if not isinstance(clave, str) or not 0 < len(clave) <= Reserva.LARGO_CLAVE:
+                print("Clave de idempotencia invalida")
+                return None
+            encontrada, original = db.claves_idempotencia.buscar(clave)
+            if encontrada:
+                return reserva._repetir(original)
+
+        async with db.conexion() as connection:
+            cursor = await connection.cursor(dictionary=True)
+            try:
+                if not connection.in_transaction:
+                    await connection.start_transaction()
+
+                if clave is not None:
+                    await cursor.execute(Reserva.SQL_BUSCAR_POR_CLAVE, (clave,))
+                    fila = await cursor.fetchone()
+                    if fila:
+                        await connection.rollback()
+                        return reserva._repetir(reserva._recordar(clave, fila))
+
+                await cursor.execute(Reserva.SQL_DESCONTAR_CUPO,
+                                     reserva._params_cupo())
+
+                if cursor.rowcount == 0:
+                    await connection.rollback()
+                    await cursor.execute(PaqueteTuristico.SQL_BUSCAR_POR_ID,
+                                         (reserva.id_paquete,))
+                    reserva._explicar_rechazo(await cursor.fetchone())
+                    return None
+
+                await cursor.execute(Reserva.SQL_DESCONTAR_DISPONIBILIDAD,
+                                     (reserva.numero_personas, reserva.id_paquete))
+
+                await cursor.execute(Reserva.SQL_PRECIO_PAQUETE,
+                                     (reserva.id_paquete,))
+                reserva.precio_total = (await cursor.fetchone())['precio_total'] * \
+                    reserva.numero_personas
+
+                if clave is None:
+                    await cursor.execute(Reserva.SQL_INSERTAR,
+                                         reserva._params_insertar())
+                else:
+                    await cursor.execute(Reserva.SQL_INSERTAR_CON_CLAVE,
+                                         reserva._params_insertar() + (clave,))
+                reserva.id_reserva = cursor.lastrowid
+
+                if db.usar_resumenes:
+                    await cursor.execute(reportes.SQL_SUMAR_RESUMEN,
+                                         reportes.params_resumen(
+                                             reserva.id_paquete,
+                                             reserva.fecha_reserva,
+                                             reserva.estado,
+                                             reserva.numero_personas,
+                                             reserva.precio_total))
+
+                await connection.commit()
+                if clave is not None:
+                    reserva._recordar(clave, {campo: getattr(reserva, campo)
+                                              for campo in Reserva.CAMPOS})
+                PaqueteTuristico._invalidar_cache(db, reserva.id_paquete)
+                return reserva.id_reserva
+
+            except Error as e:
+                await connection.rollback()
+                if clave is not None and e.errno == errorcode.ER_DUP_ENTRY:
+                    # Un reintento concurrente con la misma clave inserto
+                    # primero: se devuelve esa reserva
+                    await cursor.execute(Reserva.SQL_BUSCAR_POR_CLAVE, (clave,))
+                    fila = await cursor.fetchone()
+                    await connection.rollback()
+                    if fila:
+                        return reserva._repetir(reserva._recordar(clave, fila))
+                print(f"Error al crear reserva: {e}")
+                return None
+            finally:
+                await cursor.close()
+
+    @staticmethod
+    async def actualizar_estado(reserva, nuevo_estado):
+        """
+        Actualiza el estado de la reserva, devolviendo o descontando el cupo
+        igual que Reserva.actualizar_estado.
+        """
+        if nuevo_estado not in Reserva.ESTADOS:
+            print("Estado invalido")
+            return False
+
+        async with reserva.db.conexion() as connection:
+            cursor = await connection.cursor(dictionary=True)
+            try:
+                if not connection.in_transaction:
+                    await connection.start_transaction()
+
+                await cursor.execute(Reserva.SQL_BLOQUEAR, (reserva.id_reserva,))
+                actual = await cursor.fetchone()
+                if actual is None:
+                    await connection.rollback()
+                    print("La reserva no existe")
+                    return False
+
+                if not await ReservaAsync._ajustar_cupo(cursor, actual, nuevo_estado):
+                    await connection.rollback()
+                    print("Cupo insuficiente para reactivar la reserva")
+                    return False
+
+                await cursor.execute(Reserva.SQL_ACTUALIZAR_ESTADO,
+                                     (nuevo_estado, reserva.id_reserva))
+
+                if reserva.db.usar_resumenes and actual['estado'] != nuevo_estado:
+                    for estado, signo in ((actual['estado'], -1), (nuevo_estado, 1)):
+                        await cursor.execute(
+                            reportes.SQL_SUMAR_RESUMEN,
+                            reportes.params_resumen(
+                                actual['id_paquete'], actual['fecha_reserva'],
+                                estado, actual['numero_personas'],
+                                actual['precio_total'], signo))
+
+                await connection.commit()
+                reserva.estado = nuevo_estado
+                if (actual['estado'] == 'cancelada') != (nuevo_estado == 'cancelada'):
+                    PaqueteTuristico._invalidar_cache(reserva.db, actual['id_paquete'])
+                return True
+
+            except Error as e:
+                await connection.rollback()
+                print(f"Error al actualizar estado de reserva: {e}")
+                return False
+            finally:
+                await cursor.close()
+
+    @staticmethod
+    async def _ajustar_cupo(cursor, actual, nuevo_estado):
+        """Version async de Reserva._ajustar_cupo."""
+        personas = actual['numero_personas']
+        id_paquete = actual['id_paquete']
+
+        if nuevo_estado == 'cancelada' and actual['estado'] != 'cancelada':
+            await cursor.execute(Reserva.SQL_LIBERAR_CUPO, (personas, id_paquete))
+            await cursor.execute(PaqueteTuristico.SQL_BORRAR_DISPONIBILIDAD,
+                                 (id_paquete, id_paquete))
+            await cursor.execute(PaqueteTuristico.SQL_COPIAR_DISPONIBILIDAD,
+                                 (id_paquete, id_paquete))
+
+        elif actual['estado'] == 'cancelada' and nuevo_estado != 'cancelada':
+            await cursor.execute(Reserva.SQL_DESCONTAR_CUPO,
+                                 Reserva.params_descontar(personas, id_paquete))
+            if cursor.rowcount == 0:
+                return False
+            await cursor.execute(Reserva.SQL_DESCONTAR_DISPONIBILIDAD,
+                                 (personas, id_paquete))
+
+        return True
+
+    @staticmethod
+    async def listar_por_cliente(db, id_cliente):
+        """Lista todas las reservas de un cliente."""
+        async with db.conexion() as connection:
+            cursor = await connection.cursor()
+            try:
+                await cursor.execute(Reserva.SQL_LISTAR_POR_CLIENTE, (id_cliente,))
+                return Reserva._desde_tuplas(
+                    db, cursor.description, await cursor.fetchall())
+
+            except Error as e:
+                print(f"Error al listar reservas del cliente: {e}")
+                return []
+            finally:
+                await cursor.close()
+
+    @staticmethod
+    async def listar_por_cliente_detallado(db, id_cliente):
+        """Lista las reservas de un cliente con su paquete y destinos."""
+        async with db.conexion() as connection:
+            cursor = await connection.cursor(dictionary=True)
+            try:
+                await cursor.execute(Reserva.SQL_LISTAR_POR_CLIENTE_DETALLADO,
+                                     (id_cliente,))
+                resultados = await cursor.fetchall()
+
+            except Error as e:
+                print(f"Error al listar reservas del cliente: {e}")
+                return []
+            finally:
+                await cursor.close()
+
+        reservas, paquetes = Reserva._desde_filas_detalladas(db, resultados)
+        await PaqueteTuristicoAsync.cargar_destinos_lote(db, paquetes)
+        return reservas
+
+    @staticmethod
+    async def listar_pagina(db, limite=50, despues=None):
+        """Lista una pagina de reservas; ver Reserva.listar_pagina."""
+        async with db.conexion() as connection:
+            cursor = await connection.cursor(dictionary=True)
+            try:
+                return await _paginar(cursor, Reserva.SQL_PAGINA,
+                                      Reserva.CLAVE_PAGINA, despues=despues,
+                                      limite=limite, descendente=True)
+
+            except Error as e:
+                print(f"Error al listar reservas: {e}")
+                return [], None
+            finally:
+                await cursor.close()
+
+    @staticmethod
+    async def buscar_por_id(db, id_reserva):
+        """Busca una reserva por su ID."""
+        async with db.conexion() as connection:
+            cursor = await connection.cursor(dictionary=True)
+            try:
+                await cursor.execute(Reserva.SQL_BUSCAR_POR_ID, (id_reserva,))
+                row = await cursor.fetchone()
+
+                if row:
+                    return Reserva._desde_fila(db, row)
+                return None
+
+            except Error as e:
+                print(f"Error al buscar reserva: {e}")
+                return None
+            finally:
+                await cursor.close()
@@ -2,13 +2,110 @@
 Clases para gestion de paquetes turisticos y reservas
 Viajes Aventura
 """
+import time
 from datetime import date, datetime
-from mysql.connector import Error
+from mysql.connector import Error, errorcode
+import cache_catalogo
+import indice_fechas
+import indice_texto
+import reportes
+from conexion_db import mapeador, paginar, registrar_sentencia
+
+
+class _IdsNoConsecutivos(Exception):
+    """Los IDs generados por un INSERT multiple no fueron consecutivos."""
 
 
 class PaqueteTuristico:
     """Clase que representa un paquete turistico."""
 
+    # Consultas compartidas con la version async (modelos_async)
+    SQL_DESTINOS = """
+        SELECT d.*, pd.orden_visita
+        FROM Destinos d
+        INNER JOIN Paquetes_Destinos pd ON d.id_destino = pd.id_destino
+        WHERE pd.id_paquete = %s
+        ORDER BY pd.orden_visita
+    """
+    SQL_DESTINOS_LOTE = """
+        SELECT d.*, pd.id_paquete, pd.orden_visita
+        FROM Paquetes_Destinos pd
+        INNER JOIN Destinos d ON d.id_destino = pd.id_destino
+        WHERE pd.id_paquete IN ({marcadores})
+        ORDER BY pd.id_paquete, pd.orden_visita
+    """
+    SQL_LISTAR_TODOS = "SELECT * FROM PaquetesTuristicos ORDER BY fecha_inicio"
+    # Los paquetes disponibles se buscan en el indice DisponibilidadPaquetes
+    # (solo paquetes disponibles, por fecha de inicio y cupo restante)
+    SQL_LISTAR_DISPONIBLES = """
+        SELECT p.*
+        FROM DisponibilidadPaquetes dp
+        INNER JOIN PaquetesTuristicos p ON p.id_paquete = dp.id_paquete
+        WHERE dp.fecha_inicio >= CURDATE()
+        AND dp.cupo_disponible > 0
+        ORDER BY dp.fecha_inicio
+    """
+    SQL_PAGINA = "SELECT * FROM PaquetesTuristicos"
+    CLAVE_PAGINA = ("fecha_inicio", "id_paquete")
+    CONDICIONES_DISPONIBLES = ("disponible = TRUE", "fecha_inicio >= CURDATE()")
+    SQL_BUSCAR_POR_ID = "SELECT * FROM PaquetesTuristicos WHERE id_paquete = %s"
+    SQL_BUSCAR_POR_FECHAS = """
+        SELECT p.*
+        FROM DisponibilidadPaquetes dp
+        INNER JOIN PaquetesTuristicos p ON p.id_paquete = dp.id_paquete
+        WHERE dp.fecha_inicio >= %s
+        AND dp.fecha_fin <= %s
+        AND dp.fecha_inicio >= CURDATE()
+        AND dp.cupo_disponible >= %s
+        ORDER BY dp.fecha_inicio
+    """
+    # Paquetes de los indices en memoria de buscar_en_rango y
+    # buscar_por_actividad; {filtro} limita la recarga a los modificados
+    SQL_INDICE_PAQUETES = """
+        SELECT p.*
+        FROM DisponibilidadPaquetes dp
+        INNER JOIN PaquetesTuristicos p ON p.id_paquete = dp.id_paquete
+        WHERE dp.fecha_inicio >= CURDATE() {filtro}
+    """
+    SQL_INDICE_DESTINOS = """
+        SELECT pd.id_paquete, pd.id_destino
+        FROM DisponibilidadPaquetes dp
+        INNER JOIN Paquetes_Destinos pd ON pd.id_paquete = dp.id_paquete
+        WHERE dp.fecha_inicio >= CURDATE() {filtro}
+    """
+    CLAVE_INDICE_FECHAS = ("paquetes", "indice_fechas", ())
+    # Nombre y actividades de los destinos de cada paquete del indice de
+    # texto de buscar_por_actividad
+    SQL_INDICE_TEXTO_DESTINOS = """
+        SELECT pd.id_paquete, d.nombre, d.actividades
+        FROM DisponibilidadPaquetes dp
+        INNER JOIN Paquetes_Destinos pd ON pd.id_paquete = dp.id_paquete
+        INNER JOIN Destinos d ON d.id_destino = pd.id_destino
+        WHERE dp.fecha_inicio >= CURDATE() {filtro}
+    """
+    CLAVE_INDICE_TEXTO = ("paquetes", "indice_texto", ())
+    # Peso de cada campo en el ranking de buscar_por_actividad
+    PESO_ACTIVIDADES, PESO_DESTINOS, PESO_NOMBRE, PESO_DESCRIPCION = 3, 2, 2, 1
+    SQL_BORRAR_DISPONIBILIDAD = \
+        "DELETE FROM DisponibilidadPaquetes WHERE id_paquete BETWEEN %s AND %s"
+    SQL_COPIAR_DISPONIBILIDAD = """
+        INSERT INTO DisponibilidadPaquetes
+        (id_paquete, fecha_inicio, fecha_fin, cupo_disponible)
+        SELECT id_paquete, fecha_inicio, fecha_fin, cupo_disponible
+        FROM PaquetesTuristicos
+        WHERE id_paquete BETWEEN %s AND %s
+        AND disponible = TRUE
+    """
+    SQL_AGREGAR_DESTINO = """
+        INSERT INTO Paquetes_Destinos (id_paquete, id_destino, orden_visita)
+        VALUES (%s, %s, %s)
+    """
+
+    # Columnas en el orden de los argumentos del constructor
+    CAMPOS = ("id_paquete", "nombre", "descripcion", "fecha_inicio",
+              "fecha_fin", "precio_total", "cupo_disponible", "disponible")
+    __slots__ = ("db", "destinos") + CAMPOS
+
     def __init__(self, db, id_paquete=None, nombre="", descripcion="",
                  fecha_inicio=None, fecha_fin=None, precio_total=0.0,
                  cupo_disponible=0, disponible=True):
@@ -31,55 +128,101 @@ class PaqueteTuristico:
                 f"Precio: ${self.precio_total:,.2f} | Cupo: {self.cupo_disponible} | "
                 f"Estado: {estado}")
 
+    @staticmethod
+    def _desde_fila(db, row):
+        """Construye un paquete a partir de una fila de PaquetesTuristicos."""
+        return PaqueteTuristico(
+            db,
+            id_paquete=row['id_paquete'],
+            nombre=row['nombre'],
+            descripcion=row['descripcion'],
+            fecha_inicio=row['fecha_inicio'],
+            fecha_fin=row['fecha_fin'],
+            precio_total=row['precio_total'],
+            cupo_disponible=row['cupo_disponible'],
+            disponible=row['disponible']
+        )
+
+    @staticmethod
+    def _desde_tuplas(db, descripcion, filas):
+        """Construye paquetes a partir de filas tupla de PaquetesTuristicos."""
+        extraer = mapeador(descripcion, PaqueteTuristico.CAMPOS)
+        return [PaqueteTuristico(db, *extraer(row)) for row in filas]
+
     def agregar_destino(self, id_destino, orden_visita=1):
         """Agrega un destino al paquete turistico."""
-        sql = """
-            INSERT INTO Paquetes_Destinos (id_paquete, id_destino, orden_visita)
-            VALUES (%s, %s, %s)
-        """
         values = (self.id_paquete, id_destino, orden_visita)
 
-        try:
-            connection = self.db.conectar()
+        with self.db.conexion() as connection:
             cursor = connection.cursor()
-            cursor.execute(sql, values)
-            connection.commit()
-            print(
-                f"Destino {id_destino} agregado al paquete {self.id_paquete}")
-            return True
-
-        except Error as e:
-            connection.rollback()
-            print(f"Error al agregar destino al paquete: {e}")
-            return False
-        finally:
-            cursor.close()
+            try:
+                cursor.execute(PaqueteTuristico.SQL_AGREGAR_DESTINO, values)
+                connection.commit()
+                PaqueteTuristico._invalidar_cache(self.db, self.id_paquete)
+                print(
+                    f"Destino {id_destino} agregado al paquete {self.id_paquete}")
+                return True
+
+            except Error as e:
+                connection.rollback()
+                print(f"Error al agregar destino al paquete: {e}")
+                return False
+            finally:
+                cursor.close()
 
     def cargar_destinos(self):
         """Carga los destinos asociados al paquete."""
-        sql = """
-            SELECT d.*, pd.orden_visita
-            FROM Destinos d
-            INNER JOIN Paquetes_Destinos pd ON d.id_destino = pd.id_destino
-            WHERE pd.id_paquete = %s
-            ORDER BY pd.orden_visita
-        """
+        with self.db.conexion_lectura() as connection:
+            try:
+                self.destinos = self.db.consultar_preparada(
+                    connection, "paquetes.destinos", (self.id_paquete,))
+                return self.destinos
 
-        try:
-            connection = self.db.conectar()
-            cursor = connection.cursor(dictionary=True)
-            cursor.execute(sql, (self.id_paquete,))
-            self.destinos = cursor.fetchall()
-            return self.destinos
+            except Error as e:
+                print(f"Error al cargar destinos del paquete: {e}")
+                return []
 
-        except Error as e:
-            print(f"Error al cargar destinos del paquete: {e}")
-            return []
-        finally:
-            cursor.close()
+    @staticmethod
+    def cargar_destinos_lote(db, paquetes, tamano_lote=1000):
+        """
+        Carga los destinos de varios paquetes con una consulta IN (...)
+        por cada `tamano_lote` paquetes, en vez de una por paquete.
+        """
+        por_id = {paquete.id_paquete: paquete for paquete in paquetes}
+        for paquete in por_id.values():
+            paquete.destinos = []
 
-    def guardar(self):
-        """Guarda el paquete en la base de datos."""
+        ids = list(por_id)
+        if not ids:
+            return paquetes
+
+        with db.conexion_lectura() as connection:
+            cursor = connection.cursor(dictionary=True)
+            try:
+                for i in range(0, len(ids), tamano_lote):
+                    lote = ids[i:i + tamano_lote]
+                    marcadores = ", ".join(["%s"] * len(lote))
+                    cursor.execute(
+                        PaqueteTuristico.SQL_DESTINOS_LOTE.format(marcadores=marcadores),
+                        tuple(lote))
+
+                    for row in cursor.fetchall():
+                        por_id[row['id_paquete']].destinos.append(row)
+
+                return paquetes
+
+            except Error as e:
+                print(f"Error al cargar destinos de los paquetes: {e}")
+                return paquetes
+            finally:
+                cursor.close()
+
+    def guardar(self, destinos=()):
+        """
+        Guarda el paquete en la base de datos. `destinos` son pares
+        (id_destino, orden_visita) que se enlazan en la misma transaccion:
+        si algun enlace falla no se crea el paquete.
+        """
         sql = """
             INSERT INTO PaquetesTuristicos 
             (nombre, descripcion, fecha_inicio, fecha_fin, precio_total, 
@@ -90,48 +233,82 @@ class PaqueteTuristico:
                   self.fecha_fin, self.precio_total, self.cupo_disponible,
                   self.disponible)
 
-        try:
-            connection = self.db.conectar()
+        with self.db.conexion() as connection:
             cursor = connection.cursor()
-            cursor.execute(sql, values)
-            connection.commit()
-            self.id_paquete = cursor.lastrowid
-            print(f"Paquete '{self.nombre}' creado con ID: {self.id_paquete}")
-            return self.id_paquete
-
-        except Error as e:
-            connection.rollback()
-            print(f"Error al crear paquete: {e}")
-            return None
-        finally:
-            cursor.close()
+            try:
+                cursor.execute(sql, values)
+                self.id_paquete = cursor.lastrowid
+                if destinos:
+                    cursor.executemany(
+                        PaqueteTuristico.SQL_AGREGAR_DESTINO,
+                        [(self.id_paquete, id_destino, orden_visita)
+                         for id_destino, orden_visita in destinos])
+                PaqueteTuristico.sincronizar_disponibilidad(cursor, self.id_paquete)
+                connection.commit()
+                PaqueteTuristico._invalidar_cache(self.db, self.id_paquete)
+                print(f"Paquete '{self.nombre}' creado con ID: {self.id_paquete}")
+                return self.id_paquete
+
+            except Error as e:
+                connection.rollback()
+                self.id_paquete = None
+                print(f"Error al crear paquete: {e}")
+                return None
+            finally:
+                cursor.close()
 
     def actualizar(self):
         """Actualiza los datos del paquete."""
         sql = """
             UPDATE PaquetesTuristicos 
-            SET nombre=%s, descripcion=%s, fecha_inicio=%s, fecha_fin=%s, 
+            SET agotado = (agotado AND disponible = %s),
+                nombre=%s, descripcion=%s, fecha_inicio=%s, fecha_fin=%s, 
                 precio_total=%s, cupo_disponible=%s, disponible=%s
             WHERE id_paquete=%s
         """
-        values = (self.nombre, self.descripcion, self.fecha_inicio,
-                  self.fecha_fin, self.precio_total, self.cupo_disponible,
-                  self.disponible, self.id_paquete)
+        # Si se cambia la disponibilidad a mano deja de contar como agotado
+        values = (self.disponible, self.nombre, self.descripcion,
+                  self.fecha_inicio, self.fecha_fin, self.precio_total,
+                  self.cupo_disponible, self.disponible, self.id_paquete)
 
-        try:
-            connection = self.db.conectar()
+        with self.db.conexion() as connection:
             cursor = connection.cursor()
-            cursor.execute(sql, values)
-            connection.commit()
-            print(f"Paquete ID {self.id_paquete} actualizado correctamente")
-            return True
-
-        except Error as e:
-            connection.rollback()
-            print(f"Error al actualizar paquete: {e}")
-            return False
-        finally:
-            cursor.close()
+            try:
+                cursor.execute(sql, values)
+                PaqueteTuristico.sincronizar_disponibilidad(cursor, self.id_paquete)
+                connection.commit()
+                PaqueteTuristico._invalidar_cache(self.db, self.id_paquete)
+                print(f"Paquete ID {self.id_paquete} actualizado correctamente")
+                return True
+
+            except Error as e:
+                connection.rollback()
+                print(f"Error al actualizar paquete: {e}")
+                return False
+            finally:
+                cursor.close()
+
+    @staticmethod
+    def sincronizar_disponibilidad(cursor, desde, hasta=None):
+        """
+        Copia al indice DisponibilidadPaquetes el estado actual de los
+        paquetes con ID entre `desde` y `hasta` (o solo `desde`), dentro de
+        la transaccion en curso del cursor. Debe llamarse despues de
+        escribir paquetes con SQL propio (cargas masivas, etc.).
+        """
+        hasta = desde if hasta is None else hasta
+        cursor.execute(PaqueteTuristico.SQL_BORRAR_DISPONIBILIDAD, (desde, hasta))
+        cursor.execute(PaqueteTuristico.SQL_COPIAR_DISPONIBILIDAD, (desde, hasta))
+
+    @staticmethod
+    def _invalidar_cache(db, id_paquete):
+        """
+        Invalida los listados de paquetes y la entrada del paquete, y lo
+        marca para recargarlo en los indices de fechas y de texto.
+        """
+        cache_catalogo.invalidar(db, "paquetes", "listar_todos")
+        cache_catalogo.invalidar(db, "paquetes", "buscar_por_id", (id_paquete,))
+        cache_catalogo.marcar_indices(db, "paquetes", (id_paquete,))
 
     def verificar_disponibilidad(self, numero_personas=1):
         """Verifica si el paquete tiene disponibilidad."""
@@ -150,133 +327,468 @@ class PaqueteTuristico:
         return True
 
     def reducir_cupo(self, numero_personas):
-        """Reduce el cupo disponible del paquete."""
-        self.cupo_disponible -= numero_personas
+        """
+        Reduce el cupo disponible del paquete con un UPDATE condicional
+        (el mismo de Reserva.crear), sin leer y reescribir el paquete.
+        Despues relee la fila, porque el objeto puede tener un cupo viejo.
+        Devuelve False si no esta disponible o no tiene cupo suficiente.
+        """
+        with self.db.conexion() as connection:
+            try:
+                descontado = self.db.ejecutar_preparada(
+                    connection, "reservas.descontar_cupo",
+                    Reserva.params_descontar(numero_personas, self.id_paquete))
+                if descontado == 0:
+                    connection.rollback()
+                    print("El paquete no esta disponible o no tiene cupo suficiente")
+                    return False
+
+                self.db.ejecutar_preparada(
+                    connection, "reservas.descontar_disponibilidad",
+                    (numero_personas, self.id_paquete))
+                fila = self.db.consultar_preparada(
+                    connection, "paquetes.buscar_por_id", (self.id_paquete,))[0]
+                connection.commit()
+                PaqueteTuristico._invalidar_cache(self.db, self.id_paquete)
+                self.cupo_disponible = fila['cupo_disponible']
+                self.disponible = bool(fila['disponible'])
+                return True
+
+            except Error as e:
+                connection.rollback()
+                print(f"Error al reducir cupo del paquete: {e}")
+                return False
 
-        if self.cupo_disponible == 0:
-            self.disponible = False
+    @staticmethod
+    def listar_todos(db, solo_disponibles=False, prefetch_destinos=False):
+        """
+        Lista todos los paquetes turisticos (a traves de la cache del catalogo).
+        Con prefetch_destinos=True carga los destinos de todos los paquetes
+        en una sola consulta adicional.
+        """
+        resultado = cache_catalogo.leer(
+            db, ("paquetes", "listar_todos", (solo_disponibles, prefetch_destinos)),
+            lambda: PaqueteTuristico._consultar_todos(
+                db, solo_disponibles, prefetch_destinos))
+
+        if resultado is None:
+            return []
+
+        extraer, filas, destinos = resultado
+        paquetes = []
+        for row in filas:
+            paquete = PaqueteTuristico(db, *extraer(row))
+            if destinos is not None:
+                paquete.destinos = list(destinos.get(paquete.id_paquete, ()))
+            paquetes.append(paquete)
 
-        return self.actualizar()
+        return paquetes
 
     @staticmethod
-    def listar_todos(db, solo_disponibles=False):
-        """Lista todos los paquetes turisticos."""
-        try:
-            connection = db.conectar()
-            cursor = connection.cursor(dictionary=True)
+    def _consultar_todos(db, solo_disponibles, prefetch_destinos):
+        """
+        Consulta las filas tupla de paquetes y, si se pide, sus destinos.
+        Devuelve (extraer, filas, destinos_por_paquete) o None si hay error.
+        """
+        with db.conexion_lectura(compartida=True) as connection:
+            cursor = connection.cursor()
+            try:
+                if solo_disponibles:
+                    cursor.execute(PaqueteTuristico.SQL_LISTAR_DISPONIBLES)
+                else:
+                    cursor.execute(PaqueteTuristico.SQL_LISTAR_TODOS)
 
-            if solo_disponibles:
-                cursor.execute("""
-                    SELECT * FROM PaquetesTuristicos 
-                    WHERE disponible = TRUE AND fecha_inicio >= CURDATE()
-                    ORDER BY fecha_inicio
-                """)
-            else:
-                cursor.execute(
-                    "SELECT * FROM PaquetesTuristicos ORDER BY fecha_inicio")
+                filas = tuple(cursor.fetchall())
+                extraer = mapeador(cursor.description, PaqueteTuristico.CAMPOS)
 
-            resultados = cursor.fetchall()
+            except Error as e:
+                print(f"Error al listar paquetes: {e}")
+                return None
+            finally:
+                cursor.close()
 
-            paquetes = []
-            for row in resultados:
-                paquete = PaqueteTuristico(
-                    db,
-                    id_paquete=row['id_paquete'],
-                    nombre=row['nombre'],
-                    descripcion=row['descripcion'],
-                    fecha_inicio=row['fecha_inicio'],
-                    fecha_fin=row['fecha_fin'],
-                    precio_total=row['precio_total'],
-                    cupo_disponible=row['cupo_disponible'],
-                    disponible=row['disponible']
-                )
-                paquetes.append(paquete)
+            # Dentro del bloque: los destinos se leen de la misma base que
+            # los paquetes
+            destinos = None
+            if prefetch_destinos:
+                paquetes = [PaqueteTuristico(db, *extraer(row)) for row in filas]
+                PaqueteTuristico.cargar_destinos_lote(db, paquetes)
+                destinos = {p.id_paquete: tuple(p.destinos) for p in paquetes}
 
-            return paquetes
+        return extraer, filas, destinos
 
-        except Error as e:
-            print(f"Error al listar paquetes: {e}")
-            return []
-        finally:
-            cursor.close()
+    @staticmethod
+    def listar_pagina(db, limite=50, despues=None, solo_disponibles=False,
+                      prefetch_destinos=False):
+        """
+        Lista una pagina de paquetes ordenados por fecha de inicio.
+        Devuelve (paquetes, siguiente); `siguiente` se entrega como
+        `despues` para pedir la pagina que sigue y es None al final.
+        """
+        condiciones = ()
+        if solo_disponibles:
+            condiciones = PaqueteTuristico.CONDICIONES_DISPONIBLES
+
+        with db.conexion_lectura() as connection:
+            cursor = connection.cursor()
+            try:
+                filas, siguiente = paginar(
+                    cursor, PaqueteTuristico.SQL_PAGINA,
+                    PaqueteTuristico.CLAVE_PAGINA,
+                    condiciones=condiciones, despues=despues, limite=limite)
+                paquetes = PaqueteTuristico._desde_tuplas(
+                    db, cursor.description, filas)
+
+                if prefetch_destinos:
+                    PaqueteTuristico.cargar_destinos_lote(db, paquetes)
+                return paquetes, siguiente
+
+            except Error as e:
+                print(f"Error al listar paquetes: {e}")
+                return [], None
+            finally:
+                cursor.close()
+
+    @staticmethod
+    def iterar_todos(db, tamano_lote=500, solo_disponibles=False,
+                     prefetch_destinos=False):
+        """Recorre todos los paquetes en lotes acotados de memoria."""
+        despues = None
+        while True:
+            paquetes, despues = PaqueteTuristico.listar_pagina(
+                db, tamano_lote, despues, solo_disponibles, prefetch_destinos)
+            yield from paquetes
+            if despues is None:
+                return
 
     @staticmethod
     def buscar_por_id(db, id_paquete):
-        """Busca un paquete por su ID."""
-        try:
-            connection = db.conectar()
-            cursor = connection.cursor(dictionary=True)
-            cursor.execute("SELECT * FROM PaquetesTuristicos WHERE id_paquete = %s",
-                           (id_paquete,))
-            row = cursor.fetchone()
+        """Busca un paquete por su ID (a traves de la cache del catalogo)."""
+        resultado = cache_catalogo.leer(
+            db, ("paquetes", "buscar_por_id", (id_paquete,)),
+            lambda: PaqueteTuristico._consultar_por_id(db, id_paquete))
+
+        if resultado:
+            row, destinos = resultado
+            paquete = PaqueteTuristico._desde_fila(db, row)
+            paquete.destinos = list(destinos)
+            return paquete
+        return None
 
-            if row:
-                paquete = PaqueteTuristico(
-                    db,
-                    id_paquete=row['id_paquete'],
-                    nombre=row['nombre'],
-                    descripcion=row['descripcion'],
-                    fecha_inicio=row['fecha_inicio'],
-                    fecha_fin=row['fecha_fin'],
-                    precio_total=row['precio_total'],
-                    cupo_disponible=row['cupo_disponible'],
-                    disponible=row['disponible']
-                )
-                paquete.cargar_destinos()
-                return paquete
-            return None
+    @staticmethod
+    def _consultar_por_id(db, id_paquete):
+        """
+        Consulta la fila de un paquete y sus destinos.
+        Devuelve (fila, destinos) o None si no existe o hay error.
+        """
+        with db.conexion_lectura(compartida=True) as connection:
+            try:
+                filas = db.consultar_preparada(
+                    connection, "paquetes.buscar_por_id", (id_paquete,))
+
+                if filas:
+                    destinos = db.consultar_preparada(
+                        connection, "paquetes.destinos", (id_paquete,))
+                    return filas[0], tuple(destinos)
+                return None
 
-        except Error as e:
-            print(f"Error al buscar paquete: {e}")
-            return None
-        finally:
-            cursor.close()
+            except Error as e:
+                print(f"Error al buscar paquete: {e}")
+                return None
 
     @staticmethod
-    def buscar_por_fechas(db, fecha_inicio, fecha_fin):
-        """Busca paquetes disponibles en un rango de fechas."""
-        sql = """
-            SELECT * FROM PaquetesTuristicos 
-            WHERE disponible = TRUE 
-            AND fecha_inicio >= %s 
-            AND fecha_fin <= %s
-            AND fecha_inicio >= CURDATE()
-            ORDER BY fecha_inicio
+    def buscar_por_fechas(db, fecha_inicio, fecha_fin, prefetch_destinos=False,
+                          personas=1):
         """
+        Busca paquetes disponibles en un rango de fechas con cupo para
+        `personas`, en el indice de disponibilidad.
+        Con prefetch_destinos=True carga los destinos de todos los paquetes
+        en una sola consulta adicional.
+        """
+        with db.conexion_lectura() as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.execute(PaqueteTuristico.SQL_BUSCAR_POR_FECHAS,
+                               (fecha_inicio, fecha_fin, personas))
+                paquetes = PaqueteTuristico._desde_tuplas(
+                    db, cursor.description, cursor.fetchall())
+
+                if prefetch_destinos:
+                    PaqueteTuristico.cargar_destinos_lote(db, paquetes)
+                return paquetes
+
+            except Error as e:
+                print(f"Error al buscar paquetes por fechas: {e}")
+                return []
+            finally:
+                cursor.close()
 
-        try:
-            connection = db.conectar()
-            cursor = connection.cursor(dictionary=True)
-            cursor.execute(sql, (fecha_inicio, fecha_fin))
-            resultados = cursor.fetchall()
+    @staticmethod
+    def buscar_en_rango(db, desde, hasta, modo=indice_fechas.DENTRO, personas=1,
+                        precio_maximo=None, destinos=None, limite=None,
+                        prefetch_destinos=False):
+        """
+        Busca paquetes disponibles por rango de fechas en el indice en
+        memoria del catalogo, ordenados por fecha de inicio.
+        `modo` es "dentro" (empiezan y terminan en el rango), "solapa"
+        (tienen algun dia en el rango) o "inicia" (empiezan en el rango).
+        Filtra por cupo para `personas`, precio maximo y destinos (IDs; basta
+        con visitar uno). `limite` corta los resultados.
+        """
+        indice = PaqueteTuristico._indice_fechas(db)
+        if indice is None:
+            return []
 
-            paquetes = []
-            for row in resultados:
-                paquete = PaqueteTuristico(
-                    db,
-                    id_paquete=row['id_paquete'],
-                    nombre=row['nombre'],
-                    descripcion=row['descripcion'],
-                    fecha_inicio=row['fecha_inicio'],
-                    fecha_fin=row['fecha_fin'],
-                    precio_total=row['precio_total'],
-                    cupo_disponible=row['cupo_disponible'],
-                    disponible=row['disponible']
-                )
-                paquetes.append(paquete)
+        valores = indice.buscar(desde, hasta, modo, personas, precio_maximo,
+                                destinos, minimo_inicio=date.today(),
+                                limite=limite)
+        paquetes = [PaqueteTuristico(db, *valor) for valor in valores]
 
-            return paquetes
+        if prefetch_destinos:
+            PaqueteTuristico.cargar_destinos_lote(db, paquetes)
+        return paquetes
 
-        except Error as e:
-            print(f"Error al buscar paquetes por fechas: {e}")
-            return []
-        finally:
-            cursor.close()
+    @staticmethod
+    def _indice_fechas(db):
+        """
+        Devuelve el indice de fechas de `db` (lo construye la primera vez)
+        con los paquetes modificados ya recargados.
+        """
+        return cache_catalogo.leer_indice(
+            db, PaqueteTuristico.CLAVE_INDICE_FECHAS, indice_fechas.IndiceFechas,
+            PaqueteTuristico._consultar_indice)
+
+    @staticmethod
+    def _lotes_indice(ids, tamano_lote=1000):
+        """
+        Filtros (filtro, params) para recargar los paquetes `ids` en lotes
+        de IN acotados, o un unico filtro vacio para cargarlos todos.
+        """
+        if ids is None:
+            return [("", ())]
+
+        ids = sorted(ids)
+        lotes = []
+        for i in range(0, len(ids), tamano_lote):
+            lote = tuple(ids[i:i + tamano_lote])
+            marcadores = ", ".join(["%s"] * len(lote))
+            lotes.append((f"AND dp.id_paquete IN ({marcadores})", lote))
+        return lotes
+
+    @staticmethod
+    def _consultar_indice(db, ids=None):
+        """
+        Consulta los paquetes disponibles (todos o los de `ids`) en el
+        formato de IndiceFechas.cargar, con los campos del constructor como
+        valor. Devuelve None si hay error.
+        """
+        paquetes = []
+        with db.conexion_lectura(compartida=True) as connection:
+            cursor = connection.cursor()
+            try:
+                for filtro, lote in PaqueteTuristico._lotes_indice(ids):
+                    cursor.execute(
+                        PaqueteTuristico.SQL_INDICE_DESTINOS.format(filtro=filtro),
+                        lote)
+                    destinos = {}
+                    for id_paquete, id_destino in cursor.fetchall():
+                        destinos.setdefault(id_paquete, []).append(id_destino)
+
+                    cursor.execute(
+                        PaqueteTuristico.SQL_INDICE_PAQUETES.format(filtro=filtro),
+                        lote)
+                    extraer = mapeador(cursor.description, PaqueteTuristico.CAMPOS)
+                    for row in cursor.fetchall():
+                        valor = extraer(row)
+                        id_paquete, _, _, inicio, fin, precio, cupo, _ = valor
+                        paquetes.append((id_paquete, inicio, fin, precio, cupo,
+                                         destinos.get(id_paquete, ()), valor))
+                return paquetes
+
+            except Error as e:
+                print(f"Error al cargar el indice de fechas: {e}")
+                return None
+            finally:
+                cursor.close()
+
+    @staticmethod
+    def buscar_por_actividad(db, texto, limite=20, despues=None):
+        """
+        Busca paquetes disponibles con cupo cuyos destinos (actividades y
+        nombre), nombre o descripcion contengan todas las palabras de
+        `texto`, sin distinguir tildes ni mayusculas, ordenados por
+        relevancia. Devuelve (paquetes, siguiente) igual que listar_pagina.
+        """
+        indice = cache_catalogo.leer_indice(
+            db, PaqueteTuristico.CLAVE_INDICE_TEXTO, indice_texto.IndiceTexto,
+            PaqueteTuristico._consultar_indice_texto)
+        if indice is None:
+            return [], None
+
+        desplazamiento = despues or 0
+        valores, hay_mas = indice.buscar(texto, limite, desplazamiento,
+                                         lambda valor: valor[6] > 0)
+        paquetes = [PaqueteTuristico(db, *valor) for valor in valores]
+        return paquetes, desplazamiento + limite if hay_mas else None
+
+    @staticmethod
+    def _consultar_indice_texto(db, ids=None):
+        """
+        Consulta los paquetes disponibles (todos o los de `ids`) y sus
+        destinos como documentos de IndiceTexto, con los campos del
+        constructor como valor. Devuelve None si hay error.
+        """
+        documentos = []
+        with db.conexion_lectura(compartida=True) as connection:
+            cursor = connection.cursor()
+            try:
+                for filtro, lote in PaqueteTuristico._lotes_indice(ids):
+                    cursor.execute(PaqueteTuristico.SQL_INDICE_TEXTO_DESTINOS
+                                   .format(filtro=filtro), lote)
+                    campos = {}
+                    for id_paquete, nombre, actividades in cursor.fetchall():
+                        campos.setdefault(id_paquete, []).extend((
+                            (actividades, PaqueteTuristico.PESO_ACTIVIDADES),
+                            (nombre, PaqueteTuristico.PESO_DESTINOS)))
+
+                    cursor.execute(
+                        PaqueteTuristico.SQL_INDICE_PAQUETES.format(filtro=filtro),
+                        lote)
+                    extraer = mapeador(cursor.description, PaqueteTuristico.CAMPOS)
+                    for row in cursor.fetchall():
+                        valor = extraer(row)
+                        id_paquete, nombre, descripcion = valor[:3]
+                        documentos.append((id_paquete, campos.get(id_paquete, []) + [
+                            (nombre, PaqueteTuristico.PESO_NOMBRE),
+                            (descripcion, PaqueteTuristico.PESO_DESCRIPCION)],
+                            valor))
+                return documentos
+
+            except Error as e:
+                print(f"Error al cargar el indice de texto: {e}")
+                return None
+            finally:
+                cursor.close()
 
 
 class Reserva:
     """Clase que representa una reserva de paquete turistico."""
 
+    ESTADOS = ('pendiente', 'confirmada', 'cancelada')
+
+    # Consultas compartidas con la version async (modelos_async).
+    # `agotado` marca los paquetes que deshabilito una reserva al agotar el
+    # cupo: solo esos se rehabilitan al liberar cupo
+    SQL_DESCONTAR_CUPO = """
+        UPDATE PaquetesTuristicos
+        SET disponible = (cupo_disponible > %s),
+            agotado = (cupo_disponible = %s),
+            cupo_disponible = cupo_disponible - %s
+        WHERE id_paquete = %s
+        AND disponible = TRUE
+        AND cupo_disponible >= %s
+        AND fecha_inicio >= CURDATE()
+    """
+    SQL_LIBERAR_CUPO = """
+        UPDATE PaquetesTuristicos
+        SET disponible = (disponible OR agotado),
+            agotado = FALSE,
+            cupo_disponible = cupo_disponible + %s
+        WHERE id_paquete = %s
+    """
+    SQL_DESCONTAR_DISPONIBILIDAD = """
+        UPDATE DisponibilidadPaquetes
+        SET cupo_disponible = cupo_disponible - %s
+        WHERE id_paquete = %s
+    """
+    SQL_PRECIO_PAQUETE = \
+        "SELECT precio_total FROM PaquetesTuristicos WHERE id_paquete = %s"
+    SQL_INSERTAR = """
+        INSERT INTO Reservas 
+        (id_cliente, id_paquete, fecha_reserva, numero_personas, 
+         precio_total, estado, notas)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+    """
+    SQL_INSERTAR_CON_CLAVE = """
+        INSERT INTO Reservas
+        (id_cliente, id_paquete, fecha_reserva, numero_personas,
+         precio_total, estado, notas, clave_idempotencia)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    """
+    SQL_BUSCAR_POR_CLAVE = "SELECT * FROM Reservas WHERE clave_idempotencia = %s"
+    # Largo maximo de una clave de idempotencia (columna VARCHAR(64))
+    LARGO_CLAVE = 64
+    SQL_ACTUALIZAR_ESTADO = "UPDATE Reservas SET estado = %s WHERE id_reserva = %s"
+    # Reservas en lote: los paquetes se bloquean en orden de ID, de modo que
+    # dos lotes concurrentes con paquetes en comun no se bloquean mutuamente
+    SQL_BLOQUEAR_PAQUETES = """
+        SELECT id_paquete, precio_total, cupo_disponible, disponible,
+               fecha_inicio >= CURDATE() AS vigente
+        FROM PaquetesTuristicos
+        WHERE id_paquete IN ({marcadores})
+        ORDER BY id_paquete
+        FOR UPDATE
+    """
+    SQL_CLIENTES_EXISTENTES = \
+        "SELECT id_cliente FROM Clientes WHERE id_cliente IN ({marcadores})"
+    SQL_VERIFICAR_LOTE = """
+        SELECT id_reserva, id_cliente, id_paquete FROM Reservas
+        WHERE id_reserva BETWEEN %s AND %s
+        ORDER BY id_reserva
+    """
+    # Pendientes vencidas, en lotes; SKIP LOCKED salta las filas que otra
+    # transaccion (p. ej. actualizar_estado) tiene bloqueadas
+    SQL_PENDIENTES_VENCIDAS = """
+        SELECT id_reserva, id_paquete, fecha_reserva, numero_personas, precio_total
+        FROM Reservas
+        WHERE estado = 'pendiente' AND fecha_reserva < %s
+        ORDER BY fecha_reserva, id_reserva
+        LIMIT %s
+        FOR UPDATE SKIP LOCKED
+    """
+    SQL_EXPIRAR = """
+        UPDATE Reservas SET estado = 'cancelada'
+        WHERE estado = 'pendiente' AND id_reserva IN ({marcadores})
+    """
+    SQL_BLOQUEAR = """
+        SELECT id_paquete, fecha_reserva, numero_personas, precio_total, estado
+        FROM Reservas
+        WHERE id_reserva = %s
+        FOR UPDATE
+    """
+    SQL_LISTAR_POR_CLIENTE = """
+        SELECT r.*, p.nombre as nombre_paquete, p.fecha_inicio, p.fecha_fin
+        FROM Reservas r
+        INNER JOIN PaquetesTuristicos p ON r.id_paquete = p.id_paquete
+        WHERE r.id_cliente = %s
+        ORDER BY r.fecha_reserva DESC
+    """
+    SQL_LISTAR_POR_CLIENTE_DETALLADO = """
+        SELECT r.*, p.nombre AS paquete_nombre,
+               p.descripcion AS paquete_descripcion,
+               p.fecha_inicio, p.fecha_fin,
+               p.precio_total AS paquete_precio_total,
+               p.cupo_disponible, p.disponible
+        FROM Reservas r
+        INNER JOIN PaquetesTuristicos p ON r.id_paquete = p.id_paquete
+        WHERE r.id_cliente = %s
+        ORDER BY r.fecha_reserva DESC
+    """
+    SQL_PAGINA = """
+        SELECT r.*, c.nombre_completo, p.nombre as nombre_paquete
+        FROM Reservas r
+        INNER JOIN Clientes c ON r.id_cliente = c.id_cliente
+        INNER JOIN PaquetesTuristicos p ON r.id_paquete = p.id_paquete
+    """
+    CLAVE_PAGINA = ("r.fecha_reserva", "r.id_reserva")
+    SQL_LISTAR_TODAS = SQL_PAGINA + " ORDER BY r.fecha_reserva DESC"
+    SQL_BUSCAR_POR_ID = "SELECT * FROM Reservas WHERE id_reserva = %s"
+
+    # Columnas en el orden de los argumentos del constructor
+    CAMPOS = ("id_reserva", "id_cliente", "id_paquete", "fecha_reserva",
+              "numero_personas", "precio_total", "estado", "notas")
+    __slots__ = ("db", "paquete") + CAMPOS
+
     def __init__(self, db, id_reserva=None, id_cliente=None, id_paquete=None,
                  fecha_reserva=None, numero_personas=1, precio_total=0.0,
                  estado="pendiente", notas=""):
@@ -290,6 +802,7 @@ class Reserva:
         self.precio_total = precio_total
         self.estado = estado
         self.notas = notas
+        self.paquete = None
 
     def __str__(self):
         """Representa en string la reserva."""
@@ -297,174 +810,702 @@ class Reserva:
                 f"Paquete: {self.id_paquete} | Personas: {self.numero_personas} | "
                 f"Total: ${self.precio_total:,.2f} | Estado: {self.estado}")
 
-    def crear(self):
-        """Crea una nueva reserva en la base de datos."""
-        # Verificar disponibilidad del paquete
-        paquete = PaqueteTuristico.buscar_por_id(self.db, self.id_paquete)
+    @staticmethod
+    def _desde_fila(db, row):
+        """Construye una reserva a partir de una fila de la tabla Reservas."""
+        return Reserva(
+            db,
+            id_reserva=row['id_reserva'],
+            id_cliente=row['id_cliente'],
+            id_paquete=row['id_paquete'],
+            fecha_reserva=row['fecha_reserva'],
+            numero_personas=row['numero_personas'],
+            precio_total=row['precio_total'],
+            estado=row['estado'],
+            notas=row['notas']
+        )
 
-        if not paquete:
-            print("El paquete no existe")
-            return None
+    @staticmethod
+    def _desde_tuplas(db, descripcion, filas):
+        """Construye reservas a partir de filas tupla de la tabla Reservas."""
+        extraer = mapeador(descripcion, Reserva.CAMPOS)
+        return [Reserva(db, *extraer(row)) for row in filas]
 
-        if not paquete.verificar_disponibilidad(self.numero_personas):
-            return None
+    def crear(self, clave_idempotencia=None):
+        """
+        Crea una nueva reserva en la base de datos.
+        El cupo se descuenta con un UPDATE condicional dentro de la misma
+        transaccion que inserta la reserva, de modo que dos reservas
+        concurrentes nunca pueden sobrevender el paquete.
+        Con `clave_idempotencia` (p. ej. un UUID generado por quien reserva)
+        un reintento con la misma clave no crea otra reserva ni descuenta
+        cupo otra vez: carga y devuelve la reserva original, desde las
+        claves recientes de `db` o desde la base de datos.
+        """
+        clave = clave_idempotencia
+        if clave is not None:
+            if not isinstance(clave, str) or not 0 < len(clave) <= Reserva.LARGO_CLAVE:
+                print("Clave de idempotencia invalida")
+                return None
+            encontrada, original = self.db.claves_idempotencia.buscar(clave)
+            if encontrada:
+                return self._repetir(original)
 
-        # Calcular precio total
-        self.precio_total = paquete.precio_total * self.numero_personas
+        with self.db.conexion() as connection:
+            cursor = connection.cursor(dictionary=True)
+            try:
+                # Iniciar transaccion
+                if not connection.in_transaction:
+                    connection.start_transaction()
+
+                if clave is not None:
+                    filas = self.db.consultar_preparada(
+                        connection, "reservas.buscar_por_clave", (clave,))
+                    if filas:
+                        connection.rollback()
+                        return self._repetir(self._recordar(clave, filas[0]))
+
+                # Descontar cupo solo si alcanza (bloquea la fila del paquete)
+                descontado = self.db.ejecutar_preparada(
+                    connection, "reservas.descontar_cupo", self._params_cupo())
+
+                if descontado == 0:
+                    connection.rollback()
+                    self._informar_rechazo(cursor)
+                    return None
+
+                self.db.ejecutar_preparada(
+                    connection, "reservas.descontar_disponibilidad",
+                    (self.numero_personas, self.id_paquete))
+
+                # Calcular precio total
+                precio = self.db.consultar_preparada(
+                    connection, "reservas.precio_paquete", (self.id_paquete,))
+                self.precio_total = precio[0]['precio_total'] * \
+                    self.numero_personas
+
+                # Crear reserva
+                if clave is None:
+                    cursor.execute(Reserva.SQL_INSERTAR, self._params_insertar())
+                else:
+                    cursor.execute(Reserva.SQL_INSERTAR_CON_CLAVE,
+                                   self._params_insertar() + (clave,))
+                self.id_reserva = cursor.lastrowid
+
+                if self.db.usar_resumenes:
+                    self.db.ejecutar_preparada(
+                        connection, "reportes.sumar_resumen",
+                        reportes.params_resumen(
+                            self.id_paquete, self.fecha_reserva, self.estado,
+                            self.numero_personas, self.precio_total))
+
+                # Confirmar transaccion
+                connection.commit()
+                if clave is not None:
+                    self._recordar(clave, {campo: getattr(self, campo)
+                                           for campo in Reserva.CAMPOS})
+                PaqueteTuristico._invalidar_cache(self.db, self.id_paquete)
+                print(f"Reserva #{self.id_reserva} creada exitosamente")
+                print(f"Total a pagar: ${self.precio_total:,.2f}")
+                return self.id_reserva
+
+            except Error as e:
+                connection.rollback()
+                if clave is not None and e.errno == errorcode.ER_DUP_ENTRY:
+                    # Un reintento concurrente con la misma clave inserto
+                    # primero: se devuelve esa reserva
+                    filas = self.db.consultar_preparada(
+                        connection, "reservas.buscar_por_clave", (clave,))
+                    connection.rollback()
+                    if filas:
+                        return self._repetir(self._recordar(clave, filas[0]))
+                print(f"Error al crear reserva: {e}")
+                return None
+            finally:
+                cursor.close()
 
-        sql = """
-            INSERT INTO Reservas 
-            (id_cliente, id_paquete, fecha_reserva, numero_personas, 
-             precio_total, estado, notas)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
+    def _recordar(self, clave, fila):
         """
-        values = (self.id_cliente, self.id_paquete, self.fecha_reserva,
-                  self.numero_personas, self.precio_total, self.estado, self.notas)
+        Guarda en las claves recientes los campos de la reserva creada con
+        `clave` (una fila o dict con Reserva.CAMPOS) y los devuelve.
+        """
+        original = tuple(fila[campo] for campo in Reserva.CAMPOS)
+        self.db.claves_idempotencia.guardar(clave, original)
+        return original
 
-        try:
-            connection = self.db.conectar()
-            cursor = connection.cursor()
+    def _repetir(self, original):
+        """
+        Carga en esta reserva la original de su clave de idempotencia (los
+        valores de Reserva.CAMPOS) y devuelve su ID, o None si la clave se
+        uso para otra reserva.
+        """
+        valores = dict(zip(Reserva.CAMPOS, original))
+        if ((valores['id_cliente'], valores['id_paquete'], valores['numero_personas'])
+                != (self.id_cliente, self.id_paquete, self.numero_personas)):
+            print("La clave de idempotencia ya se uso para otra reserva")
+            return None
+
+        for campo, valor in valores.items():
+            setattr(self, campo, valor)
+        print(f"Reserva #{self.id_reserva} ya registrada con esta clave")
+        return self.id_reserva
 
-            # Iniciar transaccion
-            connection.start_transaction()
+    @staticmethod
+    def params_descontar(personas, id_paquete):
+        """Parametros de SQL_DESCONTAR_CUPO para `personas` asientos."""
+        return (personas, personas, personas, id_paquete, personas)
+
+    def _params_cupo(self):
+        """Parametros de SQL_DESCONTAR_CUPO para esta reserva."""
+        return Reserva.params_descontar(self.numero_personas, self.id_paquete)
+
+    def _params_insertar(self):
+        """Parametros de SQL_INSERTAR para esta reserva."""
+        return (self.id_cliente, self.id_paquete, self.fecha_reserva,
+                self.numero_personas, self.precio_total, self.estado, self.notas)
+
+    def _informar_rechazo(self, cursor):
+        """Informa por que no se pudo descontar el cupo del paquete."""
+        cursor.execute(PaqueteTuristico.SQL_BUSCAR_POR_ID, (self.id_paquete,))
+        self._explicar_rechazo(cursor.fetchone())
+
+    def _explicar_rechazo(self, row):
+        """Explica el rechazo a partir de la fila actual del paquete."""
+        if not row:
+            print("El paquete no existe")
+            return
 
-            # Crear reserva
-            cursor.execute(sql, values)
-            self.id_reserva = cursor.lastrowid
+        paquete = PaqueteTuristico._desde_fila(self.db, row)
+        paquete.verificar_disponibilidad(self.numero_personas)
 
-            # Reducir cupo del paquete
-            if not paquete.reducir_cupo(self.numero_personas):
+    @staticmethod
+    def crear_lote(db, solicitudes, todo_o_nada=False):
+        """
+        Crea en una sola transaccion las reservas de `solicitudes`, una
+        secuencia de (id_cliente, id_paquete, numero_personas), p. ej. el
+        manifiesto de un operador turistico.
+        Los paquetes se bloquean en orden de ID, el cupo se valida en
+        memoria (en el orden de las solicitudes), las reservas se insertan
+        con executemany y el cupo se descuenta con una sentencia por
+        paquete. Con todo_o_nada=True una sola solicitud rechazada cancela
+        el lote completo; si no, se crean las demas.
+        Devuelve un dict con `reservas` (la Reserva creada o None, en el
+        orden de las solicitudes), `errores` [(indice, motivo)], creadas,
+        rechazadas, asientos, segundos y reservas_por_segundo; o None si
+        hay error de base de datos.
+        """
+        inicio = time.perf_counter()
+        solicitudes = list(solicitudes)
+        try:
+            resultado = Reserva._crear_lote(db, solicitudes, todo_o_nada, False)
+        except _IdsNoConsecutivos:
+            # Inserciones concurrentes intercaladas: se rehace fila por fila
+            resultado = Reserva._crear_lote(db, solicitudes, todo_o_nada, True)
+        if resultado is None:
+            return None
+
+        reservas, errores = resultado
+        creadas = [r for r in reservas if r is not None]
+        segundos = time.perf_counter() - inicio
+        if errores and todo_o_nada:
+            print(f"Lote de reservas cancelado: {len(errores)} solicitudes rechazadas")
+        else:
+            print(f"Lote de reservas: {len(creadas)} creadas, "
+                  f"{len(errores)} rechazadas")
+        return {
+            "reservas": reservas,
+            "errores": errores,
+            "creadas": len(creadas),
+            "rechazadas": len(errores),
+            "asientos": sum(r.numero_personas for r in creadas),
+            "segundos": segundos,
+            "reservas_por_segundo": len(creadas) / segundos if segundos else 0.0,
+        }
+
+    @staticmethod
+    def _crear_lote(db, solicitudes, todo_o_nada, por_fila):
+        """
+        Valida e inserta el lote en una transaccion; con por_fila=True
+        inserta las reservas una a una en vez de con executemany.
+        Devuelve (reservas, errores) o None si hay error.
+        """
+        with db.conexion() as connection:
+            cursor = connection.cursor(dictionary=True)
+            try:
+                if not connection.in_transaction:
+                    connection.start_transaction()
+
+                reservas, errores = Reserva._validar_lote(db, cursor, solicitudes)
+                creadas = [r for r in reservas if r is not None]
+                if not creadas or (errores and todo_o_nada):
+                    connection.rollback()
+                    return [None] * len(solicitudes), errores
+
+                if por_fila:
+                    for reserva in creadas:
+                        cursor.execute(Reserva.SQL_INSERTAR, reserva._params_insertar())
+                        reserva.id_reserva = cursor.lastrowid
+                else:
+                    cursor.executemany(Reserva.SQL_INSERTAR,
+                                       [r._params_insertar() for r in creadas])
+                    ids = Reserva._ids_lote(cursor, cursor.lastrowid, creadas)
+                    if ids is None:
+                        raise _IdsNoConsecutivos()
+                    for reserva, id_reserva in zip(creadas, ids):
+                        reserva.id_reserva = id_reserva
+
+                # Un descuento de cupo por paquete, en el mismo orden del bloqueo
+                personas = {}
+                for reserva in creadas:
+                    personas[reserva.id_paquete] = \
+                        personas.get(reserva.id_paquete, 0) + reserva.numero_personas
+                for id_paquete in sorted(personas):
+                    total = personas[id_paquete]
+                    db.ejecutar_preparada(connection, "reservas.descontar_cupo",
+                                          Reserva.params_descontar(total, id_paquete))
+                    db.ejecutar_preparada(connection,
+                                          "reservas.descontar_disponibilidad",
+                                          (total, id_paquete))
+
+                if db.usar_resumenes:
+                    cursor.executemany(reportes.SQL_SUMAR_RESUMEN, [
+                        reportes.params_resumen(
+                            r.id_paquete, r.fecha_reserva, r.estado,
+                            r.numero_personas, r.precio_total)
+                        for r in creadas
+                    ])
+
+                connection.commit()
+                for id_paquete in personas:
+                    PaqueteTuristico._invalidar_cache(db, id_paquete)
+                return reservas, errores
+
+            except _IdsNoConsecutivos:
                 connection.rollback()
-                print("Error al actualizar cupo del paquete")
+                raise
+            except Error as e:
+                connection.rollback()
+                print(f"Error al crear el lote de reservas: {e}")
                 return None
+            finally:
+                cursor.close()
+
+    @staticmethod
+    def _validar_lote(db, cursor, solicitudes):
+        """
+        Bloquea los paquetes del lote y asigna su cupo a las solicitudes en
+        orden. Devuelve (reservas, errores): la Reserva por crear o None
+        por cada solicitud, y [(indice, motivo)] de las rechazadas.
+        """
+        normalizadas = []
+        errores = []
+        for indice, solicitud in enumerate(solicitudes):
+            try:
+                id_cliente, id_paquete, personas = (int(v) for v in solicitud)
+            except (TypeError, ValueError):
+                errores.append((indice, "solicitud invalida"))
+                normalizadas.append(None)
+                continue
+            if personas < 1:
+                errores.append((indice, "numero de personas invalido"))
+                normalizadas.append(None)
+                continue
+            normalizadas.append((id_cliente, id_paquete, personas))
+
+        validas = [s for s in normalizadas if s is not None]
+        clientes = set()
+        for lote in Reserva._lotes_ids({s[0] for s in validas}):
+            cursor.execute(Reserva.SQL_CLIENTES_EXISTENTES.format(
+                marcadores=", ".join(["%s"] * len(lote))), lote)
+            clientes.update(row['id_cliente'] for row in cursor.fetchall())
+        paquetes = {}
+        for lote in Reserva._lotes_ids({s[1] for s in validas}):
+            cursor.execute(Reserva.SQL_BLOQUEAR_PAQUETES.format(
+                marcadores=", ".join(["%s"] * len(lote))), lote)
+            paquetes.update((row['id_paquete'], row) for row in cursor.fetchall())
+
+        restante = {id_paquete: row['cupo_disponible']
+                    for id_paquete, row in paquetes.items()}
+        fecha = datetime.now()
+        reservas = []
+        for indice, solicitud in enumerate(normalizadas):
+            if solicitud is None:
+                reservas.append(None)
+                continue
+            id_cliente, id_paquete, personas = solicitud
+            paquete = paquetes.get(id_paquete)
+            if id_cliente not in clientes:
+                motivo = "el cliente no existe"
+            elif paquete is None:
+                motivo = "el paquete no existe"
+            elif not paquete['disponible']:
+                motivo = "el paquete no esta disponible"
+            elif not paquete['vigente']:
+                motivo = "el paquete ya ha iniciado o finalizado"
+            elif restante[id_paquete] < personas:
+                motivo = f"cupo insuficiente (disponible: {restante[id_paquete]})"
+            else:
+                motivo = None
 
-            # Confirmar transaccion
-            connection.commit()
-            print(f"Reserva #{self.id_reserva} creada exitosamente")
-            print(f"Total a pagar: ${self.precio_total:,.2f}")
-            return self.id_reserva
+            if motivo is not None:
+                errores.append((indice, motivo))
+                reservas.append(None)
+                continue
+            restante[id_paquete] -= personas
+            reservas.append(Reserva(
+                db, id_cliente=id_cliente, id_paquete=id_paquete,
+                fecha_reserva=fecha, numero_personas=personas,
+                precio_total=paquete['precio_total'] * personas))
 
-        except Error as e:
-            connection.rollback()
-            print(f"Error al crear reserva: {e}")
+        errores.sort()
+        return reservas, errores
+
+    @staticmethod
+    def _lotes_ids(ids, tamano_lote=1000):
+        """Tuplas ordenadas de hasta `tamano_lote` IDs para filtros IN."""
+        ids = sorted(ids)
+        return [tuple(ids[i:i + tamano_lote]) for i in range(0, len(ids), tamano_lote)]
+
+    @staticmethod
+    def _ids_lote(cursor, primer_id, reservas):
+        """
+        Calcula los IDs de un INSERT multiple a partir del primer ID generado
+        y los verifica contra las reservas insertadas. Devuelve None si no
+        son consecutivos (p. ej. por inserciones concurrentes).
+        """
+        if not primer_id:
             return None
-        finally:
-            cursor.close()
+
+        ids = list(range(primer_id, primer_id + len(reservas)))
+        cursor.execute(Reserva.SQL_VERIFICAR_LOTE, (ids[0], ids[-1]))
+        encontrados = [(row['id_reserva'], row['id_cliente'], row['id_paquete'])
+                       for row in cursor.fetchall()]
+        esperados = [(id_reserva, r.id_cliente, r.id_paquete)
+                     for id_reserva, r in zip(ids, reservas)]
+        return ids if encontrados == esperados else None
 
     def actualizar_estado(self, nuevo_estado):
-        """Actualiza el estado de la reserva."""
-        if nuevo_estado not in ['pendiente', 'confirmada', 'cancelada']:
+        """
+        Actualiza el estado de la reserva.
+        Lee el estado actual bloqueando la fila, para que el cupo y los
+        resumenes reflejen el cambio real aunque este objeto este
+        desactualizado. Cancelar devuelve los asientos al paquete y
+        reactivar una reserva cancelada los vuelve a descontar.
+        """
+        if nuevo_estado not in Reserva.ESTADOS:
             print("Estado invalido")
             return False
 
-        sql = "UPDATE Reservas SET estado = %s WHERE id_reserva = %s"
-
-        try:
-            connection = self.db.conectar()
+        with self.db.conexion() as connection:
             cursor = connection.cursor()
-            cursor.execute(sql, (nuevo_estado, self.id_reserva))
-            connection.commit()
-            self.estado = nuevo_estado
-            print(
-                f"Reserva #{self.id_reserva} actualizada a estado: {nuevo_estado}")
-            return True
-
-        except Error as e:
-            connection.rollback()
-            print(f"Error al actualizar estado de reserva: {e}")
-            return False
-        finally:
-            cursor.close()
+            try:
+                if not connection.in_transaction:
+                    connection.start_transaction()
+
+                filas = self.db.consultar_preparada(
+                    connection, "reservas.bloquear", (self.id_reserva,))
+                if not filas:
+                    connection.rollback()
+                    print("La reserva no existe")
+                    return False
+                actual = filas[0]
+
+                if not self._ajustar_cupo(connection, cursor, actual, nuevo_estado):
+                    connection.rollback()
+                    print("Cupo insuficiente para reactivar la reserva")
+                    return False
+
+                self.db.ejecutar_preparada(
+                    connection, "reservas.actualizar_estado",
+                    (nuevo_estado, self.id_reserva))
+
+                if self.db.usar_resumenes and actual['estado'] != nuevo_estado:
+                    for estado, signo in ((actual['estado'], -1), (nuevo_estado, 1)):
+                        self.db.ejecutar_preparada(
+                            connection, "reportes.sumar_resumen",
+                            reportes.params_resumen(
+                                actual['id_paquete'], actual['fecha_reserva'],
+                                estado, actual['numero_personas'],
+                                actual['precio_total'], signo))
+
+                connection.commit()
+                self.estado = nuevo_estado
+                if (actual['estado'] == 'cancelada') != (nuevo_estado == 'cancelada'):
+                    PaqueteTuristico._invalidar_cache(self.db, actual['id_paquete'])
+                print(
+                    f"Reserva #{self.id_reserva} actualizada a estado: {nuevo_estado}")
+                return True
+
+            except Error as e:
+                connection.rollback()
+                print(f"Error al actualizar estado de reserva: {e}")
+                return False
+            finally:
+                cursor.close()
+
+    def _ajustar_cupo(self, connection, cursor, actual, nuevo_estado):
+        """
+        Devuelve los asientos de la reserva al cancelarla y los descuenta
+        de nuevo (si alcanzan) al reactivarla, manteniendo el indice de
+        disponibilidad. `actual` es la fila bloqueada de la reserva.
+        Devuelve False si no hay cupo para reactivarla.
+        """
+        personas = actual['numero_personas']
+        id_paquete = actual['id_paquete']
+
+        if nuevo_estado == 'cancelada' and actual['estado'] != 'cancelada':
+            self.db.ejecutar_preparada(
+                connection, "reservas.liberar_cupo", (personas, id_paquete))
+            PaqueteTuristico.sincronizar_disponibilidad(cursor, id_paquete)
+
+        elif actual['estado'] == 'cancelada' and nuevo_estado != 'cancelada':
+            descontado = self.db.ejecutar_preparada(
+                connection, "reservas.descontar_cupo",
+                Reserva.params_descontar(personas, id_paquete))
+            if descontado == 0:
+                return False
+            self.db.ejecutar_preparada(
+                connection, "reservas.descontar_disponibilidad",
+                (personas, id_paquete))
+
+        return True
+
+    @staticmethod
+    def expirar_pendientes(db, fecha_limite, tamano_lote=500, max_lotes=None,
+                           pausa=0.0):
+        """
+        Cancela las reservas pendientes hechas antes de `fecha_limite` y
+        devuelve sus asientos, en lotes de `tamano_lote` con un commit por
+        lote para no retener bloqueos largos. `pausa` son los segundos de
+        espera entre lotes. Devuelve las estadisticas del barrido.
+        """
+        estadisticas = {"lotes": 0, "reservas": 0, "asientos": 0,
+                        "espera_bloqueo": 0.0, "espera_bloqueo_max": 0.0}
+        inicio = time.perf_counter()
+
+        while max_lotes is None or estadisticas["lotes"] < max_lotes:
+            resultado = Reserva._expirar_lote(db, fecha_limite, tamano_lote)
+            if resultado is None:
+                break
+
+            reservas, asientos, espera = resultado
+            estadisticas["lotes"] += 1
+            estadisticas["reservas"] += reservas
+            estadisticas["asientos"] += asientos
+            estadisticas["espera_bloqueo"] += espera
+            estadisticas["espera_bloqueo_max"] = max(
+                estadisticas["espera_bloqueo_max"], espera)
+
+            if reservas < tamano_lote:
+                break
+            if pausa:
+                time.sleep(pausa)
+
+        segundos = time.perf_counter() - inicio
+        estadisticas["segundos"] = segundos
+        estadisticas["reservas_por_segundo"] = \
+            estadisticas["reservas"] / segundos if segundos else 0.0
+        return estadisticas
+
+    @staticmethod
+    def _expirar_lote(db, fecha_limite, tamano_lote):
+        """
+        Expira un lote en una transaccion.
+        Devuelve (reservas, asientos, segundos esperando el bloqueo) o None
+        si hay error.
+        """
+        with db.conexion() as connection:
+            cursor = connection.cursor(dictionary=True)
+            try:
+                inicio = time.perf_counter()
+                if not connection.in_transaction:
+                    connection.start_transaction()
+                cursor.execute(Reserva.SQL_PENDIENTES_VENCIDAS,
+                               (fecha_limite, tamano_lote))
+                filas = cursor.fetchall()
+                espera = time.perf_counter() - inicio
+
+                if not filas:
+                    connection.rollback()
+                    return 0, 0, espera
+
+                ids = [row['id_reserva'] for row in filas]
+                marcadores = ", ".join(["%s"] * len(ids))
+                cursor.execute(Reserva.SQL_EXPIRAR.format(marcadores=marcadores),
+                               tuple(ids))
+
+                # Asientos por paquete, liberados en orden de ID de paquete
+                liberados = {}
+                for row in filas:
+                    liberados[row['id_paquete']] = \
+                        liberados.get(row['id_paquete'], 0) + row['numero_personas']
+                for id_paquete in sorted(liberados):
+                    cursor.execute(Reserva.SQL_LIBERAR_CUPO,
+                                   (liberados[id_paquete], id_paquete))
+                    PaqueteTuristico.sincronizar_disponibilidad(cursor, id_paquete)
+
+                if db.usar_resumenes:
+                    cursor.executemany(reportes.SQL_SUMAR_RESUMEN, [
+                        reportes.params_resumen(
+                            row['id_paquete'], row['fecha_reserva'], estado,
+                            row['numero_personas'], row['precio_total'], signo)
+                        for row in filas
+                        for estado, signo in (('pendiente', -1), ('cancelada', 1))
+                    ])
+
+                connection.commit()
+                for id_paquete in liberados:
+                    PaqueteTuristico._invalidar_cache(db, id_paquete)
+                return len(filas), sum(liberados.values()), espera
+
+            except Error as e:
+                connection.rollback()
+                print(f"Error al expirar reservas pendientes: {e}")
+                return None
+            finally:
+                cursor.close()
 
     @staticmethod
     def listar_por_cliente(db, id_cliente):
         """Lista todas las reservas de un cliente."""
-        sql = """
-            SELECT r.*, p.nombre as nombre_paquete, p.fecha_inicio, p.fecha_fin
-            FROM Reservas r
-            INNER JOIN PaquetesTuristicos p ON r.id_paquete = p.id_paquete
-            WHERE r.id_cliente = %s
-            ORDER BY r.fecha_reserva DESC
-        """
+        with db.conexion_lectura() as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.execute(Reserva.SQL_LISTAR_POR_CLIENTE, (id_cliente,))
+                return Reserva._desde_tuplas(
+                    db, cursor.description, cursor.fetchall())
 
-        try:
-            connection = db.conectar()
+            except Error as e:
+                print(f"Error al listar reservas del cliente: {e}")
+                return []
+            finally:
+                cursor.close()
+
+    @staticmethod
+    def listar_por_cliente_detallado(db, id_cliente):
+        """
+        Lista las reservas de un cliente con su paquete y destinos.
+        Usa dos consultas en total (reservas + paquetes con JOIN, y los
+        destinos de todos los paquetes con IN) sin importar cuantas
+        reservas tenga el cliente.
+        """
+        with db.conexion_lectura() as connection:
             cursor = connection.cursor(dictionary=True)
-            cursor.execute(sql, (id_cliente,))
-            resultados = cursor.fetchall()
+            try:
+                cursor.execute(Reserva.SQL_LISTAR_POR_CLIENTE_DETALLADO,
+                               (id_cliente,))
+                resultados = cursor.fetchall()
 
-            reservas = []
-            for row in resultados:
-                reserva = Reserva(
+            except Error as e:
+                print(f"Error al listar reservas del cliente: {e}")
+                return []
+            finally:
+                cursor.close()
+
+        reservas, paquetes = Reserva._desde_filas_detalladas(db, resultados)
+        PaqueteTuristico.cargar_destinos_lote(db, paquetes)
+        return reservas
+
+    @staticmethod
+    def _desde_filas_detalladas(db, resultados):
+        """
+        Construye las reservas de SQL_LISTAR_POR_CLIENTE_DETALLADO con su
+        paquete. Devuelve (reservas, paquetes distintos).
+        """
+        reservas = []
+        paquetes = {}
+        for row in resultados:
+            paquete = paquetes.get(row['id_paquete'])
+            if paquete is None:
+                paquete = PaqueteTuristico(
                     db,
-                    id_reserva=row['id_reserva'],
-                    id_cliente=row['id_cliente'],
                     id_paquete=row['id_paquete'],
-                    fecha_reserva=row['fecha_reserva'],
-                    numero_personas=row['numero_personas'],
-                    precio_total=row['precio_total'],
-                    estado=row['estado'],
-                    notas=row['notas']
+                    nombre=row['paquete_nombre'],
+                    descripcion=row['paquete_descripcion'],
+                    fecha_inicio=row['fecha_inicio'],
+                    fecha_fin=row['fecha_fin'],
+                    precio_total=row['paquete_precio_total'],
+                    cupo_disponible=row['cupo_disponible'],
+                    disponible=row['disponible']
                 )
-                reservas.append(reserva)
+                paquetes[paquete.id_paquete] = paquete
 
-            return reservas
+            reserva = Reserva._desde_fila(db, row)
+            reserva.paquete = paquete
+            reservas.append(reserva)
 
-        except Error as e:
-            print(f"Error al listar reservas del cliente: {e}")
-            return []
-        finally:
-            cursor.close()
+        return reservas, list(paquetes.values())
 
     @staticmethod
     def listar_todas(db):
         """Lista todas las reservas del sistema."""
-        sql = """
-            SELECT r.*, c.nombre_completo, p.nombre as nombre_paquete
-            FROM Reservas r
-            INNER JOIN Clientes c ON r.id_cliente = c.id_cliente
-            INNER JOIN PaquetesTuristicos p ON r.id_paquete = p.id_paquete
-            ORDER BY r.fecha_reserva DESC
-        """
+        with db.conexion_lectura() as connection:
+            cursor = connection.cursor(dictionary=True)
+            try:
+                cursor.execute(Reserva.SQL_LISTAR_TODAS)
+                return cursor.fetchall()
 
-        try:
-            connection = db.conectar()
+            except Error as e:
+                print(f"Error al listar reservas: {e}")
+                return []
+            finally:
+                cursor.close()
+
+    @staticmethod
+    def listar_pagina(db, limite=50, despues=None):
+        """
+        Lista una pagina de reservas del sistema, de la mas reciente a la
+        mas antigua, con el mismo formato de fila que listar_todas.
+        Devuelve (reservas, siguiente) igual que PaqueteTuristico.listar_pagina.
+        """
+        with db.conexion_lectura() as connection:
             cursor = connection.cursor(dictionary=True)
-            cursor.execute(sql)
-            return cursor.fetchall()
+            try:
+                return paginar(cursor, Reserva.SQL_PAGINA, Reserva.CLAVE_PAGINA,
+                               despues=despues, limite=limite, descendente=True)
 
-        except Error as e:
-            print(f"Error al listar reservas: {e}")
-            return []
-        finally:
-            cursor.close()
+            except Error as e:
+                print(f"Error al listar reservas: {e}")
+                return [], None
+            finally:
+                cursor.close()
+
+    @staticmethod
+    def iterar_todas(db, tamano_lote=500):
+        """Recorre todas las reservas del sistema en lotes acotados de memoria."""
+        despues = None
+        while True:
+            reservas, despues = Reserva.listar_pagina(db, tamano_lote, despues)
+            yield from reservas
+            if despues is None:
+                return
 
     @staticmethod
     def buscar_por_id(db, id_reserva):
         """Busca una reserva por su ID."""
-        try:
-            connection = db.conectar()
-            cursor = connection.cursor(dictionary=True)
-            cursor.execute(
-                "SELECT * FROM Reservas WHERE id_reserva = %s", (id_reserva,))
-            row = cursor.fetchone()
+        with db.conexion_lectura() as connection:
+            try:
+                filas = db.consultar_preparada(
+                    connection, "reservas.buscar_por_id", (id_reserva,))
 
-            if row:
-                return Reserva(
-                    db,
-                    id_reserva=row['id_reserva'],
-                    id_cliente=row['id_cliente'],
-                    id_paquete=row['id_paquete'],
-                    fecha_reserva=row['fecha_reserva'],
-                    numero_personas=row['numero_personas'],
-                    precio_total=row['precio_total'],
-                    estado=row['estado'],
-                    notas=row['notas']
-                )
-            return None
+                if filas:
+                    return Reserva._desde_fila(db, filas[0])
+                return None
 
-        except Error as e:
-            print(f"Error al buscar reserva: {e}")
-            return None
-        finally:
-            cursor.close()
+            except Error as e:
+                print(f"Error al buscar reserva: {e}")
+                return None
+
+
+# Sentencias preparadas de las consultas frecuentes
+registrar_sentencia("paquetes.buscar_por_id", PaqueteTuristico.SQL_BUSCAR_POR_ID)
+registrar_sentencia("paquetes.destinos", PaqueteTuristico.SQL_DESTINOS)
+registrar_sentencia("reservas.descontar_cupo", Reserva.SQL_DESCONTAR_CUPO)
+registrar_sentencia("reservas.liberar_cupo", Reserva.SQL_LIBERAR_CUPO)
+registrar_sentencia("reservas.descontar_disponibilidad",
+                    Reserva.SQL_DESCONTAR_DISPONIBILIDAD)
+registrar_sentencia("reservas.precio_paquete", Reserva.SQL_PRECIO_PAQUETE)
+registrar_sentencia("reservas.actualizar_estado", Reserva.SQL_ACTUALIZAR_ESTADO)
+registrar_sentencia("reservas.bloquear", Reserva.SQL_BLOQUEAR)
+registrar_sentencia("reservas.buscar_por_id", Reserva.SQL_BUSCAR_POR_ID)
+registrar_sentencia("reservas.buscar_por_clave", Reserva.SQL_BUSCAR_POR_CLAVE)
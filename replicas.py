@@ -0,0 +1,122 @@
+"""
+Replicas de lectura de la base de datos
+Viajes Aventura
+
+Database puede recibir, ademas de la base primaria, una o mas replicas de
+solo lectura. Los metodos de solo lectura de los modelos piden su conexion
+con Database.conexion_lectura(), que la toma de una replica elegida por
+rotacion o por menor latencia; las escrituras siguen yendo a la primaria.
+
+Para leer lo propio recien escrito, cada commit en la primaria se anota
+(ConexionPrimaria): durante `ventana_lectura_propia` segundos el mismo hilo
+sigue leyendo de la primaria, y las lecturas que llenan la cache del
+catalogo (compartida entre hilos) tambien, tras una escritura de cualquier
+hilo. Una replica que no entrega conexion se saca de la rotacion por
+`reintento` segundos y mientras tanto se lee de la primaria.
+"""
+import itertools
+import threading
+import time
+
+# Formas de elegir replica
+ROTACION = "rotacion"       # una tras otra
+LATENCIA = "latencia"       # la de menor latencia reciente
+SELECCIONES = (ROTACION, LATENCIA)
+
+# Peso de la ultima medicion en la latencia promedio (media movil)
+ALFA_LATENCIA = 0.2
+# Con LATENCIA, una de cada tantas lecturas rota igual para volver a medir
+# las replicas que no son la mas rapida
+MUESTREO_LATENCIA = 20
+
+
+class ConexionPrimaria:
+    """Conexion de la primaria que avisa cada commit."""
+
+    def __init__(self, conexion, al_confirmar):
+        """Envuelve una conexion; `al_confirmar()` se llama tras cada commit."""
+        self.__conexion = conexion
+        self.__al_confirmar = al_confirmar
+
+    def commit(self):
+        """Confirma la transaccion y anota la escritura."""
+        self.__conexion.commit()
+        self.__al_confirmar()
+
+    def __getattr__(self, nombre):
+        """Delega el resto a la conexion."""
+        return getattr(self.__conexion, nombre)
+
+
+class Replicas:
+    """Conjunto de replicas con su seleccion, latencia y disponibilidad."""
+
+    def __init__(self, bases, seleccion=ROTACION, reintento=30.0):
+        """
+        `bases` son las Database de cada replica. `reintento` son los
+        segundos que una replica caida queda fuera de la rotacion.
+        """
+        if seleccion not in SELECCIONES:
+            raise ValueError(f"Seleccion de replicas desconocida: {seleccion}")
+        if not bases:
+            raise ValueError("Se necesita al menos una replica")
+
+        self.bases = list(bases)
+        self.seleccion = seleccion
+        self.reintento = reintento
+        self.__turnos = itertools.count()
+        self.__latencias = [0.0] * len(self.bases)  # segundos, media movil
+        self.__lecturas = [0] * len(self.bases)
+        self.__caidas = [float("-inf")] * len(self.bases)  # hasta cuando
+        self.__lock = threading.Lock()
+
+    def __len__(self):
+        """Cantidad de replicas configuradas."""
+        return len(self.bases)
+
+    def elegir(self):
+        """
+        Devuelve (indice, Database) de la replica a usar, o None si todas
+        estan caidas.
+        """
+        ahora = time.monotonic()
+        with self.__lock:
+            vivas = [i for i, hasta in enumerate(self.__caidas) if hasta <= ahora]
+            if not vivas:
+                return None
+
+            turno = next(self.__turnos)
+            if self.seleccion == LATENCIA and turno % MUESTREO_LATENCIA:
+                indice = min(vivas, key=self.__latencias.__getitem__)
+            else:
+                indice = vivas[turno % len(vivas)]
+            self.__lecturas[indice] += 1
+        return indice, self.bases[indice]
+
+    def registrar(self, indice, segundos):
+        """Suma una medicion de latencia de la replica."""
+        with self.__lock:
+            anterior = self.__latencias[indice]
+            self.__latencias[indice] = (segundos if anterior == 0.0 else
+                                        anterior + ALFA_LATENCIA * (segundos - anterior))
+
+    def marcar_caida(self, indice):
+        """Saca la replica de la rotacion por `reintento` segundos."""
+        with self.__lock:
+            self.__caidas[indice] = time.monotonic() + self.reintento
+            self.__latencias[indice] = 0.0
+
+    def estado(self):
+        """Lista de dicts con la base, lecturas, latencia (ms) y si esta caida."""
+        ahora = time.monotonic()
+        with self.__lock:
+            return [{"base": base.nombre_base_datos,
+                     "lecturas": self.__lecturas[i],
+                     "latencia_ms": self.__latencias[i] * 1000,
+                     "caida": self.__caidas[i] > ahora}
+                    for i, base in enumerate(self.bases)]
+
+    def desconectar(self):
+        """Cierra las conexiones de todas las replicas."""
+        for base in self.bases:
+            base.desconectar()
@@ -0,0 +1,161 @@
+"""
+Reportes de ingresos y ocupacion
+Viajes Aventura
+
+Calcula en el servidor (GROUP BY) los ingresos, personas, reservas por
+estado y ocupacion por paquete, por destino y por mes.
+
+Los reportes se calculan sobre la tabla Reservas o, con
+Database(usar_resumenes=True), sobre la tabla ResumenReservas, que
+Reserva.crear y Reserva.actualizar_estado mantienen al dia dentro de su
+misma transaccion (una fila por paquete, mes de reserva y estado).
+"""
+from mysql.connector import Error
+
+from conexion_db import registrar_sentencia
+
+
+# Reservas agrupadas por paquete, mes y estado, con las mismas columnas
+# que ResumenReservas
+ORIGEN_RESERVAS = """
+    SELECT id_paquete, DATE_FORMAT(fecha_reserva, '%Y-%m') AS mes, estado,
+           COUNT(*) AS reservas, SUM(numero_personas) AS personas,
+           SUM(precio_total) AS monto
+    FROM Reservas
+    GROUP BY id_paquete, mes, estado
+"""
+ORIGEN_RESUMEN = """
+    SELECT id_paquete, mes, estado, reservas, personas, monto
+    FROM ResumenReservas
+"""
+
+# Metricas comunes de los reportes sobre el origen `o`
+METRICAS = """
+    COALESCE(SUM(o.reservas), 0) AS reservas,
+    COALESCE(SUM(CASE WHEN o.estado = 'confirmada' THEN o.reservas END), 0)
+        AS confirmadas,
+    COALESCE(SUM(CASE WHEN o.estado = 'pendiente' THEN o.reservas END), 0)
+        AS pendientes,
+    COALESCE(SUM(CASE WHEN o.estado = 'cancelada' THEN o.reservas END), 0)
+        AS canceladas,
+    COALESCE(SUM(CASE WHEN o.estado <> 'cancelada' THEN o.personas END), 0)
+        AS personas,
+    COALESCE(SUM(CASE WHEN o.estado = 'confirmada' THEN o.monto END), 0)
+        AS ingresos,
+    COALESCE(SUM(CASE WHEN o.estado = 'pendiente' THEN o.monto END), 0)
+        AS ingresos_pendientes
+"""
+
+# Cancelar una reserva devuelve su cupo al paquete, por lo que el cupo
+# original es el disponible mas las personas de las reservas no canceladas
+SQL_POR_PAQUETE = """
+    SELECT p.id_paquete, p.nombre, p.cupo_disponible, {metricas}
+    FROM PaquetesTuristicos p
+    LEFT JOIN ({origen}) o ON o.id_paquete = p.id_paquete
+    GROUP BY p.id_paquete, p.nombre, p.cupo_disponible
+    ORDER BY ingresos DESC, p.id_paquete
+"""
+# Cada reserva cuenta para todos los destinos de su paquete
+SQL_POR_DESTINO = """
+    SELECT d.id_destino, d.nombre, {metricas}
+    FROM Destinos d
+    LEFT JOIN Paquetes_Destinos pd ON pd.id_destino = d.id_destino
+    LEFT JOIN ({origen}) o ON o.id_paquete = pd.id_paquete
+    GROUP BY d.id_destino, d.nombre
+    ORDER BY ingresos DESC, d.id_destino
+"""
+SQL_POR_MES = """
+    SELECT o.mes, {metricas}
+    FROM ({origen}) o
+    GROUP BY o.mes
+    ORDER BY o.mes
+"""
+
+SQL_SUMAR_RESUMEN = """
+    INSERT INTO ResumenReservas
+    (id_paquete, mes, estado, reservas, personas, monto)
+    VALUES (%s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE reservas = reservas + VALUES(reservas),
+        personas = personas + VALUES(personas), monto = monto + VALUES(monto)
+"""
+SQL_RECONSTRUIR_RESUMEN = """
+    INSERT INTO ResumenReservas
+    (id_paquete, mes, estado, reservas, personas, monto)
+""" + ORIGEN_RESERVAS
+
+
+def params_resumen(id_paquete, fecha_reserva, estado, personas, monto, signo=1):
+    """
+    Parametros de SQL_SUMAR_RESUMEN para sumar (signo=1) o restar
+    (signo=-1) una reserva en la fila de su paquete, mes y estado.
+    """
+    return (id_paquete, fecha_reserva.strftime("%Y-%m"), estado,
+            signo, signo * personas, signo * monto)
+
+
+def _consultar(db, plantilla):
+    """Ejecuta un reporte sobre el origen configurado en `db`."""
+    origen = ORIGEN_RESUMEN if db.usar_resumenes else ORIGEN_RESERVAS
+    with db.conexion_lectura() as connection:
+        cursor = connection.cursor(dictionary=True)
+        try:
+            cursor.execute(plantilla.format(metricas=METRICAS, origen=origen))
+            return cursor.fetchall()
+
+        except Error as e:
+            print(f"Error al generar reporte: {e}")
+            return []
+        finally:
+            cursor.close()
+
+
+def por_paquete(db):
+    """
+    Ingresos, personas, reservas por estado y ocupacion de cada paquete.
+    La ocupacion es el porcentaje de asientos reservados (sin canceladas)
+    sobre el cupo original del paquete.
+    """
+    filas = _consultar(db, SQL_POR_PAQUETE)
+    for fila in filas:
+        cupo_original = fila['cupo_disponible'] + fila['personas']
+        fila['cupo_original'] = cupo_original
+        fila['ocupacion'] = (100.0 * float(fila['personas']) / float(cupo_original)
+                             if cupo_original else 0.0)
+    return filas
+
+
+def por_destino(db):
+    """Ingresos, personas y reservas por estado de cada destino."""
+    return _consultar(db, SQL_POR_DESTINO)
+
+
+def por_mes(db):
+    """Ingresos, personas y reservas por estado de cada mes (AAAA-MM)."""
+    return _consultar(db, SQL_POR_MES)
+
+
+def reconstruir_resumenes(db):
+    """
+    Recalcula ResumenReservas desde la tabla Reservas. Necesario al activar
+    usar_resumenes sobre una base que se escribio con la opcion desactivada.
+    """
+    with db.conexion() as connection:
+        cursor = connection.cursor()
+        try:
+            if not connection.in_transaction:
+                connection.start_transaction()
+            cursor.execute("DELETE FROM ResumenReservas")
+            cursor.execute(SQL_RECONSTRUIR_RESUMEN)
+            connection.commit()
+            print("Tablas de resumen reconstruidas")
+            return True
+
+        except Error as e:
+            connection.rollback()
+            print(f"Error al reconstruir resumenes: {e}")
+            return False
+        finally:
+            cursor.close()
+
+
+registrar_sentencia("reportes.sumar_resumen", SQL_SUMAR_RESUMEN)
@@ -0,0 +1,90 @@
+"""
+Reservas en lote desde un manifiesto CSV o JSONL
+Viajes Aventura
+
+Uso:
+    python reservas_lote.py manifiesto.csv
+    python reservas_lote.py manifiesto.jsonl --todo-o-nada
+    python reservas_lote.py manifiesto.csv --detalle
+
+Cada fila del manifiesto (columnas id_cliente, id_paquete, numero_personas)
+es una reserva. Todas se crean en una sola transaccion con
+Reserva.crear_lote; con --todo-o-nada una sola fila rechazada cancela el
+manifiesto completo.
+"""
+import argparse
+import sys
+
+from carga_masiva import RegistroInvalido, leer_registros
+from conexion_db import Database
+from paquetes_reservas import Reserva
+
+COLUMNAS = ("id_cliente", "id_paquete", "numero_personas")
+
+
+def leer_manifiesto(ruta):
+    """
+    Lee el manifiesto. Devuelve (numeros de linea, solicitudes); las lineas
+    JSON invalidas quedan como solicitudes vacias, que crear_lote rechaza.
+    """
+    lineas = []
+    solicitudes = []
+    for numero, registro in leer_registros(ruta):
+        lineas.append(numero)
+        if isinstance(registro, RegistroInvalido):
+            solicitudes.append(())
+        else:
+            solicitudes.append(tuple(registro.get(c) for c in COLUMNAS))
+    return lineas, solicitudes
+
+
+def main():
+    """Punto de entrada de la linea de comandos."""
+    parser = argparse.ArgumentParser(
+        description="Reservas en lote desde un manifiesto")
+    parser.add_argument("archivo", help="Archivo .csv o .jsonl")
+    parser.add_argument("--todo-o-nada", action="store_true",
+                        help="No crear ninguna reserva si alguna fila se rechaza")
+    parser.add_argument("--detalle", action="store_true",
+                        help="Mostrar el resultado de cada fila")
+    parser.add_argument("--max-errores", type=int, default=20,
+                        help="Errores a mostrar en el resumen")
+    args = parser.parse_args()
+
+    lineas, solicitudes = leer_manifiesto(args.archivo)
+    db = Database()
+    try:
+        resultado = Reserva.crear_lote(db, solicitudes, args.todo_o_nada)
+    finally:
+        db.desconectar()
+
+    if resultado is None:
+        sys.exit(1)
+
+    print(f"Filas leidas: {len(solicitudes)}")
+    print(f"Reservas creadas: {resultado['creadas']} "
+          f"({resultado['asientos']} asientos)")
+    print(f"Filas rechazadas: {resultado['rechazadas']}")
+    print(f"Tiempo: {resultado['segundos']:.3f} s "
+          f"({resultado['reservas_por_segundo']:.1f} reservas/s)")
+
+    if args.detalle:
+        motivos = dict(resultado["errores"])
+        for indice, reserva in enumerate(resultado["reservas"]):
+            if reserva is not None:
+                estado = f"reserva #{reserva.id_reserva} (${reserva.precio_total:,.2f})"
+            else:
+                estado = motivos.get(indice, "no creada (lote cancelado)")
+            print(f"  linea {lineas[indice]}: {estado}")
+    else:
+        for indice, motivo in resultado["errores"][:args.max_errores]:
+            print(f"  linea {lineas[indice]}: {motivo}")
+        if len(resultado["errores"]) > args.max_errores:
+            print(f"  ... y {len(resultado['errores']) - args.max_errores} mas")
+
+    if resultado["errores"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
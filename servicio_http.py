@@ -0,0 +1,668 @@
+"""
+Servicio HTTP/JSON del catalogo y las reservas
+Viajes Aventura
+
+Expone sobre HTTP las operaciones de los menus de destinos, paquetes,
+reservas y "Mis Reservas", usando las mismas clases de los modelos. Cada
+peticion se atiende en su propio hilo (ThreadingHTTPServer) con una
+conexion del pool de Database, y las conexiones HTTP se mantienen abiertas
+entre peticiones (HTTP/1.1 keep-alive).
+
+Autenticacion: POST /api/sesiones con {"nombre_usuario", "password"}
+devuelve un token que se envia en "Authorization: Bearer <token>". Leer el
+catalogo y reservar requiere cualquier usuario; modificar el catalogo,
+rol empleado o superior (igual que en main.py).
+
+    GET    /api/salud
+    POST   /api/sesiones                       DELETE /api/sesiones
+    GET    /api/destinos?limite=&despues=&q=&disponibles=1
+    POST   /api/destinos                       GET/PUT/DELETE /api/destinos/<id>
+    GET    /api/paquetes?limite=&despues=&disponibles=1
+    GET    /api/paquetes?q=<actividad>
+    GET    /api/paquetes?desde=&hasta=&modo=&personas=&precio_maximo=
+    POST   /api/paquetes                       GET /api/paquetes/<id>
+    POST   /api/reservas                       GET /api/reservas/mias
+
+Los listados devuelven {"resultados": [...], "siguiente": <cursor>}; el
+cursor se envia tal cual en `despues` para pedir la pagina siguiente.
+
+POST /api/reservas acepta una clave de idempotencia en la cabecera
+"Idempotency-Key" (o en el campo "clave_idempotencia"): si la peticion se
+reintenta con la misma clave se responde con la reserva original en vez de
+crear otra.
+
+Uso:
+    python servicio_http.py --puerto 8080 --conexiones 16
+    python servicio_http.py --backend sqlite --base-datos viajes_local
+"""
+import argparse
+import base64
+import contextlib
+import json
+import os
+import re
+import secrets
+import sys
+import threading
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from conexion_db import Database
+from modelos import Destino, Usuario
+from paquetes_reservas import PaqueteTuristico, Reserva
+
+# Registros por pagina por defecto y maximo en los listados
+LIMITE_PAGINA = 20
+LIMITE_MAXIMO = 200
+# Segundos de inactividad tras los que vence una sesion
+DURACION_SESION = 8 * 3600
+# Cada cuantos segundos, como maximo, se purgan las sesiones vencidas
+INTERVALO_PURGA = 60
+# Tamano maximo del cuerpo de una peticion
+MAX_CUERPO = 64 * 1024
+
+
+class ErrorAPI(Exception):
+    """Error que se responde al cliente con un codigo HTTP y un mensaje."""
+
+    def __init__(self, estado, mensaje):
+        """Construye el error con su codigo HTTP."""
+        super().__init__(mensaje)
+        self.estado = estado
+        self.mensaje = mensaje
+
+
+class Sesiones:
+    """
+    Tokens de sesion en memoria, con vencimiento por inactividad. Las
+    sesiones vencidas que nadie vuelve a consultar se purgan al abrir
+    sesiones nuevas, a lo sumo una vez cada INTERVALO_PURGA segundos.
+    """
+
+    def __init__(self, duracion=DURACION_SESION):
+        """Construye el registro de sesiones vacio."""
+        self.duracion = duracion
+        self.__sesiones = {}  # token -> [usuario, vence]
+        self.__lock = threading.Lock()
+        self.__proxima_purga = time.monotonic() + INTERVALO_PURGA
+
+    def abrir(self, usuario):
+        """Crea una sesion para el usuario autenticado y devuelve su token."""
+        token = secrets.token_urlsafe(32)
+        ahora = time.monotonic()
+        with self.__lock:
+            if ahora >= self.__proxima_purga:
+                self._purgar(ahora)
+            self.__sesiones[token] = [usuario, ahora + self.duracion]
+        return token
+
+    def _purgar(self, ahora):
+        """Elimina las sesiones vencidas (con el lock tomado)."""
+        vencidas = [token for token, (_, vence) in self.__sesiones.items()
+                    if vence < ahora]
+        for token in vencidas:
+            del self.__sesiones[token]
+        self.__proxima_purga = ahora + INTERVALO_PURGA
+
+    def __len__(self):
+        """Sesiones registradas (incluye las vencidas aun no purgadas)."""
+        with self.__lock:
+            return len(self.__sesiones)
+
+    def usuario(self, token):
+        """Devuelve el usuario de la sesion y la renueva; None si vencio."""
+        ahora = time.monotonic()
+        with self.__lock:
+            sesion = self.__sesiones.get(token)
+            if sesion is None:
+                return None
+            if sesion[1] < ahora:
+                del self.__sesiones[token]
+                return None
+            sesion[1] = ahora + self.duracion
+            return sesion[0]
+
+    def cerrar(self, token):
+        """Elimina la sesion del token."""
+        with self.__lock:
+            self.__sesiones.pop(token, None)
+
+
+def _a_json(valor):
+    """Convierte fechas y decimales para json.dumps."""
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return float(valor)
+    raise TypeError(f"Tipo no serializable: {type(valor).__name__}")
+
+
+def _cursor(siguiente):
+    """Codifica la clave de la pagina siguiente como cursor opaco."""
+    if siguiente is None:
+        return None
+    return base64.urlsafe_b64encode(
+        json.dumps(siguiente, default=_a_json).encode()).decode()
+
+
+def _leer_cursor(texto, clave=None):
+    """
+    Decodifica un cursor de _cursor; None si no se envio. Con `clave` (la
+    clave de orden del listado) debe ser una lista de valores simples del
+    mismo largo; sin ella, un desplazamiento entero no negativo (busquedas
+    de texto).
+    """
+    if not texto:
+        return None
+    try:
+        despues = json.loads(base64.urlsafe_b64decode(texto.encode()))
+    except ValueError:
+        raise ErrorAPI(400, "Cursor 'despues' invalido")
+
+    if clave is None:
+        valido = (isinstance(despues, int) and not isinstance(despues, bool)
+                  and despues >= 0)
+    else:
+        valido = (isinstance(despues, list) and len(despues) == len(clave) and
+                  all(isinstance(v, (str, int, float)) and not isinstance(v, bool)
+                      for v in despues))
+    if not valido:
+        raise ErrorAPI(400, "Cursor 'despues' invalido")
+    return despues if clave is None else tuple(despues)
+
+
+def _campos(objeto, campos):
+    """Dict con los campos de un objeto de los modelos."""
+    datos = {campo: getattr(objeto, campo) for campo in campos}
+    if "disponible" in datos:
+        # MySQL y SQLite devuelven BOOLEAN como 0/1
+        datos["disponible"] = bool(datos["disponible"])
+    return datos
+
+
+def destino_a_dict(destino):
+    """Representacion JSON de un destino."""
+    return _campos(destino, Destino.CAMPOS)
+
+
+def paquete_a_dict(paquete):
+    """Representacion JSON de un paquete, con sus destinos si estan cargados."""
+    datos = _campos(paquete, PaqueteTuristico.CAMPOS)
+    datos["destinos"] = [
+        {"id_destino": d["id_destino"], "nombre": d["nombre"],
+         "actividades": d["actividades"], "orden_visita": d["orden_visita"]}
+        for d in paquete.destinos]
+    return datos
+
+
+def reserva_a_dict(reserva):
+    """Representacion JSON de una reserva, con su paquete si esta cargado."""
+    datos = _campos(reserva, Reserva.CAMPOS)
+    if reserva.paquete is not None:
+        datos["paquete"] = paquete_a_dict(reserva.paquete)
+    return datos
+
+
+def _entero(texto, nombre, minimo=None, maximo=None):
+    """Convierte un parametro a entero dentro de [minimo, maximo]."""
+    try:
+        valor = int(texto)
+    except (TypeError, ValueError):
+        raise ErrorAPI(400, f"'{nombre}' debe ser un entero")
+    if (minimo is not None and valor < minimo) or (maximo is not None and valor > maximo):
+        raise ErrorAPI(400, f"'{nombre}' fuera de rango")
+    return valor
+
+
+def _numero(texto, nombre):
+    """Convierte un parametro a float."""
+    try:
+        return float(texto)
+    except (TypeError, ValueError):
+        raise ErrorAPI(400, f"'{nombre}' debe ser un numero")
+
+
+def _fecha(texto, nombre):
+    """Convierte un parametro YYYY-MM-DD a date."""
+    try:
+        return datetime.strptime(texto, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        raise ErrorAPI(400, f"'{nombre}' debe tener formato YYYY-MM-DD")
+
+
+def _requerido(cuerpo, nombre):
+    """Devuelve un campo obligatorio del cuerpo JSON."""
+    if cuerpo.get(nombre) in (None, ""):
+        raise ErrorAPI(400, f"Falta el campo '{nombre}'")
+    return cuerpo[nombre]
+
+
+def _limite(consulta):
+    """Limite de pagina pedido en la consulta."""
+    return _entero(consulta.get("limite", LIMITE_PAGINA), "limite", 1, LIMITE_MAXIMO)
+
+
+def _pagina(objetos, siguiente, a_dict):
+    """Respuesta de un listado paginado."""
+    return {"resultados": [a_dict(objeto) for objeto in objetos],
+            "siguiente": _cursor(siguiente)}
+
+
+# ------------------------------------------------------------------
+# Operaciones. Reciben (db, usuario, consulta, cuerpo, *ids de la ruta) y
+# devuelven (codigo HTTP, respuesta JSON).
+# ------------------------------------------------------------------
+
+def salud(db, usuario, consulta, cuerpo):
+    """Estado del servicio."""
+    return 200, {"estado": "ok", "backend": db.backend}
+
+
+def listar_destinos(db, usuario, consulta, cuerpo):
+    """Pagina de destinos por nombre, o busqueda de texto con `q`."""
+    limite = _limite(consulta)
+    solo_disponibles = consulta.get("disponibles") == "1"
+
+    if consulta.get("q"):
+        destinos, siguiente = Destino.buscar_texto(
+            db, consulta["q"], limite, _leer_cursor(consulta.get("despues")),
+            solo_disponibles)
+    else:
+        despues = _leer_cursor(consulta.get("despues"), Destino.CLAVE_PAGINA)
+        destinos, siguiente = Destino.listar_pagina(
+            db, limite, despues, solo_disponibles)
+    return 200, _pagina(destinos, siguiente, destino_a_dict)
+
+
+def ver_destino(db, usuario, consulta, cuerpo, id_destino):
+    """Un destino por ID."""
+    destino = Destino.buscar_por_id(db, id_destino)
+    if destino is None:
+        raise ErrorAPI(404, "Destino no encontrado")
+    return 200, destino_a_dict(destino)
+
+
+def crear_destino(db, usuario, consulta, cuerpo):
+    """Agrega un destino."""
+    destino = Destino(db, nombre=_requerido(cuerpo, "nombre"),
+                      descripcion=cuerpo.get("descripcion", ""),
+                      actividades=cuerpo.get("actividades", ""),
+                      costo_base=_numero(_requerido(cuerpo, "costo_base"),
+                                         "costo_base"))
+    if not destino.guardar():
+        raise ErrorAPI(409, "No se pudo guardar el destino")
+    return 201, destino_a_dict(destino)
+
+
+def modificar_destino(db, usuario, consulta, cuerpo, id_destino):
+    """Modifica los campos enviados de un destino."""
+    destino = Destino.buscar_por_id(db, id_destino)
+    if destino is None:
+        raise ErrorAPI(404, "Destino no encontrado")
+
+    for campo in ("nombre", "descripcion", "actividades"):
+        if campo in cuerpo:
+            setattr(destino, campo, cuerpo[campo])
+    if "costo_base" in cuerpo:
+        destino.costo_base = _numero(cuerpo["costo_base"], "costo_base")
+    if "disponible" in cuerpo:
+        destino.disponible = bool(cuerpo["disponible"])
+
+    if not destino.actualizar():
+        raise ErrorAPI(409, "No se pudo actualizar el destino")
+    return 200, destino_a_dict(destino)
+
+
+def eliminar_destino(db, usuario, consulta, cuerpo, id_destino):
+    """Elimina un destino."""
+    if Destino.buscar_por_id(db, id_destino) is None:
+        raise ErrorAPI(404, "Destino no encontrado")
+    if not Destino.eliminar(db, id_destino):
+        raise ErrorAPI(409, "No se pudo eliminar el destino")
+    return 200, {"id_destino": id_destino, "eliminado": True}
+
+
+def listar_paquetes(db, usuario, consulta, cuerpo):
+    """
+    Paquetes: por rango de fechas (`desde` y `hasta`), por actividad (`q`)
+    o una pagina por fecha de inicio.
+    """
+    limite = _limite(consulta)
+
+    if "desde" in consulta or "hasta" in consulta:
+        desde = _fecha(consulta.get("desde"), "desde")
+        hasta = _fecha(consulta.get("hasta"), "hasta")
+        precio_maximo = consulta.get("precio_maximo")
+        try:
+            paquetes = PaqueteTuristico.buscar_en_rango(
+                db, desde, hasta, consulta.get("modo", "dentro"),
+                personas=_entero(consulta.get("personas", 1), "personas", 1),
+                precio_maximo=(None if precio_maximo is None
+                               else _numero(precio_maximo, "precio_maximo")),
+                limite=limite)
+        except ValueError as e:
+            raise ErrorAPI(400, str(e))
+        return 200, _pagina(paquetes, None, paquete_a_dict)
+
+    if consulta.get("q"):
+        paquetes, siguiente = PaqueteTuristico.buscar_por_actividad(
+            db, consulta["q"], limite, _leer_cursor(consulta.get("despues")))
+    else:
+        despues = _leer_cursor(consulta.get("despues"),
+                               PaqueteTuristico.CLAVE_PAGINA)
+        paquetes, siguiente = PaqueteTuristico.listar_pagina(
+            db, limite, despues, solo_disponibles=consulta.get("disponibles") == "1",
+            prefetch_destinos=True)
+    return 200, _pagina(paquetes, siguiente, paquete_a_dict)
+
+
+def ver_paquete(db, usuario, consulta, cuerpo, id_paquete):
+    """Un paquete por ID, con sus destinos."""
+    paquete = PaqueteTuristico.buscar_por_id(db, id_paquete)
+    if paquete is None:
+        raise ErrorAPI(404, "Paquete no encontrado")
+    return 200, paquete_a_dict(paquete)
+
+
+def crear_paquete(db, usuario, consulta, cuerpo):
+    """
+    Crea un paquete. `destinos` es una lista opcional de IDs de destino o
+    de {"id_destino", "orden_visita"}; el paquete y sus destinos se guardan
+    en una sola transaccion.
+    """
+    fecha_inicio = _fecha(_requerido(cuerpo, "fecha_inicio"), "fecha_inicio")
+    fecha_fin = _fecha(_requerido(cuerpo, "fecha_fin"), "fecha_fin")
+    if fecha_inicio < date.today():
+        raise ErrorAPI(400, "La fecha de inicio no puede ser anterior a hoy")
+    if fecha_fin <= fecha_inicio:
+        raise ErrorAPI(400, "La fecha de fin debe ser posterior a la de inicio")
+
+    destinos = cuerpo.get("destinos") or []
+    if not isinstance(destinos, list):
+        raise ErrorAPI(400, "'destinos' debe ser una lista")
+    enlaces = []
+    for orden, destino in enumerate(destinos, 1):
+        if isinstance(destino, dict):
+            enlaces.append((_entero(destino.get("id_destino"), "id_destino", 1),
+                            _entero(destino.get("orden_visita", orden),
+                                    "orden_visita", 1)))
+        elif isinstance(destino, (int, str)) and not isinstance(destino, bool):
+            enlaces.append((_entero(destino, "id_destino", 1), orden))
+        else:
+            raise ErrorAPI(400, "Cada elemento de 'destinos' debe ser un ID "
+                                "o un objeto con 'id_destino'")
+
+    paquete = PaqueteTuristico(
+        db, nombre=_requerido(cuerpo, "nombre"),
+        descripcion=cuerpo.get("descripcion", ""),
+        fecha_inicio=fecha_inicio, fecha_fin=fecha_fin,
+        precio_total=_numero(_requerido(cuerpo, "precio_total"), "precio_total"),
+        cupo_disponible=_entero(_requerido(cuerpo, "cupo_disponible"),
+                                "cupo_disponible", 1))
+    if not paquete.guardar(enlaces):
+        mensaje = "No se pudo guardar el paquete"
+        if enlaces:
+            mensaje += ": verifique que los destinos existan"
+        raise ErrorAPI(409, mensaje)
+
+    paquete.cargar_destinos()
+    return 201, paquete_a_dict(paquete)
+
+
+def crear_reserva(db, usuario, consulta, cuerpo):
+    """Reserva un paquete para el cliente de la sesion."""
+    if not usuario.id_cliente:
+        raise ErrorAPI(403, "Debe estar autenticado como cliente para reservar")
+
+    clave = cuerpo.get("clave_idempotencia")
+    if clave is not None and (not isinstance(clave, str) or
+                              not 0 < len(clave) <= Reserva.LARGO_CLAVE):
+        raise ErrorAPI(400, f"'clave_idempotencia' debe ser un texto de hasta "
+                            f"{Reserva.LARGO_CLAVE} caracteres")
+
+    reserva = Reserva(
+        db, id_cliente=usuario.id_cliente,
+        id_paquete=_entero(_requerido(cuerpo, "id_paquete"), "id_paquete", 1),
+        numero_personas=_entero(cuerpo.get("numero_personas", 1),
+                                "numero_personas", 1),
+        notas=cuerpo.get("notas", ""))
+    if not reserva.crear(clave):
+        mensaje = ("No se pudo crear la reserva: el paquete no existe, "
+                   "no esta disponible o no tiene cupo suficiente")
+        if clave is not None:
+            mensaje += ", o la clave de idempotencia ya se uso para otra reserva"
+        raise ErrorAPI(409, mensaje)
+    return 201, reserva_a_dict(reserva)
+
+
+def mis_reservas(db, usuario, consulta, cuerpo):
+    """Reservas del cliente de la sesion, con paquete y destinos."""
+    if not usuario.id_cliente:
+        raise ErrorAPI(403, "Debe estar autenticado como cliente")
+    reservas = Reserva.listar_por_cliente_detallado(db, usuario.id_cliente)
+    return 200, {"resultados": [reserva_a_dict(r) for r in reservas],
+                 "siguiente": None}
+
+
+# (metodo, ruta, operacion, rol requerido o None para no exigir sesion)
+RUTAS = [
+    ("GET", r"/api/salud", salud, None),
+    ("GET", r"/api/destinos", listar_destinos, "cliente"),
+    ("POST", r"/api/destinos", crear_destino, "empleado"),
+    ("GET", r"/api/destinos/(\d+)", ver_destino, "cliente"),
+    ("PUT", r"/api/destinos/(\d+)", modificar_destino, "empleado"),
+    ("DELETE", r"/api/destinos/(\d+)", eliminar_destino, "empleado"),
+    ("GET", r"/api/paquetes", listar_paquetes, "cliente"),
+    ("POST", r"/api/paquetes", crear_paquete, "empleado"),
+    ("GET", r"/api/paquetes/(\d+)", ver_paquete, "cliente"),
+    ("POST", r"/api/reservas", crear_reserva, "cliente"),
+    ("GET", r"/api/reservas/mias", mis_reservas, "cliente"),
+]
+_RUTAS = [(metodo, re.compile(ruta + "$"), operacion, rol)
+          for metodo, ruta, operacion, rol in RUTAS]
+
+
+class ManejadorAPI(BaseHTTPRequestHandler):
+    """Atiende una conexion HTTP; el servidor entrega db y sesiones."""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "ViajesAventura/1.0"
+    # Cabeceras y cuerpo salen en dos escrituras: sin esto, Nagle y el ACK
+    # retardado agregan ~40 ms a cada respuesta keep-alive
+    disable_nagle_algorithm = True
+
+    def _responder(self, estado, datos):
+        """Envia una respuesta JSON."""
+        contenido = json.dumps(datos, default=_a_json).encode("utf-8")
+        self.send_response(estado)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(contenido)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(contenido)
+
+    def _cuerpo(self):
+        """
+        Lee el cuerpo JSON de la peticion ({} si no hay). Si el cuerpo no se
+        puede leer completo la conexion se cierra tras responder, porque lo
+        que quede sin leer se tomaria como la siguiente peticion.
+        """
+        try:
+            largo = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            largo = -1
+        if largo < 0:
+            self.close_connection = True
+            raise ErrorAPI(400, "Content-Length invalido")
+        if largo > MAX_CUERPO:
+            self.close_connection = True
+            raise ErrorAPI(413, "Cuerpo demasiado grande")
+        if not largo:
+            return {}
+        try:
+            cuerpo = json.loads(self.rfile.read(largo))
+        except ValueError:
+            raise ErrorAPI(400, "El cuerpo no es JSON valido")
+        if not isinstance(cuerpo, dict):
+            raise ErrorAPI(400, "El cuerpo debe ser un objeto JSON")
+        return cuerpo
+
+    def _token(self):
+        """Token de la cabecera Authorization, o None."""
+        autorizacion = self.headers.get("Authorization", "")
+        if autorizacion.startswith("Bearer "):
+            return autorizacion[7:].strip()
+        return None
+
+    def _usuario(self, rol):
+        """Usuario de la sesion con al menos `rol`; ErrorAPI si no."""
+        usuario = self.server.sesiones.usuario(self._token() or "")
+        if usuario is None:
+            raise ErrorAPI(401, "Debe iniciar sesion")
+        if not usuario.tiene_permiso(rol):
+            raise ErrorAPI(403, "No tiene permisos para esta operacion")
+        return usuario
+
+    def _atender(self, metodo):
+        """Enruta la peticion y responde."""
+        partes = urlsplit(self.path)
+        try:
+            cuerpo = self._cuerpo()
+            clave = self.headers.get("Idempotency-Key")
+            if clave:
+                cuerpo.setdefault("clave_idempotencia", clave.strip())
+
+            if partes.path == "/api/sesiones":
+                if metodo == "POST":
+                    return self._responder(*self._iniciar_sesion(cuerpo))
+                if metodo == "DELETE":
+                    self.server.sesiones.cerrar(self._token() or "")
+                    return self._responder(200, {"sesion": "cerrada"})
+
+            metodos = []
+            for metodo_ruta, patron, operacion, rol in _RUTAS:
+                coincidencia = patron.match(partes.path)
+                if coincidencia is None:
+                    continue
+                if metodo_ruta != metodo:
+                    metodos.append(metodo_ruta)
+                    continue
+                usuario = self._usuario(rol) if rol else None
+                consulta = {clave: valores[-1] for clave, valores in
+                            parse_qs(partes.query).items()}
+                ids = [int(grupo) for grupo in coincidencia.groups()]
+                return self._responder(*operacion(
+                    self.server.db, usuario, consulta, cuerpo, *ids))
+
+            if metodos:
+                raise ErrorAPI(405, "Metodo no permitido")
+            raise ErrorAPI(404, "Ruta no encontrada")
+
+        except ErrorAPI as e:
+            self._responder(e.estado, {"error": e.mensaje})
+        except Exception as e:
+            print(f"Error al atender {metodo} {partes.path}: {e}", file=sys.stderr)
+            self._responder(500, {"error": "Error interno del servidor"})
+
+    def _iniciar_sesion(self, cuerpo):
+        """Autentica con usuario y contrasena y abre una sesion."""
+        usuario = Usuario(self.server.db,
+                          nombre_usuario=str(_requerido(cuerpo, "nombre_usuario")),
+                          password=str(_requerido(cuerpo, "password")))
+        if not usuario.autenticar():
+            raise ErrorAPI(401, "Usuario o contrasena incorrectos")
+        usuario.password = ""
+        return 201, {"token": self.server.sesiones.abrir(usuario),
+                     "nombre_usuario": usuario.nombre_usuario,
+                     "rol": usuario.rol, "id_cliente": usuario.id_cliente}
+
+    def do_GET(self):
+        """Atiende GET."""
+        self._atender("GET")
+
+    def do_POST(self):
+        """Atiende POST."""
+        self._atender("POST")
+
+    def do_PUT(self):
+        """Atiende PUT."""
+        self._atender("PUT")
+
+    def do_DELETE(self):
+        """Atiende DELETE."""
+        self._atender("DELETE")
+
+    def log_message(self, formato, *args):
+        """Registra la peticion solo si el servidor lo pide."""
+        if self.server.registrar_peticiones:
+            super().log_message(formato, *args)
+
+
+class ServidorAPI(ThreadingHTTPServer):
+    """Servidor HTTP con un hilo por conexion sobre una Database con pool."""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, db, direccion=("127.0.0.1", 8080), sesiones=None,
+                 registrar_peticiones=True):
+        """
+        Construye el servidor. `db` deberia usar pool (usar_pool=True) para
+        atender peticiones concurrentes con conexiones distintas.
+        """
+        self.db = db
+        self.sesiones = sesiones or Sesiones()
+        self.registrar_peticiones = registrar_peticiones
+        super().__init__(direccion, ManejadorAPI)
+
+    def iniciar(self):
+        """Atiende peticiones en un hilo de fondo y devuelve el hilo."""
+        hilo = threading.Thread(target=self.serve_forever,
+                                name="servidor-api", daemon=True)
+        hilo.start()
+        return hilo
+
+
+def main():
+    """Punto de entrada de la linea de comandos."""
+    parser = argparse.ArgumentParser(
+        description="Servicio HTTP/JSON de Viajes Aventura")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="Direccion en la que escuchar")
+    parser.add_argument("--puerto", type=int, default=8080)
+    parser.add_argument("--conexiones", type=int, default=16,
+                        help="Maximo de conexiones del pool de la base de datos")
+    parser.add_argument("--backend", choices=("mysql", "sqlite"), default="mysql")
+    parser.add_argument("--base-datos", default="viajes_aventura_db")
+    parser.add_argument("--silencioso", action="store_true",
+                        help="No mostrar las peticiones ni los mensajes de los modelos")
+    args = parser.parse_args()
+
+    db = Database(database=args.base_datos, backend=args.backend,
+                  usar_pool=True, pool_min=2, pool_max=args.conexiones)
+    db.conectar()
+    db.crear_tablas()
+
+    servidor = ServidorAPI(db, (args.host, args.puerto),
+                           registrar_peticiones=not args.silencioso)
+    print(f"Escuchando en http://{args.host}:{args.puerto}/api", file=sys.stderr)
+    # Con --silencioso los mensajes de los modelos van a /dev/null mientras
+    # el servidor atiende; la salida estandar se restaura al terminar
+    salida = (open(os.devnull, "w") if args.silencioso
+              else contextlib.nullcontext(sys.stdout))
+    with salida as destino, contextlib.redirect_stdout(destino):
+        try:
+            servidor.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            servidor.server_close()
+            db.desconectar()
+
+
+if __name__ == "__main__":
+    main()